@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-17 10:00:00 (ywatanabe)"
+# File: benchmarks/benchmark_batch_indexing.py
+
+"""
+Benchmark indexing documents one at a time against batched indexing.
+
+Indexes a synthetic Zipfian corpus with SearchEngine.add_document, then
+with SearchEngine.add_documents in this process and in worker processes,
+and reports the throughput of each.
+
+Usage:
+    python benchmarks/benchmark_batch_indexing.py [--docs N] [--processes N]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from scitex_scholar.search_engine import SearchEngine
+
+
+def generate_corpus(num_docs: int, vocab_size: int, doc_length: int, seed: int = 0):
+    """Generate (doc_id, content, metadata) documents with Zipf-distributed words."""
+    rng = random.Random(seed)
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    vocabulary = [''.join(rng.choices(letters, k=rng.randint(4, 10))) for _ in range(vocab_size)]
+    weights = [1.0 / (rank + 1) for rank in range(vocab_size)]
+    for i in range(num_docs):
+        words = rng.choices(vocabulary, weights=weights, k=doc_length)
+        metadata = {'title': ' '.join(words[:8]), 'year': 2000 + i % 25}
+        yield f"paper_{i:07d}", ' '.join(words), metadata
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--docs', type=int, default=2000)
+    parser.add_argument('--terms', type=int, default=20000)
+    parser.add_argument('--doc-length', type=int, default=500)
+    parser.add_argument('--processes', type=int, default=4)
+    args = parser.parse_args()
+
+    corpus = list(generate_corpus(args.docs, args.terms, args.doc_length))
+
+    def one_at_a_time(engine):
+        for document in corpus:
+            engine.add_document(*document)
+
+    runs = [
+        ('add_document per document', one_at_a_time),
+        ('add_documents', lambda engine: engine.add_documents(corpus)),
+        (f'add_documents, {args.processes} processes',
+         lambda engine: engine.add_documents(corpus, processes=args.processes)),
+    ]
+
+    print(f"documents: {args.docs:,}  words per document: {args.doc_length:,}")
+    print(f"{'method':<36}{'seconds':>10}{'docs/s':>10}")
+    for name, run in runs:
+        engine = SearchEngine()
+        start = time.perf_counter()
+        run(engine)
+        elapsed = time.perf_counter() - start
+        print(f"{name:<36}{elapsed:>10.2f}{args.docs / elapsed:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
+
+# EOF
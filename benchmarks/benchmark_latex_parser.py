@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-17 10:00:00 (ywatanabe)"
+# File: benchmarks/benchmark_latex_parser.py
+
+"""
+Benchmark LaTeX parsing on growing LaTeX documents.
+
+Generates documents of sections with inline and display math, citations,
+figures and nested itemize environments, doubling the number of sections,
+and reports the time of LaTeXParser.parse_document and of
+TextProcessor.process_latex_document, which also cleans and tokenizes the
+text. A linear parser keeps throughput constant as documents grow. With
+--unclosed the figure environments are left open, as in section files cut
+from a larger manuscript.
+
+Usage:
+    python benchmarks/benchmark_latex_parser.py [--sections N] [--steps N] [--unclosed]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from scitex_scholar.latex_parser import LaTeXParser
+from scitex_scholar.text_processor import TextProcessor
+
+WORDS = ('neural oscillations phase amplitude coupling cortex hippocampus spike '
+         'decoding seizure detection spectral analysis model results methods').split()
+
+
+def generate_document(num_sections: int, unclosed: bool = False, seed: int = 0) -> str:
+    """Generate a LaTeX document with the given number of sections."""
+    figure_end = '' if unclosed else '\\end{figure}'
+    rng = random.Random(seed)
+    body = []
+    for n in range(num_sections):
+        text = ' '.join(rng.choices(WORDS, k=80))
+        body.append(
+            f"\\section{{Part {n}}}\\label{{sec:{n}}}\n{text} $x_{n} = \\frac{{a}}{{b}}$ "
+            f"\\cite{{ref{n},ref{n + 1}}}.\n"
+            f"\\begin{{itemize}}\\item \\textbf{{{rng.choice(WORDS)}}}"
+            f"\\begin{{itemize}}\\item {rng.choice(WORDS)}\\end{{itemize}}\\end{{itemize}}\n"
+            f"\\begin{{equation}}\\int_0^{n} f(t)\\,dt\\end{{equation}}\n"
+            f"\\begin{{figure}}\\centering\\caption{{{text[:40]}}}{figure_end}\n"
+        )
+    return ('\\documentclass{article}\n\\title{Benchmark}\n\\begin{document}\n'
+            '\\begin{abstract}A generated document.\\end{abstract}\n'
+            + ''.join(body) + '\\end{document}\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--sections', type=int, default=100)
+    parser.add_argument('--steps', type=int, default=6)
+    parser.add_argument('--unclosed', action='store_true', help='Leave figure environments open')
+    args = parser.parse_args()
+
+    print(f"{'sections':>10}{'KB':>10}{'parse s':>10}{'MB/s':>8}{'process s':>12}{'MB/s':>8}")
+    for step in range(args.steps):
+        num_sections = args.sections * 2 ** step
+        document = generate_document(num_sections, args.unclosed)
+        megabytes = len(document) / 2 ** 20
+
+        start = time.perf_counter()
+        LaTeXParser().parse_document(document)
+        parse_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        TextProcessor().process_latex_document(document)
+        process_time = time.perf_counter() - start
+
+        print(f"{num_sections:>10,}{len(document) / 1024:>10,.0f}{parse_time:>10.3f}{megabytes / parse_time:>8.2f}"
+              f"{process_time:>12.3f}{megabytes / process_time:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
+
+# EOF
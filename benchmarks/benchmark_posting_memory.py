@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-17 10:00:00 (ywatanabe)"
+# File: benchmarks/benchmark_posting_memory.py
+
+"""
+Benchmark memory per posting of the search index.
+
+Compares the former representation (dict of sets of absolute path strings)
+with the array-backed posting lists and their delta/varint persisted form,
+on a synthetic Zipfian corpus.
+
+Usage:
+    python benchmarks/benchmark_posting_memory.py [--docs N] [--terms N]
+"""
+
+import argparse
+import random
+import sys
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from scitex_scholar.postings import DocIdTable, PostingList
+
+
+def generate_corpus(num_docs: int, vocab_size: int, doc_length: int, seed: int = 0):
+    """Generate (path, term frequencies) pairs with Zipf-distributed terms."""
+    rng = random.Random(seed)
+    vocabulary = [f"term{i}" for i in range(vocab_size)]
+    weights = [1.0 / (rank + 1) for rank in range(vocab_size)]
+    for i in range(num_docs):
+        path = f"/home/user/Documents/library/papers/{i // 1000:04d}/paper_{i:07d}.pdf"
+        freqs = {}
+        for term in rng.choices(vocabulary, weights=weights, k=doc_length):
+            freqs[term] = freqs.get(term, 0) + 1
+        yield path, freqs
+
+
+def measure(build):
+    """Return (object, bytes allocated while building it)."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    obj = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return obj, after - before
+
+
+def build_set_index(corpus):
+    index = {}
+    for path, freqs in corpus:
+        for term in freqs:
+            index.setdefault(term, set()).add(path)
+    return index
+
+
+def build_array_index(corpus):
+    table = DocIdTable()
+    index = {}
+    for path, freqs in corpus:
+        docno = table.add(path)
+        for term, tf in freqs.items():
+            postings = index.get(term)
+            if postings is None:
+                postings = index[term] = PostingList()
+            postings.append(docno, tf)
+    return table, index
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--docs', type=int, default=20000)
+    parser.add_argument('--terms', type=int, default=50000)
+    parser.add_argument('--doc-length', type=int, default=300)
+    args = parser.parse_args()
+
+    corpus = list(generate_corpus(args.docs, args.terms, args.doc_length))
+    # Paths are shared by both layouts and excluded from the measurement,
+    # except that the set index stores a reference per posting.
+    num_postings = sum(len(freqs) for _, freqs in corpus)
+
+    set_index, set_bytes = measure(lambda: build_set_index(corpus))
+    del set_index
+    (table, array_index), array_bytes = measure(lambda: build_array_index(corpus))
+    encoded_bytes = sum(len(postings.encode()) for postings in array_index.values())
+
+    print(f"documents: {args.docs:,}  postings: {num_postings:,}  terms: {len(array_index):,}")
+    print(f"{'representation':<40}{'total MB':>10}{'bytes/posting':>16}")
+    for name, size in [
+        ('dict of sets of paths', set_bytes),
+        ('array-backed postings (+ docid table)', array_bytes),
+        ('delta/varint persisted postings', encoded_bytes),
+    ]:
+        print(f"{name:<40}{size / 1e6:>10.1f}{size / num_postings:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
+
+# EOF
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-17 10:00:00 (ywatanabe)"
+# File: benchmarks/benchmark_process_many.py
+
+"""
+Benchmark TextProcessor.process_many with increasing worker counts.
+
+Processes a synthetic corpus of LaTeX and plain text documents with 1, 2,
+4, ... worker processes up to the number of CPUs and reports throughput
+and speedup over a single process.
+
+Usage:
+    python benchmarks/benchmark_process_many.py [--docs N] [--chunksize N]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from scitex_scholar.text_processor import TextProcessor
+
+WORDS = ('neural oscillations phase amplitude coupling cortex hippocampus spike '
+         'decoding seizure detection spectral analysis electroencephalography '
+         'model results methods significant network synchronization').split()
+
+
+def generate_corpus(num_docs: int, paragraphs: int, seed: int = 0):
+    """Generate alternating LaTeX and plain text documents."""
+    rng = random.Random(seed)
+    documents = []
+    for i in range(num_docs):
+        body = [' '.join(rng.choices(WORDS, k=120)) for _ in range(paragraphs)]
+        if i % 2:
+            documents.append('\n\n'.join(['Abstract', *body]))
+        else:
+            sections = [f"\\section{{Part {n}}}\n{text} $x_{n} = \\frac{{a}}{{b}}$ \\cite{{ref{n}}}"
+                        for n, text in enumerate(body)]
+            documents.append('\\documentclass{article}\n\\begin{document}\n'
+                             + '\n'.join(sections) + '\n\\end{document}')
+    return documents
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--docs', type=int, default=2000)
+    parser.add_argument('--paragraphs', type=int, default=8)
+    parser.add_argument('--chunksize', type=int, default=16)
+    args = parser.parse_args()
+
+    documents = generate_corpus(args.docs, args.paragraphs)
+    processor = TextProcessor()
+    worker_counts = [1]
+    while worker_counts[-1] * 2 <= (os.cpu_count() or 1):
+        worker_counts.append(worker_counts[-1] * 2)
+
+    print(f"documents: {args.docs:,}  CPUs: {os.cpu_count()}")
+    print(f"{'workers':>8}{'seconds':>10}{'docs/s':>10}{'speedup':>10}")
+    baseline = None
+    for workers in worker_counts:
+        start = time.perf_counter()
+        for _ in processor.process_many(documents, workers=workers, chunksize=args.chunksize):
+            pass
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f"{workers:>8}{elapsed:>10.2f}{args.docs / elapsed:>10.0f}{baseline / elapsed:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
+
+# EOF
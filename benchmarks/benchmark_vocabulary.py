@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-17 10:00:00 (ywatanabe)"
+# File: benchmarks/benchmark_vocabulary.py
+
+"""
+Benchmark vocabulary size and tokenizing time with token normalization.
+
+Tokenizes a corpus of text files without normalization, with the Porter
+stemmer and with the stemmer plus the scientific lemma list, and reports
+the number of distinct index terms, the tokenizing time and the hit rate
+of the normalizer's memo cache.
+
+Usage:
+    python benchmarks/benchmark_vocabulary.py [PATH ...]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'src'))
+
+from scitex_scholar.normalizer import SCIENTIFIC_LEMMAS, Normalizer
+from scitex_scholar.text_processor import TextProcessor
+
+
+def read_corpus(paths):
+    """Read the .md, .txt and .tex files under the given paths."""
+    texts = []
+    for path in paths:
+        files = [path] if path.is_file() else sorted(
+            file for pattern in ('*.md', '*.txt', '*.tex') for file in path.rglob(pattern)
+        )
+        for file in files:
+            texts.append(file.read_text(encoding='utf-8', errors='ignore'))
+    return texts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('paths', nargs='*', type=Path, default=[ROOT / 'docs'],
+                        help='Files or directories of the corpus (default: docs/)')
+    args = parser.parse_args()
+
+    texts = read_corpus(args.paths)
+    configurations = [
+        ('no normalization', None),
+        ('Porter stemmer', Normalizer()),
+        ('Porter stemmer + lemmas', Normalizer(lemmas=SCIENTIFIC_LEMMAS)),
+    ]
+
+    print(f"documents: {len(texts):,}")
+    print(f"{'normalizer':<28}{'tokens':>10}{'terms':>10}{'seconds':>10}{'cache hits':>12}")
+    for name, normalizer in configurations:
+        processor = TextProcessor(normalizer=normalizer)
+        vocabulary = set()
+        num_tokens = 0
+        start = time.perf_counter()
+        for text in texts:
+            frequencies = processor.tokenize(text).frequencies
+            vocabulary.update(frequencies)
+            num_tokens += sum(frequencies.values())
+        elapsed = time.perf_counter() - start
+
+        hits = '-'
+        if normalizer is not None:
+            info = normalizer.cache_info()
+            hits = f"{info.hits / max(1, info.hits + info.misses):.1%}"
+        print(f"{name:<28}{num_tokens:>10,}{len(vocabulary):>10,}{elapsed:>10.3f}{hits:>12}")
+
+
+if __name__ == "__main__":
+    main()
+
+# EOF
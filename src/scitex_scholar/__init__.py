@@ -27,7 +27,11 @@ __email__ = "ywatanabe@alumni.u-tokyo.ac.jp"
 from .text_processor import TextProcessor
 from .search_engine import SearchEngine
 from .latex_parser import LaTeXParser
+from .latex_project import LaTeXProject
+from .sqlite_search_engine import SQLiteSearchEngine
+from .sharded_search_engine import ShardedSearchEngine
 
-__all__ = ['TextProcessor', 'SearchEngine', 'LaTeXParser']
+__all__ = ['TextProcessor', 'SearchEngine', 'LaTeXParser', 'LaTeXProject', 'SQLiteSearchEngine',
+           'ShardedSearchEngine']
 
 # EOF
\ No newline at end of file
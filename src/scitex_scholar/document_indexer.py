@@ -12,21 +12,30 @@ scientific documents from local directories.
 
 import asyncio
 import json
-import sqlite3
 from pathlib import Path
-from typing import Dict, List, Any, Optional, Set
+from typing import Dict, List, Any, Optional, Set, Tuple
 import logging
 from datetime import datetime
 import hashlib
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import pickle
 
 from .scientific_pdf_parser import ScientificPDFParser, ScientificPaper
 from .search_engine import SearchEngine
+from .segment_store import SegmentStore
+from .sharded_search_engine import ShardedSearchEngine
+from .sqlite_search_engine import SQLiteSearchEngine
+from .stored_fields import StoredDocument
 from .text_processor import TextProcessor
 
 logger = logging.getLogger(__name__)
 
+# Text files larger than this many bytes are indexed in blocks of
+# STREAM_BLOCK_SIZE characters (see SearchEngine.add_document_stream)
+STREAM_THRESHOLD = 16 * 1024 * 1024
+STREAM_BLOCK_SIZE = 1024 * 1024
+
 
 class DocumentIndexer:
     """Indexes scientific documents for search."""
@@ -42,24 +51,31 @@ class DocumentIndexer:
         self.pdf_parser = ScientificPDFParser()
         self.text_processor = TextProcessor()
         self.indexed_files: Set[str] = set()
+        self._state_lock = threading.Lock()  # Guards indexed_files across worker threads
         self.index_stats = {
             'total_files': 0,
             'successful': 0,
             'failed': 0,
             'skipped': 0
         }
+        self.segment_store: Optional[SegmentStore] = None
         
     async def index_documents(self, 
                             paths: List[Path], 
                             patterns: Optional[List[str]] = None,
-                            force_reindex: bool = False) -> Dict[str, Any]:
+                            force_reindex: bool = False,
+                            batch_size: int = 64) -> Dict[str, Any]:
         """
         Index documents from specified paths.
         
+        Files are parsed in worker threads and their documents are added to
+        the search engine in batches, which publishes each batch at once.
+        
         Args:
             paths: List of directories to scan
             patterns: File patterns to match (e.g., ['*.pdf'])
             force_reindex: Whether to reindex already indexed files
+            batch_size: Number of parsed documents added to the search engine at once
             
         Returns:
             Indexing statistics
@@ -77,44 +93,86 @@ class DocumentIndexer:
         logger.info(f"Found {len(all_files)} files to process")
         self.index_stats['total_files'] = len(all_files)
         
-        # Process files in parallel
+        # Process files in parallel without blocking the event loop, so
+        # searches are served while documents are being indexed
+        loop = asyncio.get_running_loop()
+        batch: List[Tuple[str, str, Dict]] = []  # Parsed documents waiting to be added
+        
+        async def add_batch(executor: ThreadPoolExecutor) -> None:
+            documents = batch[:]
+            del batch[:]
+            try:
+                results = await loop.run_in_executor(executor, self._add_documents, documents)
+            except Exception as e:
+                logger.error(f"Error adding {len(documents)} documents: {str(e)}")
+                results = [False] * len(documents)
+            self.index_stats['successful'] += sum(results)
+            self.index_stats['failed'] += len(results) - sum(results)
+        
+        async def process(executor: ThreadPoolExecutor, file_path: Path) -> None:
+            # Statistics and the batch are only updated on the event loop thread
+            pending = []
+            try:
+                success = await loop.run_in_executor(executor, self._process_file, file_path, pending)
+            except Exception as e:
+                logger.error(f"Error processing {file_path}: {str(e)}")
+                success = False
+            if not success:
+                self.index_stats['failed'] += 1
+            elif pending:
+                batch.extend(pending)
+                if len(batch) >= batch_size:
+                    await add_batch(executor)
+            else:
+                self.index_stats['successful'] += 1
+        
         with ThreadPoolExecutor(max_workers=4) as executor:
-            # Submit all parsing tasks
-            future_to_file = {}
-            
+            tasks = []
             for file_path in all_files:
                 # Skip if already indexed and not forcing reindex
                 file_id = self._get_file_id(file_path)
                 if file_id in self.indexed_files and not force_reindex:
                     self.index_stats['skipped'] += 1
                     continue
-                
-                # Submit parsing task
-                future = executor.submit(self._process_file, file_path)
-                future_to_file[future] = file_path
+                tasks.append(process(executor, file_path))
             
-            # Process completed tasks
-            for future in as_completed(future_to_file):
-                file_path = future_to_file[future]
-                try:
-                    success = future.result()
-                    if success:
-                        self.index_stats['successful'] += 1
-                    else:
-                        self.index_stats['failed'] += 1
-                except Exception as e:
-                    logger.error(f"Error processing {file_path}: {str(e)}")
-                    self.index_stats['failed'] += 1
+            await asyncio.gather(*tasks)
+            if batch:
+                await add_batch(executor)
         
         logger.info(f"Indexing complete: {self.index_stats}")
         return self.index_stats
     
-    def _process_file(self, file_path: Path) -> bool:
+    def _add_documents(self, documents: List[Tuple[str, str, Dict]]) -> List[bool]:
+        """
+        Add parsed documents to the search engine and record the indexed files.
+        
+        Args:
+            documents: (doc_id, content, metadata) tuples
+            
+        Returns:
+            For each document, True if it was added successfully
+        """
+        if hasattr(self.search_engine, 'add_documents'):
+            results = self.search_engine.add_documents(documents)
+        else:
+            results = [self.search_engine.add_document(*document) for document in documents]
+        
+        with self._state_lock:
+            for (doc_id, _, _), added in zip(documents, results):
+                if added:
+                    self.indexed_files.add(doc_id)
+        return results
+    
+    def _process_file(self, file_path: Path, pending: Optional[List[Tuple[str, str, Dict]]] = None) -> bool:
         """
         Process a single file.
         
         Args:
             file_path: Path to file
+            pending: If given, the parsed document is appended to this list
+                as a (doc_id, content, metadata) tuple instead of being added
+                to the search engine
             
         Returns:
             True if successful
@@ -124,9 +182,9 @@ class DocumentIndexer:
             
             # Determine file type and parse accordingly
             if file_path.suffix.lower() == '.pdf':
-                return self._process_pdf(file_path)
+                return self._process_pdf(file_path, pending)
             elif file_path.suffix.lower() in ['.txt', '.md']:
-                return self._process_text_file(file_path)
+                return self._process_text_file(file_path, pending)
             else:
                 logger.warning(f"Unsupported file type: {file_path}")
                 return False
@@ -135,8 +193,8 @@ class DocumentIndexer:
             logger.error(f"Failed to process {file_path}: {str(e)}")
             return False
     
-    def _process_pdf(self, pdf_path: Path) -> bool:
-        """Process a PDF file."""
+    def _process_pdf(self, pdf_path: Path, pending: Optional[List[Tuple[str, str, Dict]]] = None) -> bool:
+        """Process a PDF file, or queue its document in pending (see _process_file)."""
         try:
             # Parse PDF
             paper = self.pdf_parser.parse_pdf(pdf_path)
@@ -146,6 +204,9 @@ class DocumentIndexer:
             
             # Add to search engine
             doc_id = self._get_file_id(pdf_path)
+            if pending is not None:
+                pending.append((doc_id, doc_data['content'], doc_data['metadata']))
+                return True
             success = self.search_engine.add_document(
                 doc_id=doc_id,
                 content=doc_data['content'],
@@ -153,7 +214,8 @@ class DocumentIndexer:
             )
             
             if success:
-                self.indexed_files.add(doc_id)
+                with self._state_lock:
+                    self.indexed_files.add(doc_id)
                 logger.info(f"Successfully indexed: {paper.title}")
             
             return success
@@ -162,22 +224,39 @@ class DocumentIndexer:
             logger.error(f"Error parsing PDF {pdf_path}: {str(e)}")
             return False
     
-    def _process_text_file(self, file_path: Path) -> bool:
-        """Process a text file."""
+    def _process_text_file(self, file_path: Path,
+                           pending: Optional[List[Tuple[str, str, Dict]]] = None) -> bool:
+        """Process a text file, or queue its document in pending (see _process_file)."""
         try:
-            content = file_path.read_text(encoding='utf-8')
+            stat = file_path.stat()
             
             # Extract metadata
             metadata = {
                 'file_path': str(file_path),
                 'file_name': file_path.name,
                 'file_type': file_path.suffix[1:],  # Remove dot
-                'modified': datetime.fromtimestamp(file_path.stat().st_mtime).isoformat(),
-                'size': file_path.stat().st_size
+                'modified': datetime.fromtimestamp(stat.st_mtime).isoformat(),
+                'size': stat.st_size
             }
             
+            if stat.st_size > STREAM_THRESHOLD and hasattr(self.search_engine, 'add_document_stream'):
+                # Index large files block by block instead of reading them whole
+                doc_id = self._get_file_id(file_path)
+                with open(file_path, encoding='utf-8') as f:
+                    blocks = iter(lambda: f.read(STREAM_BLOCK_SIZE), '')
+                    success = self.search_engine.add_document_stream(doc_id, blocks, metadata)
+                if success:
+                    with self._state_lock:
+                        self.indexed_files.add(doc_id)
+                return success
+            
+            content = file_path.read_text(encoding='utf-8')
+            
             # Add to search engine
             doc_id = self._get_file_id(file_path)
+            if pending is not None:
+                pending.append((doc_id, content, metadata))
+                return True
             success = self.search_engine.add_document(
                 doc_id=doc_id,
                 content=content,
@@ -185,7 +264,8 @@ class DocumentIndexer:
             )
             
             if success:
-                self.indexed_files.add(doc_id)
+                with self._state_lock:
+                    self.indexed_files.add(doc_id)
             
             return success
             
@@ -222,45 +302,125 @@ class DocumentIndexer:
             return content, metadata
     
     async def save_index(self, cache_path: Path):
-        """Save index to disk."""
-        cache_data = {
-            'documents': self.search_engine.documents,
-            'index': {k: list(v) for k, v in self.search_engine.index.items()},
-            'indexed_files': list(self.indexed_files),
-            'stats': self.index_stats,
-            'timestamp': datetime.now().isoformat()
-        }
+        """
+        Save index to disk as log-structured, memory-mapped segments.
         
-        # Create cache directory if needed
-        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        The cache is a directory of immutable segments and a manifest
+        naming them (see SegmentStore). Only documents indexed since the
+        last save are written, as a new segment, and replaced documents are
+        recorded in delete bitmaps. Segments selected by the merge policy
+        are then merged in a worker thread, so searches continue meanwhile.
         
-        # Save as JSON for portability
-        with open(cache_path, 'w', encoding='utf-8') as f:
-            json.dump(cache_data, f, indent=2)
+        An SQLiteSearchEngine commits every document as it is added, so
+        only the indexer state is written to its database. A
+        ShardedSearchEngine saves each shard to its own segment store in
+        the shard's worker process.
         
-        logger.info(f"Saved index to {cache_path}")
+        Args:
+            cache_path: Index cache directory
+        """
+        state = self._indexer_state()
+        if isinstance(self.search_engine, SQLiteSearchEngine):
+            self.search_engine.set_setting('indexer', state)
+            logger.info(f"Saved index to {self.search_engine.db_path}")
+            return
+        
+        if cache_path.is_file():
+            # Replace a JSON cache written by earlier versions
+            cache_path.unlink()
+        
+        loop = asyncio.get_running_loop()
+        if isinstance(self.search_engine, ShardedSearchEngine):
+            await loop.run_in_executor(None, self.search_engine.save, cache_path, state)
+            logger.info(f"Saved index to {cache_path} ({self.search_engine.num_shards} shards)")
+            return
+        
+        store = self._get_segment_store(cache_path)
+        await loop.run_in_executor(None, store.commit, self.search_engine, state)
+        
+        while True:
+            selected = store.find_merge()
+            if selected is None:
+                break
+            merged = await loop.run_in_executor(None, store.merge, *selected)
+            if not store.apply_merge(self.search_engine, *selected, merged):
+                break
+            logger.info(f"Merged {selected[1] - selected[0]} segments into {merged['name']}")
+        
+        logger.info(f"Saved index to {cache_path} ({len(store.segments)} segments)")
+    
+    def _indexer_state(self) -> Dict[str, Any]:
+        """Return the indexer state saved with the index."""
+        with self._state_lock:
+            indexed_files = list(self.indexed_files)
+        return {
+            'indexed_files': indexed_files,
+            'stats': dict(self.index_stats),
+            'timestamp': datetime.now().isoformat()
+        }
+    
+    def _get_segment_store(self, cache_path: Path) -> SegmentStore:
+        """Return the segment store for a cache directory."""
+        if self.segment_store is None or self.segment_store.directory != cache_path:
+            self.segment_store = SegmentStore(cache_path)
+        return self.segment_store
     
     async def load_index(self, cache_path: Path):
-        """Load index from disk."""
+        """
+        Load index from disk.
+        
+        Segment caches are memory-mapped, so loading does not read the
+        postings or stored documents. JSON caches from earlier versions are
+        still read in full.
+        
+        Args:
+            cache_path: Index cache directory (or legacy JSON file)
+        """
         if not cache_path.exists():
             logger.warning(f"Cache file not found: {cache_path}")
             return
         
         try:
-            with open(cache_path, 'r', encoding='utf-8') as f:
-                cache_data = json.load(f)
-            
-            # Restore search engine state
-            self.search_engine.documents = cache_data['documents']
-            self.search_engine.index = {k: set(v) for k, v in cache_data['index'].items()}
-            self.indexed_files = set(cache_data['indexed_files'])
-            self.index_stats = cache_data['stats']
+            if isinstance(self.search_engine, SQLiteSearchEngine):
+                # Documents are read from the database on demand
+                state = self.search_engine.get_setting('indexer', {})
+                self.indexed_files = set(state.get('indexed_files', []))
+                self.index_stats = state.get('stats', self.index_stats)
+            elif isinstance(self.search_engine, ShardedSearchEngine):
+                loop = asyncio.get_running_loop()
+                state = await loop.run_in_executor(None, self.search_engine.load, cache_path)
+                self.indexed_files = set(state.get('indexed_files', []))
+                self.index_stats = state.get('stats', self.index_stats)
+            elif cache_path.is_dir():
+                store = self._get_segment_store(cache_path)
+                store.open(self.search_engine)
+                self.indexed_files = set(store.user_data.get('indexed_files', []))
+                self.index_stats = store.user_data.get('stats', self.index_stats)
+            else:
+                self._load_json_index(cache_path)
             
             logger.info(f"Loaded index from {cache_path}")
             logger.info(f"Restored {len(self.search_engine.documents)} documents")
             
         except Exception as e:
             logger.error(f"Error loading index: {str(e)}")
-
+    
+    def _load_json_index(self, cache_path: Path):
+        """
+        Load a legacy JSON index cache written by earlier versions.
+        
+        These caches hold documents but no postings, so the index is
+        rebuilt from the documents.
+        """
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cache_data = json.load(f)
+        
+        # Restore search engine state
+        self.search_engine.documents = {
+            doc_id: StoredDocument.from_dict(doc) for doc_id, doc in cache_data['documents'].items()
+        }
+        self.search_engine.rebuild_index()
+        self.indexed_files = set(cache_data['indexed_files'])
+        self.index_stats = cache_data['stats']
 
 # EOF
\ No newline at end of file
@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-17 10:00:00 (ywatanabe)"
+# File: src/scitex_scholar/filter_index.py
+
+"""
+Secondary indexes on document metadata for filtered search.
+
+Filters map metadata keys to conditions. A plain value matches documents
+whose value equals it or, for list values such as ``authors``, contains
+it. A dictionary of operators expresses other conditions:
+
+- ``$eq``, ``$in``: equality with one or any of several values
+- ``$gt``, ``$gte``, ``$lt``, ``$lte``: ranges (e.g. ``year``)
+- ``$prefix``: string prefix (e.g. ``file_path``)
+- ``$contains``: list element or substring
+- ``$icontains``: case-insensitive list element or substring
+
+For indexed fields the matching documents are found from the index as an
+integer bitmap (bit ``n`` set for document number ``n``), so filters are
+intersected before any document is scored; other fields are checked on
+document metadata with the same semantics.
+"""
+
+import base64
+from array import array
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Metadata fields indexed by default
+DEFAULT_FILTER_FIELDS = ('file_type', 'year', 'authors', 'methods', 'datasets', 'file_path', 'path')
+
+_KEY_TYPES = (str, int, float, bool)
+_RANGE_OPERATORS = ('$gt', '$gte', '$lt', '$lte')
+
+
+def _elements(value: Any) -> List[Any]:
+    """Return the elements of a list value, or the value itself."""
+    if isinstance(value, (list, tuple, set)):
+        return list(value)
+    return [value]
+
+
+def _as_number(value: Any) -> Optional[float]:
+    """Convert a number or numeric string to a float, or return None."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return None
+
+
+def _key_matches(key: Any, op: str, operand: Any) -> bool:
+    """Check one metadata element against one operator."""
+    if op == '$eq':
+        return key == operand
+    if op == '$in':
+        return any(key == candidate for candidate in operand)
+    if op == '$prefix':
+        return isinstance(key, str) and key.startswith(operand)
+    if op == '$contains':
+        return key == operand or (isinstance(key, str) and isinstance(operand, str) and operand in key)
+    if op == '$icontains':
+        return isinstance(key, str) and isinstance(operand, str) and operand.lower() in key.lower()
+    if op in _RANGE_OPERATORS:
+        if isinstance(operand, (int, float)) and not isinstance(operand, bool):
+            key = _as_number(key)
+            if key is None:
+                return False
+        elif type(key) is not type(operand):
+            return False
+        if op == '$gt':
+            return key > operand
+        if op == '$gte':
+            return key >= operand
+        if op == '$lt':
+            return key < operand
+        return key <= operand
+    raise ValueError(f"Unsupported filter operator: {op}")
+
+
+def match_filter(value: Any, condition: Any) -> bool:
+    """
+    Check a metadata value against a filter condition.
+
+    Args:
+        value: Metadata value
+        condition: Plain value or dictionary of operators
+
+    Returns:
+        True if the value satisfies the condition
+    """
+    if isinstance(condition, dict):
+        elements = _elements(value)
+        return all(
+            any(_key_matches(element, op, operand) for element in elements)
+            for op, operand in condition.items()
+        )
+    if value == condition:
+        return True
+    return isinstance(value, (list, tuple, set)) and isinstance(condition, _KEY_TYPES) and condition in value
+
+
+def match_filters(metadata: Dict, filters: Dict) -> bool:
+    """
+    Check document metadata against all filters.
+
+    Args:
+        metadata: Document metadata
+        filters: Mapping of metadata keys to conditions
+
+    Returns:
+        True if every filtered key is present and matches
+    """
+    for key, condition in filters.items():
+        if key not in metadata or not match_filter(metadata[key], condition):
+            return False
+    return True
+
+
+def bitmap_to_bytes(bitmap: int, doc_count: int) -> bytes:
+    """Convert an integer bitmap to little-endian bytes for constant-time bit tests."""
+    return bitmap.to_bytes((doc_count + 7) // 8, 'little')
+
+
+def bitmap_docnos(bitmap: int) -> array:
+    """Return the sorted document numbers set in an integer bitmap."""
+    docnos = array('I')
+    data = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, 'little')
+    for i, byte in enumerate(data):
+        while byte:
+            low = byte & -byte
+            docnos.append((i << 3) | (low.bit_length() - 1))
+            byte ^= low
+    return docnos
+
+
+def _union_bitmap(arrays: Iterable[array], doc_count: int) -> int:
+    """Build the bitmap of the document numbers in any of several arrays."""
+    bits = bytearray((doc_count + 7) // 8)
+    for docnos in arrays:
+        for docno in docnos:
+            if docno < doc_count:
+                bits[docno >> 3] |= 1 << (docno & 7)
+    return int.from_bytes(bits, 'little')
+
+
+class FilterIndex:
+    """
+    Inverted index from metadata values to document numbers.
+
+    Each indexed value holds a sorted ``array('I')`` of document numbers
+    (list values index each element). Queries turn the arrays of the
+    matching values into an integer bitmap. String values are also kept in
+    sorted order so prefix queries are answered by binary search.
+    """
+
+    def __init__(self, fields: Optional[Iterable[str]] = DEFAULT_FILTER_FIELDS):
+        """
+        Initialize an empty index.
+
+        Args:
+            fields: Metadata fields to index, or None to index every field
+                of the added metadata
+        """
+        self.index_all = fields is None
+        self.fields = () if fields is None else tuple(fields)
+        self._postings: Dict[str, Dict[Any, array]] = {field: {} for field in self.fields}
+        self._sorted_keys: Dict[str, List[str]] = {}  # Per field, cleared when keys are added
+
+    def add(self, docno: int, metadata: Dict) -> None:
+        """
+        Index the metadata of a document newer than all indexed documents.
+
+        Args:
+            docno: Document number
+            metadata: Document metadata
+        """
+        for field in (metadata if self.index_all else self.fields):
+            if field not in metadata:
+                continue
+            postings = self._postings.get(field)
+            if postings is None:
+                postings = self._postings[field] = {}
+                self.fields += (field,)
+            for key in _elements(metadata[field]):
+                if not isinstance(key, _KEY_TYPES):
+                    continue
+                docnos = postings.get(key)
+                if docnos is None:
+                    docnos = postings[key] = array('I')
+                    self._sorted_keys.pop(field, None)
+                if not docnos or docnos[-1] != docno:
+                    docnos.append(docno)
+
+    def extend(self, other: 'FilterIndex', base: int) -> None:
+        """
+        Append the entries of another index with shifted document numbers.
+
+        Args:
+            other: Index whose document numbers all follow the indexed ones
+            base: Offset added to the document numbers of other
+        """
+        for field, other_postings in other._postings.items():
+            postings = self._postings.setdefault(field, {})
+            if field not in self.fields:
+                self.fields += (field,)
+            for key, docnos in other_postings.items():
+                target = postings.get(key)
+                if target is None:
+                    target = postings[key] = array('I')
+                    self._sorted_keys.pop(field, None)
+                target.extend(docno + base for docno in docnos)
+
+    def remap(self, remap: Dict[int, int]) -> 'FilterIndex':
+        """
+        Return a copy keeping and renumbering the documents in remap.
+
+        Args:
+            remap: Old to new document numbers, preserving order
+
+        Returns:
+            Renumbered index
+        """
+        result = FilterIndex(self.fields)
+        result.index_all = self.index_all
+        for field, postings in self._postings.items():
+            for key, docnos in postings.items():
+                kept = array('I', (remap[docno] for docno in docnos if docno in remap))
+                if kept:
+                    result._postings[field][key] = kept
+        return result
+
+    def to_dict(self, remap: Dict[int, int], start: int = 0) -> Dict[str, List[List[Any]]]:
+        """
+        Export the entries of the documents in remap in a JSON-serializable form.
+
+        Args:
+            remap: Old to new document numbers, preserving order
+            start: Smallest document number present in remap
+
+        Returns:
+            Mapping of fields to [value, base64 document numbers] pairs
+        """
+        data = {}
+        for field, postings in self._postings.items():
+            entries = []
+            for key, docnos in postings.items():
+                kept = array('I', (
+                    remap[docnos[i]] for i in range(bisect_left(docnos, start), len(docnos))
+                    if docnos[i] in remap
+                ))
+                if kept:
+                    entries.append([key, base64.b64encode(kept.tobytes()).decode('ascii')])
+            data[field] = entries
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, List[List[Any]]]) -> 'FilterIndex':
+        """Rebuild an index from the output of to_dict."""
+        index = cls(data.keys())
+        for field, entries in data.items():
+            for key, encoded in entries:
+                docnos = array('I')
+                docnos.frombytes(base64.b64decode(encoded))
+                index._postings[field][key] = docnos
+        return index
+
+    def select(self, filters: Dict, doc_count: int) -> Tuple[Optional[int], Dict]:
+        """
+        Resolve the filters on indexed fields to a bitmap.
+
+        Args:
+            filters: Mapping of metadata keys to conditions
+            doc_count: Number of document numbers in use
+
+        Returns:
+            Tuple of (bitmap of matching documents, or None if no filter
+            could use the index; filters left to check on metadata)
+        """
+        bitmap = None
+        residual = {}
+        for field, condition in filters.items():
+            field_bitmap = self._select_field(field, condition, doc_count)
+            if field_bitmap is None:
+                residual[field] = condition
+                continue
+            bitmap = field_bitmap if bitmap is None else bitmap & field_bitmap
+        return bitmap, residual
+
+    def _select_field(self, field: str, condition: Any, doc_count: int) -> Optional[int]:
+        """Return the bitmap of documents matching one condition, or None if not indexed."""
+        postings = self._postings.get(field)
+        if postings is None:
+            # With every field indexed, no document has this one
+            return 0 if self.index_all else None
+        if not isinstance(condition, dict):
+            if not isinstance(condition, _KEY_TYPES):
+                return None  # e.g. whole-list equality
+            condition = {'$eq': condition}
+
+        bitmap = None
+        for op, operand in condition.items():
+            if op == '$eq':
+                keys = [operand] if isinstance(operand, _KEY_TYPES) and operand in postings else []
+            elif op == '$in':
+                keys = [key for key in operand if isinstance(key, _KEY_TYPES) and key in postings]
+            elif op == '$prefix':
+                keys = self._prefix_keys(field, operand)
+            else:
+                keys = [key for key in postings if _key_matches(key, op, operand)]
+            op_bitmap = _union_bitmap((postings[key] for key in keys), doc_count)
+            bitmap = op_bitmap if bitmap is None else bitmap & op_bitmap
+        return bitmap
+
+    def _prefix_keys(self, field: str, prefix: str) -> List[str]:
+        """Find the string keys of a field starting with a prefix."""
+        keys = self._sorted_keys.get(field)
+        if keys is None:
+            keys = self._sorted_keys[field] = sorted(
+                key for key in self._postings[field] if isinstance(key, str)
+            )
+        matched = []
+        for i in range(bisect_left(keys, prefix), len(keys)):
+            if not keys[i].startswith(prefix):
+                break
+            matched.append(keys[i])
+        return matched
+
+
+# EOF
@@ -0,0 +1,1044 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-17 10:00:00 (ywatanabe)"
+# File: src/scitex_scholar/index_segment.py
+
+"""
+Binary, memory-mapped index segments.
+
+A segment is an immutable directory holding one search index:
+
+- ``terms.dat``: term dictionary sorted by UTF-8 bytes, with fixed-width
+  entries so a term is found by binary search without loading the table
+- ``postings.dat``: per term, raw ``uint32`` columns of document numbers and
+  term frequencies, followed by positional postings (document numbers,
+  offsets and positions)
+- ``docids.dat``: document ID dictionary sorted by ID, mapping IDs to
+  document numbers, and ``docorder.dat`` with the dictionary entry of each
+  document number for the reverse lookup
+- ``lengths.dat``: ``uint32`` weighted length per document number
+- ``stored.dat`` / ``stored.idx``: stored fields other than the content,
+  one JSON record per document, addressed by ``uint64`` offsets
+- ``content.dat`` / ``content.idx``: zlib-compressed document text, read
+  only when a result's content is used (version 1 segments keep the
+  content in the JSON records)
+- ``offsets.dat`` / ``offsets.idx``: ``uint32`` character offsets of the
+  body words of each document, for snippets, and ``body.dat`` /
+  ``body.idx``: compressed body text of documents whose body differs from
+  their raw text (both optional)
+- ``filters.json``: metadata filter index (see FilterIndex)
+- ``meta.json``: counts and corpus statistics
+- ``deletes-<generation>.bin``: optional delete bitmaps written after the
+  segment, one bit per document number
+
+All files are opened with mmap. Posting columns are exposed as zero-copy
+``memoryview`` objects, so opening a segment costs O(1) and postings are
+paged in by the operating system when a query touches them. A
+SegmentSet presents several segments as one index, numbering documents
+consecutively across segments; its posting lists, document lengths and
+filter index are views over the per-segment data, each part shifted by
+the segment's base document number, so opening a set is O(1) in the
+number of documents as well. The views below let SearchEngine run on top
+of it and keep accepting new documents in memory.
+"""
+
+import heapq
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from collections.abc import MutableMapping, Sequence as SequenceABC
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .filter_index import FilterIndex
+from .postings import DocIdTable, PostingList, PositionList
+from .stored_fields import StoredDocument
+
+FORMAT_NAME = 'scitex-segment'
+FORMAT_VERSION = 2
+READABLE_VERSIONS = (1, 2)
+
+# term offset, term length, document frequency, max tf, postings offset,
+# positions offset, positional document count, position count
+_TERM_ENTRY = struct.Struct('<QIIIQQII')
+# id offset, id length, document number
+_DOCID_ENTRY = struct.Struct('<QII')
+_HEADER = struct.Struct('<4sII')  # magic, version, entry count
+_DICTIONARY_VERSION = 1  # Layout of terms.dat and docids.dat
+_TERMS_MAGIC = b'STXT'
+_DOCIDS_MAGIC = b'STXD'
+
+
+def write_segment(engine, directory: Path, start: int = 0,
+                  terms: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    """
+    Write the live documents of a search engine as a segment.
+
+    Retired document numbers are dropped and the remaining documents are
+    renumbered densely in their original order. With ``start``, only
+    documents numbered from ``start`` on are written, which flushes the
+    documents added since a segment set was opened.
+
+    Args:
+        engine: SearchEngine to serialize
+        directory: Segment directory to create (must not exist)
+        start: First document number to write
+        terms: Terms that may have postings from ``start`` on (all terms if None)
+
+    Returns:
+        Segment metadata written to meta.json
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True)
+
+    # Dense renumbering of live documents
+    remap = {}
+    live_ids = []
+    for docno in range(start, len(engine.doc_table)):
+        doc_id = engine.doc_table.doc_id(docno)
+        if doc_id is not None:
+            remap[docno] = len(live_ids)
+            live_ids.append(doc_id)
+
+    lengths = array('I', (engine.doc_lengths[docno] for docno in remap))
+    with open(directory / 'lengths.dat', 'wb') as f:
+        lengths.tofile(f)
+
+    records, contents, token_offsets, bodies = [], [], [], []
+    for doc_id in live_ids:
+        stored = StoredDocument.from_dict(engine.documents[doc_id])
+        records.append(json.dumps(stored.fields()).encode('utf-8'))
+        contents.append(stored.compressed)
+        token_offsets.append(b'' if stored.offsets is None else bytes(stored.offsets))
+        bodies.append(stored.body or b'')
+    _write_blobs(directory, 'stored', records)
+    _write_blobs(directory, 'content', contents)
+    _write_blobs(directory, 'offsets', token_offsets)
+    _write_blobs(directory, 'body', bodies)
+
+    doc_entries = sorted((doc_id.encode('utf-8'), (docno,)) for docno, doc_id in enumerate(live_ids))
+    _write_dictionary(directory / 'docids.dat', _DOCIDS_MAGIC, _DOCID_ENTRY, doc_entries)
+    order = array('I', bytes(4 * len(doc_entries)))
+    for i, (_, (docno,)) in enumerate(doc_entries):
+        order[docno] = i
+    with open(directory / 'docorder.dat', 'wb') as f:
+        order.tofile(f)
+
+    with open(directory / 'filters.json', 'w', encoding='utf-8') as f:
+        json.dump(engine.filter_index.to_dict(remap, start), f)
+
+    if terms is None:
+        terms = set(engine.index) | set(engine.positions)
+
+    entries = []
+    with open(directory / 'postings.dat', 'wb') as f:
+        position = 0
+        for term in sorted(set(terms), key=lambda t: t.encode('utf-8')):
+            doc_ids, freqs = array('I'), array('I')
+            postings = _peek(engine.index, term)
+            if postings is not None:
+                for i in range(bisect_left(postings.doc_ids, start), len(postings.doc_ids)):
+                    docno = remap.get(postings.doc_ids[i])
+                    if docno is not None:
+                        doc_ids.append(docno)
+                        freqs.append(postings.freqs[i])
+
+            pos_doc_ids, pos_offsets, pos_values = array('I'), array('I', [0]), array('I')
+            position_list = _peek(engine.positions, term)
+            if position_list is not None:
+                for i in range(bisect_left(position_list.doc_ids, start), len(position_list.doc_ids)):
+                    docno = remap.get(position_list.doc_ids[i])
+                    if docno is not None:
+                        pos_doc_ids.append(docno)
+                        pos_values.extend(position_list.positions[position_list.offsets[i]:position_list.offsets[i + 1]])
+                        pos_offsets.append(len(pos_values))
+
+            if not doc_ids and not pos_doc_ids:
+                continue
+
+            postings_offset = position
+            for column in (doc_ids, freqs):
+                column.tofile(f)
+            position += 4 * (len(doc_ids) + len(freqs))
+
+            positions_offset = position
+            for column in (pos_doc_ids, pos_offsets, pos_values):
+                column.tofile(f)
+            position += 4 * (len(pos_doc_ids) + len(pos_offsets) + len(pos_values))
+
+            entries.append((term.encode('utf-8'), (
+                len(doc_ids), max(freqs) if freqs else 0, postings_offset,
+                positions_offset, len(pos_doc_ids), len(pos_values)
+            )))
+
+    _write_dictionary(directory / 'terms.dat', _TERMS_MAGIC, _TERM_ENTRY, entries)
+
+    meta = {
+        'format': FORMAT_NAME,
+        'version': FORMAT_VERSION,
+        'byteorder': sys.byteorder,
+        'doc_count': len(live_ids),
+        'term_count': len(entries),
+        'total_length': sum(lengths),
+    }
+    with open(directory / 'meta.json', 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2)
+
+    return meta
+
+
+def _peek(term_index, term: str):
+    """Look up a term without caching lists built from a segment set."""
+    if isinstance(term_index, SegmentTermIndex):
+        return term_index.peek(term)
+    return term_index.get(term)
+
+
+def write_deletes(path: Path, docnos: Iterable[int], doc_count: int) -> None:
+    """
+    Write a delete bitmap with one bit per document number.
+
+    Args:
+        path: Output file
+        docnos: Deleted document numbers
+        doc_count: Number of documents in the segment
+    """
+    bitmap = bytearray((doc_count + 7) // 8)
+    for docno in docnos:
+        bitmap[docno >> 3] |= 1 << (docno & 7)
+    with open(path, 'wb') as f:
+        f.write(bitmap)
+
+
+def read_deletes(path: Path) -> List[int]:
+    """
+    Read the document numbers set in a delete bitmap.
+
+    Args:
+        path: File written by write_deletes
+
+    Returns:
+        Sorted deleted document numbers
+    """
+    with open(path, 'rb') as f:
+        bitmap = f.read()
+    return [
+        (i << 3) | bit
+        for i, byte in enumerate(bitmap) if byte
+        for bit in range(8) if byte & (1 << bit)
+    ]
+
+
+def _write_dictionary(path: Path, magic: bytes, entry_struct: struct.Struct,
+                      entries: List[Tuple[bytes, Tuple[int, ...]]]) -> None:
+    """
+    Write a sorted dictionary of fixed-width entries followed by a key blob.
+
+    Args:
+        path: Output file
+        magic: Four-byte file signature
+        entry_struct: Entry layout; the first two fields are key offset and length
+        entries: Sorted (key bytes, remaining entry fields) pairs
+    """
+    blob_start = _HEADER.size + entry_struct.size * len(entries)
+    with open(path, 'wb') as f:
+        f.write(_HEADER.pack(magic, _DICTIONARY_VERSION, len(entries)))
+        key_offset = blob_start
+        for key, fields in entries:
+            f.write(entry_struct.pack(key_offset, len(key), *fields))
+            key_offset += len(key)
+        for key, _ in entries:
+            f.write(key)
+
+
+class _MappedDictionary:
+    """Read-only view over a dictionary file written by _write_dictionary."""
+
+    def __init__(self, path: Path, magic: bytes, entry_struct: struct.Struct):
+        self._mm = _map_file(path)
+        self._entry = entry_struct
+        file_magic, version, self.count = _HEADER.unpack_from(self._mm, 0)
+        if file_magic != magic or version != _DICTIONARY_VERSION:
+            raise ValueError(f"Unsupported segment file: {path}")
+
+    def entry(self, i: int) -> Tuple[int, ...]:
+        """Return the fields of the i-th entry."""
+        return self._entry.unpack_from(self._mm, _HEADER.size + i * self._entry.size)
+
+    def key(self, i: int) -> bytes:
+        """Return the key bytes of the i-th entry."""
+        key_offset, key_length = self.entry(i)[:2]
+        return self._mm[key_offset:key_offset + key_length]
+
+    def find(self, key: bytes) -> Optional[Tuple[int, ...]]:
+        """Binary search for a key and return its entry fields."""
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.key(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.count and self.key(lo) == key:
+            return self.entry(lo)
+        return None
+
+    def keys(self) -> Iterator[bytes]:
+        """Iterate over keys in sorted order."""
+        for i in range(self.count):
+            yield self.key(i)
+
+
+def _write_blobs(directory: Path, name: str, blobs: List[bytes]) -> None:
+    """Write byte strings to <name>.dat, addressed by uint64 offsets in <name>.idx."""
+    offsets = array('Q', [0])
+    with open(directory / f'{name}.dat', 'wb') as f:
+        for blob in blobs:
+            f.write(blob)
+            offsets.append(offsets[-1] + len(blob))
+    with open(directory / f'{name}.idx', 'wb') as f:
+        offsets.tofile(f)
+
+
+class _MappedBlobs:
+    """Read-only view over byte strings written by _write_blobs."""
+
+    def __init__(self, directory: Path, name: str):
+        self._data = _map_file(directory / f'{name}.dat')
+        self._offsets = memoryview(_map_file(directory / f'{name}.idx')).cast('B').cast('Q')
+
+    def __getitem__(self, i: int) -> bytes:
+        return self._data[self._offsets[i]:self._offsets[i + 1]]
+
+
+def _map_file(path: Path):
+    """Memory-map a file read-only (empty files map to empty bytes)."""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b''
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class SegmentReader:
+    """Memory-mapped reader for a segment directory."""
+
+    def __init__(self, directory: Path):
+        """
+        Open a segment.
+
+        Args:
+            directory: Segment directory written by write_segment
+        """
+        self.directory = Path(directory)
+        with open(self.directory / 'meta.json', 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+        if self.meta.get('format') != FORMAT_NAME or self.meta.get('version') not in READABLE_VERSIONS:
+            raise ValueError(f"Unsupported segment format in {self.directory}")
+        if self.meta['byteorder'] != sys.byteorder:
+            raise ValueError(f"Segment {self.directory} was written with {self.meta['byteorder']}-endian integers")
+
+        self.doc_count = self.meta['doc_count']
+        self.total_length = self.meta['total_length']
+
+        self._terms = _MappedDictionary(self.directory / 'terms.dat', _TERMS_MAGIC, _TERM_ENTRY)
+        self._doc_ids = _MappedDictionary(self.directory / 'docids.dat', _DOCIDS_MAGIC, _DOCID_ENTRY)
+        self._postings = memoryview(_map_file(self.directory / 'postings.dat'))
+        self._stored = _MappedBlobs(self.directory, 'stored')
+        self._content = _MappedBlobs(self.directory, 'content') if self.meta['version'] >= 2 else None
+        if (self.directory / 'offsets.idx').exists():
+            self._token_offsets = _MappedBlobs(self.directory, 'offsets')
+            self._bodies = _MappedBlobs(self.directory, 'body')
+        else:
+            self._token_offsets = self._bodies = None
+        self._doc_order = self._typed_view(self.directory / 'docorder.dat', 'I')
+        self.doc_lengths = self._typed_view(self.directory / 'lengths.dat', 'I')
+
+    @staticmethod
+    def _typed_view(path: Path, code: str) -> memoryview:
+        """Map a file of native unsigned integers as a typed memoryview."""
+        return memoryview(_map_file(path)).cast('B').cast(code)
+
+    def _column(self, offset: int, count: int) -> memoryview:
+        """Return a uint32 column view from postings.dat."""
+        return self._postings[offset:offset + 4 * count].cast('I')
+
+    def postings(self, term: str) -> Optional[PostingList]:
+        """Return the posting list of a term, or None if absent."""
+        entry = self._terms.find(term.encode('utf-8'))
+        if entry is None or entry[2] == 0:
+            return None
+        _, _, df, max_tf, offset = entry[:5]
+        return PostingList(self._column(offset, df), self._column(offset + 4 * df, df), max_tf)
+
+    def positions(self, term: str) -> Optional[PositionList]:
+        """Return the positional posting list of a term, or None if absent."""
+        entry = self._terms.find(term.encode('utf-8'))
+        if entry is None or entry[6] == 0:
+            return None
+        offset, pos_df, pos_count = entry[5:]
+        return PositionList(
+            self._column(offset, pos_df),
+            self._column(offset + 4 * pos_df, pos_df + 1),
+            self._column(offset + 4 * (2 * pos_df + 1), pos_count),
+        )
+
+    def terms(self, kind: str = 'postings') -> Iterator[str]:
+        """
+        Iterate over terms in sorted order.
+
+        Args:
+            kind: 'postings' for terms with postings, 'positions' for terms
+                with positional postings
+        """
+        field = 2 if kind == 'postings' else 6
+        for i in range(self._terms.count):
+            if self._terms.entry(i)[field]:
+                yield bytes(self._terms.key(i)).decode('utf-8')
+
+    def docno(self, doc_id: str) -> Optional[int]:
+        """Return the document number of a document ID, or None if absent."""
+        entry = self._doc_ids.find(doc_id.encode('utf-8'))
+        return None if entry is None else entry[2]
+
+    def doc_id(self, docno: int) -> str:
+        """Return the document ID of a document number."""
+        return bytes(self._doc_ids.key(self._doc_order[docno])).decode('utf-8')
+
+    def doc_ids(self) -> Iterator[str]:
+        """Iterate over document IDs in sorted order."""
+        for key in self._doc_ids.keys():
+            yield bytes(key).decode('utf-8')
+
+    def document(self, docno: int) -> StoredDocument:
+        """Decode the stored fields of a document; the content stays compressed."""
+        fields = json.loads(self._stored[docno])
+        if self._content is None:
+            return StoredDocument.from_dict(fields)
+        offsets = body = None
+        if self._token_offsets is not None:
+            offsets = array('I', self._token_offsets[docno]) if self._token_offsets[docno] else None
+            body = self._bodies[docno] or None
+        return StoredDocument(self._content[docno], fields['processed'], fields['metadata'],
+                              fields['document_type'], offsets, body)
+
+    def filter_index(self) -> FilterIndex:
+        """Load the metadata filter index, rebuilding it for segments written without one."""
+        path = self.directory / 'filters.json'
+        if path.exists():
+            with open(path, 'r', encoding='utf-8') as f:
+                return FilterIndex.from_dict(json.load(f))
+        index = FilterIndex()
+        for docno in range(self.doc_count):
+            index.add(docno, self.document(docno)['metadata'])
+        return index
+
+
+class SegmentSet:
+    """
+    Ordered segments presented as one index.
+
+    Documents are numbered consecutively across segments, so segment ``i``
+    holds numbers ``bases[i]`` to ``bases[i] + doc_count - 1``. Documents
+    marked in a segment's delete bitmap are skipped by ID lookups and
+    iteration, and excluded from the corpus statistics; their postings stay
+    in place until the segment is merged.
+    """
+
+    def __init__(self, readers: Sequence[SegmentReader],
+                 deletes: Optional[Sequence[Iterable[int]]] = None):
+        """
+        Combine segments.
+
+        Args:
+            readers: Segments, oldest first
+            deletes: Deleted document numbers local to each segment
+        """
+        self.readers = list(readers)
+        self.bases = []
+        base = 0
+        for reader in self.readers:
+            self.bases.append(base)
+            base += reader.doc_count
+        self.doc_count = base
+
+        self.deleted = set()
+        for reader_base, docnos in zip(self.bases, deletes or []):
+            self.deleted.update(reader_base + docno for docno in docnos)
+        self.live_count = self.doc_count - len(self.deleted)
+
+        if len(self.readers) == 1:
+            self.doc_lengths = self.readers[0].doc_lengths
+        else:
+            self.doc_lengths = _ConcatenatedColumn(
+                [(0, reader.doc_lengths, reader.doc_count) for reader in self.readers]
+            )
+        self.total_length = (sum(reader.total_length for reader in self.readers)
+                             - sum(self.doc_lengths[docno] for docno in self.deleted))
+
+    @property
+    def directories(self) -> List[Path]:
+        """Segment directories, oldest first."""
+        return [reader.directory for reader in self.readers]
+
+    def _locate(self, docno: int) -> Tuple[int, int]:
+        """Return the segment index and local number of a document number."""
+        i = bisect_right(self.bases, docno) - 1
+        return i, docno - self.bases[i]
+
+    def _parts(self, term: str, kind: str) -> List[Tuple[int, Any]]:
+        """Collect (base, list) pairs of the segments containing a term."""
+        parts = []
+        for base, reader in zip(self.bases, self.readers):
+            value = reader.postings(term) if kind == 'postings' else reader.positions(term)
+            if value is not None:
+                parts.append((base, value))
+        return parts
+
+    def postings(self, term: str) -> Optional['SegmentPostingList']:
+        """Return a view of the posting lists of a term across segments, or None if absent."""
+        parts = self._parts(term, 'postings')
+        return SegmentPostingList(parts, self.doc_count) if parts else None
+
+    def positions(self, term: str) -> Optional['SegmentPositionList']:
+        """Return a view of the positional posting lists of a term across segments, or None if absent."""
+        parts = self._parts(term, 'positions')
+        return SegmentPositionList(parts, self.doc_count) if parts else None
+
+    def terms(self, kind: str = 'postings') -> Iterator[str]:
+        """Iterate over the terms of all segments in sorted order."""
+        previous = None
+        for term in heapq.merge(*(reader.terms(kind) for reader in self.readers)):
+            if term != previous:
+                yield term
+                previous = term
+
+    def docno(self, doc_id: str) -> Optional[int]:
+        """Return the live document number of a document ID, or None if absent."""
+        for base, reader in zip(reversed(self.bases), reversed(self.readers)):
+            docno = reader.docno(doc_id)
+            if docno is not None and base + docno not in self.deleted:
+                return base + docno
+        return None
+
+    def doc_id(self, docno: int) -> str:
+        """Return the document ID of a document number."""
+        i, local = self._locate(docno)
+        return self.readers[i].doc_id(local)
+
+    def doc_ids(self) -> Iterator[str]:
+        """Iterate over the IDs of live documents."""
+        for base, reader in zip(self.bases, self.readers):
+            if not any(base <= docno < base + reader.doc_count for docno in self.deleted):
+                yield from reader.doc_ids()
+                continue
+            for local in range(reader.doc_count):
+                if base + local not in self.deleted:
+                    yield reader.doc_id(local)
+
+    def document(self, docno: int) -> StoredDocument:
+        """Decode the stored fields of a document."""
+        i, local = self._locate(docno)
+        return self.readers[i].document(local)
+
+    def filter_index(self) -> 'SegmentFilterIndex':
+        """Return a filter index over the segments, loading each segment's index on first use."""
+        return SegmentFilterIndex(self)
+
+
+class _ConcatenatedColumn(SequenceABC):
+    """
+    Read-only concatenation of integer columns, each shifted by a constant.
+
+    Supports len, iteration, indexing and contiguous slices (returned as
+    ``array('I')``), so bisect and the set operations of
+    :mod:`scitex_scholar.postings` run on it without copying the columns.
+    """
+
+    __slots__ = ('_columns', '_shifts', '_starts', '_length')
+
+    def __init__(self, columns: Sequence[Tuple[int, Sequence[int], int]]):
+        """
+        Initialize the view.
+
+        Args:
+            columns: (shift, column, length) triples; only the first
+                ``length`` values of each column are part of the view
+        """
+        self._columns = [column for _, column, _ in columns]
+        self._shifts = [shift for shift, _, _ in columns]
+        self._starts = []
+        length = 0
+        for _, _, column_length in columns:
+            self._starts.append(length)
+            length += column_length
+        self._length = length
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            start, stop, step = i.indices(self._length)
+            if step != 1:
+                return array('I', (self[j] for j in range(start, stop, step)))
+            result = array('I')
+            for k, column_start in enumerate(self._starts):
+                column_end = self._starts[k + 1] if k + 1 < len(self._starts) else self._length
+                lo, hi = max(start, column_start), min(stop, column_end)
+                if lo < hi:
+                    values = self._columns[k][lo - column_start:hi - column_start]
+                    shift = self._shifts[k]
+                    result.extend(map(shift.__add__, values) if shift else values)
+            return result
+        if i < 0:
+            i += self._length
+        if not 0 <= i < self._length:
+            raise IndexError(i)
+        k = bisect_right(self._starts, i) - 1
+        return self._columns[k][i - self._starts[k]] + self._shifts[k]
+
+    def __iter__(self) -> Iterator[int]:
+        for k, column_start in enumerate(self._starts):
+            column_end = self._starts[k + 1] if k + 1 < len(self._starts) else self._length
+            values = islice(self._columns[k], column_end - column_start)
+            shift = self._shifts[k]
+            yield from map(shift.__add__, values) if shift else values
+
+
+class SegmentPostingList(PostingList):
+    """
+    Posting list of a term over several segments.
+
+    Each part is the zero-copy list of one segment paired with the
+    segment's base document number. Postings appended after the segments
+    were opened go to an in-memory part based at the end of the set, so
+    nothing is copied out of the segments.
+    """
+
+    __slots__ = ('parts', '_tail_base')
+
+    def __init__(self, parts: List[Tuple[int, PostingList]], tail_base: int):
+        """
+        Initialize the view.
+
+        Args:
+            parts: (base document number, posting list) pairs in order
+            tail_base: First document number after the segments
+        """
+        self.parts = list(parts)
+        self._tail_base = tail_base
+        super().__init__(*self._columns(), max(postings.max_tf for _, postings in self.parts))
+
+    def _columns(self) -> Tuple[Sequence[int], Sequence[int]]:
+        """Build the document number and frequency columns over the parts."""
+        if len(self.parts) == 1 and self.parts[0][0] == 0:
+            return self.parts[0][1].doc_ids, self.parts[0][1].freqs
+        return (_ConcatenatedColumn([(base, postings.doc_ids, len(postings)) for base, postings in self.parts]),
+                _ConcatenatedColumn([(0, postings.freqs, len(postings)) for _, postings in self.parts]))
+
+    def _tail(self, docno: int) -> PostingList:
+        """Return the in-memory part, checking that docno follows the segments."""
+        if docno < self._tail_base:
+            raise ValueError(f"Postings must be appended in increasing order: {docno}")
+        if self.parts[-1][0] != self._tail_base:
+            self.parts.append((self._tail_base, PostingList()))
+        return self.parts[-1][1]
+
+    def append(self, docno: int, tf: int) -> None:
+        self._tail(docno).append(docno - self._tail_base, tf)
+        self.doc_ids, self.freqs = self._columns()
+        self.max_tf = max(self.max_tf, tf)
+
+    def extend(self, doc_ids: array, freqs: array) -> None:
+        if not len(doc_ids):
+            return
+        base = self._tail_base
+        self._tail(doc_ids[0]).extend(array('I', (docno - base for docno in doc_ids)), freqs)
+        self.doc_ids, self.freqs = self._columns()
+        self.max_tf = max(self.max_tf, max(freqs))
+
+    def get(self, docno: int, default: Optional[int] = None) -> Optional[int]:
+        for base, postings in reversed(self.parts):
+            if docno >= base:
+                return postings.get(docno - base, default)
+        return default
+
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        for base, postings in self.parts:
+            if base:
+                yield from zip(map(base.__add__, postings.doc_ids), postings.freqs)
+            else:
+                yield from postings
+
+
+class SegmentPositionList(PositionList):
+    """Positional posting list of a term over several segments (see SegmentPostingList)."""
+
+    __slots__ = ('parts', '_tail_base')
+
+    def __init__(self, parts: List[Tuple[int, PositionList]], tail_base: int):
+        """
+        Initialize the view.
+
+        Args:
+            parts: (base document number, positional list) pairs in order
+            tail_base: First document number after the segments
+        """
+        self.parts = list(parts)
+        self._tail_base = tail_base
+        super().__init__(*self._columns())
+
+    def _columns(self) -> Tuple[Sequence[int], Sequence[int], Sequence[int]]:
+        """Build the document number, offset and position columns over the parts."""
+        if len(self.parts) == 1 and self.parts[0][0] == 0:
+            part = self.parts[0][1]
+            return part.doc_ids, part.offsets, part.positions
+        doc_ids, offsets, positions = [], [], []
+        shift = 0
+        for base, part in self.parts:
+            count, position_count = len(part), len(part.positions)
+            doc_ids.append((base, part.doc_ids, count))
+            offsets.append((shift, part.offsets, count))  # Without the end offset
+            positions.append((0, part.positions, position_count))
+            shift += position_count
+        offsets.append((shift, (0,), 1))
+        return _ConcatenatedColumn(doc_ids), _ConcatenatedColumn(offsets), _ConcatenatedColumn(positions)
+
+    def _tail(self, docno: int) -> PositionList:
+        """Return the in-memory part, checking that docno follows the segments."""
+        if docno < self._tail_base:
+            raise ValueError(f"Postings must be appended in increasing order: {docno}")
+        if self.parts[-1][0] != self._tail_base:
+            self.parts.append((self._tail_base, PositionList()))
+        return self.parts[-1][1]
+
+    def append(self, docno: int, positions: Iterable[int]) -> None:
+        self._tail(docno).append(docno - self._tail_base, positions)
+        self.doc_ids, self.offsets, self.positions = self._columns()
+
+    def extend(self, doc_ids: array, counts: array, positions: array) -> None:
+        if not len(doc_ids):
+            return
+        base = self._tail_base
+        self._tail(doc_ids[0]).extend(array('I', (docno - base for docno in doc_ids)), counts, positions)
+        self.doc_ids, self.offsets, self.positions = self._columns()
+
+    def get(self, docno: int) -> Optional[array]:
+        for base, position_list in reversed(self.parts):
+            if docno >= base:
+                return position_list.get(docno - base)
+        return None
+
+
+class SegmentFilterIndex:
+    """
+    Metadata filter index over a segment set and documents added after opening.
+
+    The filter index of a segment is loaded when a filtered query first
+    needs it; documents added later are indexed in memory.
+    """
+
+    def __init__(self, reader: SegmentSet):
+        """
+        Initialize the index.
+
+        Args:
+            reader: Segments providing document numbers 0..doc_count-1
+        """
+        self._reader = reader
+        self._segments: List[Optional[FilterIndex]] = [None] * len(reader.readers)
+        self._added = FilterIndex()
+        self._lock = threading.Lock()
+
+    @property
+    def fields(self) -> Tuple[str, ...]:
+        """Indexed metadata fields."""
+        return self._added.fields
+
+    def _segment(self, i: int) -> FilterIndex:
+        """Return the filter index of segment i, loading it on first use."""
+        with self._lock:
+            index = self._segments[i]
+            if index is None:
+                index = self._segments[i] = self._reader.readers[i].filter_index()
+            return index
+
+    def add(self, docno: int, metadata: Dict) -> None:
+        """Index the metadata of a document added after the segments (see FilterIndex.add)."""
+        self._added.add(docno, metadata)
+
+    def select(self, filters: Dict, doc_count: int) -> Tuple[Optional[int], Dict]:
+        """
+        Resolve the filters on indexed fields to a bitmap (see FilterIndex.select).
+
+        Each segment resolves the filters on its own document numbers and
+        the bitmaps are shifted to the segment's base.
+        """
+        bitmap, residual = self._added.select(filters, doc_count)
+        if bitmap is None:
+            return None, residual
+        for i, (base, reader) in enumerate(zip(self._reader.bases, self._reader.readers)):
+            segment_bitmap, _ = self._segment(i).select(filters, reader.doc_count)
+            if segment_bitmap:
+                bitmap |= segment_bitmap << base
+        return bitmap, residual
+
+    def to_dict(self, remap: Dict[int, int], start: int = 0) -> Dict[str, List[List[Any]]]:
+        """Export the entries of the documents in remap (see FilterIndex.to_dict)."""
+        combined = FilterIndex(self._added.fields)
+        for i, (base, reader) in enumerate(zip(self._reader.bases, self._reader.readers)):
+            if base + reader.doc_count > start:
+                combined.extend(self._segment(i), base)
+        combined.extend(self._added, 0)
+        return combined.to_dict(remap, start)
+
+
+class SegmentDocIdTable(DocIdTable):
+    """DocIdTable whose first document numbers come from a segment set."""
+
+    def __init__(self, reader: SegmentSet):
+        """
+        Initialize the table on top of segments.
+
+        Args:
+            reader: Segments providing document numbers 0..doc_count-1
+        """
+        super().__init__()
+        self._reader = reader
+        self._base = reader.doc_count
+        self.retired = set(reader.deleted)
+
+    def add(self, doc_id: str) -> int:
+        self.remove(doc_id)
+        docno = self._base + len(self._doc_ids)
+        self._doc_ids.append(doc_id)
+        self._ids[doc_id] = docno
+        return docno
+
+    def remove(self, doc_id: str) -> Optional[int]:
+        docno = self.get(doc_id)
+        if docno is None:
+            return None
+        if docno >= self._base:
+            self._doc_ids[docno - self._base] = None
+            del self._ids[doc_id]
+        self.retired.add(docno)
+        return docno
+
+    def get(self, doc_id: str) -> Optional[int]:
+        docno = self._ids.get(doc_id)
+        if docno is not None:
+            return docno
+        docno = self._reader.docno(doc_id)
+        if docno is None or docno in self.retired:
+            return None
+        return docno
+
+    def doc_id(self, docno: int) -> Optional[str]:
+        if docno >= self._base:
+            return self._doc_ids[docno - self._base]
+        if docno in self.retired:
+            return None
+        return self._reader.doc_id(docno)
+
+    def __len__(self) -> int:
+        return self._base + len(self._doc_ids)
+
+    def to_list(self) -> List[Optional[str]]:
+        return [self.doc_id(docno) for docno in range(len(self))]
+
+    def segment_deletes(self) -> List[List[int]]:
+        """Return the deleted local document numbers of each segment."""
+        deletes = [[] for _ in self._reader.readers]
+        for docno in sorted(self.retired):
+            if docno < self._base:
+                i, local = self._reader._locate(docno)
+                deletes[i].append(local)
+        return deletes
+
+
+class SegmentTermIndex(MutableMapping):
+    """
+    Term -> posting list mapping backed by a segment set.
+
+    Lists read from the segments are views (see SegmentPostingList) kept in
+    a bounded LRU cache, so memory does not grow with the number of
+    distinct terms queried. Lists written since opening, including
+    segment lists extended with new documents, are held in memory until
+    the index is reopened and reported by changed_terms.
+    """
+
+    def __init__(self, reader: SegmentSet, kind: str, cache_size: int = 1024):
+        """
+        Initialize the mapping.
+
+        Args:
+            reader: Segments to read from
+            kind: 'postings' or 'positions'
+            cache_size: Maximum number of lists read from the segments to keep
+        """
+        self._reader = reader
+        self._kind = kind
+        self._lookup = reader.postings if kind == 'postings' else reader.positions
+        self._written: Dict[str, Any] = {}
+        self._deleted = set()  # Segment terms deleted since opening
+        self._cache: 'OrderedDict[str, Any]' = OrderedDict()  # Term -> list, or None if absent
+        self._cache_size = cache_size
+        self._cache_lock = threading.Lock()  # Searches read concurrently
+
+    def _read(self, term: str):
+        """Return the segment list of a term, or None, through the cache."""
+        with self._cache_lock:
+            if term in self._cache:
+                self._cache.move_to_end(term)
+                return self._cache[term]
+        value = self._lookup(term)
+        if self._cache_size > 0:
+            with self._cache_lock:
+                self._cache[term] = value
+                while len(self._cache) > self._cache_size:
+                    self._cache.popitem(last=False)
+        return value
+
+    def __getitem__(self, term: str):
+        value = self._written.get(term)
+        if value is not None:
+            return value
+        if term in self._deleted:
+            raise KeyError(term)
+        value = self._read(term)
+        if value is None:
+            raise KeyError(term)
+        return value
+
+    def __setitem__(self, term: str, value) -> None:
+        self._deleted.discard(term)
+        with self._cache_lock:
+            self._cache.pop(term, None)
+        self._written[term] = value
+
+    def peek(self, term: str):
+        """Return the list of a term, or None, without caching it."""
+        value = self._written.get(term)
+        if value is not None or term in self._deleted:
+            return value
+        with self._cache_lock:
+            if term in self._cache:
+                return self._cache[term]
+        return self._lookup(term)
+
+    def changed_terms(self) -> List[str]:
+        """Return the terms whose lists were written since the segments were opened."""
+        return list(self._written)
+
+    def __delitem__(self, term: str) -> None:
+        self[term]  # Raise KeyError for unknown terms
+        self._written.pop(term, None)
+        with self._cache_lock:
+            self._cache.pop(term, None)
+        self._deleted.add(term)
+
+    def __iter__(self) -> Iterator[str]:
+        seen = set()
+        for term in self._reader.terms(self._kind):
+            if term not in self._deleted:
+                if term in self._written:
+                    seen.add(term)
+                yield term
+        for term in list(self._written):
+            if term not in seen:
+                yield term
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+
+class SegmentDocLengths:
+    """Document lengths from segments followed by in-memory additions."""
+
+    def __init__(self, reader: SegmentSet):
+        self._base = reader.doc_lengths
+        self._added = array('I')
+
+    def __getitem__(self, docno: int) -> int:
+        if docno < len(self._base):
+            return self._base[docno]
+        return self._added[docno - len(self._base)]
+
+    def __len__(self) -> int:
+        return len(self._base) + len(self._added)
+
+    def __iter__(self) -> Iterator[int]:
+        yield from self._base
+        yield from self._added
+
+    def append(self, length: int) -> None:
+        self._added.append(length)
+
+
+class SegmentDocuments(MutableMapping):
+    """
+    doc_id -> stored document mapping backed by a segment set.
+
+    Segment documents are decoded on access and not retained; documents
+    added or replaced after opening are held in memory.
+    """
+
+    def __init__(self, reader: SegmentSet):
+        self._reader = reader
+        self._added: Dict[str, Dict[str, Any]] = {}
+        self._removed = set()  # Segment documents replaced or deleted
+        self._base_len = reader.live_count
+
+    def _segment_docno(self, doc_id: str) -> Optional[int]:
+        if doc_id in self._removed:
+            return None
+        return self._reader.docno(doc_id)
+
+    def __getitem__(self, doc_id: str) -> Dict[str, Any]:
+        doc = self._added.get(doc_id)
+        if doc is not None:
+            return doc
+        docno = self._segment_docno(doc_id)
+        if docno is None:
+            raise KeyError(doc_id)
+        return self._reader.document(docno)
+
+    def __setitem__(self, doc_id: str, doc: Dict[str, Any]) -> None:
+        if self._segment_docno(doc_id) is not None:
+            self._removed.add(doc_id)
+            self._base_len -= 1
+        self._added[doc_id] = doc
+
+    def __delitem__(self, doc_id: str) -> None:
+        if doc_id in self._added:
+            del self._added[doc_id]
+        elif self._segment_docno(doc_id) is not None:
+            self._removed.add(doc_id)
+            self._base_len -= 1
+        else:
+            raise KeyError(doc_id)
+
+    def __contains__(self, doc_id: object) -> bool:
+        return doc_id in self._added or (
+            isinstance(doc_id, str) and self._segment_docno(doc_id) is not None
+        )
+
+    def __iter__(self) -> Iterator[str]:
+        for doc_id in self._reader.doc_ids():
+            if doc_id not in self._removed:
+                yield doc_id
+        yield from list(self._added)
+
+    def __len__(self) -> int:
+        return self._base_len + len(self._added)
+
+
+# EOF
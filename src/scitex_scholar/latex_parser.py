@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
-# Time-stamp: "2025-05-22 16:35:00 (ywatanabe)"
+# Time-stamp: "2026-10-17 10:00:00 (ywatanabe)"
 # File: src/scitex_scholar/latex_parser.py
 
 """
@@ -8,11 +8,182 @@ LaTeX parsing module for scientific documents.
 
 This module provides functionality for parsing LaTeX-specific content including
 commands, environments, mathematical expressions, and citations from scientific papers.
+
+Documents are read by a single-pass lexer: one precompiled pattern finds the
+next control sequence, brace, math delimiter or comment, and stacks of open
+brace groups and environments pair them up, so commands, nested
+environments, math, citations, metadata, sections and the cleaned text all
+come out of one linear scan. Scans are kept in a ParseCache, a bounded LRU
+keyed by a BLAKE2b digest of the source, so the extract_* methods and
+repeated parses of the same document share one scan.
 """
 
+import hashlib
 import re
+import sys
+import threading
+from collections import OrderedDict
 from typing import List, Dict, Any, Optional, Tuple
-from functools import lru_cache
+
+# Tokens of the lexer; text between tokens is plain text. The lookahead
+# skips plain text without trying each alternative, and a command token
+# includes the [options] and opening brace of its first argument.
+_TOKEN_PATTERN = re.compile(r"""
+    (?=[\\${}%])
+    (?:
+        \\(?P<delimiter>begin|end)\s*\{(?P<environment>[^{}]*)\}
+      | \\(?P<name>[a-zA-Z]+\*?)(?P<argument>(?:\[[^\]]*\])?\{)?
+      | \\(?P<escape>.)
+      | (?P<math>\$\$?)
+      | (?P<open>\{)
+      | (?P<close>\})
+      | (?P<comment>%)[^\n]*
+    )
+""", re.VERBOSE | re.DOTALL)
+
+MATH_ENVIRONMENTS = frozenset({'equation', 'align', 'gather', 'multline', 'eqnarray'})
+CITATION_COMMANDS = frozenset({'cite', 'citep', 'citet', 'citealp', 'citealt'})
+SECTION_COMMANDS = frozenset({'section', 'subsection', 'subsubsection'})
+METADATA_COMMANDS = frozenset({'title', 'author', 'documentclass'})
+
+# Environments and commands whose content is not LaTeX and is not lexed
+_VERBATIM_ENVIRONMENTS = frozenset({'verbatim', 'verbatim*', 'lstlisting', 'minted', 'comment'})
+_VERBATIM_COMMANDS = {'url': '[URL]'}
+
+# Commands whose argument is left out of the cleaned text, with its replacement
+_DROPPED_ARGUMENTS = {
+    'footnote': '', 'label': '', 'ref': '[REF]',
+    'input': '', 'include': '', 'subfile': '',
+    'bibliography': '', 'bibliographystyle': '', 'addbibresource': '',
+}
+
+# Escaped characters kept in the cleaned text; accents are dropped, other
+# control symbols (\\, \, and friends) become spaces
+_ESCAPED_CHARACTERS = frozenset('%$&#_{}')
+_ACCENTS = frozenset('\'"`^~=.')
+_MATH_BRACKETS = {'(': ('\\(', 'inline'), '[': ('\\[', 'display'),
+                  ')': ('\\(', 'inline'), ']': ('\\[', 'display')}
+
+
+# Approximate size of a result dictionary, without its strings
+_ITEM_SIZE = sys.getsizeof({'type': 0, 'content': 0, 'start': 0, 'end': 0}) + 64
+_RESULT_LISTS = ('commands', 'environments', 'math_expressions', 'citations', 'sections')
+
+
+def _copy_items(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Copy the flat item dicts of a cached scan so callers cannot change the cache."""
+    return [dict(item) for item in items]
+
+
+class ParseCache:
+    """
+    Thread-safe LRU cache of parse results, bounded in entries and bytes.
+    
+    Keys are BLAKE2b digests of the source text, so different documents
+    never share an entry. Each entry is stored with an estimate of its size
+    in bytes, and least recently used entries are evicted while the cache
+    holds more than ``max_size`` entries or ``max_bytes`` bytes; a result
+    larger than ``max_bytes`` is not cached. The cache is rebuilt empty
+    when it is pickled to worker processes.
+    """
+    
+    def __init__(self, max_size: int = 128, max_bytes: int = 64 * 2 ** 20):
+        """
+        Initialize an empty cache.
+        
+        Args:
+            max_size: Maximum number of cached results (0 disables caching)
+            max_bytes: Maximum estimated size of the cached results in bytes
+        """
+        self.max_size = max_size
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[bytes, Tuple[int, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    @staticmethod
+    def make_key(text: str) -> bytes:
+        """
+        Build a cache key from a source text.
+        
+        Args:
+            text: Source text
+        
+        Returns:
+            256-bit BLAKE2b digest of the text
+        """
+        return hashlib.blake2b(text.encode('utf-8', 'surrogatepass'), digest_size=32).digest()
+    
+    def get(self, key: bytes) -> Optional[Any]:
+        """
+        Look up a cached result.
+        
+        Args:
+            key: Cache key
+        
+        Returns:
+            Cached result, or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+    
+    def put(self, key: bytes, result: Any, size: int) -> None:
+        """
+        Store a result, evicting the least recently used entries.
+        
+        Args:
+            key: Cache key
+            result: Parse result
+            size: Estimated size of the result in bytes
+        """
+        if self.max_size <= 0 or size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= previous[0]
+            self._entries[key] = (size, result)
+            self.bytes += size
+            while len(self._entries) > self.max_size or self.bytes > self.max_bytes:
+                evicted_size, _ = self._entries.popitem(last=False)[1]
+                self.bytes -= evicted_size
+                self.evictions += 1
+    
+    def clear(self) -> None:
+        """Drop all cached results."""
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+    
+    def get_statistics(self) -> Dict[str, Any]:
+        """Return the size, bytes held, hit/miss and eviction counts of the cache."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'bytes': self.bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions
+            }
+    
+    def __getstate__(self) -> Dict[str, int]:
+        return {'max_size': self.max_size, 'max_bytes': self.max_bytes}
+    
+    def __setstate__(self, state: Dict[str, int]) -> None:
+        self.__init__(**state)
 
 
 class LaTeXParser:
@@ -23,197 +194,59 @@ class LaTeXParser:
     expressions, and citations from LaTeX source documents.
     """
     
-    def __init__(self):
-        """Initialize LaTeXParser with optimized regex patterns for common LaTeX constructs."""
-        # Compile all regex patterns once for better performance
-        self._compile_patterns()
-        
-        # Cache for frequently accessed environments
-        self._environment_cache: Dict[str, List[Dict[str, Any]]] = {}
-        
-    def _compile_patterns(self) -> None:
-        """Compile all regex patterns for optimal performance."""
-        # Basic command pattern: \command{content} or \command[options]{content}
-        self.command_pattern = re.compile(
-            r'\\([a-zA-Z]+)(?:\[[^\]]*\])?\{([^{}]*(?:\{[^{}]*\}[^{}]*)*)\}'
-        )
-        
-        # Environment pattern: \begin{env}...\end{env}
-        self.environment_pattern = re.compile(
-            r'\\begin\{([^}]+)\}(.*?)\\end\{\1\}',
-            re.DOTALL
-        )
-        
-        # Math patterns - optimized for common cases
-        self.inline_math_pattern = re.compile(r'\$([^$]+)\$')
-        self.display_math_pattern = re.compile(r'\$\$([^$]+)\$\$')
-        
-        # Citation patterns - combined for efficiency
-        self.citation_patterns = {
-            'cite': re.compile(r'\\cite\{([^}]+)\}'),
-            'citep': re.compile(r'\\citep\{([^}]+)\}'),
-            'citet': re.compile(r'\\citet\{([^}]+)\}'),
-            'citealp': re.compile(r'\\citealp\{([^}]+)\}'),
-            'citealt': re.compile(r'\\citealt\{([^}]+)\}'),
-        }
-        
-        # Optimized cleanup patterns with precompiled regex
-        self.cleanup_patterns = [
-            (re.compile(r'\\textbf\{([^}]+)\}'), r'\1'),  # Bold text
-            (re.compile(r'\\textit\{([^}]+)\}'), r'\1'),  # Italic text
-            (re.compile(r'\\emph\{([^}]+)\}'), r'\1'),    # Emphasized text
-            (re.compile(r'\\footnote\{[^}]+\}'), ''),     # Remove footnotes
-            (re.compile(r'\\label\{[^}]+\}'), ''),        # Remove labels
-            (re.compile(r'\\ref\{[^}]+\}'), '[REF]'),     # Replace references
-            (re.compile(r'\\url\{[^}]+\}'), '[URL]'),     # Replace URLs
-        ]
+    def __init__(self, cache_size: int = 128, cache_bytes: int = 64 * 2 ** 20):
+        """
+        Initialize LaTeXParser.
+
+        Args:
+            cache_size: Maximum number of documents whose parse results are
+                cached (0 disables caching)
+            cache_bytes: Maximum estimated size of the cached results in bytes
+        """
+        self._cache = ParseCache(max_size=cache_size, max_bytes=cache_bytes)
     
     def extract_commands(self, latex_text: str) -> List[Dict[str, str]]:
         """
         Extract LaTeX commands from text.
         
+        Every command with a braced argument is reported, including commands
+        nested in another command's argument; content is the first argument.
+        
         Args:
             latex_text: LaTeX source text
-            
+        
         Returns:
             List of dictionaries containing command information
         """
-        commands = []
-        
-        for match in self.command_pattern.finditer(latex_text):
-            command_name = match.group(1)
-            command_content = match.group(2)
-            
-            commands.append({
-                'command': command_name,
-                'content': command_content,
-                'start': match.start(),
-                'end': match.end()
-            })
-        
-        return commands
-    
-    @lru_cache(maxsize=128)
-    def _get_environment_pattern(self, env_name: str) -> re.Pattern:
-        """Get compiled regex pattern for specific environment (cached)."""
-        return re.compile(
-            rf'\\begin\{{{re.escape(env_name)}\}}(.*?)\\end\{{{re.escape(env_name)}\}}',
-            re.DOTALL
-        )
+        return _copy_items(self._parse(latex_text)['commands'])
     
     def extract_environments(self, latex_text: str) -> List[Dict[str, Any]]:
         """
-        Extract LaTeX environments from text with optimized pattern matching.
+        Extract LaTeX environments from text, including nested environments.
         
         Args:
             latex_text: LaTeX source text
-            
+        
         Returns:
             List of dictionaries containing environment information
         """
-        # Check cache first for performance
-        text_hash = hash(latex_text)
-        if text_hash in self._environment_cache:
-            return self._environment_cache[text_hash]
-        
-        environments = []
-        processed_positions = set()
-        
-        # Priority environments - extract these first for better performance
-        priority_environments = [
-            'abstract', 'figure', 'table', 'equation', 'align', 'gather'
-        ]
-        
-        # Extract priority environments first
-        for env_name in priority_environments:
-            pattern = self._get_environment_pattern(env_name)
-            for match in pattern.finditer(latex_text):
-                pos_key = (match.start(), match.end())
-                if pos_key not in processed_positions:
-                    environments.append({
-                        'name': env_name,
-                        'content': match.group(1).strip(),
-                        'start': match.start(),
-                        'end': match.end()
-                    })
-                    processed_positions.add(pos_key)
-        
-        # Extract remaining environments using general pattern
-        for match in self.environment_pattern.finditer(latex_text):
-            pos_key = (match.start(), match.end())
-            if pos_key not in processed_positions:
-                environments.append({
-                    'name': match.group(1),
-                    'content': match.group(2).strip(),
-                    'start': match.start(),
-                    'end': match.end()
-                })
-                processed_positions.add(pos_key)
-        
-        # Sort by position for consistent ordering
-        environments.sort(key=lambda x: x['start'])
-        
-        # Cache result for future use
-        self._environment_cache[text_hash] = environments
-        
-        return environments
+        return _copy_items(self._parse(latex_text)['environments'])
     
     def extract_math_expressions(self, latex_text: str) -> List[Dict[str, str]]:
         """
-        Extract mathematical expressions from LaTeX text with optimized pattern matching.
+        Extract mathematical expressions from LaTeX text.
+        
+        Inline math ($...$ and \\(...\\)) has type 'inline', display math
+        ($$...$$ and \\[...\\]) type 'display' and math environments the
+        environment name.
         
         Args:
             latex_text: LaTeX source text
-            
+        
         Returns:
             List of dictionaries containing math expression information
         """
-        math_expressions = []
-        processed_positions = set()
-        
-        # Extract inline math ($...$) - most common, check first
-        for match in self.inline_math_pattern.finditer(latex_text):
-            pos_key = (match.start(), match.end())
-            if pos_key not in processed_positions:
-                math_expressions.append({
-                    'type': 'inline',
-                    'content': match.group(1),
-                    'start': match.start(),
-                    'end': match.end()
-                })
-                processed_positions.add(pos_key)
-        
-        # Extract display math ($$...$$)
-        for match in self.display_math_pattern.finditer(latex_text):
-            pos_key = (match.start(), match.end())
-            if pos_key not in processed_positions:
-                math_expressions.append({
-                    'type': 'display',
-                    'content': match.group(1),
-                    'start': match.start(),
-                    'end': match.end()
-                })
-                processed_positions.add(pos_key)
-        
-        # Extract math environments - use cached patterns for performance
-        math_environments = ['equation', 'align', 'gather', 'multline', 'eqnarray']
-        for env_name in math_environments:
-            pattern = self._get_environment_pattern(env_name)
-            for match in pattern.finditer(latex_text):
-                pos_key = (match.start(), match.end())
-                if pos_key not in processed_positions:
-                    math_expressions.append({
-                        'type': env_name,
-                        'content': match.group(1).strip(),
-                        'start': match.start(),
-                        'end': match.end()
-                    })
-                    processed_positions.add(pos_key)
-        
-        # Sort by position for consistency
-        math_expressions.sort(key=lambda x: x['start'])
-        
-        return math_expressions
+        return _copy_items(self._parse(latex_text)['math_expressions'])
     
     def extract_citations(self, latex_text: str) -> List[Dict[str, str]]:
         """
@@ -221,24 +254,11 @@ class LaTeXParser:
         
         Args:
             latex_text: LaTeX source text
-            
+        
         Returns:
             List of dictionaries containing citation information
         """
-        citations = []
-        
-        for cite_type, pattern in self.citation_patterns.items():
-            for match in pattern.finditer(latex_text):
-                citation_keys = match.group(1).split(',')
-                for key in citation_keys:
-                    citations.append({
-                        'type': cite_type,
-                        'key': key.strip(),
-                        'start': match.start(),
-                        'end': match.end()
-                    })
-        
-        return citations
+        return _copy_items(self._parse(latex_text)['citations'])
     
     def extract_document_metadata(self, latex_text: str) -> Dict[str, str]:
         """
@@ -246,28 +266,11 @@ class LaTeXParser:
         
         Args:
             latex_text: LaTeX source text
-            
+        
         Returns:
             Dictionary containing document metadata
         """
-        metadata = {}
-        
-        # Extract title
-        title_match = re.search(r'\\title\{([^}]+)\}', latex_text)
-        if title_match:
-            metadata['title'] = title_match.group(1)
-        
-        # Extract author
-        author_match = re.search(r'\\author\{([^}]+)\}', latex_text)
-        if author_match:
-            metadata['author'] = author_match.group(1)
-        
-        # Extract document class
-        docclass_match = re.search(r'\\documentclass(?:\[[^\]]*\])?\{([^}]+)\}', latex_text)
-        if docclass_match:
-            metadata['documentclass'] = docclass_match.group(1)
-        
-        return metadata
+        return dict(self._parse(latex_text)['metadata'])
     
     def extract_document_structure(self, latex_text: str) -> Dict[str, Any]:
         """
@@ -275,60 +278,28 @@ class LaTeXParser:
         
         Args:
             latex_text: LaTeX source text
-            
+        
         Returns:
             Dictionary containing document structure information
         """
-        structure = {'sections': []}
-        
-        # Section patterns in order of hierarchy
-        section_patterns = [
-            ('section', re.compile(r'\\section\{([^}]+)\}')),
-            ('subsection', re.compile(r'\\subsection\{([^}]+)\}')),
-            ('subsubsection', re.compile(r'\\subsubsection\{([^}]+)\}')),
-        ]
-        
-        for section_type, pattern in section_patterns:
-            for match in pattern.finditer(latex_text):
-                structure['sections'].append({
-                    'type': section_type,
-                    'title': match.group(1),
-                    'start': match.start(),
-                    'end': match.end()
-                })
-        
-        # Sort by position in document
-        structure['sections'].sort(key=lambda x: x['start'])
-        
-        return structure
+        return {'sections': _copy_items(self._parse(latex_text)['sections'])}
     
     def clean_latex_content(self, latex_text: str) -> str:
         """
         Clean LaTeX content for text processing.
         
+        Command arguments and math are kept as text, footnotes and labels
+        dropped, references and URLs replaced by [REF] and [URL], and
+        comments, braces, math delimiters and environment markers removed.
+        Command names are kept as words inside math (\\sin, \\alpha).
+        
         Args:
             latex_text: LaTeX source text
-            
+        
         Returns:
             Cleaned text with LaTeX commands removed or converted
         """
-        cleaned = latex_text
-        
-        # Apply cleanup patterns
-        for pattern, replacement in self.cleanup_patterns:
-            cleaned = pattern.sub(replacement, cleaned)
-        
-        # Remove remaining simple commands
-        cleaned = re.sub(r'\\[a-zA-Z]+\{([^}]*)\}', r'\1', cleaned)
-        
-        # Remove math expressions for clean text (keep content)
-        cleaned = re.sub(r'\$\$([^$]+)\$\$', r'\1', cleaned)
-        cleaned = re.sub(r'\$([^$]+)\$', r'\1', cleaned)
-        
-        # Clean up whitespace
-        cleaned = re.sub(r'\s+', ' ', cleaned.strip())
-        
-        return cleaned
+        return self._parse(latex_text)['clean_text']
     
     def clear_cache(self) -> None:
         """
@@ -337,37 +308,33 @@ class LaTeXParser:
         Useful when processing many different documents or when memory usage
         becomes a concern.
         """
-        self._environment_cache.clear()
-        self._get_environment_pattern.cache_clear()
+        self._cache.clear()
     
     def get_cache_info(self) -> Dict[str, Any]:
         """
         Get information about cache usage for performance monitoring.
         
         Returns:
-            Dictionary containing cache statistics
+            Dictionary containing cache statistics: size, max_size, bytes,
+            max_bytes, hits, misses, hit_rate and evictions
         """
-        return {
-            'environment_cache_size': len(self._environment_cache),
-            'pattern_cache_info': self._get_environment_pattern.cache_info()._asdict()
-        }
+        info = self._cache.get_statistics()
+        info['environment_cache_size'] = info['size']
+        return info
     
     def parse_document(self, latex_text: str) -> Dict[str, Any]:
         """
-        Parse a complete LaTeX document.
+        Parse a complete LaTeX document in one pass.
         
         Args:
             latex_text: LaTeX source text
-            
+        
         Returns:
-            Dictionary containing all parsed information
+            Dictionary containing all parsed information, including the
+            commands as returned by extract_commands
         """
-        # Extract all components
-        metadata = self.extract_document_metadata(latex_text)
-        structure = self.extract_document_structure(latex_text)
-        environments = self.extract_environments(latex_text)
-        math_expressions = self.extract_math_expressions(latex_text)
-        citations = self.extract_citations(latex_text)
+        scanned = self._parse(latex_text)
+        environments = _copy_items(scanned['environments'])
         
         # Extract specific content sections
         content = {}
@@ -378,17 +345,219 @@ class LaTeXParser:
                 content['abstract'] = env['content']
                 break
         
-        # Clean text for general processing
-        clean_text = self.clean_latex_content(latex_text)
-        
         return {
-            'metadata': metadata,
-            'structure': structure,
+            'metadata': dict(scanned['metadata']),
+            'structure': {'sections': _copy_items(scanned['sections'])},
             'content': content,
             'environments': environments,
+            'math_expressions': _copy_items(scanned['math_expressions']),
+            'citations': _copy_items(scanned['citations']),
+            'commands': _copy_items(scanned['commands']),
+            'clean_text': scanned['clean_text']
+        }
+    
+    def _parse(self, latex_text: str) -> Dict[str, Any]:
+        """Return the cached scan of a document, scanning it on a miss."""
+        key = ParseCache.make_key(latex_text)
+        scanned = self._cache.get(key)
+        if scanned is None:
+            scanned = self._scan(latex_text)
+            self._cache.put(key, scanned, self._estimate_size(scanned))
+        return scanned
+    
+    @staticmethod
+    def _estimate_size(scanned: Dict[str, Any]) -> int:
+        """Estimate the memory held by a scan in bytes."""
+        size = sys.getsizeof(scanned['clean_text'])
+        for field in _RESULT_LISTS:
+            for item in scanned[field]:
+                size += _ITEM_SIZE + sum(len(value) for value in item.values() if isinstance(value, str))
+        return size
+    
+    def _scan(self, text: str) -> Dict[str, Any]:
+        """
+        Lex a LaTeX source in one linear pass.
+        
+        Braces push and pop a stack of groups, where a group opened right
+        after a command and its [options] is that command's argument;
+        \\begin and \\end push and pop a stack of environments, and an \\end
+        closes the innermost open environment of its name. Unbalanced braces
+        and environments are skipped.
+        
+        Args:
+            text: LaTeX source text
+        
+        Returns:
+            Dictionary with commands, environments, math_expressions,
+            citations, metadata, sections and clean_text
+        """
+        commands = []
+        environments = []
+        math_expressions = []
+        citations = []
+        sections = []
+        metadata = {}
+        clean = []
+        
+        groups: List[Tuple[Optional[str], int, int, bool]] = []  # (command, start, content start, dropped)
+        open_environments: List[Tuple[str, int, int]] = []  # (name, start, content start)
+        math: Optional[Tuple[str, int, int]] = None  # (delimiter, start, content start)
+        math_depth = 0  # Open math environments
+        dropped = 0  # Open groups left out of the cleaned text
+        
+        pos = 0  # End of the last token
+        skip_to = 0  # End of verbatim content, which is not lexed
+        for match in _TOKEN_PATTERN.finditer(text):
+            start = match.start()
+            if start < skip_to:
+                continue
+            if not dropped:
+                clean.append(text[pos:start])
+            pos = match.end()
+            kind = match.lastgroup
+            
+            if kind == 'environment':
+                delimiter = match.group('delimiter')
+                name = match.group('environment').strip()
+                commands.append({'command': delimiter, 'content': name, 'start': start, 'end': pos})
+                if not dropped:
+                    clean.append(' ')
+                if delimiter == 'begin':
+                    if name in _VERBATIM_ENVIRONMENTS:
+                        end_marker = '\\end{' + name + '}'
+                        end = text.find(end_marker, pos)
+                        if end < 0:
+                            continue
+                        environments.append({'name': name, 'content': text[pos:end].strip(),
+                                             'start': start, 'end': end + len(end_marker)})
+                        if not dropped:
+                            clean.append(text[pos:end])
+                        pos = skip_to = end + len(end_marker)
+                        continue
+                    open_environments.append((name, start, pos))
+                    math_depth += name.rstrip('*') in MATH_ENVIRONMENTS
+                    continue
+                for depth in range(len(open_environments) - 1, -1, -1):
+                    if open_environments[depth][0] == name:
+                        break
+                else:
+                    continue
+                _, env_start, content_start = open_environments[depth]
+                for unclosed, _, _ in open_environments[depth:]:
+                    math_depth -= unclosed.rstrip('*') in MATH_ENVIRONMENTS
+                del open_environments[depth:]
+                content = text[content_start:start].strip()
+                environments.append({'name': name, 'content': content, 'start': env_start, 'end': pos})
+                if name.rstrip('*') in MATH_ENVIRONMENTS:
+                    math_expressions.append({'type': name, 'content': content,
+                                             'start': env_start, 'end': pos})
+            
+            elif kind == 'close':
+                if not groups:
+                    continue
+                name, command_start, content_start, drop = groups.pop()
+                dropped -= drop
+                if name is None:
+                    continue
+                content = text[content_start:start]
+                commands.append({'command': name, 'content': content, 'start': command_start, 'end': pos})
+                base = name.rstrip('*')
+                if base in CITATION_COMMANDS:
+                    for key in content.split(','):
+                        citations.append({'type': base, 'key': key.strip(),
+                                          'start': command_start, 'end': pos})
+                elif base in SECTION_COMMANDS:
+                    sections.append({'type': base, 'title': content, 'start': command_start, 'end': pos})
+                elif name in METADATA_COMMANDS and name not in metadata:
+                    metadata[name] = content
+                if not dropped and not drop:
+                    clean.append(' ')
+            
+            elif kind == 'argument':
+                name = match.group('name')
+                if name in _VERBATIM_COMMANDS:
+                    close = text.find('}', pos)
+                    if close < 0:
+                        continue
+                    commands.append({'command': name, 'content': text[pos:close],
+                                     'start': start, 'end': close + 1})
+                    if not dropped:
+                        clean.append(_VERBATIM_COMMANDS[name])
+                    pos = skip_to = close + 1
+                    continue
+                drop = name in _DROPPED_ARGUMENTS
+                if drop and not dropped:
+                    clean.append(_DROPPED_ARGUMENTS[name])
+                dropped += drop
+                groups.append((name, start, pos, drop))
+            
+            elif kind == 'name':
+                # Command without an argument
+                if not dropped:
+                    clean.append(' ' + match.group('name') + ' ' if math or math_depth else ' ')
+            
+            elif kind == 'math':
+                delimiter = match.group('math')
+                if math is None:
+                    math = (delimiter, start, pos)
+                    continue
+                reopen = math[0] == '$' and delimiter == '$$'
+                if reopen:
+                    # "$a$$b$": the first dollar closes a formula, the second opens the next
+                    delimiter = '$'
+                elif math[0] != delimiter:
+                    continue
+                content = text[math[2]:start]
+                if content:
+                    math_expressions.append({'type': 'inline' if delimiter == '$' else 'display',
+                                             'content': content, 'start': math[1],
+                                             'end': start + len(delimiter)})
+                math = ('$', start + 1, pos) if reopen else None
+            
+            elif kind == 'open':
+                groups.append((None, start, pos, False))
+            
+            elif kind == 'escape':
+                character = match.group('escape')
+                if character in _MATH_BRACKETS:
+                    delimiter, math_type = _MATH_BRACKETS[character]
+                    if character in '([':
+                        if math is None:
+                            math = (delimiter, start, pos)
+                    elif math is not None and math[0] == delimiter:
+                        content = text[math[2]:start]
+                        if content:
+                            math_expressions.append({'type': math_type, 'content': content,
+                                                     'start': math[1], 'end': pos})
+                        math = None
+                elif not dropped:
+                    if character in _ESCAPED_CHARACTERS:
+                        clean.append(character)
+                    elif character not in _ACCENTS:
+                        clean.append(' ')
+            
+            # Comments are skipped
+        
+        if not dropped:
+            clean.append(text[pos:])
+        
+        # Inner items close first; report everything in document order
+        position = lambda item: item['start']
+        commands.sort(key=position)
+        environments.sort(key=position)
+        math_expressions.sort(key=position)
+        citations.sort(key=position)
+        sections.sort(key=position)
+        
+        return {
+            'commands': commands,
+            'environments': environments,
             'math_expressions': math_expressions,
             'citations': citations,
-            'clean_text': clean_text
+            'metadata': metadata,
+            'sections': sections,
+            'clean_text': ' '.join(''.join(clean).split())
         }
 
-# EOF
\ No newline at end of file
+# EOF
+    
\ No newline at end of file
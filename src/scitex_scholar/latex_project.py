@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-17 10:00:00 (ywatanabe)"
+# File: src/scitex_scholar/latex_project.py
+
+"""
+Multi-file LaTeX project parsing.
+
+Manuscripts are usually split across a main file, section files pulled in
+with \\input or \\include, and BibTeX files named by \\bibliography or
+\\addbibresource. LaTeXProject follows this include graph from the root
+file, parses each file once with LaTeXParser and merges sections,
+environments, math and citations in document order, each tagged with its
+source file and offsets within that file. Parse results are cached per
+file and revalidated by modification time, size and a content digest, so
+after editing one section file only that file is parsed again.
+"""
+
+import hashlib
+import logging
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from .latex_parser import LaTeXParser
+
+logger = logging.getLogger(__name__)
+
+INCLUDE_COMMANDS = frozenset({'input', 'include', 'subfile'})
+BIBLIOGRAPHY_COMMANDS = frozenset({'bibliography', 'addbibresource'})
+
+# Merged lists whose items are tagged with their source file
+_MERGED_FIELDS = ('sections', 'environments', 'math_expressions', 'citations')
+
+_BIB_ENTRY = re.compile(r'@\s*([a-zA-Z]+)\s*[{(]')
+_BIB_KEY = re.compile(r'\s*([^,\s})]+)\s*,')
+_BIB_FIELD = re.compile(r'\s*([a-zA-Z][\w:-]*)\s*=\s*')
+_BIB_BARE_VALUE = re.compile(r'[^,})\s]+')
+_BIB_DELIMITERS = {'{': re.compile(r'[{}]'), '(': re.compile(r'[()]')}
+
+
+def parse_bibtex(text: str) -> List[Dict[str, Any]]:
+    """
+    Parse the entries of a BibTeX file.
+
+    Field values keep their inner braces; @comment, @preamble and @string
+    entries are skipped.
+
+    Args:
+        text: BibTeX source text
+
+    Returns:
+        List of dictionaries with type, key, fields, start and end
+    """
+    entries = []
+    pos = 0
+    while True:
+        match = _BIB_ENTRY.search(text, pos)
+        if match is None:
+            break
+        entry_type = match.group(1).lower()
+        end = _closing_delimiter(text, match.end(), text[match.end() - 1])
+        pos = match.end() if end < 0 else end
+        if end < 0 or entry_type in ('comment', 'preamble', 'string'):
+            continue
+        key_match = _BIB_KEY.match(text, match.end())
+        if key_match is None:
+            continue
+        entries.append({
+            'type': entry_type,
+            'key': key_match.group(1),
+            'fields': _parse_bib_fields(text, key_match.end(), end - 1),
+            'start': match.start(),
+            'end': end
+        })
+    return entries
+
+
+def _closing_delimiter(text: str, pos: int, opening: str = '{') -> int:
+    """Return the position after the delimiter closing a group opened before pos, or -1."""
+    depth = 1
+    for match in _BIB_DELIMITERS[opening].finditer(text, pos):
+        if match.group() == opening:
+            depth += 1
+        else:
+            depth -= 1
+            if depth == 0:
+                return match.end()
+    return -1
+
+
+def _parse_bib_fields(text: str, pos: int, end: int) -> Dict[str, str]:
+    """Parse the name = value fields of a BibTeX entry between pos and end."""
+    fields = {}
+    while pos < end:
+        match = _BIB_FIELD.match(text, pos, end)
+        if match is None:
+            break
+        pos = match.end()
+        if text.startswith('{', pos):
+            value_end = _closing_delimiter(text, pos + 1)
+            if value_end < 0:
+                break
+            value = text[pos + 1:value_end - 1]
+        elif text.startswith('"', pos):
+            value_end = text.find('"', pos + 1) + 1
+            if value_end <= 0:
+                break
+            value = text[pos + 1:value_end - 1]
+        else:
+            bare = _BIB_BARE_VALUE.match(text, pos, end)
+            if bare is None:
+                break
+            value_end = bare.end()
+            value = bare.group()
+        fields[match.group(1).lower()] = ' '.join(value.split())
+        comma = text.find(',', value_end, end)
+        pos = end if comma < 0 else comma + 1
+    return fields
+
+
+@dataclass
+class _SourceFile:
+    """Cached parse of one project file, valid while its stat and digest match."""
+
+    mtime_ns: int
+    size: int
+    digest: bytes
+    parsed: Dict[str, Any]
+    includes: List[Tuple[int, str, str]] = field(default_factory=list)  # (start, command, argument)
+
+
+class LaTeXProject:
+    """
+    LaTeX project rooted at a main file, with its included files.
+
+    Included paths are resolved relative to the directory of the root file,
+    as LaTeX does, adding .tex (and .bib for bibliographies) when a path
+    has no extension. Parse results are cached per file; parse() only
+    reads and parses files that changed since the previous call.
+    """
+
+    def __init__(self, root: Union[str, Path], latex_parser: Optional[LaTeXParser] = None):
+        """
+        Initialize a project.
+
+        Args:
+            root: Path of the main .tex file
+            latex_parser: Parser for the project files (defaults to a
+                LaTeXParser without its own parse cache, as results are
+                cached per file here)
+        """
+        self.root = Path(root).resolve()
+        self.base_dir = self.root.parent
+        self.latex_parser = latex_parser or LaTeXParser(cache_size=0)
+        self._files: Dict[Path, _SourceFile] = {}
+        self.parses = 0
+        self.hits = 0
+
+    def parse(self) -> Dict[str, Any]:
+        """
+        Parse the project, reusing cached results of unchanged files.
+
+        Returns:
+            Dictionary with the root path, the files in include order,
+            metadata, structure, content and clean_text (the per-file texts
+            in include order), merged environments, math_expressions and
+            citations (each item has a 'file' key and offsets within that
+            file), bibliography entries by key, citation keys missing from
+            the bibliography and unresolved include paths
+        """
+        merged = {name: [] for name in _MERGED_FIELDS}
+        state = {
+            'files': [], 'metadata': {}, 'content': {}, 'clean_text': [],
+            'bibliography': {}, 'missing_files': []
+        }
+        self._merge(self.root, [], merged, state)
+
+        seen = set(state['files'])
+        for path in list(self._files):
+            if path not in seen:
+                del self._files[path]  # No longer part of the project
+
+        bibliography = state['bibliography']
+        undefined = list(dict.fromkeys(
+            cite['key'] for cite in merged['citations'] if cite['key'] not in bibliography
+        )) if bibliography else []
+
+        return {
+            'root': str(self.root),
+            'files': [self._relative(path) for path in dict.fromkeys(state['files'])],
+            'metadata': state['metadata'],
+            'structure': {'sections': merged['sections']},
+            'content': state['content'],
+            'environments': merged['environments'],
+            'math_expressions': merged['math_expressions'],
+            'citations': merged['citations'],
+            'clean_text': ' '.join(text for text in state['clean_text'] if text),
+            'bibliography': bibliography,
+            'undefined_citations': undefined,
+            'missing_files': state['missing_files']
+        }
+
+    def get_cache_info(self) -> Dict[str, Any]:
+        """Return the number of cached files, parses and cache hits."""
+        lookups = self.parses + self.hits
+        return {
+            'files': len(self._files),
+            'parses': self.parses,
+            'hits': self.hits,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
+
+    def clear_cache(self) -> None:
+        """Drop all cached file parses."""
+        self._files.clear()
+
+    def _merge(self, path: Path, stack: List[Path], merged: Dict[str, List[Dict[str, Any]]],
+               state: Dict[str, Any]) -> None:
+        """Merge a .tex file's results, recursing into its includes at their positions."""
+        source = self._load(path, bibtex=False)
+        if source is None:
+            state['missing_files'].append(self._relative(path))
+            return
+        state['files'].append(path)
+        parsed = source.parsed
+        name = self._relative(path)
+        for key, value in parsed['metadata'].items():
+            state['metadata'].setdefault(key, value)
+        for key, value in parsed['content'].items():
+            state['content'].setdefault(key, value)
+        state['clean_text'].append(parsed['clean_text'])
+
+        items = {
+            'sections': parsed['structure']['sections'],
+            'environments': parsed['environments'],
+            'math_expressions': parsed['math_expressions'],
+            'citations': parsed['citations'],
+        }
+        next_item = dict.fromkeys(_MERGED_FIELDS, 0)
+
+        def emit_until(position: Optional[int]) -> None:
+            for field_name in _MERGED_FIELDS:
+                field_items = items[field_name]
+                i = next_item[field_name]
+                while i < len(field_items) and (position is None or field_items[i]['start'] < position):
+                    merged[field_name].append({**field_items[i], 'file': name})
+                    i += 1
+                next_item[field_name] = i
+
+        stack.append(path)
+        for start, command, argument in source.includes:
+            if command in BIBLIOGRAPHY_COMMANDS:
+                for bib_name in argument.split(','):
+                    self._add_bibliography(self._resolve(bib_name.strip(), '.bib'), state)
+                continue
+            emit_until(start)
+            child = self._resolve(argument.strip(), '.tex')
+            if child in stack:
+                logger.warning(f"Skipping circular include of {child} in {path}")
+                continue
+            self._merge(child, stack, merged, state)
+        stack.pop()
+        emit_until(None)
+
+    def _add_bibliography(self, path: Path, state: Dict[str, Any]) -> None:
+        """Add the entries of a .bib file to the bibliography."""
+        source = self._load(path, bibtex=True)
+        if source is None:
+            state['missing_files'].append(self._relative(path))
+            return
+        state['files'].append(path)
+        name = self._relative(path)
+        for entry in source.parsed['entries']:
+            state['bibliography'].setdefault(entry['key'], {**entry, 'file': name})
+
+    def _load(self, path: Path, bibtex: bool) -> Optional[_SourceFile]:
+        """
+        Return the parse of a file, from the cache if it has not changed.
+
+        A file whose modification time and size match its cache entry is
+        not read; one that was touched but has the same content digest is
+        read but not parsed again.
+        """
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        cached = self._files.get(path)
+        if cached is not None and (cached.mtime_ns, cached.size) == (stat.st_mtime_ns, stat.st_size):
+            self.hits += 1
+            return cached
+
+        try:
+            data = path.read_bytes()
+        except OSError as e:
+            logger.error(f"Error reading {path}: {str(e)}")
+            return None
+        digest = hashlib.blake2b(data, digest_size=32).digest()
+        if cached is not None and cached.digest == digest:
+            cached.mtime_ns, cached.size = stat.st_mtime_ns, stat.st_size
+            self.hits += 1
+            return cached
+
+        text = data.decode('utf-8', errors='ignore')
+        self.parses += 1
+        if bibtex:
+            source = _SourceFile(stat.st_mtime_ns, stat.st_size, digest, {'entries': parse_bibtex(text)})
+        else:
+            parsed = self.latex_parser.parse_document(text)
+            # Include commands come from the same scan; the full command list is not kept
+            includes = [
+                (command['start'], command['command'], command['content'])
+                for command in parsed.pop('commands')
+                if command['command'] in INCLUDE_COMMANDS or command['command'] in BIBLIOGRAPHY_COMMANDS
+            ]
+            source = _SourceFile(stat.st_mtime_ns, stat.st_size, digest, parsed, includes)
+        self._files[path] = source
+        return source
+
+    def _resolve(self, name: str, extension: str) -> Path:
+        """Resolve an included name relative to the root directory."""
+        path = (self.base_dir / name).resolve()
+        if not path.suffix and not path.exists():
+            path = path.with_name(path.name + extension)
+        return path
+
+    def _relative(self, path: Path) -> str:
+        """Return a path relative to the root directory where possible."""
+        try:
+            return path.relative_to(self.base_dir).as_posix()
+        except ValueError:
+            return str(path)
+
+
+# EOF
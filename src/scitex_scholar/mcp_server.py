@@ -13,11 +13,15 @@ to local documents through the Model Context Protocol.
 import asyncio
 import json
 import logging
+import sqlite3
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Union
 import mcp.server.stdio
 import mcp.types as types
 from .search_engine import SearchEngine
+from .sharded_search_engine import ShardedSearchEngine
+from .snippets import highlight
+from .sqlite_search_engine import SQLiteSearchEngine
 from .document_indexer import DocumentIndexer
 
 # Configure logging
@@ -31,8 +35,6 @@ class SciTeXSearchServer:
     def __init__(self, config: Optional[Dict[str, Any]] = None):
         """Initialize the MCP server with configuration."""
         self.config = config or {}
-        self.search_engine = SearchEngine()
-        self.indexer = DocumentIndexer(self.search_engine)
         
         # Load configuration
         self.index_paths = self.config.get('index_paths', [Path.home()])
@@ -47,6 +49,17 @@ class SciTeXSearchServer:
         # Ensure cache directory exists
         self.index_cache_path.parent.mkdir(parents=True, exist_ok=True)
         
+        # 'sqlite' keeps the index in an SQLite database at cache_path,
+        # updated in place as documents are indexed; 'sharded' splits it
+        # across 'shards' worker processes
+        if self.config.get('backend') == 'sqlite':
+            self.search_engine = SQLiteSearchEngine(self.index_cache_path)
+        elif self.config.get('backend') == 'sharded':
+            self.search_engine = ShardedSearchEngine(self.config.get('shards'))
+        else:
+            self.search_engine = SearchEngine()
+        self.indexer = DocumentIndexer(self.search_engine)
+        
     async def initialize(self):
         """Initialize the server and load existing index."""
         logger.info("Initializing SciTeX-Scholar MCP server...")
@@ -58,7 +71,8 @@ class SciTeXSearchServer:
         else:
             logger.info("No existing index found, starting fresh")
     
-    async def handle_search(self, query: str, options: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    async def handle_search(self, query: str,
+                            options: Optional[Dict[str, Any]] = None) -> Union[List[Dict[str, Any]], Dict[str, str]]:
         """
         Handle document search requests.
         
@@ -67,7 +81,8 @@ class SciTeXSearchServer:
             options: Search options (filters, limit, etc.)
             
         Returns:
-            List of search results
+            List of search results, or a dictionary with an 'error' message
+            if the backend cannot run the query
         """
         options = options or {}
         
@@ -82,26 +97,42 @@ class SciTeXSearchServer:
         if file_type:
             filters['file_type'] = file_type
         if path_filter:
-            filters['path_contains'] = path_filter
-        
-        # Perform search
-        results = self.search_engine.search(
-            query, 
-            exact_phrase=exact_phrase,
-            filters=filters
-        )
+            # Absolute paths select a directory tree, other patterns match anywhere
+            if path_filter.startswith(('/', '~')):
+                filters['file_path'] = {'$prefix': str(Path(path_filter).expanduser())}
+            else:
+                filters['file_path'] = {'$contains': path_filter}
         
-        # Limit results
-        results = results[:limit]
+        # Perform search, keeping only the top results
+        try:
+            results = self.search_engine.search(
+                query, 
+                exact_phrase=exact_phrase,
+                filters=filters,
+                top_k=limit
+            )
+        except (ValueError, sqlite3.Error) as e:
+            # Invalid queries are reported to the client as a tool error
+            logger.warning(f"Search for {query!r} failed: {e}")
+            return {'error': f"Search failed: {e}"}
         
         # Format results for MCP
         formatted_results = []
         for result in results:
+            # Fragments come from indexed word offsets where the backend records them
+            fragments = []
+            if hasattr(self.search_engine, 'snippets'):
+                fragments = self.search_engine.snippets(result['doc_id'], query)
+            if fragments:
+                snippet = '...' + highlight(fragments[0]) + '...'
+            else:
+                snippet = self._extract_snippet(str(result['content']), query)
             formatted_results.append({
                 'path': result['metadata'].get('path', ''),
                 'title': result['metadata'].get('title', Path(result['metadata'].get('path', '')).name),
                 'score': result['score'],
-                'snippet': self._extract_snippet(result['content'], query),
+                'snippet': snippet,
+                'highlights': fragments,
                 'file_type': result['metadata'].get('file_type', 'unknown'),
                 'modified': result['metadata'].get('modified', '')
             })
@@ -227,7 +258,7 @@ async def run_server():
                     "properties": {
                         "query": {
                             "type": "string",
-                            "description": "Search query"
+                            "description": "Search query. Supports AND/OR/NOT, parentheses, \"quoted phrases\", +required and -excluded terms, title:/author:/method: fields, year:2018..2022 ranges, electroenceph* wildcards and oscilation~ fuzzy terms"
                         },
                         "limit": {
                             "type": "integer",
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-17 10:00:00 (ywatanabe)"
+# File: src/scitex_scholar/normalizer.py
+
+"""
+Token normalization for indexing and queries.
+
+This module provides a pure-Python Porter stemmer, a lemma list for
+irregular scientific plurals, and Normalizer, which combines them behind a
+bounded memo cache. Token frequencies are Zipfian, so a small cache
+answers almost every lookup of a large corpus. Pass a Normalizer to
+TextProcessor to index and query with the same normalized terms, e.g.
+"networks", "network" and "networked" as "network".
+"""
+
+from functools import lru_cache
+from typing import Callable, Dict, Optional
+
+# Irregular plurals of scientific vocabulary, mapped to their singular
+# before stemming (the stemmer only strips regular suffixes)
+SCIENTIFIC_LEMMAS = {
+    'algae': 'alga',
+    'analyses': 'analysis',
+    'apices': 'apex',
+    'appendices': 'appendix',
+    'axes': 'axis',
+    'bacteria': 'bacterium',
+    'cortices': 'cortex',
+    'corpora': 'corpus',
+    'criteria': 'criterion',
+    'data': 'datum',
+    'diagnoses': 'diagnosis',
+    'foci': 'focus',
+    'formulae': 'formula',
+    'fungi': 'fungus',
+    'genera': 'genus',
+    'hypotheses': 'hypothesis',
+    'indices': 'index',
+    'larvae': 'larva',
+    'loci': 'locus',
+    'matrices': 'matrix',
+    'maxima': 'maximum',
+    'media': 'medium',
+    'minima': 'minimum',
+    'mitochondria': 'mitochondrion',
+    'nuclei': 'nucleus',
+    'phenomena': 'phenomenon',
+    'radii': 'radius',
+    'spectra': 'spectrum',
+    'stimuli': 'stimulus',
+    'strata': 'stratum',
+    'syntheses': 'synthesis',
+    'theses': 'thesis',
+    'vertices': 'vertex',
+}
+
+_VOWELS = frozenset('aeiou')
+
+_STEP2_SUFFIXES = (
+    ('ational', 'ate'), ('tional', 'tion'), ('enci', 'ence'), ('anci', 'ance'),
+    ('izer', 'ize'), ('abli', 'able'), ('alli', 'al'), ('entli', 'ent'),
+    ('eli', 'e'), ('ousli', 'ous'), ('ization', 'ize'), ('ation', 'ate'),
+    ('ator', 'ate'), ('alism', 'al'), ('iveness', 'ive'), ('fulness', 'ful'),
+    ('ousness', 'ous'), ('aliti', 'al'), ('iviti', 'ive'), ('biliti', 'ble'),
+)
+
+_STEP3_SUFFIXES = (
+    ('icate', 'ic'), ('ative', ''), ('alize', 'al'), ('iciti', 'ic'),
+    ('ical', 'ic'), ('ful', ''), ('ness', ''),
+)
+
+_STEP4_SUFFIXES = (
+    'al', 'ance', 'ence', 'er', 'ic', 'able', 'ible', 'ant', 'ement', 'ment',
+    'ent', 'ion', 'ou', 'ism', 'ate', 'iti', 'ous', 'ive', 'ize',
+)
+
+
+class PorterStemmer:
+    """
+    Porter stemmer (M. F. Porter, "An algorithm for suffix stripping", 1980).
+
+    Words are expected in lowercase; words of one or two letters and words
+    with characters other than ASCII letters are returned unchanged.
+    """
+
+    def stem(self, word: str) -> str:
+        """
+        Reduce a word to its stem.
+
+        Args:
+            word: Lowercase word
+
+        Returns:
+            Stem of the word
+        """
+        if len(word) <= 2 or not (word.isascii() and word.isalpha()):
+            return word
+        word = self._step1a(word)
+        word = self._step1b(word)
+        word = self._step1c(word)
+        word = self._replace_suffix(word, _STEP2_SUFFIXES)
+        word = self._replace_suffix(word, _STEP3_SUFFIXES)
+        word = self._step4(word)
+        return self._step5(word)
+
+    __call__ = stem
+
+    @staticmethod
+    def _is_consonant(word: str, i: int) -> bool:
+        """Return whether word[i] is a consonant ('y' after a consonant is a vowel)."""
+        letter = word[i]
+        if letter in _VOWELS:
+            return False
+        if letter == 'y':
+            return i == 0 or not PorterStemmer._is_consonant(word, i - 1)
+        return True
+
+    @classmethod
+    def _measure(cls, stem: str) -> int:
+        """Count the vowel-consonant sequences of a stem, its m in [C](VC)^m[V]."""
+        measure = 0
+        previous_vowel = False
+        for i in range(len(stem)):
+            consonant = cls._is_consonant(stem, i)
+            if consonant and previous_vowel:
+                measure += 1
+            previous_vowel = not consonant
+        return measure
+
+    @classmethod
+    def _has_vowel(cls, stem: str) -> bool:
+        return any(not cls._is_consonant(stem, i) for i in range(len(stem)))
+
+    @classmethod
+    def _ends_double_consonant(cls, stem: str) -> bool:
+        return len(stem) >= 2 and stem[-1] == stem[-2] and cls._is_consonant(stem, len(stem) - 1)
+
+    @classmethod
+    def _ends_cvc(cls, stem: str) -> bool:
+        """Return whether a stem ends consonant-vowel-consonant, the last not w, x or y."""
+        return (len(stem) >= 3 and cls._is_consonant(stem, len(stem) - 3)
+                and not cls._is_consonant(stem, len(stem) - 2)
+                and cls._is_consonant(stem, len(stem) - 1) and stem[-1] not in 'wxy')
+
+    def _step1a(self, word: str) -> str:
+        if word.endswith('sses'):
+            return word[:-2]
+        if word.endswith('ies'):
+            return word[:-2]
+        if word.endswith('ss'):
+            return word
+        if word.endswith('s'):
+            return word[:-1]
+        return word
+
+    def _step1b(self, word: str) -> str:
+        if word.endswith('eed'):
+            return word[:-1] if self._measure(word[:-3]) > 0 else word
+        for suffix in ('ed', 'ing'):
+            if word.endswith(suffix):
+                stem = word[:-len(suffix)]
+                if not self._has_vowel(stem):
+                    return word
+                if stem.endswith(('at', 'bl', 'iz')):
+                    return stem + 'e'
+                if self._ends_double_consonant(stem) and stem[-1] not in 'lsz':
+                    return stem[:-1]
+                if self._measure(stem) == 1 and self._ends_cvc(stem):
+                    return stem + 'e'
+                return stem
+        return word
+
+    def _step1c(self, word: str) -> str:
+        if word.endswith('y') and self._has_vowel(word[:-1]):
+            return word[:-1] + 'i'
+        return word
+
+    def _replace_suffix(self, word: str, suffixes) -> str:
+        """Replace the first matching suffix if the remaining stem has m > 0."""
+        for suffix, replacement in suffixes:
+            if word.endswith(suffix):
+                stem = word[:-len(suffix)]
+                return stem + replacement if self._measure(stem) > 0 else word
+        return word
+
+    def _step4(self, word: str) -> str:
+        for suffix in _STEP4_SUFFIXES:
+            if word.endswith(suffix):
+                stem = word[:-len(suffix)]
+                if self._measure(stem) <= 1:
+                    return word
+                if suffix == 'ion' and not stem.endswith(('s', 't')):
+                    return word
+                return stem
+        return word
+
+    def _step5(self, word: str) -> str:
+        if word.endswith('e'):
+            stem = word[:-1]
+            measure = self._measure(stem)
+            if measure > 1 or (measure == 1 and not self._ends_cvc(stem)):
+                word = stem
+        if word.endswith('ll') and self._measure(word) > 1:
+            word = word[:-1]
+        return word
+
+
+class Normalizer:
+    """
+    Memoized token normalizer: lemma lookup followed by stemming.
+
+    Calls are cached in an LRU cache of ``cache_size`` entries; the cache
+    is rebuilt empty when the normalizer is pickled to worker processes.
+    """
+
+    def __init__(self, stemmer: Optional[Callable[[str], str]] = None,
+                 lemmas: Optional[Dict[str, str]] = None, cache_size: int = 65536):
+        """
+        Initialize the normalizer.
+
+        Args:
+            stemmer: Function reducing a lowercase word to its stem
+                (defaults to PorterStemmer)
+            lemmas: Word -> lemma mapping applied before stemming, such as
+                SCIENTIFIC_LEMMAS
+            cache_size: Maximum number of cached words
+        """
+        self.stemmer = stemmer or PorterStemmer()
+        self.lemmas = dict(lemmas or {})
+        self.cache_size = cache_size
+        self._cached = lru_cache(maxsize=cache_size)(self._normalize)
+
+    def _normalize(self, word: str) -> str:
+        return self.stemmer(self.lemmas.get(word, word))
+
+    def __call__(self, word: str) -> str:
+        """Return the normalized form of a lowercase word."""
+        return self._cached(word)
+
+    def cache_info(self):
+        """Return the hit and miss counts of the memo cache."""
+        return self._cached.cache_info()
+
+    def __getstate__(self) -> Dict[str, object]:
+        return {'stemmer': self.stemmer, 'lemmas': self.lemmas, 'cache_size': self.cache_size}
+
+    def __setstate__(self, state: Dict[str, object]) -> None:
+        self.__init__(**state)
+
+
+# EOF
@@ -0,0 +1,454 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-17 10:00:00 (ywatanabe)"
+# File: src/scitex_scholar/postings.py
+
+"""
+Compact posting lists for the search engine.
+
+This module provides integer document identifiers, array-backed posting
+lists, set operations on sorted integer arrays, and the delta/varint
+encoding used when postings are persisted.
+"""
+
+import heapq
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+
+class DocIdTable:
+    """
+    Interning table mapping external document IDs to dense integers.
+
+    Integers are assigned in increasing order, so posting lists built by
+    appending new documents stay sorted. Re-adding or removing a document
+    retires its integer: the integer is kept in ``retired`` as a tombstone
+    until the postings are compacted.
+    """
+
+    def __init__(self):
+        """Initialize an empty table."""
+        self._ids: Dict[str, int] = {}
+        self._doc_ids: List[Optional[str]] = []
+        self.retired = set()  # Tombstoned document numbers
+
+    def add(self, doc_id: str) -> int:
+        """
+        Assign a new integer to a document, retiring any previous one.
+
+        Args:
+            doc_id: External document identifier
+
+        Returns:
+            Integer document number
+        """
+        previous = self._ids.get(doc_id)
+        if previous is not None:
+            self._doc_ids[previous] = None
+            self.retired.add(previous)
+
+        docno = len(self._doc_ids)
+        self._doc_ids.append(doc_id)
+        self._ids[doc_id] = docno
+        return docno
+
+    def remove(self, doc_id: str) -> Optional[int]:
+        """
+        Retire the integer of a document.
+
+        Args:
+            doc_id: External document identifier
+
+        Returns:
+            Retired document number, or None if the document is unknown
+        """
+        docno = self._ids.pop(doc_id, None)
+        if docno is not None:
+            self._doc_ids[docno] = None
+            self.retired.add(docno)
+        return docno
+
+    def get(self, doc_id: str) -> Optional[int]:
+        """Return the current integer of a document, or None if unknown."""
+        return self._ids.get(doc_id)
+
+    def doc_id(self, docno: int) -> Optional[str]:
+        """Return the external ID of a document number, or None if retired."""
+        return self._doc_ids[docno]
+
+    def __len__(self) -> int:
+        """Return the number of integers assigned, including retired ones."""
+        return len(self._doc_ids)
+
+    def to_list(self) -> List[Optional[str]]:
+        """Return external IDs indexed by document number."""
+        return list(self._doc_ids)
+
+    @classmethod
+    def from_list(cls, doc_ids: Sequence[Optional[str]]) -> 'DocIdTable':
+        """Rebuild a table from the output of to_list."""
+        table = cls()
+        table._doc_ids = list(doc_ids)
+        table._ids = {doc_id: docno for docno, doc_id in enumerate(table._doc_ids) if doc_id is not None}
+        table.retired = {docno for docno, doc_id in enumerate(table._doc_ids) if doc_id is None}
+        return table
+
+
+class PostingList:
+    """
+    Posting list of sorted document numbers with term frequencies.
+
+    Both columns are ``array('I')``, costing 8 bytes per posting instead of
+    a set entry holding a path string. Columns may also be read-only
+    ``memoryview`` objects over a memory-mapped segment; they are copied
+    into arrays on the first append.
+    """
+
+    __slots__ = ('doc_ids', 'freqs', 'max_tf')
+
+    def __init__(self, doc_ids: Optional[Sequence[int]] = None, freqs: Optional[Sequence[int]] = None,
+                 max_tf: Optional[int] = None):
+        """
+        Initialize a posting list.
+
+        Args:
+            doc_ids: Sorted document numbers
+            freqs: Term frequencies aligned with doc_ids
+            max_tf: Highest term frequency, computed from freqs if omitted
+        """
+        self.doc_ids = doc_ids if doc_ids is not None else array('I')
+        self.freqs = freqs if freqs is not None else array('I')
+        if max_tf is None:
+            max_tf = max(self.freqs) if len(self.freqs) else 0
+        self.max_tf = max_tf
+
+    def append(self, docno: int, tf: int) -> None:
+        """
+        Append a posting for a document newer than all existing postings.
+
+        Args:
+            docno: Document number
+            tf: Term frequency
+        """
+        if len(self.doc_ids) and docno <= self.doc_ids[-1]:
+            raise ValueError(f"Postings must be appended in increasing order: {docno}")
+        if not isinstance(self.doc_ids, array):
+            self.doc_ids = array('I', self.doc_ids)
+            self.freqs = array('I', self.freqs)
+        self.doc_ids.append(docno)
+        self.freqs.append(tf)
+        if tf > self.max_tf:
+            self.max_tf = tf
+
+    def extend(self, doc_ids: array, freqs: array) -> None:
+        """
+        Append postings for documents newer than all existing postings.
+
+        Args:
+            doc_ids: Increasing document numbers
+            freqs: Term frequencies aligned with doc_ids
+        """
+        if not len(doc_ids):
+            return
+        if len(self.doc_ids) and doc_ids[0] <= self.doc_ids[-1]:
+            raise ValueError(f"Postings must be appended in increasing order: {doc_ids[0]}")
+        if not isinstance(self.doc_ids, array):
+            self.doc_ids = array('I', self.doc_ids)
+            self.freqs = array('I', self.freqs)
+        self.doc_ids.extend(doc_ids)
+        self.freqs.extend(freqs)
+        self.max_tf = max(self.max_tf, max(freqs))
+
+    def get(self, docno: int, default: Optional[int] = None) -> Optional[int]:
+        """Return the term frequency for a document, or default if absent."""
+        i = bisect_left(self.doc_ids, docno)
+        if i < len(self.doc_ids) and self.doc_ids[i] == docno:
+            return self.freqs[i]
+        return default
+
+    def __contains__(self, docno: int) -> bool:
+        return self.get(docno) is not None
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        return zip(self.doc_ids, self.freqs)
+
+    def encode(self) -> bytes:
+        """Encode as varint count, delta-coded document numbers and frequencies."""
+        out = bytearray()
+        encode_varints([len(self.doc_ids)], out)
+        encode_varints(delta_encode(self.doc_ids), out)
+        encode_varints(self.freqs, out)
+        return bytes(out)
+
+    @classmethod
+    def decode(cls, data: bytes) -> 'PostingList':
+        """Decode the output of encode."""
+        (count,), pos = decode_varints(data, 1)
+        gaps, pos = decode_varints(data, count, pos)
+        freqs, pos = decode_varints(data, count, pos)
+        return cls(array('I', delta_decode(gaps)), array('I', freqs))
+
+
+class PositionList:
+    """
+    Positional posting list of sorted document numbers with word positions.
+
+    Positions of all documents are stored in one flat ``array('I')``;
+    ``offsets[i]:offsets[i + 1]`` delimits the positions of ``doc_ids[i]``.
+    Like PostingList, columns may be memory-mapped views copied on write.
+    """
+
+    __slots__ = ('doc_ids', 'offsets', 'positions')
+
+    def __init__(self, doc_ids: Optional[Sequence[int]] = None, offsets: Optional[Sequence[int]] = None,
+                 positions: Optional[Sequence[int]] = None):
+        """
+        Initialize a positional posting list.
+
+        Args:
+            doc_ids: Sorted document numbers
+            offsets: Start of each document's positions, plus a final end offset
+            positions: Flat ascending word positions per document
+        """
+        self.doc_ids = doc_ids if doc_ids is not None else array('I')
+        self.offsets = offsets if offsets is not None else array('I', [0])
+        self.positions = positions if positions is not None else array('I')
+
+    def append(self, docno: int, positions: Iterable[int]) -> None:
+        """
+        Append the positions of a term in a document newer than existing ones.
+
+        Args:
+            docno: Document number
+            positions: Ascending word positions
+        """
+        if len(self.doc_ids) and docno <= self.doc_ids[-1]:
+            raise ValueError(f"Postings must be appended in increasing order: {docno}")
+        if not isinstance(self.doc_ids, array):
+            self.doc_ids = array('I', self.doc_ids)
+            self.offsets = array('I', self.offsets)
+            self.positions = array('I', self.positions)
+        self.doc_ids.append(docno)
+        self.positions.extend(positions)
+        self.offsets.append(len(self.positions))
+
+    def extend(self, doc_ids: array, counts: array, positions: array) -> None:
+        """
+        Append the positions of a term in documents newer than existing ones.
+
+        Args:
+            doc_ids: Increasing document numbers
+            counts: Number of positions of each document
+            positions: Flat ascending word positions per document
+        """
+        if not len(doc_ids):
+            return
+        if len(self.doc_ids) and doc_ids[0] <= self.doc_ids[-1]:
+            raise ValueError(f"Postings must be appended in increasing order: {doc_ids[0]}")
+        if not isinstance(self.doc_ids, array):
+            self.doc_ids = array('I', self.doc_ids)
+            self.offsets = array('I', self.offsets)
+            self.positions = array('I', self.positions)
+        self.doc_ids.extend(doc_ids)
+        end = len(self.positions)
+        for count in counts:
+            end += count
+            self.offsets.append(end)
+        self.positions.extend(positions)
+
+    def get(self, docno: int) -> Optional[array]:
+        """Return the positions of the term in a document, or None if absent."""
+        i = bisect_left(self.doc_ids, docno)
+        if i < len(self.doc_ids) and self.doc_ids[i] == docno:
+            return self.positions[self.offsets[i]:self.offsets[i + 1]]
+        return None
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+
+    def encode(self) -> bytes:
+        """Encode as varint count, delta-coded documents and per-document delta positions."""
+        out = bytearray()
+        encode_varints([len(self.doc_ids)], out)
+        encode_varints(delta_encode(self.doc_ids), out)
+        for i in range(len(self.doc_ids)):
+            doc_positions = self.positions[self.offsets[i]:self.offsets[i + 1]]
+            encode_varints([len(doc_positions)], out)
+            encode_varints(delta_encode(doc_positions), out)
+        return bytes(out)
+
+    @classmethod
+    def decode(cls, data: bytes) -> 'PositionList':
+        """Decode the output of encode."""
+        (count,), pos = decode_varints(data, 1)
+        gaps, pos = decode_varints(data, count, pos)
+        result = cls(array('I', delta_decode(gaps)))
+        for _ in range(count):
+            (length,), pos = decode_varints(data, 1, pos)
+            doc_gaps, pos = decode_varints(data, length, pos)
+            result.positions.extend(delta_decode(doc_gaps))
+            result.offsets.append(len(result.positions))
+        return result
+
+
+def _gallop(values: Sequence[int], target: int, lo: int) -> int:
+    """
+    Find the first index at or after lo whose value is not below target.
+
+    Probes lo + 1, lo + 3, lo + 7, ... until the target is passed, then
+    binary searches the last gap, so the cost is logarithmic in the
+    distance moved rather than in the length of the array.
+    """
+    n = len(values)
+    if lo >= n or values[lo] >= target:
+        return lo
+    step = 1
+    hi = lo + step
+    while hi < n and values[hi] < target:
+        lo = hi
+        step <<= 1
+        hi = lo + step
+    return bisect_left(values, target, lo + 1, min(hi, n))
+
+
+def intersect(a: Sequence[int], b: Sequence[int]) -> array:
+    """
+    Intersect two sorted integer arrays.
+
+    Each element of the shorter array is located in the longer one by
+    galloping (exponential) search from the previous match, so the cost is
+    O(m log(n / m)) for m <= n.
+
+    Args:
+        a: Sorted integers
+        b: Sorted integers
+
+    Returns:
+        Sorted array of integers present in both inputs
+    """
+    if len(a) > len(b):
+        a, b = b, a
+
+    result = array('I')
+    lo = 0
+    n = len(b)
+    for value in a:
+        lo = _gallop(b, value, lo)
+        if lo == n:
+            break
+        if b[lo] == value:
+            result.append(value)
+    return result
+
+
+def difference(a: Sequence[int], b: Sequence[int]) -> array:
+    """
+    Remove the integers of one sorted array from another.
+
+    Args:
+        a: Sorted integers
+        b: Sorted integers to remove
+
+    Returns:
+        Sorted array of integers in a but not in b
+    """
+    result = array('I')
+    lo = 0
+    n = len(b)
+    for value in a:
+        lo = _gallop(b, value, lo)
+        if lo == n or b[lo] != value:
+            result.append(value)
+    return result
+
+
+def union(arrays: Iterable[Sequence[int]]) -> array:
+    """
+    Merge sorted integer arrays into one sorted array without duplicates.
+
+    The arrays are merged k ways with a heap, so equal integers arrive
+    next to each other and only the first of each run is kept.
+
+    Args:
+        arrays: Sorted integer arrays
+
+    Returns:
+        Sorted array of integers present in any input
+    """
+    result = array('I')
+    append = result.append
+    previous = -1
+    for value in heapq.merge(*arrays):
+        if value != previous:
+            append(value)
+            previous = value
+    return result
+
+
+def delta_encode(values: Sequence[int]) -> List[int]:
+    """Convert ascending integers into gaps from the previous value."""
+    previous = 0
+    gaps = []
+    for value in values:
+        gaps.append(value - previous)
+        previous = value
+    return gaps
+
+
+def delta_decode(gaps: Iterable[int]) -> List[int]:
+    """Convert gaps back into ascending integers."""
+    total = 0
+    values = []
+    for gap in gaps:
+        total += gap
+        values.append(total)
+    return values
+
+
+def encode_varints(values: Iterable[int], out: bytearray) -> None:
+    """
+    Append non-negative integers to a buffer as LEB128 varints.
+
+    Args:
+        values: Non-negative integers
+        out: Buffer to append to
+    """
+    for value in values:
+        while value >= 0x80:
+            out.append((value & 0x7F) | 0x80)
+            value >>= 7
+        out.append(value)
+
+
+def decode_varints(data: bytes, count: int, pos: int = 0) -> Tuple[List[int], int]:
+    """
+    Read LEB128 varints from a buffer.
+
+    Args:
+        data: Encoded bytes
+        count: Number of integers to read
+        pos: Offset to start reading at
+
+    Returns:
+        Tuple of (decoded integers, offset after the last one)
+    """
+    values = []
+    for _ in range(count):
+        value = 0
+        shift = 0
+        while True:
+            byte = data[pos]
+            pos += 1
+            value |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                break
+            shift += 7
+        values.append(value)
+    return values, pos
+
+
+# EOF
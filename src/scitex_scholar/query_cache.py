@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-17 10:00:00 (ywatanabe)"
+# File: src/scitex_scholar/query_cache.py
+
+"""
+Result cache for repeated search queries.
+
+Search engines key cached results by the query, the search options and
+an index generation counter that is incremented whenever documents are
+added or removed, so a changed index never serves stale results; entries
+of older generations are simply evicted.
+"""
+
+import copy
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class QueryCache:
+    """
+    Thread-safe LRU cache with an optional time-to-live.
+
+    Cached values are lists of results. ``put`` stores and ``get`` returns
+    deep copies, so callers can reorder, truncate or modify the results
+    (e.g. add highlights to a result's metadata) without affecting the
+    cache or other callers.
+    """
+
+    def __init__(self, max_size: int = 256, ttl: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize an empty cache.
+
+        Args:
+            max_size: Maximum number of cached queries (0 disables caching)
+            ttl: Seconds after which an entry expires (None keeps entries
+                until they are evicted)
+            clock: Time source, in seconds
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: 'OrderedDict[Hashable, Tuple[float, list]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """
+        Build a cache key from query parts.
+
+        Args:
+            parts: JSON-serializable values such as the generation, the
+                query, options and filters
+
+        Returns:
+            Key string, independent of dictionary ordering
+        """
+        return json.dumps(parts, sort_keys=True, default=str)
+
+    def get(self, key: Hashable) -> Optional[list]:
+        """
+        Look up cached results.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Copy of the cached results, or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl is not None and self._clock() - entry[0] > self.ttl:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            results = entry[1]
+        return copy.deepcopy(results)
+
+    def put(self, key: Hashable, results: list) -> None:
+        """
+        Store results, evicting the least recently used entries.
+
+        Args:
+            key: Cache key
+            results: Search results
+        """
+        if self.max_size <= 0:
+            return
+        results = copy.deepcopy(list(results))
+        with self._lock:
+            self._entries[key] = (self._clock(), results)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop all cached results."""
+        with self._lock:
+            self._entries.clear()
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Return the size and hit/miss counts of the cache."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+
+# EOF
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-17 10:00:00 (ywatanabe)"
+# File: src/scitex_scholar/query_parser.py
+
+"""
+Parser for the search query language.
+
+Supported syntax:
+
+- ``phase coupling``: either term (terms are combined with OR)
+- ``"phase amplitude coupling"``: exact phrase
+- ``a AND b``, ``a OR b``, ``NOT a`` and parentheses; AND binds tighter
+  than OR
+- ``+term`` (required) and ``-term`` (excluded)
+- ``title:coupling``, ``author:smith``, ``method:"wavelet transform"``:
+  terms or phrases restricted to a field
+- ``year:2018..2022``, ``year:2018..``, ``year:..2022``: ranges
+- ``electroenceph*``, ``neuro*gy``: wildcards (``*`` any characters,
+  ``?`` one character)
+- ``oscilation~``, ``oscilation~2``: terms within an edit distance
+
+Clauses on metadata fields other than the title and keywords restrict
+the results like filters: they must match but do not affect the score.
+
+Parsing never fails: unbalanced parentheses and dangling operators are
+ignored and an unterminated quote extends to the end of the query.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple, Union
+
+# Field names accepted before ':' and the metadata fields they refer to
+QUERY_FIELDS = {
+    'title': 'title',
+    'keyword': 'keywords',
+    'keywords': 'keywords',
+    'author': 'authors',
+    'authors': 'authors',
+    'method': 'methods',
+    'methods': 'methods',
+    'dataset': 'datasets',
+    'datasets': 'datasets',
+    'year': 'year',
+    'type': 'file_type',
+    'file_type': 'file_type',
+}
+
+# Fields searched as text; clauses on other fields act as filters
+TEXT_FIELDS = ('title', 'keywords')
+
+_OPERATORS = ('AND', 'OR', 'NOT')
+_FIELD_PREFIX = re.compile(r'([A-Za-z_]+):(.*)', re.DOTALL)
+_FUZZY = re.compile(r'(.+)~(\d)?')
+
+
+@dataclass
+class TermNode:
+    """Single word, optionally restricted to a field."""
+    text: str
+    field: Optional[str] = None
+
+
+@dataclass
+class PhraseNode:
+    """Quoted phrase, optionally restricted to a field."""
+    text: str
+    field: Optional[str] = None
+
+
+@dataclass
+class WildcardNode:
+    """Word pattern with '*' and '?' wildcards."""
+    pattern: str
+    field: Optional[str] = None
+
+
+@dataclass
+class FuzzyNode:
+    """Word matching terms within an edit distance (None for automatic)."""
+    text: str
+    max_edits: Optional[int] = None
+    field: Optional[str] = None
+
+
+@dataclass
+class RangeNode:
+    """Inclusive range on a metadata field; open ends are None."""
+    field: str
+    low: Optional[str]
+    high: Optional[str]
+
+
+@dataclass
+class BooleanNode:
+    """
+    Combination of clauses.
+
+    Documents must match every ``must`` and ``filter`` clause and no
+    ``must_not`` clause. Without ``must`` clauses they must match at least
+    one ``should`` clause; otherwise ``should`` clauses only contribute to
+    the score. ``filter`` clauses do not contribute to the score.
+    """
+    must: List['QueryNode'] = field(default_factory=list)
+    should: List['QueryNode'] = field(default_factory=list)
+    must_not: List['QueryNode'] = field(default_factory=list)
+    filter: List['QueryNode'] = field(default_factory=list)
+
+
+QueryNode = Union[TermNode, PhraseNode, WildcardNode, FuzzyNode, RangeNode, BooleanNode]
+
+_Token = Tuple[str, object]  # (kind, value)
+_Clause = Tuple[str, QueryNode]  # (occur, node)
+
+
+def _word(text: str, field_name: Optional[str] = None) -> QueryNode:
+    """Build the leaf of an unquoted word."""
+    match = _FUZZY.fullmatch(text)
+    if match:
+        max_edits = match.group(2)
+        return FuzzyNode(match.group(1), None if max_edits is None else int(max_edits), field_name)
+    # A trailing '?' ends a question rather than matching one character
+    if '*' in text or '?' in text[:-1]:
+        return WildcardNode(text, field_name)
+    return TermNode(text, field_name)
+
+
+def _tokenize(text: str) -> List[_Token]:
+    """Split a query into operator, parenthesis, modifier and leaf tokens."""
+    tokens: List[_Token] = []
+    i, n = 0, len(text)
+    while i < n:
+        char = text[i]
+        if char.isspace():
+            i += 1
+        elif char in '()':
+            tokens.append((char, None))
+            i += 1
+        elif char in '+-' and i + 1 < n and not text[i + 1].isspace():
+            tokens.append(('MOD', char))
+            i += 1
+        elif char == '"':
+            end = text.find('"', i + 1)
+            end = n if end < 0 else end
+            tokens.append(('LEAF', PhraseNode(text[i + 1:end])))
+            i = end + 1
+        else:
+            start = i
+            while i < n and not text[i].isspace() and text[i] not in '()"':
+                i += 1
+            word = text[start:i]
+            if word in _OPERATORS:
+                tokens.append((word, None))
+                continue
+
+            match = _FIELD_PREFIX.fullmatch(word)
+            field_name = QUERY_FIELDS.get(match.group(1).lower()) if match else None
+            if field_name is None:
+                tokens.append(('LEAF', _word(word)))
+                continue
+
+            value = match.group(2)
+            if not value and i < n and text[i] == '"':
+                end = text.find('"', i + 1)
+                end = n if end < 0 else end
+                tokens.append(('LEAF', PhraseNode(text[i + 1:end], field_name)))
+                i = end + 1
+            elif '..' in value:
+                low, high = value.split('..', 1)
+                tokens.append(('LEAF', RangeNode(field_name, low or None, high or None)))
+            elif value:
+                tokens.append(('LEAF', _word(value, field_name)))
+    return tokens
+
+
+class _Parser:
+    """Recursive descent parser over query tokens."""
+
+    def __init__(self, tokens: List[_Token]):
+        self.tokens = tokens
+        self.pos = 0
+
+    def _peek(self) -> Optional[str]:
+        return self.tokens[self.pos][0] if self.pos < len(self.tokens) else None
+
+    def parse(self) -> Optional[QueryNode]:
+        clauses = []
+        while self._peek() is not None:
+            clauses.extend(self._parse_or())
+            if self._peek() == ')':
+                self.pos += 1  # Unbalanced closing parenthesis
+        return _combine(clauses)
+
+    def _parse_or(self) -> List[_Clause]:
+        """Parse clauses joined by OR or juxtaposition up to a closing parenthesis."""
+        clauses = []
+        while self._peek() not in (None, ')'):
+            if self._peek() in ('OR', 'AND'):
+                self.pos += 1  # Dangling operator
+                continue
+            clause = self._parse_and()
+            if clause is not None:
+                clauses.append(clause)
+        return clauses
+
+    def _parse_and(self) -> Optional[_Clause]:
+        """Parse clauses joined by AND."""
+        first = self._parse_unary()
+        if self._peek() != 'AND':
+            return first
+
+        clauses = [first] if first is not None else []
+        while self._peek() == 'AND':
+            self.pos += 1
+            clause = self._parse_unary()
+            if clause is not None:
+                clauses.append(clause)
+
+        node = BooleanNode()
+        for occur, child in clauses:
+            (node.must_not if occur == 'must_not' else node.must).append(child)
+        return 'should', node
+
+    def _parse_unary(self) -> Optional[_Clause]:
+        """Parse a leaf, a parenthesized group or a negated/required clause."""
+        kind = self._peek()
+        if kind is None or kind in ('AND', 'OR', ')'):
+            return None
+        token = self.tokens[self.pos]
+        self.pos += 1
+
+        if kind in ('NOT', 'MOD'):
+            clause = self._parse_unary()
+            if clause is None:
+                return None
+            if kind == 'NOT' or token[1] == '-':
+                return 'must_not', clause[1]
+            return 'must', clause[1]
+
+        if kind == '(':
+            node = _combine(self._parse_or())
+            if self._peek() == ')':
+                self.pos += 1
+            return None if node is None else ('should', node)
+
+        return 'should', token[1]
+
+
+def _is_filter(node: QueryNode) -> bool:
+    """Check whether a leaf restricts a metadata field that is not searched as text."""
+    if isinstance(node, RangeNode):
+        return True
+    field_name = getattr(node, 'field', None)
+    return not isinstance(node, BooleanNode) and field_name is not None and field_name not in TEXT_FIELDS
+
+
+def _combine(clauses: List[_Clause]) -> Optional[QueryNode]:
+    """Combine clauses into a single node."""
+    if not clauses:
+        return None
+    if len(clauses) == 1 and clauses[0][0] != 'must_not':
+        return clauses[0][1]
+
+    node = BooleanNode()
+    for occur, child in clauses:
+        if occur == 'should' and _is_filter(child):
+            occur = 'filter'
+        getattr(node, occur).append(child)
+    return node
+
+
+def parse_query(text: str) -> Optional[QueryNode]:
+    """
+    Parse a search query.
+
+    Args:
+        text: Query string
+
+    Returns:
+        Query tree, or None if the query has no searchable clause
+    """
+    if not text:
+        return None
+    return _Parser(_tokenize(text)).parse()
+
+
+# EOF
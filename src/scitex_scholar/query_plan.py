@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-17 10:00:00 (ywatanabe)"
+# File: src/scitex_scholar/query_plan.py
+
+"""
+Execution plans for boolean queries.
+
+A plan node produces the sorted document numbers matching a clause, either
+on its own (``evaluate``) or restricted to candidates found by another
+clause (``restrict``). Conjunctions evaluate their cheapest clause and
+restrict the candidates with the others in order of increasing cost, so
+long posting lists are only probed by binary search for the surviving
+candidates instead of being read in full.
+"""
+
+from array import array
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from .filter_index import bitmap_docnos, bitmap_to_bytes
+from .postings import PositionList, PostingList, difference, intersect, union
+
+
+class PlanNode:
+    """Base class of plan nodes."""
+
+    def cost(self) -> int:
+        """Estimate the number of documents the node evaluates to."""
+        raise NotImplementedError
+
+    def evaluate(self) -> array:
+        """Return the sorted document numbers matching the node."""
+        raise NotImplementedError
+
+    def restrict(self, candidates: Sequence[int]) -> array:
+        """Return the sorted candidates matching the node."""
+        return intersect(candidates, self.evaluate())
+
+
+class TermPlan(PlanNode):
+    """Documents containing a term."""
+
+    def __init__(self, postings: PostingList):
+        self.postings = postings
+
+    def cost(self) -> int:
+        return len(self.postings)
+
+    def evaluate(self) -> array:
+        return self.postings.doc_ids
+
+    def restrict(self, candidates: Sequence[int]) -> array:
+        return intersect(candidates, self.postings.doc_ids)
+
+
+class PhrasePlan(PlanNode):
+    """Documents containing terms at consecutive positions."""
+
+    def __init__(self, position_lists: List[Tuple[PositionList, int]]):
+        """
+        Initialize the plan.
+
+        Args:
+            position_lists: Position list of each phrase term with the
+                offset of the term from the start of the phrase
+        """
+        self.position_lists = sorted(position_lists, key=lambda item: len(item[0]))
+
+    def cost(self) -> int:
+        return len(self.position_lists[0][0])
+
+    def evaluate(self) -> array:
+        return self.restrict(self.position_lists[0][0].doc_ids)
+
+    def restrict(self, candidates: Sequence[int]) -> array:
+        return array('I', (docno for docno in self.candidates(candidates) if self.matches(docno)))
+
+    def candidates(self, docnos: Sequence[int]) -> Sequence[int]:
+        """Keep the documents containing every phrase term, rarest term first."""
+        for position_list, _ in self.position_lists:
+            if not docnos:
+                break
+            docnos = intersect(docnos, position_list.doc_ids)
+        return docnos
+
+    def matches(self, docno: int) -> int:
+        """
+        Count the occurrences of the phrase in a document.
+
+        Args:
+            docno: Document containing every phrase term
+
+        Returns:
+            Number of phrase start positions consistent with every term
+        """
+        rarest_list, rarest_offset = self.position_lists[0]
+        starts = {position - rarest_offset for position in rarest_list.get(docno)}
+        for position_list, offset in self.position_lists[1:]:
+            starts.intersection_update(position - offset for position in position_list.get(docno))
+            if not starts:
+                break
+        return len(starts)
+
+
+class PredicatePlan(PlanNode):
+    """Documents of another plan passing a per-document check."""
+
+    def __init__(self, base: PlanNode, predicate: Callable[[int], bool]):
+        self.base = base
+        self.predicate = predicate
+
+    def cost(self) -> int:
+        return self.base.cost()
+
+    def evaluate(self) -> array:
+        return array('I', (docno for docno in self.base.evaluate() if self.predicate(docno)))
+
+    def restrict(self, candidates: Sequence[int]) -> array:
+        return array('I', (docno for docno in self.base.restrict(candidates) if self.predicate(docno)))
+
+
+class AllPlan(PlanNode):
+    """Every live document."""
+
+    def __init__(self, universe: Callable[[], array]):
+        self.universe = universe
+        self._docnos: Optional[array] = None
+
+    def cost(self) -> int:
+        return len(self.evaluate())
+
+    def evaluate(self) -> array:
+        if self._docnos is None:
+            self._docnos = self.universe()
+        return self._docnos
+
+    def restrict(self, candidates: Sequence[int]) -> array:
+        return array('I', candidates)
+
+
+class BitmapPlan(PlanNode):
+    """Documents set in a filter bitmap."""
+
+    def __init__(self, bitmap: int, doc_count: int):
+        self.bitmap = bitmap
+        self.bits = bitmap_to_bytes(bitmap, doc_count)
+
+    def cost(self) -> int:
+        return bin(self.bitmap).count('1')
+
+    def evaluate(self) -> array:
+        return bitmap_docnos(self.bitmap)
+
+    def restrict(self, candidates: Sequence[int]) -> array:
+        bits = self.bits
+        return array('I', (docno for docno in candidates if bits[docno >> 3] & (1 << (docno & 7))))
+
+
+class AndPlan(PlanNode):
+    """Documents matching every required plan and no excluded plan."""
+
+    def __init__(self, must: List[PlanNode], must_not: Optional[List[PlanNode]] = None):
+        self.must = sorted(must, key=lambda plan: plan.cost())
+        self.must_not = must_not or []
+
+    def cost(self) -> int:
+        return self.must[0].cost()
+
+    def evaluate(self) -> array:
+        return self._exclude(self._restrict_all(self.must[0].evaluate(), self.must[1:]))
+
+    def restrict(self, candidates: Sequence[int]) -> array:
+        return self._exclude(self._restrict_all(candidates, self.must))
+
+    @staticmethod
+    def _restrict_all(candidates: Sequence[int], plans: List[PlanNode]) -> Sequence[int]:
+        for plan in plans:
+            if not candidates:
+                break
+            candidates = plan.restrict(candidates)
+        return candidates
+
+    def _exclude(self, candidates: Sequence[int]) -> array:
+        for plan in self.must_not:
+            if not candidates:
+                break
+            candidates = difference(candidates, plan.restrict(candidates))
+        return array('I', candidates)
+
+
+class OrPlan(PlanNode):
+    """Documents matching any of several plans."""
+
+    def __init__(self, should: List[PlanNode]):
+        self.should = should
+
+    def cost(self) -> int:
+        return sum(plan.cost() for plan in self.should)
+
+    def evaluate(self) -> array:
+        return union(plan.evaluate() for plan in self.should)
+
+    def restrict(self, candidates: Sequence[int]) -> array:
+        return union(plan.restrict(candidates) for plan in self.should)
+
+
+# EOF
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-17 10:00:00 (ywatanabe)"
+# File: src/scitex_scholar/rw_lock.py
+
+"""
+Readers-writer lock for indexes shared between searches and indexing.
+
+Searches hold the lock for reading and see the index as last published;
+indexing threads hold it for writing while they apply a document, so each
+change becomes visible to searches at once.
+"""
+
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+
+class ReadWriteLock:
+    """
+    Readers-writer lock preferring writers.
+
+    Any number of threads may hold the lock for reading, or one thread for
+    writing. New readers wait while a writer is waiting, so a stream of
+    searches cannot starve indexing. Both modes are reentrant and the
+    writing thread may also acquire the lock for reading; upgrading a read
+    lock to a write lock is not supported.
+    """
+
+    def __init__(self):
+        """Initialize an unlocked lock."""
+        self._condition = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer: Optional[int] = None
+        self._writer_depth = 0
+        self._waiting_writers = 0
+        self._local = threading.local()  # read_depth, counted
+
+    def acquire_read(self) -> None:
+        """Acquire the lock for reading, waiting for writers to finish."""
+        depth = getattr(self._local, 'read_depth', 0)
+        if depth:
+            self._local.read_depth = depth + 1
+            return
+
+        me = threading.get_ident()
+        with self._condition:
+            counted = self._writer != me
+            if counted:
+                while self._writer is not None or self._waiting_writers:
+                    self._condition.wait()
+                self._readers += 1
+        self._local.counted = counted
+        self._local.read_depth = 1
+
+    def release_read(self) -> None:
+        """Release a read acquisition."""
+        depth = getattr(self._local, 'read_depth', 0)
+        if not depth:
+            raise RuntimeError("Read lock released without being held")
+        self._local.read_depth = depth - 1
+        if depth == 1 and self._local.counted:
+            with self._condition:
+                self._readers -= 1
+                if not self._readers:
+                    self._condition.notify_all()
+
+    def acquire_write(self) -> None:
+        """
+        Acquire the lock for writing, waiting for readers to finish.
+
+        Raises:
+            RuntimeError: If the calling thread holds the lock only for reading
+        """
+        me = threading.get_ident()
+        if self._writer == me:
+            self._writer_depth += 1
+            return
+        if getattr(self._local, 'read_depth', 0):
+            raise RuntimeError("Cannot upgrade a read lock to a write lock")
+
+        with self._condition:
+            self._waiting_writers += 1
+            try:
+                while self._writer is not None or self._readers:
+                    self._condition.wait()
+            finally:
+                self._waiting_writers -= 1
+            self._writer = me
+            self._writer_depth = 1
+
+    def release_write(self) -> None:
+        """Release a write acquisition."""
+        if self._writer != threading.get_ident():
+            raise RuntimeError("Write lock released by a thread not holding it")
+        with self._condition:
+            self._writer_depth -= 1
+            if not self._writer_depth:
+                self._writer = None
+                self._condition.notify_all()
+
+    @contextmanager
+    def read(self) -> Iterator[None]:
+        """Hold the lock for reading within a with block."""
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write(self) -> Iterator[None]:
+        """Hold the lock for writing within a with block."""
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
+
+
+# EOF
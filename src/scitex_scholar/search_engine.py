@@ -10,9 +10,48 @@ This module provides functionality for indexing and searching scientific
 documents with support for keyword search, phrase matching, and ranking.
 """
 
+import base64
+import heapq
+import math
 import re
-from typing import List, Dict, Any, Optional
-from .text_processor import TextProcessor
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, repeat
+from pathlib import Path
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+from .text_processor import DETECTION_PREFIX, TextProcessor, TokenizedText
+from .filter_index import FilterIndex, bitmap_docnos, bitmap_to_bytes, match_filters
+from .postings import (
+    DocIdTable, PostingList, PositionList, intersect,
+    encode_varints, decode_varints
+)
+from .index_segment import (
+    SegmentReader, SegmentSet, SegmentDocIdTable, SegmentDocLengths,
+    SegmentDocuments, SegmentTermIndex, write_segment
+)
+from .query_cache import QueryCache
+from .query_parser import (
+    BooleanNode, FuzzyNode, QueryNode, RangeNode, TermNode, WildcardNode, parse_query
+)
+from .query_plan import (
+    AllPlan, AndPlan, BitmapPlan, OrPlan, PhrasePlan, PlanNode, PredicatePlan, TermPlan
+)
+from .rw_lock import ReadWriteLock
+from .snippets import build_fragments
+from .stored_fields import StoredDocument, TextCompressor
+from .term_dictionary import TermDictionary
+
+
+# Metadata fields indexed alongside the body text, with integer boosts.
+# A term in the title counts as if it appeared `weight` times in the body
+# (BM25F-style field weighting folded into a single weighted term frequency).
+DEFAULT_FIELD_WEIGHTS = {
+    'title': 3,
+    'keywords': 2,
+}
+
+# Maximum number of index terms a wildcard or fuzzy query term expands to
+MAX_TERM_EXPANSIONS = 64
 
 
 class SearchEngine:
@@ -21,13 +60,73 @@ class SearchEngine:
     
     Provides methods for indexing documents and performing various types
     of searches including keyword, phrase, and filtered searches.
+    
+    Keyword queries are ranked with BM25. Term frequencies and document
+    lengths are recorded when documents are added, so scoring only walks
+    the posting lists of the query terms. Queries using boolean operators,
+    phrases or fields (see :mod:`scitex_scholar.query_parser`) are compiled
+    to an execution plan that intersects the rarest posting lists first.
+    Wildcard and fuzzy terms, and terms missing from the index, are
+    expanded with a term dictionary (see :mod:`scitex_scholar.term_dictionary`).
+    A positional index over the body text answers exact-phrase queries by
+    intersecting position lists.
+    When a ``top_k`` limit is given, only the best ``top_k`` documents are
+    kept in a bounded heap and MaxScore pruning skips candidates that cannot
+    reach it.
+    
+    Documents are interned to dense integers and postings are stored as
+    sorted ``array('I')`` columns (see :mod:`scitex_scholar.postings`).
+    Common metadata fields are indexed so filters are resolved to a bitmap
+    before scoring (see :mod:`scitex_scholar.filter_index`).
+    The index can be saved as binary segments and reopened via mmap, after
+    which new documents are indexed in memory on top of the segments and
+    can be flushed as a new segment (see :mod:`scitex_scholar.segment_store`).
+    
+    The engine can be shared between indexing threads and searches.
+    Documents are processed outside of ``lock`` and published under its
+    write side, so a search, which holds the read side, sees every
+    document either fully indexed or not at all.
+    
+    Batches of documents added with ``add_documents`` are published under
+    a single write lock, with the postings of each term merged once.
+    
+    Search results are cached by query, options and index ``generation``,
+    which every change to the indexed documents increments.
     """
     
-    def __init__(self):
-        """Initialize SearchEngine with empty document index."""
+    def __init__(self, k1: float = 1.2, b: float = 0.75,
+                 field_weights: Optional[Dict[str, int]] = None,
+                 cache_size: int = 256, cache_ttl: Optional[float] = None,
+                 text_processor: Optional[TextProcessor] = None):
+        """
+        Initialize SearchEngine with empty document index.
+        
+        Args:
+            k1: BM25 term frequency saturation parameter
+            b: BM25 document length normalization parameter
+            field_weights: Metadata fields to index with their integer boosts
+            cache_size: Number of query results to cache (0 disables caching)
+            cache_ttl: Seconds after which cached results expire
+            text_processor: Tokenizer for documents and queries (e.g.
+                ``TextProcessor(scientific_tokens=True)``)
+        """
         self.documents = {}
-        self.text_processor = TextProcessor()
-        self.index = {}  # Inverted index for efficient searching
+        self.text_processor = text_processor or TextProcessor()
+        self.doc_table = DocIdTable()  # doc_id <-> integer document number
+        self.index: Dict[str, PostingList] = {}  # Inverted index with term frequencies
+        self.positions: Dict[str, PositionList] = {}  # Positional index over body text
+        self.filter_index = FilterIndex()  # Metadata value -> document numbers
+        self._term_dictionary: Optional[TermDictionary] = None  # Built on first expansion
+        self.doc_lengths = array('I')  # Weighted document length by document number
+        self.total_length = 0
+        self.segments: Optional[SegmentSet] = None  # Open segments, if any
+        self.lock = ReadWriteLock()  # Searches read, index changes write
+        self.generation = 0  # Incremented on every change to the indexed documents
+        self.query_cache = QueryCache(cache_size, cache_ttl)
+        
+        self.k1 = k1
+        self.b = b
+        self.field_weights = dict(DEFAULT_FIELD_WEIGHTS if field_weights is None else field_weights)
     
     def add_document(self, doc_id: str, content: str, metadata: Optional[Dict] = None) -> bool:
         """
@@ -41,51 +140,538 @@ class SearchEngine:
         Returns:
             True if document was added successfully
         """
-        if not doc_id or not content:
+        prepared = self._prepare_document(doc_id, content, metadata)
+        if prepared is None:
             return False
         
-        # Detect document type and process accordingly
-        doc_type = self.text_processor.detect_document_type(content)
+        # Publish the document and its postings together
+        with self.lock.write():
+            self._index_documents([prepared])
         
-        if doc_type == 'latex':
-            # Use enhanced LaTeX processing
-            processed = self.text_processor.process_latex_document(content)
+        return True
+    
+    def add_documents(self, documents: Iterable[Tuple[str, str, Optional[Dict]]],
+                      processes: Optional[int] = None) -> List[bool]:
+        """
+        Add a batch of documents to the search index.
+        
+        Documents are processed outside of the lock, optionally in worker
+        processes, and published together under a single write lock. The
+        postings of each term are gathered across the batch and appended
+        to its posting list in one step, so a batch costs one index lookup
+        per distinct term instead of one per term occurrence per document.
+        
+        Args:
+            documents: (doc_id, content, metadata) tuples
+            processes: Number of worker processes tokenizing the documents
+                (documents are processed in this process if None or 1)
+            
+        Returns:
+            For each document, True if it was added successfully
+        """
+        documents = list(documents)
+        if processes is not None and processes > 1 and len(documents) > 1:
+            # Several documents per task amortize pickling the worker arguments
+            chunk_size = max(1, len(documents) // (processes * 4))
+            chunks = [documents[i:i + chunk_size] for i in range(0, len(documents), chunk_size)]
+            with ProcessPoolExecutor(processes) as executor:
+                prepared = [
+                    item
+                    for chunk in executor.map(_prepare_documents, repeat(self.field_weights),
+                                          repeat(self.text_processor), chunks)
+                    for item in chunk
+                ]
         else:
-            # Use standard text processing
-            processed = self.text_processor.process_document(content)
-        
-        # Store document with enhanced metadata
-        self.documents[doc_id] = {
-            'content': content,
-            'processed': processed,
-            'metadata': metadata or {},
-            'document_type': doc_type
-        }
+            prepared = [self._prepare_document(*document) for document in documents]
+        
+        batch = [item for item in prepared if item is not None]
+        if batch:
+            with self.lock.write():
+                self._index_documents(batch)
         
-        # Update inverted index with all keywords
-        all_keywords = processed['keywords']
-        if 'math_keywords' in processed:
-            all_keywords.extend(processed['math_keywords'])
+        return [item is not None for item in prepared]
+    
+    def add_document_stream(self, doc_id: str, chunks: Iterable[str],
+                            metadata: Optional[Dict] = None) -> bool:
+        """
+        Add a document read as text chunks, such as the pages of a thesis.
         
-        self._update_index(doc_id, all_keywords)
+        The type of the document is detected on its first DETECTION_PREFIX
+        characters. Plain text is tokenized and compressed chunk by chunk,
+        so the whole text is never held in memory; its sections are not
+        extracted and its char_count counts raw characters. LaTeX sources
+        are parsed as a whole, so their chunks are joined and added with
+        add_document.
+        
+        Args:
+            doc_id: Unique document identifier
+            chunks: Text chunks in document order
+            metadata: Optional document metadata
+            
+        Returns:
+            True if document was added successfully
+        """
+        if not doc_id:
+            return False
+        
+        chunks = iter(chunks)
+        head = []
+        size = 0
+        for chunk in chunks:
+            head.append(chunk)
+            size += len(chunk)
+            if size >= DETECTION_PREFIX:
+                break
+        prefix = ''.join(head)
+        doc_type = self.text_processor.detect_document_type(prefix)
+        if doc_type == 'latex':
+            return self.add_document(doc_id, prefix + ''.join(chunks), metadata)
+        
+        compressor = TextCompressor()
+        tokens = self.text_processor.tokenize_stream(compressor.compress_chunks(chain([prefix], chunks)))
+        if not tokens.char_count:
+            return False
+        
+        metadata = metadata or {}
+        processed = {'word_count': tokens.split_count, 'char_count': tokens.char_count}
+        term_freqs, positions = self._analyze_document(tokens, processed, metadata)
+        stored = StoredDocument(compressor.finish(), processed, metadata, doc_type, tokens.offsets)
+        
+        with self.lock.write():
+            self._index_documents([(doc_id, stored, term_freqs, positions)])
         
         return True
     
-    def _update_index(self, doc_id: str, keywords: List[str]) -> None:
+    def _prepare_document(self, doc_id: str, content: str, metadata: Optional[Dict] = None
+                          ) -> Optional[Tuple[str, StoredDocument, Dict[str, int], Dict[str, List[int]]]]:
         """
-        Update the inverted index with document keywords.
+        Process a document and compute its postings without touching the index.
+        
+        Args:
+            doc_id: Unique document identifier
+            content: Document content (plain text or LaTeX)
+            metadata: Optional document metadata
+            
+        Returns:
+            Tuple of (doc_id, stored document, term frequencies, body term
+            positions), or None if the document is empty
+        """
+        if not doc_id or not content:
+            return None
+        
+        metadata = metadata or {}
+        doc_type, processed, tokens = self._process_content(content)
+        term_freqs, positions = self._analyze_document(tokens, processed, metadata)
+        
+        # Only the compressed text, the small processed fields and the word
+        # offsets of the body text (for snippets) are kept
+        stored = StoredDocument.create(content, processed, metadata, doc_type, tokens.offsets)
+        return doc_id, stored, term_freqs, positions
+    
+    def _process_content(self, content: str) -> Tuple[str, Dict[str, Any], TokenizedText]:
+        """
+        Detect the type of a document and process its text accordingly.
+        
+        Args:
+            content: Document content (plain text or LaTeX)
+            
+        Returns:
+            Tuple of (document type, processed document, tokens of the body
+            text returned by _body_text)
+        """
+        return self.text_processor.analyze_document(content)
+    
+    @staticmethod
+    def _body_text(content: str, doc_type: str, processed: Dict[str, Any]) -> str:
+        """
+        Return the text whose word positions are indexed.
+        
+        Cleaning plain text only collapses whitespace, which keeps its words,
+        so positions also count the words of the raw text; cleaned LaTeX has
+        other words than its source.
+        """
+        return processed['cleaned_text'] if doc_type == 'latex' else content
+    
+    def remove_document(self, doc_id: str) -> bool:
+        """
+        Remove a document from the search index.
+        
+        The document number is tombstoned: its postings stay in place but
+        are skipped by queries and excluded from document frequencies until
+        the index is compacted.
         
         Args:
             doc_id: Document identifier
-            keywords: List of keywords from the document
+            
+        Returns:
+            True if the document was removed, False if it was not indexed
+        """
+        with self.lock.write():
+            docno = self.doc_table.remove(doc_id)
+            if docno is None:
+                return False
+        
+            del self.documents[doc_id]
+            self.total_length -= self.doc_lengths[docno]
+            self.generation += 1
+            return True
+    
+    def update_document(self, doc_id: str, content: str, metadata: Optional[Dict] = None) -> bool:
+        """
+        Replace the content of an indexed document.
+        
+        Args:
+            doc_id: Document identifier
+            content: New document content
+            metadata: New metadata (the current metadata is kept if None)
+            
+        Returns:
+            True if the document was updated, False if it was not indexed
         """
-        for keyword in keywords:
-            if keyword not in self.index:
-                self.index[keyword] = set()
-            self.index[keyword].add(doc_id)
+        if metadata is None:
+            with self.lock.read():
+                if self.doc_table.get(doc_id) is None:
+                    return False
+                metadata = self.documents[doc_id]['metadata']
+        
+        # Process the new text outside of the lock, as add_document does
+        prepared = self._prepare_document(doc_id, content, metadata)
+        if prepared is None:
+            return False
+        
+        with self.lock.write():
+            # The document may have been removed while it was processed
+            if self.doc_table.get(doc_id) is None:
+                return False
+            self._index_documents([prepared])
+        
+        return True
+    
+    def compact(self) -> int:
+        """
+        Drop tombstoned postings and renumber live documents densely.
+        
+        Only in-memory indexes are compacted here; segments opened with
+        open_segments are compacted when SegmentStore merges them.
+        
+        Returns:
+            Number of tombstones removed
+        """
+        with self.lock.write():
+            if self.segments is not None:
+                raise ValueError("Segment-backed indexes are compacted by SegmentStore merges")
+        
+            table = DocIdTable()
+            lengths = array('I')
+            remap = {}
+            for docno in range(len(self.doc_table)):
+                doc_id = self.doc_table.doc_id(docno)
+                if doc_id is not None:
+                    remap[docno] = table.add(doc_id)
+                    lengths.append(self.doc_lengths[docno])
+        
+            removed = len(self.doc_table) - len(table)
+            if not removed:
+                return 0
+        
+            index = {}
+            for term, postings in self.index.items():
+                compacted = PostingList()
+                for docno, tf in postings:
+                    if docno in remap:
+                        compacted.append(remap[docno], tf)
+                if compacted:
+                    index[term] = compacted
+        
+            positions = {}
+            for term, position_list in self.positions.items():
+                compacted = PositionList()
+                for i, docno in enumerate(position_list.doc_ids):
+                    if docno in remap:
+                        compacted.append(remap[docno], position_list.positions[position_list.offsets[i]:position_list.offsets[i + 1]])
+                if compacted:
+                    positions[term] = compacted
+        
+            self.filter_index = self.filter_index.remap(remap)
+            self._term_dictionary = None
+            self.doc_table = table
+            self.doc_lengths = lengths
+            self.index = index
+            self.positions = positions
+            self.generation += 1
+            return removed
+    
+    def _analyze_document(self, tokens: TokenizedText, processed: Dict[str, Any],
+                          metadata: Dict) -> Tuple[Dict[str, int], Dict[str, List[int]]]:
+        """
+        Compute weighted term frequencies and body term positions for a document.
+        
+        Args:
+            tokens: Tokens of the body text
+            processed: Output of TextProcessor.process_document/process_latex_document
+            metadata: Document metadata
+            
+        Returns:
+            Tuple of (term -> weighted frequency, term -> body word positions)
+        """
+        positions = tokens.positions
+        term_freqs = dict(tokens.frequencies)
+        
+        normalize = self.text_processor.normalizer
+        for keyword in processed.get('math_keywords', []):
+            if normalize is not None:
+                keyword = normalize(keyword)
+            term_freqs[keyword] = term_freqs.get(keyword, 0) + 1
+        
+        for field, weight in self.field_weights.items():
+            value = metadata.get(field)
+            if not value:
+                continue
+            if isinstance(value, (list, tuple, set)):
+                value = ' '.join(str(item) for item in value)
+            for term, count in self.text_processor.keyword_frequencies(str(value)).items():
+                term_freqs[term] = term_freqs.get(term, 0) + count * weight
+        
+        return term_freqs, positions
+    
+    def _index_documents(self, batch: List[Tuple[str, StoredDocument, Dict[str, int],
+                                                 Dict[str, List[int]]]]) -> None:
+        """
+        Store documents and add their terms to the inverted and positional indexes.
+        
+        Each document receives a new document number, so its postings are
+        appended at the end of each list. Postings of a previous version of
+        a document stay in place, tombstoned, until the index is compacted.
+        Postings are first grouped by term so each list is extended once.
+        
+        Args:
+            batch: (doc_id, stored document, term -> weighted frequency,
+                body term -> word positions) tuples as returned by
+                _prepare_document
+        """
+        batch_postings: Dict[str, Tuple[array, array]] = {}
+        batch_positions: Dict[str, Tuple[array, array, array]] = {}
+        
+        for doc_id, stored, term_freqs, positions in batch:
+            previous = self.doc_table.get(doc_id)
+            if previous is not None:
+                self.total_length -= self.doc_lengths[previous]
+            
+            docno = self.doc_table.add(doc_id)
+            self.documents[doc_id] = stored
+            
+            for term, tf in term_freqs.items():
+                columns = batch_postings.get(term)
+                if columns is None:
+                    columns = batch_postings[term] = (array('I'), array('I'))
+                columns[0].append(docno)
+                columns[1].append(tf)
+            
+            for term, term_positions in positions.items():
+                columns = batch_positions.get(term)
+                if columns is None:
+                    columns = batch_positions[term] = (array('I'), array('I'), array('I'))
+                columns[0].append(docno)
+                columns[1].append(len(term_positions))
+                columns[2].extend(term_positions)
+            
+            self.filter_index.add(docno, stored.metadata)
+            
+            length = sum(term_freqs.values())
+            self.doc_lengths.append(length)
+            self.total_length += length
+        
+        # Lists are stored back so segment-backed indexes record the term as changed
+        for term, (doc_ids, freqs) in batch_postings.items():
+            postings = self.index.get(term)
+            if postings is None:
+                postings = PostingList()
+                if self._term_dictionary is not None:
+                    self._term_dictionary.add(term)
+            postings.extend(doc_ids, freqs)
+            self.index[term] = postings
+        
+        for term, (doc_ids, counts, term_positions) in batch_positions.items():
+            position_list = self.positions.get(term)
+            if position_list is None:
+                position_list = PositionList()
+            position_list.extend(doc_ids, counts, term_positions)
+            self.positions[term] = position_list
+        
+        self.generation += 1
+    
+    def rebuild_index(self) -> None:
+        """Rebuild the inverted index and length statistics from stored documents."""
+        with self.lock.write():
+            self.doc_table = DocIdTable()
+            self.index = {}
+            self.positions = {}
+            self.filter_index = FilterIndex()
+            self._term_dictionary = None
+            self.doc_lengths = array('I')
+            self.total_length = 0
+            self.segments = None
+        
+            batch = []
+            for doc_id, doc in list(self.documents.items()):
+                # Text-derived fields are not stored, so the text is processed again
+                content = doc['content']
+                doc_type, processed, tokens = self._process_content(content)
+                stored = StoredDocument.from_dict(doc)
+                if stored.offsets is None:
+                    # Stored by an earlier version
+                    stored = StoredDocument.create(content, processed, stored.metadata, doc_type, tokens.offsets)
+                term_freqs, positions = self._analyze_document(tokens, processed, stored.metadata)
+                batch.append((doc_id, stored, term_freqs, positions))
+            self._index_documents(batch)
+    
+    def export_index(self) -> Dict[str, Any]:
+        """
+        Export the index in a JSON-serializable form.
+        
+        Postings are delta/varint encoded and stored as base64 strings.
+        
+        Returns:
+            Dictionary accepted by import_index
+        """
+        with self.lock.read():
+            lengths = bytearray()
+            encode_varints(self.doc_lengths, lengths)
+            return {
+                'doc_ids': self.doc_table.to_list(),
+                'doc_lengths': base64.b64encode(bytes(lengths)).decode('ascii'),
+                'index': {
+                    term: base64.b64encode(postings.encode()).decode('ascii')
+                    for term, postings in self.index.items()
+                },
+                'positions': {
+                    term: base64.b64encode(position_list.encode()).decode('ascii')
+                    for term, position_list in self.positions.items()
+                },
+            }
+    
+    def import_index(self, state: Dict[str, Any]) -> None:
+        """
+        Restore the index from the output of export_index.
+        
+        Args:
+            state: Exported index state
+        """
+        with self.lock.write():
+            self.doc_table = DocIdTable.from_list(state['doc_ids'])
+            self.segments = None
+            self._term_dictionary = None
+            lengths, _ = decode_varints(base64.b64decode(state['doc_lengths']), len(self.doc_table))
+            self.doc_lengths = array('I', lengths)
+            self.total_length = sum(
+                length for docno, length in enumerate(self.doc_lengths)
+                if self.doc_table.doc_id(docno) is not None
+            )
+            self.index = {
+                term: PostingList.decode(base64.b64decode(data))
+                for term, data in state['index'].items()
+            }
+            self.positions = {
+                term: PositionList.decode(base64.b64decode(data))
+                for term, data in state['positions'].items()
+            }
+        
+            # The filter index is rebuilt from the stored metadata
+            self.filter_index = FilterIndex()
+            for docno in range(len(self.doc_table)):
+                doc_id = self.doc_table.doc_id(docno)
+                if doc_id is not None:
+                    self.filter_index.add(docno, self.documents[doc_id]['metadata'])
+            self.generation += 1
+    
+    def save_segment(self, directory: Path) -> Dict[str, Any]:
+        """
+        Save the index and stored documents as a binary segment.
+        
+        Args:
+            directory: Segment directory to create
+            
+        Returns:
+            Segment metadata
+        """
+        with self.lock.read():
+            return write_segment(self, directory)
+    
+    def open_segment(self, directory: Path) -> None:
+        """
+        Replace the current index with a memory-mapped segment.
+        
+        Opening does not read postings or documents; they are paged in when
+        queries touch them.
+        
+        Args:
+            directory: Segment directory written by save_segment
+        """
+        self.open_segments([directory])
+    
+    def open_segments(self, directories: List[Path],
+                      deletes: Optional[List[Iterable[int]]] = None) -> None:
+        """
+        Replace the current index with a set of memory-mapped segments.
+        
+        Args:
+            directories: Segment directories, oldest first
+            deletes: Deleted document numbers local to each segment
+        """
+        with self.lock.write():
+            reader = SegmentSet([SegmentReader(directory) for directory in directories], deletes)
+            self.segments = reader
+            self.doc_table = SegmentDocIdTable(reader)
+            self.documents = SegmentDocuments(reader)
+            self.index = SegmentTermIndex(reader, 'postings')
+            self.positions = SegmentTermIndex(reader, 'positions')
+            self.filter_index = reader.filter_index()
+            self._term_dictionary = None
+            self.doc_lengths = SegmentDocLengths(reader)
+            self.total_length = reader.total_length
+            self.generation += 1
+    
+    def flush_segment(self, directory: Path) -> Optional[Dict[str, Any]]:
+        """
+        Write the documents added since the segments were opened as a new segment.
+        
+        Only the buffered documents and the terms they touched are written,
+        so the cost does not depend on the size of the open segments. The
+        engine keeps serving from memory until it is reopened.
+        
+        Args:
+            directory: Segment directory to create
+            
+        Returns:
+            Segment metadata, or None if no live documents were buffered
+        """
+        with self.lock.read():
+            if self.segments is None:
+                start, terms = 0, None
+            else:
+                start = self.segments.doc_count
+                terms = set(self.index.changed_terms()) | set(self.positions.changed_terms())
+        
+            if all(self.doc_table.doc_id(docno) is None for docno in range(start, len(self.doc_table))):
+                return None
+            return write_segment(self, directory, start=start, terms=terms)
+    
+    def segment_deletes(self) -> List[List[int]]:
+        """
+        Return the deleted document numbers local to each open segment.
+        
+        Returns:
+            One sorted list per segment, oldest first (empty without segments)
+        """
+        with self.lock.read():
+            if self.segments is None:
+                return []
+            return self.doc_table.segment_deletes()
     
     def search(self, query: str, exact_phrase: bool = False, 
-               filters: Optional[Dict] = None) -> List[Dict[str, Any]]:
+               filters: Optional[Dict] = None,
+               top_k: Optional[int] = None,
+               collection_stats: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
         """
         Search for documents matching the query.
         
@@ -93,173 +679,781 @@ class SearchEngine:
             query: Search query string
             exact_phrase: Whether to search for exact phrase
             filters: Optional metadata filters
+            top_k: Maximum number of results to return (None returns all matches)
+            collection_stats: Corpus statistics to compute BM25 weights from
+                instead of this engine's own, as returned by
+                collection_statistics and summed over the shards of a
+                partitioned corpus
             
         Returns:
             List of search results with scores
         """
-        if not query:
+        if not query or (top_k is not None and top_k <= 0):
             return []
         
-        if exact_phrase:
-            return self._phrase_search(query, filters)
+        with self.lock.read():
+            key = QueryCache.make_key(
+                # Operators are case-sensitive, so only whitespace is normalized
+                self.generation, ' '.join(query.split()),
+                exact_phrase, filters, top_k, collection_stats
+            )
+            results = self.query_cache.get(key)
+            if results is not None:
+                return results
+            
+            if exact_phrase:
+                results = self._phrase_search(query, filters, top_k)
+            else:
+                results = self._query_search(query, filters, top_k, collection_stats)
+            self.query_cache.put(key, results)
+            return results
+    
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get index and query cache statistics."""
+        with self.lock.read():
+            return {
+                'total_documents': len(self.documents),
+                'segments': 0 if self.segments is None else len(self.segments.directories),
+                'tombstones': len(self.doc_table) - len(self.documents),
+                'generation': self.generation,
+                'query_cache': self.query_cache.get_statistics()
+            }
+    
+    def snippets(self, doc_id: str, query: str, max_fragments: int = 3,
+                 fragment_words: int = 30) -> List[Dict[str, Any]]:
+        """
+        Build highlighted fragments of a document for a query.
+        
+        Query terms are located with the positional index and mapped to
+        characters with the word offsets recorded at indexing time, so
+        only the selected fragments are sliced out of the text.
+        
+        Args:
+            doc_id: Document identifier
+            query: Search query string
+            max_fragments: Maximum number of fragments
+            fragment_words: Fragment length in words
+            
+        Returns:
+            Fragments, best first, as returned by
+            scitex_scholar.snippets.build_fragments (empty if no query term
+            occurs in the body text)
+        """
+        with self.lock.read():
+            docno = self.doc_table.get(doc_id)
+            if docno is None or max_fragments <= 0:
+                return []
+            
+            hits = []
+            for term_number, term in enumerate(self._scoring_terms(query)):
+                position_list = self.positions.get(term)
+                term_positions = position_list.get(docno) if position_list else None
+                hits.extend((position, term_number) for position in term_positions or ())
+            if not hits:
+                return []
+            hits.sort()
+            
+            stored = StoredDocument.from_dict(self.documents[doc_id])
+        
+        if stored.offsets is None:
+            # Stored by an earlier version without offsets
+            content = stored['content']
+            doc_type, processed, tokens = self._process_content(content)
+            text, offsets = self._body_text(content, doc_type, processed), tokens.offsets
         else:
-            return self._keyword_search(query, filters)
+            text, offsets = stored.body_text(), stored.offsets
+        return build_fragments(text, offsets, hits, max_fragments, fragment_words,
+                               self.text_processor.token_pattern)
     
-    def _keyword_search(self, query: str, filters: Optional[Dict] = None) -> List[Dict[str, Any]]:
+    def collection_statistics(self, query: str) -> Dict[str, Any]:
         """
-        Perform keyword-based search.
+        Get the corpus statistics that BM25 scores of a query depend on.
+        
+        Statistics of several engines holding parts of one corpus can be
+        summed and passed back to search as ``collection_stats``, so that
+        every part scores with the IDF of the whole corpus.
+        
+        Args:
+            query: Search query string
+            
+        Returns:
+            Dictionary with the live document count, the total weighted
+            document length, the document frequency of each query term and
+            the edit distance at which each query term was corrected
+            (0 if it is indexed, None if no index term is close enough)
+        """
+        with self.lock.read():
+            doc_freqs = {}
+            expansions: Dict[str, Optional[int]] = {}
+            for term in self._scoring_terms(query, expansions):
+                postings = self.index.get(term)
+                doc_freq = self._doc_freq(postings) if postings else 0
+                if doc_freq:
+                    doc_freqs[term] = doc_freq
+            return {
+                'doc_count': len(self.documents),
+                'total_length': self.total_length,
+                'doc_freqs': doc_freqs,
+                'expansions': expansions
+            }
+    
+    def _scoring_terms(self, query: str,
+                       expansions: Optional[Dict[str, Optional[int]]] = None) -> List[str]:
+        """Return the expanded index terms a query is scored on."""
+        node = parse_query(query) if query else None
+        if node is None:
+            return []
+        keywords = self._disjunction_terms(node, expansions)
+        if keywords is not None:
+            return keywords
+        scoring_terms: List[str] = []
+        self._compile(node, scoring_terms, expansions)
+        return list(dict.fromkeys(scoring_terms))
+    
+    def _query_search(self, query: str, filters: Optional[Dict] = None,
+                      top_k: Optional[int] = None,
+                      collection_stats: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Perform a search with the query language.
+        
+        Queries that are plain lists of terms are ranked by _keyword_search
+        after expanding wildcard, fuzzy and unknown terms. Unknown terms are
+        corrected as recorded in the ``expansions`` of collection_stats, so
+        that they are only corrected if missing from the whole corpus.
+        Other queries are compiled to a plan (see :mod:`scitex_scholar.query_plan`)
+        and the matching documents are ranked by BM25 over the terms of
+        their non-excluded clauses.
         
         Args:
             query: Search query
             filters: Optional metadata filters
+            top_k: Maximum number of results to return
+            collection_stats: Optional corpus statistics to score with
             
         Returns:
             List of search results
         """
-        query_keywords = self.text_processor.extract_keywords(query)
-        if not query_keywords:
+        node = parse_query(query)
+        if node is None or not self.documents:
             return []
         
-        # Find documents containing query keywords
-        matching_docs = set()
-        keyword_scores = {}
+        expansions = None
+        if collection_stats is not None and collection_stats.get('expansions') is not None:
+            expansions = dict(collection_stats['expansions'])
         
-        for keyword in query_keywords:
-            if keyword in self.index:
-                docs_with_keyword = self.index[keyword]
-                matching_docs.update(docs_with_keyword)
-                
-                # Score based on keyword frequency
-                for doc_id in docs_with_keyword:
-                    if doc_id not in keyword_scores:
-                        keyword_scores[doc_id] = 0
-                    keyword_scores[doc_id] += 1
-        
-        # Apply filters if provided
+        keywords = self._disjunction_terms(node, expansions)
+        if keywords is not None:
+            return self._keyword_search(keywords, filters, top_k, collection_stats)
+        
+        scoring_terms: List[str] = []
+        plan = self._compile(node, scoring_terms, expansions)
+        if plan is None:
+            return []
         if filters:
-            matching_docs = self._apply_filters(matching_docs, filters)
+            plan = AndPlan([plan, self._filter_plan(filters)])
+        
+        num_docs, avg_length, doc_freqs = self._scoring_statistics(collection_stats)
+        terms = []
+        for term in dict.fromkeys(scoring_terms):
+            postings = self.index.get(term)
+            doc_freq = self._doc_freq(postings) if postings else 0
+            if doc_freq:
+                terms.append((postings, self._idf(doc_freqs.get(term, doc_freq), num_docs)))
         
-        # Calculate final scores and create results
-        results = []
-        for doc_id in matching_docs:
-            doc = self.documents[doc_id]
-            score = self._calculate_score(doc_id, query_keywords, keyword_scores.get(doc_id, 0))
+        scores = {}
+        for docno in plan.evaluate():
+            if self.doc_table.doc_id(docno) is None:
+                continue
+            score = 0.0
+            for postings, idf in terms:
+                tf = postings.get(docno)
+                if tf is not None:
+                    score += self._bm25_term_score(tf, self.doc_lengths[docno], avg_length, idf)
+            scores[docno] = score
+        
+        return self._rank(scores, top_k)
+    
+    def _disjunction_terms(self, node: QueryNode,
+                           expansions: Optional[Dict[str, Optional[int]]] = None) -> Optional[List[str]]:
+        """Return the expanded index terms of a query made only of unfielded words, or None."""
+        clauses = [node]
+        if isinstance(node, BooleanNode):
+            if node.must or node.must_not or node.filter:
+                return None
+            clauses = node.should
+        if not all(isinstance(clause, (TermNode, WildcardNode, FuzzyNode)) and clause.field is None
+                   for clause in clauses):
+            return None
+        
+        terms = []
+        for clause in clauses:
+            if isinstance(clause, TermNode):
+                for keyword in self.text_processor.extract_keywords(clause.text):
+                    terms.extend(self._expand_missing(keyword, expansions))
+            else:
+                terms.extend(self._expand_leaf(clause))
+        return list(dict.fromkeys(terms))
+    
+    def _get_term_dictionary(self) -> TermDictionary:
+        """Return the term dictionary, building it from the index on first use."""
+        if self._term_dictionary is None:
+            self._term_dictionary = TermDictionary(self.index)
+        return self._term_dictionary
+    
+    @staticmethod
+    def _auto_edits(term: str) -> int:
+        """Return the edit distance tolerated for a term of this length."""
+        if len(term) < 5:
+            return 0
+        return 1 if len(term) < 8 else 2
+    
+    def _expand_missing(self, term: str,
+                        expansions: Optional[Dict[str, Optional[int]]] = None) -> List[str]:
+        """
+        Replace a term without live postings by its closest index terms.
+        
+        A term listed in ``expansions`` is corrected at the edit distance
+        recorded there (0 keeps it), e.g. the smallest distance over the
+        shards of a corpus. Other terms are corrected against this index
+        and their distance is added to ``expansions``.
+        
+        Args:
+            term: Normalized query term
+            expansions: Optional mapping of query terms to correction
+                distances (None if no index term is close enough)
             
-            results.append({
-                'doc_id': doc_id,
-                'content': doc['content'],
-                'score': score,
-                'metadata': doc['metadata']
-            })
+        Returns:
+            The term itself if it is indexed (or too short to correct),
+            otherwise the indexed terms at the smallest edit distance
+        """
+        max_edits = self._auto_edits(term)
+        if not max_edits:
+            return [term]
+        if expansions is not None and term in expansions:
+            distance = expansions[term]
+            if not distance:
+                return [term]
+            matches = self._get_term_dictionary().fuzzy(term, distance, MAX_TERM_EXPANSIONS)
+            return [match for match, match_distance in matches if match_distance == distance] or [term]
+        
+        postings = self.index.get(term)
+        if postings and self._doc_freq(postings):
+            distance, terms = 0, [term]
+        else:
+            matches = self._get_term_dictionary().fuzzy(term, max_edits, MAX_TERM_EXPANSIONS)
+            distance = matches[0][1] if matches else None
+            terms = [match for match, match_distance in matches if match_distance == distance] or [term]
+        if expansions is not None:
+            expansions[term] = distance
+        return terms
+    
+    def _expand_leaf(self, node: QueryNode) -> List[str]:
+        """
+        Expand a wildcard or fuzzy query word to index terms.
         
-        # Sort by score (highest first)
-        results.sort(key=lambda x: x['score'], reverse=True)
+        Args:
+            node: WildcardNode or FuzzyNode
+            
+        Returns:
+            Index terms, at most MAX_TERM_EXPANSIONS
+        """
+        dictionary = self._get_term_dictionary()
+        if isinstance(node, WildcardNode):
+            return dictionary.wildcard(node.pattern.lower(), MAX_TERM_EXPANSIONS)
         
-        return results
+        terms = []
+        for keyword in self.text_processor.extract_keywords(node.text):
+            max_edits = self._auto_edits(keyword) if node.max_edits is None else node.max_edits
+            matches = dictionary.fuzzy(keyword, max_edits, MAX_TERM_EXPANSIONS)
+            terms.extend(match for match, _ in matches)
+        return terms
     
-    def _phrase_search(self, phrase: str, filters: Optional[Dict] = None) -> List[Dict[str, Any]]:
+    def _compile(self, node: QueryNode, scoring_terms: List[str],
+                 expansions: Optional[Dict[str, Optional[int]]] = None) -> Optional[PlanNode]:
         """
-        Perform exact phrase search.
+        Compile a query tree to an execution plan.
         
         Args:
-            phrase: Exact phrase to search for
+            node: Parsed query
+            scoring_terms: List extended with the terms that contribute to
+                the score of matching documents
+            expansions: Correction distances of unknown terms (see
+                _expand_missing)
+            
+        Returns:
+            Plan, or None if the query has no searchable clause (e.g. only
+            stop words)
+        """
+        if isinstance(node, BooleanNode):
+            must = [plan for plan in (self._compile(child, scoring_terms, expansions)
+                                      for child in node.must) if plan]
+            should = [plan for plan in (self._compile(child, scoring_terms, expansions)
+                                        for child in node.should) if plan]
+            must_not = [plan for plan in (self._compile(child, [], expansions)
+                                          for child in node.must_not) if plan]
+            if not must and should:
+                # Without required clauses, at least one optional clause must match
+                must = [should[0] if len(should) == 1 else OrPlan(should)]
+            must += [plan for plan in (self._compile(child, [], expansions) for child in node.filter) if plan]
+            if not must:
+                if not must_not:
+                    return None
+                must = [AllPlan(self._live_docnos)]
+            return AndPlan(must, must_not) if must_not or len(must) > 1 else must[0]
+        
+        if isinstance(node, RangeNode):
+            condition = {}
+            if node.low is not None:
+                condition['$gte'] = self._range_value(node.low)
+            if node.high is not None:
+                condition['$lte'] = self._range_value(node.high)
+            return self._filter_plan({node.field: condition}) if condition else None
+        
+        if node.field is not None and node.field not in self.field_weights:
+            # Metadata fields such as authors or year are matched as filters
+            text = node.pattern if isinstance(node, WildcardNode) else node.text
+            if node.field == 'year':
+                value = self._range_value(text)
+                return self._filter_plan({'year': {'$gte': value, '$lte': value}})
+            text = max(re.split(r'[*?]', text), key=len)  # Longest literal part of a pattern
+            return self._filter_plan({node.field: {'$icontains': text}})
+        
+        if isinstance(node, (WildcardNode, FuzzyNode)):
+            terms = self._expand_leaf(node)
+            if not terms:
+                return TermPlan(PostingList())
+            scoring_terms.extend(terms)
+            plan = self._any_term_plan(terms)
+            if node.field is not None:
+                field = node.field
+                plan = PredicatePlan(plan, lambda docno: any(
+                    self._field_contains(docno, field, {term: [0]}) for term in terms
+                ))
+            return plan
+        
+        # Text leaves: one term or a phrase (e.g. quoted or hyphenated words)
+        positions = self.text_processor.term_positions(node.text)
+        if not positions:
+            return None
+        if len(positions) == 1 and len(next(iter(positions.values()))) == 1:
+            term = next(iter(positions))
+            terms = self._expand_missing(term, expansions) if node.field is None else [term]
+            scoring_terms.extend(terms)
+            plan = self._any_term_plan(terms)
+        elif node.field is None:
+            plan = self._phrase_plan(positions)
+        else:
+            # Title and keyword terms share the postings of the body; the
+            # phrase is checked on the field itself
+            plan = AndPlan([TermPlan(self.index.get(term) or PostingList()) for term in positions])
+        if len(positions) > 1 or node.field is not None:
+            scoring_terms.extend(positions)
+        
+        if node.field is not None:
+            field = node.field
+            plan = PredicatePlan(plan, lambda docno: self._field_contains(docno, field, positions))
+        return plan
+    
+    def _any_term_plan(self, terms: List[str]) -> PlanNode:
+        """Build the plan of documents containing any of several terms."""
+        plans = [TermPlan(self.index.get(term) or PostingList()) for term in terms]
+        return plans[0] if len(plans) == 1 else OrPlan(plans)
+    
+    def _phrase_plan(self, phrase_positions: Dict[str, List[int]]) -> PhrasePlan:
+        """Build the plan of a phrase from the positions of its terms."""
+        return PhrasePlan([
+            (self.positions.get(term) or PositionList(), position)
+            for term, term_positions in phrase_positions.items()
+            for position in term_positions
+        ])
+    
+    def _filter_plan(self, filters: Dict) -> PlanNode:
+        """Build the plan of metadata filters from the filter index and stored metadata."""
+        allowed, residual = self._select_filters(filters)
+        if allowed is None:
+            plan = AllPlan(self._live_docnos)
+        else:
+            plan = BitmapPlan(allowed, len(self.doc_table))
+        if residual:
+            plan = PredicatePlan(plan, lambda docno: self._accept(docno, residual))
+        return plan
+    
+    def _live_docnos(self) -> array:
+        """Return the numbers of all live documents."""
+        return array('I', (
+            docno for docno in range(len(self.doc_table))
+            if self.doc_table.doc_id(docno) is not None
+        ))
+    
+    @staticmethod
+    def _range_value(text: str) -> Any:
+        """Convert a range bound from a query to a number when possible."""
+        try:
+            return int(text)
+        except ValueError:
+            try:
+                return float(text)
+            except ValueError:
+                return text
+    
+    def _field_contains(self, docno: int, field: str, phrase_positions: Dict[str, List[int]]) -> bool:
+        """
+        Check whether a metadata text field of a document contains a phrase.
+        
+        Args:
+            docno: Document number
+            field: Metadata field (e.g. 'title')
+            phrase_positions: Terms of the phrase with their word positions
+            
+        Returns:
+            True if the terms occur in the field at the same relative positions
+        """
+        doc_id = self.doc_table.doc_id(docno)
+        if doc_id is None:
+            return False
+        value = self.documents[doc_id]['metadata'].get(field)
+        if not value:
+            return False
+        if isinstance(value, (list, tuple, set)):
+            value = ' '.join(str(item) for item in value)
+        
+        field_positions = self.text_processor.term_positions(str(value))
+        starts = None
+        for term, term_positions in phrase_positions.items():
+            for offset in term_positions:
+                term_starts = {position - offset for position in field_positions.get(term, ())}
+                starts = term_starts if starts is None else starts & term_starts
+                if not starts:
+                    return False
+        return True
+    
+    def _keyword_search(self, query_keywords: List[str], filters: Optional[Dict] = None,
+                        top_k: Optional[int] = None,
+                        collection_stats: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Perform keyword-based search ranked by BM25.
+        
+        Terms are processed in decreasing order of their score upper bound.
+        With a ``top_k`` limit, once the remaining terms together cannot lift
+        an unseen document above the current k-th best score, no new
+        candidates are admitted and hopeless candidates are dropped (MaxScore).
+        
+        Args:
+            query_keywords: Normalized query terms
             filters: Optional metadata filters
+            top_k: Maximum number of results to return
+            collection_stats: Optional corpus statistics to score with
             
         Returns:
             List of search results
         """
-        results = []
-        normalized_phrase = self.text_processor.normalize_text(phrase)
+        if not query_keywords or not self.documents:
+            return []
         
-        for doc_id, doc in self.documents.items():
-            content = self.text_processor.normalize_text(doc['content'])
-            
-            if normalized_phrase in content:
-                # Apply filters if provided
-                if filters and not self._match_filters(doc['metadata'], filters):
+        allowed, filters = self._select_filters(filters)
+        if allowed == 0:
+            return []
+        if allowed is not None:
+            allowed = bitmap_to_bytes(allowed, len(self.doc_table))
+        
+        num_docs, avg_length, doc_freqs = self._scoring_statistics(collection_stats)
+        doc_lengths = self.doc_lengths
+        
+        terms = []
+        for keyword in query_keywords:
+            postings = self.index.get(keyword)
+            if postings:
+                doc_freq = self._doc_freq(postings)
+                if not doc_freq:
                     continue
-                
-                # Count phrase occurrences for scoring
-                phrase_count = content.count(normalized_phrase)
-                score = phrase_count * 10  # Higher score for exact matches
-                
-                results.append({
-                    'doc_id': doc_id,
-                    'content': doc['content'],
-                    'score': score,
-                    'metadata': doc['metadata']
-                })
+                idf = self._idf(doc_freqs.get(keyword, doc_freq), num_docs)
+                terms.append((postings, idf, self._term_upper_bound(postings, idf)))
+        terms.sort(key=lambda term: term[2], reverse=True)
         
-        # Sort by score (highest first)
-        results.sort(key=lambda x: x['score'], reverse=True)
+        # Sum of upper bounds of the terms not yet processed
+        remaining = sum(term[2] for term in terms)
         
-        return results
+        scores = {}
+        rejected = set()  # Retired documents and documents failing the filters
+        admitting = True
+        for postings, idf, bound in terms:
+            remaining -= bound
+            
+            if admitting:
+                for docno, tf in postings:
+                    if docno not in scores:
+                        if docno in rejected:
+                            continue
+                        if not self._accept(docno, filters, allowed):
+                            rejected.add(docno)
+                            continue
+                        scores[docno] = 0.0
+                    scores[docno] += self._bm25_term_score(tf, doc_lengths[docno], avg_length, idf)
+            else:
+                # Only existing candidates can still make the top k
+                if len(postings) < len(scores):
+                    matches = [(docno, tf) for docno, tf in postings if docno in scores]
+                else:
+                    matches = [(docno, postings.get(docno)) for docno in scores]
+                for docno, tf in matches:
+                    if tf is not None:
+                        scores[docno] += self._bm25_term_score(tf, doc_lengths[docno], avg_length, idf)
+            
+            if top_k is not None and len(scores) >= top_k:
+                threshold = heapq.nlargest(top_k, scores.values())[-1]
+                if remaining < threshold:
+                    admitting = False
+                    scores = {
+                        docno: score for docno, score in scores.items()
+                        if score + remaining >= threshold
+                    }
+        
+        return self._rank(scores, top_k)
     
-    def _apply_filters(self, doc_ids: set, filters: Dict) -> set:
+    def _rank(self, scores: Dict[int, float], top_k: Optional[int]) -> List[Dict[str, Any]]:
         """
-        Apply metadata filters to document set.
+        Order scored documents and build result entries for the best ones.
         
         Args:
-            doc_ids: Set of document IDs
-            filters: Filter criteria
+            scores: Mapping of document numbers to scores
+            top_k: Maximum number of results (None keeps all)
             
         Returns:
-            Filtered set of document IDs
+            List of search results, highest score first
         """
-        filtered_docs = set()
+        if top_k is None:
+            ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        else:
+            ranked = heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
         
-        for doc_id in doc_ids:
-            if doc_id in self.documents:
-                metadata = self.documents[doc_id]['metadata']
-                if self._match_filters(metadata, filters):
-                    filtered_docs.add(doc_id)
+        return [self._make_result(docno, score) for docno, score in ranked]
+    
+    def _make_result(self, docno: int, score: float) -> Dict[str, Any]:
+        """
+        Build a search result entry for a document.
+        
+        Args:
+            docno: Document number
+            score: Relevance score
+            
+        Returns:
+            Search result dictionary; 'content' is a ContentHandle
+        """
+        doc_id = self.doc_table.doc_id(docno)
+        doc = StoredDocument.from_dict(self.documents[doc_id])
+        return {
+            'doc_id': doc_id,
+            'content': doc.content,  # Decompressed when read
+            'score': score,
+            'metadata': doc.metadata
+        }
+    
+    def _select_filters(self, filters: Optional[Dict]) -> Tuple[Optional[int], Optional[Dict]]:
+        """
+        Resolve filters on indexed metadata fields to a bitmap.
         
-        return filtered_docs
+        Args:
+            filters: Optional metadata filters
+            
+        Returns:
+            Tuple of (bitmap of allowed document numbers or None, filters
+            that must still be checked on document metadata)
+        """
+        if not filters:
+            return None, filters
+        return self.filter_index.select(filters, len(self.doc_table))
     
-    def _match_filters(self, metadata: Dict, filters: Dict) -> bool:
+    def _accept(self, docno: int, filters: Optional[Dict],
+                allowed: Optional[bytes] = None) -> bool:
         """
-        Check if document metadata matches filter criteria.
+        Check whether a document number is live and matches the filters.
         
         Args:
-            metadata: Document metadata
-            filters: Filter criteria
+            docno: Document number
+            filters: Optional metadata filters
+            allowed: Bitmap bytes of documents passing the indexed filters
             
         Returns:
-            True if metadata matches all filters
+            True if the document may appear in results
         """
-        for key, value in filters.items():
-            if key not in metadata or metadata[key] != value:
-                return False
-        return True
+        if allowed is not None and not allowed[docno >> 3] & (1 << (docno & 7)):
+            return False
+        doc_id = self.doc_table.doc_id(docno)
+        if doc_id is None:
+            return False
+        return not filters or self._match_filters(self.documents[doc_id]['metadata'], filters)
     
-    def _calculate_score(self, doc_id: str, query_keywords: List[str], keyword_count: int) -> float:
+    def _term_upper_bound(self, postings: PostingList, idf: float) -> float:
         """
-        Calculate relevance score for a document.
+        Calculate an upper bound on the BM25 contribution of a term.
+        
+        Uses the highest term frequency of the term and the smallest possible
+        length normalization, so no document can score above it.
         
         Args:
-            doc_id: Document identifier
-            query_keywords: List of query keywords
-            keyword_count: Number of matching keywords
+            postings: Posting list of the term
+            idf: Inverse document frequency of the term
             
         Returns:
-            Relevance score
+            Maximum score the term can add to any document
         """
-        if doc_id not in self.documents:
-            return 0.0
+        max_tf = postings.max_tf
+        return idf * max_tf * (self.k1 + 1.0) / (max_tf + self.k1 * (1.0 - self.b))
+    
+    def _doc_freq(self, postings: PostingList) -> int:
+        """
+        Count the live documents in a posting list.
         
-        doc = self.documents[doc_id]
-        doc_keywords = doc['processed']['keywords']
+        Tombstoned documents are subtracted by probing whichever of the
+        posting list and the tombstone set is smaller.
         
-        # Base score from keyword matches
-        base_score = keyword_count / len(query_keywords) if query_keywords else 0
+        Args:
+            postings: Posting list of a term
+            
+        Returns:
+            Number of live documents containing the term
+        """
+        retired = self.doc_table.retired
+        if not retired:
+            return len(postings)
+        if len(retired) < len(postings):
+            stale = sum(1 for docno in retired if docno in postings)
+        else:
+            stale = sum(1 for docno in postings.doc_ids if docno in retired)
+        return len(postings) - stale
+    
+    def _scoring_statistics(self, collection_stats: Optional[Dict[str, Any]]
+                            ) -> Tuple[int, float, Dict[str, int]]:
+        """
+        Resolve the corpus statistics to score with.
         
-        # Bonus for keyword frequency in document
-        keyword_frequency = 0
-        for keyword in query_keywords:
-            keyword_frequency += doc_keywords.count(keyword)
+        Args:
+            collection_stats: Statistics of the whole corpus, or None to use
+                this engine's documents
+            
+        Returns:
+            Tuple of (document count, average weighted document length,
+            document frequencies overriding the local ones)
+        """
+        if collection_stats is None:
+            num_docs, total_length, doc_freqs = len(self.documents), self.total_length, {}
+        else:
+            num_docs = collection_stats['doc_count']
+            total_length = collection_stats['total_length']
+            doc_freqs = collection_stats['doc_freqs']
+        return num_docs, total_length / num_docs if num_docs else 0.0, doc_freqs
+    
+    def _idf(self, doc_freq: int, num_docs: Optional[int] = None) -> float:
+        """
+        Calculate the BM25 inverse document frequency of a term.
+        
+        Args:
+            doc_freq: Number of documents containing the term
+            num_docs: Number of documents in the corpus (defaults to this
+                engine's documents)
+            
+        Returns:
+            Non-negative IDF weight
+        """
+        if num_docs is None:
+            num_docs = len(self.documents)
+        return math.log(1.0 + (num_docs - doc_freq + 0.5) / (doc_freq + 0.5))
+    
+    def _bm25_term_score(self, tf: int, doc_length: int, avg_length: float, idf: float) -> float:
+        """
+        Calculate the BM25 contribution of one term to a document score.
+        
+        Args:
+            tf: Weighted term frequency in the document
+            doc_length: Weighted length of the document
+            avg_length: Average weighted document length in the corpus
+            idf: Inverse document frequency of the term
+            
+        Returns:
+            Term score
+        """
+        norm = self.k1 * (1.0 - self.b + self.b * doc_length / avg_length) if avg_length else self.k1
+        return idf * tf * (self.k1 + 1.0) / (tf + norm)
+    
+    def _phrase_search(self, phrase: str, filters: Optional[Dict] = None,
+                       top_k: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Perform exact phrase search over the positional index.
         
-        frequency_bonus = keyword_frequency / len(doc_keywords) if doc_keywords else 0
+        Candidate documents come from intersecting the posting lists of the
+        phrase terms, rarest first, and are verified by aligning word
+        positions. Stop words inside the phrase are kept as position gaps.
         
-        return base_score + frequency_bonus
+        Args:
+            phrase: Exact phrase to search for
+            filters: Optional metadata filters
+            top_k: Maximum number of results to return
+            
+        Returns:
+            List of search results
+        """
+        phrase_positions = self.text_processor.term_positions(phrase)
+        if not phrase_positions:
+            return []
+        plan = self._phrase_plan(phrase_positions)
+        
+        allowed, filters = self._select_filters(filters)
+        if allowed == 0:
+            return []
+        
+        # Intersect sorted document numbers starting from the rarest term,
+        # or from the documents passing the indexed filters
+        if allowed is None:
+            candidates = plan.candidates(plan.position_lists[0][0].doc_ids)
+        else:
+            candidates = plan.candidates(bitmap_docnos(allowed))
+        
+        scores = {}
+        for docno in self._apply_filters(candidates, filters):
+            matches = plan.matches(docno)
+            if matches:
+                scores[docno] = matches * 10  # Higher score for exact matches
+        
+        return self._rank(scores, top_k)
+    
+    def _apply_filters(self, docnos: Iterable[int], filters: Optional[Dict]) -> List[int]:
+        """
+        Keep live documents matching metadata filters.
+        
+        Args:
+            docnos: Document numbers
+            filters: Filter criteria
+            
+        Returns:
+            Filtered list of document numbers
+        """
+        return [docno for docno in docnos if self._accept(docno, filters)]
+    
+    def _match_filters(self, metadata: Dict, filters: Dict) -> bool:
+        """
+        Check if document metadata matches filter criteria.
+        
+        Args:
+            metadata: Document metadata
+            filters: Filter criteria (see :mod:`scitex_scholar.filter_index`)
+            
+        Returns:
+            True if metadata matches all filters
+        """
+        return match_filters(metadata, filters)
+
+
+# Engine of a worker process of SearchEngine.add_documents, reused across tasks
+_worker_engine: Optional[SearchEngine] = None
+
+
+def _prepare_documents(field_weights: Dict[str, int], text_processor: TextProcessor,
+                       documents: List[Tuple[str, str, Optional[Dict]]]) -> List[Optional[tuple]]:
+    """Run SearchEngine._prepare_document on documents in a worker process."""
+    global _worker_engine
+    if _worker_engine is None or _worker_engine.field_weights != field_weights:
+        _worker_engine = SearchEngine(field_weights=field_weights, cache_size=0)
+    _worker_engine.text_processor = text_processor
+    return [_worker_engine._prepare_document(*document) for document in documents]
 
-# EOF
\ No newline at end of file
+# EOF
@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-17 10:00:00 (ywatanabe)"
+# File: src/scitex_scholar/segment_store.py
+
+"""
+Log-structured storage of index segments.
+
+A store is a directory of immutable segments listed, oldest first, in a
+manifest. Committing flushes only the documents added since the last
+commit as a new segment and records documents deleted or replaced in
+older segments as delete bitmaps. A tiered merge policy combines runs of
+similarly sized segments so the number of segments stays logarithmic in
+the size of the library. Merging drops deleted documents, and segments
+with many deletions are rewritten on their own.
+"""
+
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .index_segment import SegmentReader, read_deletes, write_deletes
+from .search_engine import SearchEngine
+
+MANIFEST_NAME = 'manifest.json'
+
+
+class TieredMergePolicy:
+    """
+    Merge policy grouping segments into size tiers.
+
+    Tier 0 holds segments with fewer than ``floor_segment_docs *
+    merge_factor`` live documents and each following tier is
+    ``merge_factor`` times larger. When ``merge_factor`` adjacent segments
+    fall in the same tier they are merged into one segment of the next
+    tier, so every document is rewritten O(log n) times. A segment whose
+    share of deleted documents exceeds ``max_deleted_ratio`` is rewritten
+    alone to expunge them.
+    """
+
+    def __init__(self, merge_factor: int = 10, floor_segment_docs: int = 1000,
+                 max_deleted_ratio: float = 0.2):
+        """
+        Initialize the policy.
+
+        Args:
+            merge_factor: Number of same-tier segments merged at once
+            floor_segment_docs: Size below which segments share the lowest tier
+            max_deleted_ratio: Share of deleted documents that triggers a rewrite
+        """
+        if merge_factor < 2:
+            raise ValueError("merge_factor must be at least 2")
+        self.merge_factor = merge_factor
+        self.floor_segment_docs = max(1, floor_segment_docs)
+        self.max_deleted_ratio = max_deleted_ratio
+
+    def tier(self, doc_count: int) -> int:
+        """Return the size tier of a segment with doc_count live documents."""
+        tier = 0
+        size = self.floor_segment_docs * self.merge_factor
+        while doc_count >= size:
+            size *= self.merge_factor
+            tier += 1
+        return tier
+
+    def find_merge(self, doc_counts: List[int]) -> Optional[Tuple[int, int]]:
+        """
+        Select adjacent segments to merge.
+
+        Args:
+            doc_counts: Live document counts of the segments, oldest first
+
+        Returns:
+            (start, end) slice of segments to merge, or None
+        """
+        end = len(doc_counts)
+        while end > 0:
+            tier = self.tier(doc_counts[end - 1])
+            start = end - 1
+            while start > 0 and self.tier(doc_counts[start - 1]) == tier:
+                start -= 1
+            if end - start >= self.merge_factor:
+                return start, end
+            end = start
+        return None
+
+    def find_expunge(self, doc_counts: List[int], live_counts: List[int]) -> Optional[Tuple[int, int]]:
+        """
+        Select a segment to rewrite without its deleted documents.
+
+        Args:
+            doc_counts: Document counts of the segments, including deleted ones
+            live_counts: Live document counts of the segments
+
+        Returns:
+            (start, start + 1) slice of the segment with the most deletions, or None
+        """
+        worst, worst_ratio = None, self.max_deleted_ratio
+        for i, (doc_count, live_count) in enumerate(zip(doc_counts, live_counts)):
+            ratio = (doc_count - live_count) / doc_count if doc_count else 0.0
+            if ratio > worst_ratio:
+                worst, worst_ratio = i, ratio
+        return None if worst is None else (worst, worst + 1)
+
+
+class SegmentStore:
+    """
+    Directory of index segments with an atomically replaced manifest.
+
+    The manifest lists each segment with its document counts and current
+    delete bitmap, plus caller-provided user data. Files no longer named by
+    the manifest are removed after it has been replaced.
+    """
+
+    def __init__(self, directory: Path, merge_policy: Optional[TieredMergePolicy] = None):
+        """
+        Initialize the store, reading its manifest if it exists.
+
+        Args:
+            directory: Store directory
+            merge_policy: Policy deciding which segments to merge
+        """
+        self.directory = Path(directory)
+        self.merge_policy = merge_policy or TieredMergePolicy()
+        self.segments: List[Dict[str, Any]] = []  # name, doc_count, live_count, deletes
+        self.generation = 0
+        self.user_data: Dict[str, Any] = {}
+
+        if (self.directory / MANIFEST_NAME).exists():
+            self._read_manifest()
+
+    def _read_manifest(self) -> None:
+        """Load the segment list and user data from the manifest."""
+        with open(self.directory / MANIFEST_NAME, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+
+        if 'segments' in manifest:
+            self.segments = manifest['segments']
+            self.generation = manifest['generation']
+            self.user_data = manifest['user_data']
+        else:
+            # Single-segment manifest written by earlier versions
+            doc_count = SegmentReader(self.directory / manifest['segment']).doc_count
+            self.segments = [{'name': manifest['segment'], 'doc_count': doc_count,
+                              'live_count': doc_count, 'deletes': None}]
+            self.user_data = {key: value for key, value in manifest.items() if key != 'segment'}
+
+    def _write_manifest(self) -> None:
+        """Replace the manifest atomically and remove unreferenced files."""
+        manifest = {
+            'generation': self.generation,
+            'segments': self.segments,
+            'user_data': self.user_data,
+        }
+        manifest_tmp = self.directory / (MANIFEST_NAME + '.tmp')
+        with open(manifest_tmp, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(manifest_tmp, self.directory / MANIFEST_NAME)
+
+        live = {segment['name']: segment['deletes'] for segment in self.segments}
+        for path in self.directory.glob('segment-*'):
+            if path.name not in live:
+                shutil.rmtree(path, ignore_errors=True)
+                continue
+            for deletes in path.glob('deletes-*.bin'):
+                if deletes.name != live[path.name]:
+                    deletes.unlink()
+
+    def _next_segment_name(self) -> str:
+        self.generation += 1
+        return f"segment-{self.generation:08d}"
+
+    def _deletes(self, segment: Dict[str, Any]) -> List[int]:
+        """Read the deleted local document numbers of a segment."""
+        if not segment['deletes']:
+            return []
+        return read_deletes(self.directory / segment['name'] / segment['deletes'])
+
+    def open(self, engine: SearchEngine) -> None:
+        """
+        Open the segments of the store in a search engine.
+
+        Args:
+            engine: SearchEngine to load
+        """
+        engine.open_segments(
+            [self.directory / segment['name'] for segment in self.segments],
+            [self._deletes(segment) for segment in self.segments]
+        )
+
+    def _is_open_in(self, engine: SearchEngine) -> bool:
+        """Check whether an engine runs on exactly the segments of this store."""
+        if engine.segments is None:
+            return False
+        return engine.segments.directories == [self.directory / segment['name'] for segment in self.segments]
+
+    def commit(self, engine: SearchEngine, user_data: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Persist the changes of a search engine and reopen it on the store.
+
+        If the engine was opened from this store, only documents added since
+        then are written, as a new segment, and deletions in existing
+        segments are written as new delete bitmaps. Otherwise the whole
+        engine replaces the contents of the store. The engine is locked for
+        writing until it has been reopened, so no document added meanwhile
+        is lost.
+
+        Args:
+            engine: SearchEngine to persist
+            user_data: JSON-serializable data to keep in the manifest
+        """
+        with engine.lock.write():
+            self.directory.mkdir(parents=True, exist_ok=True)
+            incremental = self._is_open_in(engine)
+            segments = [dict(segment) for segment in self.segments] if incremental else []
+
+            if incremental:
+                self.generation += 1
+                for segment, deleted in zip(segments, engine.segment_deletes()):
+                    if len(deleted) == segment['doc_count'] - segment['live_count']:
+                        continue  # Unchanged
+                    segment['deletes'] = f"deletes-{self.generation:08d}.bin"
+                    segment['live_count'] = segment['doc_count'] - len(deleted)
+                    write_deletes(self.directory / segment['name'] / segment['deletes'],
+                                  deleted, segment['doc_count'])
+
+            name = self._next_segment_name()
+            meta = engine.flush_segment(self.directory / name)
+            if meta is not None:
+                segments.append({'name': name, 'doc_count': meta['doc_count'],
+                                 'live_count': meta['doc_count'], 'deletes': None})
+
+            # Fully deleted segments are dropped without merging
+            self.segments = [segment for segment in segments if segment['live_count'] > 0]
+            if user_data is not None:
+                self.user_data = user_data
+            self._write_manifest()
+            self.open(engine)
+
+    def find_merge(self) -> Optional[Tuple[int, int]]:
+        """
+        Ask the merge policy for segments to merge or to compact.
+
+        Returns:
+            (start, end) slice of segments, or None
+        """
+        live_counts = [segment['live_count'] for segment in self.segments]
+        selected = self.merge_policy.find_merge(live_counts)
+        if selected is None:
+            selected = self.merge_policy.find_expunge(
+                [segment['doc_count'] for segment in self.segments], live_counts
+            )
+        return selected
+
+    def merge(self, start: int, end: int) -> Dict[str, Any]:
+        """
+        Write the live documents of adjacent segments as one new segment.
+
+        Only immutable files are read and the manifest is not changed, so
+        this can run in a background thread while searches continue; the
+        result is installed with apply_merge.
+
+        Args:
+            start: First segment to merge
+            end: End of the slice of segments to merge
+
+        Returns:
+            Manifest entry of the merged segment
+        """
+        run = self.segments[start:end]
+        source = SearchEngine()
+        source.open_segments([self.directory / segment['name'] for segment in run],
+                             [self._deletes(segment) for segment in run])
+
+        name = self._next_segment_name()
+        meta = source.save_segment(self.directory / name)
+        return {'name': name, 'doc_count': meta['doc_count'],
+                'live_count': meta['doc_count'], 'deletes': None,
+                'merged': [segment['name'] for segment in run]}
+
+    def apply_merge(self, engine: SearchEngine, start: int, end: int,
+                    merged: Dict[str, Any]) -> bool:
+        """
+        Replace merged segments with their merge result and reopen the engine.
+
+        The merge is abandoned if the segments changed or documents were
+        added or deleted since it started; a later commit can retry it.
+
+        Args:
+            engine: SearchEngine opened on this store
+            start: First merged segment
+            end: End of the slice of merged segments
+            merged: Result of merge
+
+        Returns:
+            True if the merge was installed
+        """
+        merged = dict(merged)
+        sources = merged.pop('merged')
+        with engine.lock.write():
+            run = self.segments[start:end]
+            unchanged = (
+                [segment['name'] for segment in run] == sources
+                and self._is_open_in(engine)
+                and len(engine.doc_table) == engine.segments.doc_count
+                and [len(deleted) for deleted in engine.segment_deletes()[start:end]]
+                == [segment['doc_count'] - segment['live_count'] for segment in run]
+            )
+            if not unchanged:
+                shutil.rmtree(self.directory / merged['name'], ignore_errors=True)
+                return False
+
+            self.segments[start:end] = [merged]
+            self._write_manifest()
+            self.open(engine)
+            return True
+
+
+# EOF
@@ -0,0 +1,474 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-17 10:00:00 (ywatanabe)"
+# File: src/scitex_scholar/sharded_search_engine.py
+
+"""
+Keyword search partitioned across worker processes.
+
+Documents are assigned to shards by a stable hash of their ID, and every
+shard is a SearchEngine owned by its own process, so indexing and
+searching use as many cores as there are shards. Queries are scattered
+to all shards and their top results gathered by a coordinator. Before
+scoring, the coordinator collects the document frequencies of the query
+terms from every shard and sends back their sums, so each shard ranks
+with the IDF and average document length of the whole corpus and the
+merged ranking matches that of a single engine.
+"""
+
+import heapq
+import json
+import multiprocessing
+import os
+import threading
+import zlib
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .query_cache import QueryCache
+from .search_engine import SearchEngine
+from .segment_store import SegmentStore
+from .text_processor import TextProcessor
+
+MANIFEST_NAME = 'shards.json'
+
+
+def _shard_add_documents(engine: SearchEngine,
+                         documents: List[Tuple[str, str, Optional[Dict]]]) -> List[bool]:
+    """Add (doc_id, content, metadata) documents to a shard in one batch."""
+    return engine.add_documents(documents)
+
+
+def _shard_get_document(engine: SearchEngine, doc_id: str) -> Optional[Dict[str, Any]]:
+    """Return a stored document of a shard, or None."""
+    with engine.lock.read():
+        return engine.documents.get(doc_id)
+
+
+def _shard_doc_ids(engine: SearchEngine) -> List[str]:
+    """Return the IDs of the documents of a shard."""
+    with engine.lock.read():
+        return list(engine.documents)
+
+
+def _shard_save(engine: SearchEngine, directory: str) -> int:
+    """Commit a shard to its segment store and merge segments."""
+    store = SegmentStore(Path(directory))
+    store.commit(engine)
+    while True:
+        selected = store.find_merge()
+        if selected is None or not store.apply_merge(engine, *selected, store.merge(*selected)):
+            break
+    return len(store.segments)
+
+
+def _shard_load(engine: SearchEngine, directory: str) -> int:
+    """Open a shard from its segment store."""
+    store = SegmentStore(Path(directory))
+    store.open(engine)
+    return len(engine.documents)
+
+
+_SHARD_COMMANDS = {
+    'add_documents': _shard_add_documents,
+    'get_document': _shard_get_document,
+    'doc_ids': _shard_doc_ids,
+    'save': _shard_save,
+    'load': _shard_load,
+}
+
+
+def _shard_worker(connection, engine_options: Dict[str, Any]) -> None:
+    """
+    Serve requests for one shard until the connection is closed.
+
+    Each request is a (command, args) tuple naming a SearchEngine method
+    or an entry of _SHARD_COMMANDS; the reply is (True, result) or
+    (False, exception).
+
+    Args:
+        connection: Worker end of the coordinator pipe
+        engine_options: Keyword arguments for the shard's SearchEngine
+    """
+    # Results are cached by the coordinator
+    engine = SearchEngine(cache_size=0, **engine_options)
+    while True:
+        try:
+            request = connection.recv()
+        except EOFError:
+            break
+        if request is None:
+            break
+        command, args = request
+        try:
+            handler = _SHARD_COMMANDS.get(command)
+            result = handler(engine, *args) if handler else getattr(engine, command)(*args)
+            reply = (True, result)
+        except Exception as e:
+            reply = (False, e)
+        try:
+            connection.send(reply)
+        except Exception as e:
+            # The exception or result could not be pickled
+            connection.send((False, RuntimeError(f"{command} failed: {e!r}")))
+    connection.close()
+
+
+class ShardedSearchEngine:
+    """
+    SearchEngine-compatible index split across worker processes.
+
+    The engine can be shared between threads: requests to one shard are
+    serialized by a per-shard lock, so documents routed to different shards
+    are indexed in parallel. Call close (or use the engine as a context
+    manager) to stop the workers.
+    """
+
+    def __init__(self, num_shards: Optional[int] = None, k1: float = 1.2, b: float = 0.75,
+                 field_weights: Optional[Dict[str, int]] = None,
+                 cache_size: int = 256, cache_ttl: Optional[float] = None,
+                 start_method: Optional[str] = None,
+                 text_processor: Optional[TextProcessor] = None):
+        """
+        Start the shard workers.
+
+        Args:
+            num_shards: Number of shards and worker processes (defaults to
+                the number of CPUs)
+            k1: BM25 term frequency saturation parameter
+            b: BM25 document length normalization parameter
+            field_weights: Metadata fields to index with their integer boosts
+            cache_size: Number of query results to cache (0 disables caching)
+            cache_ttl: Seconds after which cached results expire
+            start_method: multiprocessing start method ('fork', 'spawn' or
+                'forkserver'; defaults to the platform default)
+            text_processor: Tokenizer for documents and queries, copied to
+                every shard
+        """
+        self.num_shards = max(1, num_shards or os.cpu_count() or 1)
+        self.text_processor = text_processor or TextProcessor()
+        self.generation = 0  # Incremented on every change to the indexed documents
+        self.query_cache = QueryCache(cache_size, cache_ttl)
+        self.documents = ShardedDocuments(self)
+
+        engine_options = {'k1': k1, 'b': b, 'field_weights': field_weights,
+                          'text_processor': self.text_processor}
+        context = multiprocessing.get_context(start_method)
+        self._connections = []
+        self._processes = []
+        self._locks = []
+        for _ in range(self.num_shards):
+            connection, worker_connection = context.Pipe()
+            process = context.Process(target=_shard_worker, args=(worker_connection, engine_options),
+                                      daemon=True)
+            process.start()
+            worker_connection.close()
+            self._connections.append(connection)
+            self._processes.append(process)
+            self._locks.append(threading.Lock())
+        self._generation_lock = threading.Lock()
+
+    def __enter__(self) -> 'ShardedSearchEngine':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Stop the shard workers."""
+        for connection, process, lock in zip(self._connections, self._processes, self._locks):
+            with lock:
+                if process.is_alive():
+                    try:
+                        connection.send(None)
+                    except (BrokenPipeError, OSError):
+                        pass
+                connection.close()
+            process.join(timeout=5)
+        self._connections, self._processes = [], []
+
+    def shard_of(self, doc_id: str) -> int:
+        """Return the shard holding a document, independent of the process."""
+        return zlib.crc32(doc_id.encode('utf-8')) % self.num_shards
+
+    @staticmethod
+    def _receive(connection) -> Any:
+        """Receive a reply and raise the exception of a failed request."""
+        ok, result = connection.recv()
+        if not ok:
+            raise result
+        return result
+
+    def _call(self, shard: int, command: str, *args: Any) -> Any:
+        """Run a command on one shard."""
+        with self._locks[shard]:
+            self._connections[shard].send((command, args))
+            return self._receive(self._connections[shard])
+
+    def _scatter(self, command: str, shard_args: List[Tuple]) -> List[Any]:
+        """
+        Run a command on every shard in parallel.
+
+        Args:
+            command: SearchEngine method or shard command name
+            shard_args: Arguments for each shard
+
+        Returns:
+            Result of each shard
+        """
+        # Shard locks are always taken in order, so concurrent scatters cannot deadlock
+        for lock in self._locks:
+            lock.acquire()
+        try:
+            for connection, args in zip(self._connections, shard_args):
+                connection.send((command, args))
+            replies = []
+            for connection in self._connections:
+                try:
+                    replies.append((True, self._receive(connection)))
+                except Exception as e:
+                    # Keep reading so the other shards' replies are consumed
+                    replies.append((False, e))
+        finally:
+            for lock in self._locks:
+                lock.release()
+        for ok, result in replies:
+            if not ok:
+                raise result
+        return [result for _, result in replies]
+
+    def _broadcast(self, command: str, *args: Any) -> List[Any]:
+        """Run a command with the same arguments on every shard."""
+        return self._scatter(command, [args] * self.num_shards)
+
+    def _changed(self) -> None:
+        with self._generation_lock:
+            self.generation += 1
+
+    def add_document(self, doc_id: str, content: str, metadata: Optional[Dict] = None) -> bool:
+        """
+        Add a document to its shard.
+
+        Args:
+            doc_id: Unique document identifier
+            content: Document content
+            metadata: Optional document metadata
+
+        Returns:
+            True if successfully added
+        """
+        added = self._call(self.shard_of(doc_id), 'add_documents', [(doc_id, content, metadata)])[0]
+        self._changed()
+        return added
+
+    def add_documents(self, documents: Iterable[Tuple[str, str, Optional[Dict]]]) -> List[bool]:
+        """
+        Add documents to all shards in parallel.
+
+        Args:
+            documents: (doc_id, content, metadata) tuples
+
+        Returns:
+            Whether each document was added, in input order
+        """
+        documents = list(documents)
+        batches: List[List[Tuple[str, str, Optional[Dict]]]] = [[] for _ in range(self.num_shards)]
+        placement = []
+        for doc_id, content, metadata in documents:
+            shard = self.shard_of(doc_id)
+            placement.append((shard, len(batches[shard])))
+            batches[shard].append((doc_id, content, metadata))
+
+        added = self._scatter('add_documents', [(batch,) for batch in batches])
+        self._changed()
+        return [added[shard][i] for shard, i in placement]
+
+    def remove_document(self, doc_id: str) -> bool:
+        """
+        Remove a document from its shard.
+
+        Args:
+            doc_id: Document identifier
+
+        Returns:
+            True if the document was indexed
+        """
+        removed = self._call(self.shard_of(doc_id), 'remove_document', doc_id)
+        if removed:
+            self._changed()
+        return removed
+
+    def update_document(self, doc_id: str, content: str, metadata: Optional[Dict] = None) -> bool:
+        """
+        Replace the content and metadata of a document.
+
+        Args:
+            doc_id: Document identifier
+            content: New document content
+            metadata: New document metadata
+
+        Returns:
+            True if successfully updated
+        """
+        updated = self._call(self.shard_of(doc_id), 'update_document', doc_id, content, metadata)
+        self._changed()
+        return updated
+
+    def compact(self) -> int:
+        """Drop tombstoned postings on every shard; returns the number of documents dropped."""
+        return sum(self._broadcast('compact'))
+
+    def search(self, query: str, exact_phrase: bool = False,
+               filters: Optional[Dict] = None,
+               top_k: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Search all shards and merge their results.
+
+        Keyword queries take two rounds: the shards first report the
+        document frequencies of the query terms and the edit distances at
+        which they correct unknown terms, then score with the sums and
+        correct only terms missing from every shard.
+
+        Args:
+            query: Search query string
+            exact_phrase: Whether to search for exact phrase
+            filters: Optional metadata filters
+            top_k: Maximum number of results to return (None returns all matches)
+
+        Returns:
+            List of search results with scores
+        """
+        if not query or (top_k is not None and top_k <= 0):
+            return []
+
+        key = QueryCache.make_key(
+            # Operators are case-sensitive, so only whitespace is normalized
+            self.generation, ' '.join(query.split()),
+            exact_phrase, filters, top_k
+        )
+        results = self.query_cache.get(key)
+        if results is not None:
+            return results
+
+        collection_stats = None
+        if not exact_phrase:
+            collection_stats = self._merge_statistics(self._broadcast('collection_statistics', query))
+        shard_results = self._broadcast('search', query, exact_phrase, filters, top_k, collection_stats)
+
+        # Each shard returns its results best first
+        merged = heapq.merge(*shard_results, key=lambda result: result['score'], reverse=True)
+        results = list(merged) if top_k is None else [result for _, result in zip(range(top_k), merged)]
+        self.query_cache.put(key, results)
+        return results
+
+    def snippets(self, doc_id: str, query: str, max_fragments: int = 3,
+                 fragment_words: int = 30) -> List[Dict[str, Any]]:
+        """Build highlighted fragments of a document on its shard (see SearchEngine.snippets)."""
+        return self._call(self.shard_of(doc_id), 'snippets', doc_id, query, max_fragments, fragment_words)
+
+    @staticmethod
+    def _merge_statistics(shard_stats: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Sum the collection statistics of the shards.
+
+        Unknown query terms are corrected at the smallest edit distance
+        found on any shard, and not at all if a shard indexes them.
+        """
+        doc_freqs: Dict[str, int] = {}
+        expansions: Dict[str, Optional[int]] = {}
+        for stats in shard_stats:
+            for term, doc_freq in stats['doc_freqs'].items():
+                doc_freqs[term] = doc_freqs.get(term, 0) + doc_freq
+            for term, distance in stats.get('expansions', {}).items():
+                current = expansions.get(term)
+                if current is None or (distance is not None and distance < current):
+                    expansions[term] = distance
+        return {
+            'doc_count': sum(stats['doc_count'] for stats in shard_stats),
+            'total_length': sum(stats['total_length'] for stats in shard_stats),
+            'doc_freqs': doc_freqs,
+            'expansions': expansions
+        }
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get index statistics summed over the shards, and query cache statistics."""
+        shard_stats = self._broadcast('get_statistics')
+        return {
+            'total_documents': sum(stats['total_documents'] for stats in shard_stats),
+            'segments': sum(stats['segments'] for stats in shard_stats),
+            'tombstones': sum(stats['tombstones'] for stats in shard_stats),
+            'generation': self.generation,
+            'shards': [stats['total_documents'] for stats in shard_stats],
+            'query_cache': self.query_cache.get_statistics()
+        }
+
+    def save(self, directory: Path, user_data: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Persist every shard to its own segment store under a directory.
+
+        Args:
+            directory: Index directory
+            user_data: JSON-serializable data to keep in the shard manifest
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        self._scatter('save', [(str(self._shard_directory(directory, shard)),)
+                               for shard in range(self.num_shards)])
+
+        manifest = {'num_shards': self.num_shards, 'user_data': user_data or {}}
+        manifest_tmp = directory / (MANIFEST_NAME + '.tmp')
+        with open(manifest_tmp, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(manifest_tmp, directory / MANIFEST_NAME)
+
+    def load(self, directory: Path) -> Dict[str, Any]:
+        """
+        Open the shards saved under a directory.
+
+        Args:
+            directory: Index directory written by save
+
+        Returns:
+            User data saved with the shards
+
+        Raises:
+            ValueError: If the index was saved with a different number of shards
+        """
+        directory = Path(directory)
+        with open(directory / MANIFEST_NAME, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest['num_shards'] != self.num_shards:
+            raise ValueError(
+                f"Index has {manifest['num_shards']} shards, engine has {self.num_shards}"
+            )
+        self._scatter('load', [(str(self._shard_directory(directory, shard)),)
+                               for shard in range(self.num_shards)])
+        self._changed()
+        return manifest['user_data']
+
+    @staticmethod
+    def _shard_directory(directory: Path, shard: int) -> Path:
+        return directory / f"shard-{shard:03d}"
+
+
+class ShardedDocuments(Mapping):
+    """Read-only doc_id -> document mapping fetching documents from their shards."""
+
+    def __init__(self, engine: ShardedSearchEngine):
+        self._engine = engine
+
+    def __getitem__(self, doc_id: str) -> Dict[str, Any]:
+        doc = self._engine._call(self._engine.shard_of(doc_id), 'get_document', doc_id)
+        if doc is None:
+            raise KeyError(doc_id)
+        return doc
+
+    def __iter__(self) -> Iterator[str]:
+        return (doc_id for doc_ids in self._engine._broadcast('doc_ids') for doc_id in doc_ids)
+
+    def __len__(self) -> int:
+        return self._engine.get_statistics()['total_documents']
+
+
+# EOF
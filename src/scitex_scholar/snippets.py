@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-17 10:00:00 (ywatanabe)"
+# File: src/scitex_scholar/snippets.py
+
+"""
+Snippet selection from term positions and token offsets.
+
+Given the word positions where query terms occur in a document and the
+character offset of every word, snippets are the windows of a fixed
+number of words holding the most distinct query terms and hits. Only the
+selected windows are sliced out of the text; the text is never scanned
+for the query.
+"""
+
+import re
+from array import array
+from typing import Any, Dict, Iterable, List, Pattern, Sequence, Tuple
+
+_WORD = re.compile(r'[a-zA-Z]+')
+_TOKEN = re.compile(r'\b[a-zA-Z]+\b')  # Words as counted by TextProcessor.term_positions
+
+
+def densest_windows(hits: Sequence[Tuple[int, int]], window: int,
+                    max_windows: int) -> List[List[Tuple[int, int]]]:
+    """
+    Select non-overlapping windows of word positions with the most hits.
+
+    Windows are ranked by the number of distinct terms they contain, then
+    by the number of hits.
+
+    Args:
+        hits: (word position, term number) pairs sorted by position
+        window: Window length in words
+        max_windows: Maximum number of windows
+
+    Returns:
+        Hits of each selected window, best window first
+    """
+    remaining = list(hits)
+    selected = []
+    while remaining and len(selected) < max_windows:
+        best, best_key = (0, 0), None
+        end = 0
+        counts: Dict[int, int] = {}
+        for start in range(len(remaining)):
+            # Extend the window to every hit within `window` words of its first hit
+            while end < len(remaining) and remaining[end][0] < remaining[start][0] + window:
+                term = remaining[end][1]
+                counts[term] = counts.get(term, 0) + 1
+                end += 1
+            key = (len(counts), end - start)
+            if best_key is None or key > best_key:
+                best, best_key = (start, end), key
+            term = remaining[start][1]
+            counts[term] -= 1
+            if not counts[term]:
+                del counts[term]
+        selected.append(remaining[best[0]:best[1]])
+        del remaining[best[0]:best[1]]
+    return selected
+
+
+def build_fragments(text: str, offsets: Sequence[int], hits: Sequence[Tuple[int, int]],
+                    max_fragments: int = 3, fragment_words: int = 30,
+                    token_pattern: Pattern = _WORD) -> List[Dict[str, Any]]:
+    """
+    Build highlighted fragments around the densest groups of hits.
+
+    Args:
+        text: Text the offsets refer to
+        offsets: Character offset of every word of the text
+        hits: (word position, term number) pairs sorted by position
+        max_fragments: Maximum number of fragments
+        fragment_words: Fragment length in words
+        token_pattern: Pattern of the words the offsets point to (see
+            TextProcessor.token_pattern)
+
+    Returns:
+        Fragments, best first, each with its 'text', its 'start' and 'end'
+        offsets in the text and the (start, end) 'matches' of query terms
+        relative to the fragment
+    """
+    fragments = []
+    for window_hits in densest_windows(hits, fragment_words, max_fragments):
+        first, last = window_hits[0][0], window_hits[-1][0]
+        # Center the hits in a window of fragment_words words
+        start_word = max(0, first - (fragment_words - 1 - (last - first)) // 2)
+        end_word = min(len(offsets) - 1, max(last, start_word + fragment_words - 1))
+        start = offsets[start_word]
+        end = token_pattern.match(text, offsets[end_word]).end()
+
+        matches = []
+        for position, _ in window_hits:
+            match = token_pattern.match(text, offsets[position])
+            matches.append((match.start() - start, match.end() - start))
+        fragments.append({
+            'text': text[start:end],
+            'start': start,
+            'end': end,
+            'matches': matches
+        })
+    return fragments
+
+
+def fragments_for_terms(text: str, terms: Iterable[str], max_fragments: int = 3,
+                        fragment_words: int = 30) -> List[Dict[str, Any]]:
+    """
+    Build highlighted fragments of a text without recorded offsets.
+
+    The text is tokenized to find the terms, so this is meant for short
+    texts such as the chunks of vector search results.
+
+    Args:
+        text: Text to build fragments from
+        terms: Lowercase query terms
+        max_fragments: Maximum number of fragments
+        fragment_words: Fragment length in words
+
+    Returns:
+        Fragments as returned by build_fragments
+    """
+    term_numbers = {term: i for i, term in enumerate(dict.fromkeys(terms))}
+    offsets = array('I')
+    hits = []
+    for position, match in enumerate(_TOKEN.finditer(text)):
+        offsets.append(match.start())
+        term_number = term_numbers.get(match.group().lower())
+        if term_number is not None:
+            hits.append((position, term_number))
+    return build_fragments(text, offsets, hits, max_fragments, fragment_words)
+
+
+def highlight(fragment: Dict[str, Any], before: str = '**', after: str = '**') -> str:
+    """
+    Mark the query-term matches of a fragment.
+
+    Args:
+        fragment: Fragment returned by build_fragments
+        before: Marker inserted before each match
+        after: Marker inserted after each match
+
+    Returns:
+        Fragment text with marked matches
+    """
+    parts = []
+    previous = 0
+    for start, end in fragment['matches']:
+        parts.append(fragment['text'][previous:start])
+        parts.append(before + fragment['text'][start:end] + after)
+        previous = end
+    parts.append(fragment['text'][previous:])
+    return ''.join(parts)
+
+
+# EOF
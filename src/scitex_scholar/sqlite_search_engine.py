@@ -0,0 +1,612 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-17 10:00:00 (ywatanabe)"
+# File: src/scitex_scholar/sqlite_search_engine.py
+
+"""
+SQLite storage backend for keyword search.
+
+This module provides a SearchEngine-compatible backend that keeps documents
+in an SQLite database with an FTS5 full-text index ranked by bm25. The
+database runs in WAL mode so searches can proceed while documents are
+being indexed, and every document update is committed on its own, so the
+index is durable without rewriting it.
+
+As in SearchEngine, the raw text of a document is stored once,
+zlib-compressed. The FTS5 table is contentless: plain text documents are
+indexed from their raw text, which has the same words as their cleaned
+text, and LaTeX documents additionally keep their compressed cleaned text,
+which is needed to remove them from the index.
+
+Queries of :mod:`scitex_scholar.query_parser` are translated to FTS5
+expressions: AND/OR/NOT, +/- prefixes, phrases, title: and keywords:
+fields and trailing wildcards (``spind*``) are searched by FTS5; fuzzy
+terms match exactly, and clauses on other metadata fields that every
+result must satisfy are applied as filters. Queries FTS5 cannot express,
+such as other wildcards or metadata clauses under OR, fall back to
+matching any keyword of the query.
+"""
+
+import json
+import re
+import sqlite3
+import threading
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from .filter_index import match_filters
+from .query_parser import (
+    TEXT_FIELDS, BooleanNode, PhraseNode, QueryNode, RangeNode, WildcardNode, parse_query
+)
+from .search_engine import DEFAULT_FIELD_WEIGHTS, SearchEngine
+from .stored_fields import TRANSIENT_FIELDS, ContentHandle, compress_text, decompress_text
+from .text_processor import TextProcessor
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    doc_id TEXT NOT NULL UNIQUE,
+    title TEXT,
+    keywords TEXT,
+    body BLOB,
+    content BLOB NOT NULL,
+    metadata TEXT NOT NULL,
+    processed TEXT NOT NULL,
+    document_type TEXT
+);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+    title, keywords, body,
+    content='',
+    tokenize='unicode61'
+);
+
+CREATE TABLE IF NOT EXISTS settings (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+# Wildcard patterns FTS5 can search: a word followed by a single '*'
+_PREFIX_PATTERN = re.compile(r'(\w+)\*')
+
+
+class _UnsupportedQuery(Exception):
+    """Raised for a query clause that has no FTS5 translation."""
+
+
+def _is_metadata_clause(node: QueryNode) -> bool:
+    """Check whether a leaf restricts a metadata field that is not indexed by FTS5."""
+    if isinstance(node, RangeNode):
+        return True
+    return not isinstance(node, BooleanNode) and node.field is not None and node.field not in TEXT_FIELDS
+
+
+class SQLiteSearchEngine:
+    """
+    Search engine storing documents in SQLite with an FTS5 index.
+
+    Provides the same add_document/search interface as SearchEngine.
+    Each thread uses its own connection; writes are serialized with a lock
+    and readers see the last committed state through WAL. A ':memory:'
+    database lives on a single connection shared by all threads, so reads
+    take the lock as well.
+    """
+
+    def __init__(self, db_path: Union[str, Path] = ':memory:',
+                 field_weights: Optional[Dict[str, int]] = None):
+        """
+        Initialize the backend and create the schema if needed.
+
+        Args:
+            db_path: SQLite database file (':memory:' for a private database)
+            field_weights: Boosts for the 'title' and 'keywords' fields
+                relative to the body, as in SearchEngine
+        """
+        self.db_path = str(db_path)
+        self.text_processor = TextProcessor()
+        weights = dict(DEFAULT_FIELD_WEIGHTS if field_weights is None else field_weights)
+        self._bm25_weights = (float(weights.get('title', 1)), float(weights.get('keywords', 1)), 1.0)
+
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        # A private in-memory database only exists on one connection
+        self._shared_connection = self._connect() if self.db_path == ':memory:' else None
+
+        with self._write_lock:
+            connection = self._connection()
+            connection.executescript(_SCHEMA)
+            connection.commit()
+
+        self.documents = SQLiteDocuments(self)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection in WAL mode."""
+        if self.db_path != ':memory:':
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(self.db_path, check_same_thread=self.db_path != ':memory:')
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        return connection
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return the connection of the calling thread."""
+        if self._shared_connection is not None:
+            return self._shared_connection
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._local.connection = self._connect()
+        return connection
+
+    def close(self) -> None:
+        """Close the connection of the calling thread."""
+        connection = self._shared_connection or getattr(self._local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+            self._shared_connection = None
+
+    def add_document(self, doc_id: str, content: str, metadata: Optional[Dict] = None) -> bool:
+        """
+        Add or replace a document and commit it.
+
+        Args:
+            doc_id: Unique document identifier
+            content: Document content (plain text or LaTeX)
+            metadata: Optional document metadata
+
+        Returns:
+            True if document was added successfully
+        """
+        row = self._row(doc_id, content, metadata)
+        if row is None:
+            return False
+
+        with self._write_lock:
+            connection = self._connection()
+            with connection:
+                self._write_row(connection, *row)
+        return True
+
+    def add_documents(self, documents: Iterable[Tuple[str, str, Optional[Dict]]]) -> List[bool]:
+        """
+        Add or replace a batch of documents and commit them in one transaction.
+
+        Args:
+            documents: (doc_id, content, metadata) tuples
+
+        Returns:
+            For each document, True if it was added successfully
+        """
+        rows = [self._row(*document) for document in documents]
+
+        with self._write_lock:
+            connection = self._connection()
+            with connection:
+                for row in rows:
+                    if row is not None:
+                        self._write_row(connection, *row)
+        return [row is not None for row in rows]
+
+    def _query(self, sql: str, params: Iterable[Any] = ()) -> List[tuple]:
+        """Run a read query and return all rows, locking the shared connection."""
+        if self._shared_connection is None:
+            return self._connection().execute(sql, tuple(params)).fetchall()
+        with self._write_lock:
+            return self._shared_connection.execute(sql, tuple(params)).fetchall()
+
+    def _row(self, doc_id: str, content: str,
+             metadata: Optional[Dict] = None) -> Optional[Tuple[tuple, str]]:
+        """
+        Process a document into the values written by _write_row.
+
+        Returns:
+            Row tuple ending with the doc_id and the body text to index, or
+            None if the document is empty
+        """
+        if not doc_id or not content:
+            return None
+
+        metadata = metadata or {}
+        doc_type = self.text_processor.detect_document_type(content)
+        if doc_type == 'latex':
+            processed = self.text_processor.process_latex_document(content)
+        else:
+            processed = self.text_processor.process_document(content)
+
+        # Plain text has the words of its cleaned text, so only LaTeX
+        # documents store their cleaned text
+        if doc_type == 'latex':
+            body = processed['cleaned_text']
+            stored_body = compress_text(body)
+        else:
+            body = content
+            stored_body = None
+
+        row = (
+            self._field_text(metadata.get('title')),
+            self._field_text(metadata.get('keywords')),
+            stored_body,
+            compress_text(content),
+            json.dumps(metadata),
+            json.dumps({key: value for key, value in processed.items() if key not in TRANSIENT_FIELDS}),
+            doc_type,
+            doc_id,
+        )
+        return row, body
+
+    @classmethod
+    def _write_row(cls, connection: sqlite3.Connection, row: tuple, body: str) -> None:
+        """Update the row of a document, inserting it if the document is new, and index it."""
+        existing = connection.execute('SELECT id FROM documents WHERE doc_id = ?', (row[-1],)).fetchone()
+        if existing is None:
+            rowid = connection.execute(
+                'INSERT INTO documents (title, keywords, body, content, metadata, '
+                'processed, document_type, doc_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                row
+            ).lastrowid
+        else:
+            rowid = existing[0]
+            cls._unindex_row(connection, rowid)
+            connection.execute(
+                'UPDATE documents SET title = ?, keywords = ?, body = ?, content = ?, '
+                'metadata = ?, processed = ?, document_type = ? WHERE id = ?',
+                row[:-1] + (rowid,)
+            )
+        connection.execute(
+            'INSERT INTO documents_fts(rowid, title, keywords, body) VALUES (?, ?, ?, ?)',
+            (rowid, row[0], row[1], body)
+        )
+
+    @staticmethod
+    def _unindex_row(connection: sqlite3.Connection, rowid: int) -> None:
+        """Remove a stored document from the contentless FTS index."""
+        title, keywords, body, content = connection.execute(
+            'SELECT title, keywords, body, content FROM documents WHERE id = ?', (rowid,)
+        ).fetchone()
+        # The delete command needs the indexed values of the document
+        connection.execute(
+            "INSERT INTO documents_fts(documents_fts, rowid, title, keywords, body) "
+            "VALUES ('delete', ?, ?, ?, ?)",
+            (rowid, title, keywords, decompress_text(content if body is None else body))
+        )
+
+    def remove_document(self, doc_id: str) -> bool:
+        """
+        Remove a document and commit the removal.
+
+        Args:
+            doc_id: Document identifier
+
+        Returns:
+            True if the document was removed, False if it was not indexed
+        """
+        with self._write_lock:
+            connection = self._connection()
+            with connection:
+                existing = connection.execute('SELECT id FROM documents WHERE doc_id = ?', (doc_id,)).fetchone()
+                if existing is None:
+                    return False
+                self._unindex_row(connection, existing[0])
+                connection.execute('DELETE FROM documents WHERE id = ?', existing)
+                return True
+
+    def update_document(self, doc_id: str, content: str, metadata: Optional[Dict] = None) -> bool:
+        """
+        Replace the content of an indexed document.
+
+        Args:
+            doc_id: Document identifier
+            content: New document content
+            metadata: New metadata (the current metadata is kept if None)
+
+        Returns:
+            True if the document was updated, False if it was not indexed
+        """
+        doc = self._fetch_document(doc_id)
+        if doc is None:
+            return False
+        if metadata is None:
+            metadata = doc['metadata']
+        return self.add_document(doc_id, content, metadata)
+
+    @staticmethod
+    def _field_text(value: Any) -> str:
+        """Convert a metadata field to indexable text."""
+        if not value:
+            return ''
+        if isinstance(value, (list, tuple, set)):
+            return ' '.join(str(item) for item in value)
+        return str(value)
+
+    def search(self, query: str, exact_phrase: bool = False,
+               filters: Optional[Dict] = None,
+               top_k: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Search for documents matching the query.
+
+        The query is translated to an FTS5 expression (see the module
+        docstring) and matching documents are ranked by bm25. Optional
+        clauses next to required ones do not affect the ranking, and
+        documents matched by metadata clauses alone score 0.
+
+        Args:
+            query: Search query string
+            exact_phrase: Whether to search for exact phrase
+            filters: Optional metadata filters
+            top_k: Maximum number of results to return (None returns all matches)
+
+        Returns:
+            List of search results with scores
+        """
+        if not query or (top_k is not None and top_k <= 0):
+            return []
+
+        if exact_phrase:
+            words = self.text_processor.normalize_text(query).split()
+            match = self._quote(' '.join(words)) if words else None
+            clause_filters = []
+        else:
+            # Metadata clauses of the query must match, or not match if excluded
+            match, clause_filters = self._translate_query(query)
+        if match is None and not clause_filters:
+            return []
+
+        if match is None:
+            sql = 'SELECT d.doc_id, d.content, d.metadata, 0.0 AS score FROM documents d WHERE 1'
+            params: List[Any] = []
+        else:
+            sql = (
+                'SELECT d.doc_id, d.content, d.metadata, -bm25(documents_fts, ?, ?, ?) AS score '
+                'FROM documents_fts JOIN documents d ON d.id = documents_fts.rowid '
+                'WHERE documents_fts MATCH ?'
+            )
+            params = [*self._bm25_weights, match]
+
+        # Scalar filters run in SQL (json_each matches a scalar value or a
+        # list element); operator filters are checked on the rows returned
+        python_filters = {}
+        for key, value in (filters or {}).items():
+            if isinstance(value, (str, int, float)) and not isinstance(value, bool):
+                sql += ' AND EXISTS (SELECT 1 FROM json_each(d.metadata, ?) WHERE value = ?)'
+                params.extend([self._json_path(key), value])
+            else:
+                python_filters[key] = value
+
+        sql += ' ORDER BY score DESC, d.id'
+        if top_k is not None and not python_filters and not clause_filters:
+            sql += ' LIMIT ?'
+            params.append(top_k)
+
+        results = []
+        for doc_id, content, metadata_json, score in self._query(sql, params):
+            metadata = json.loads(metadata_json)
+            if python_filters and not self._match_filters(metadata, python_filters):
+                continue
+            if any(self._match_filters(metadata, clause) != expected for clause, expected in clause_filters):
+                continue
+            results.append({
+                'doc_id': doc_id,
+                'content': ContentHandle(content),
+                'score': score,
+                'metadata': metadata
+            })
+            if top_k is not None and len(results) >= top_k:
+                break
+        return results
+
+    def _translate_query(self, query: str) -> Tuple[Optional[str], List[Tuple[Dict, bool]]]:
+        """
+        Translate a query to an FTS5 expression.
+
+        Args:
+            query: Search query string
+
+        Returns:
+            FTS5 expression (None if the query has no text clause) and the
+            (filter, whether it must match) pairs of its metadata clauses
+        """
+        node = parse_query(query)
+        clause_filters: List[Tuple[Dict, bool]] = []
+        try:
+            return self._fts_expression(node, clause_filters, required=True), clause_filters
+        except _UnsupportedQuery:
+            # Match any keyword of the text clauses instead
+            keywords = self.text_processor.extract_keywords(' '.join(self._leaf_texts(node)))
+            return ' OR '.join(self._quote(keyword) for keyword in keywords) or None, []
+
+    def _fts_expression(self, node: Optional[QueryNode], clause_filters: List[Tuple[Dict, bool]],
+                        required: bool) -> Optional[str]:
+        """
+        Translate a query tree to an FTS5 expression.
+
+        Args:
+            node: Parsed query
+            clause_filters: List extended with the (filter, whether it must
+                match) pairs of metadata clauses
+            required: Whether every result must match the node, so metadata
+                clauses can be applied as filters
+
+        Returns:
+            FTS5 expression, or None if the node has no text clause
+
+        Raises:
+            _UnsupportedQuery: If FTS5 cannot express the node
+        """
+        if node is None:
+            return None
+
+        if isinstance(node, BooleanNode):
+            must = [expression for expression in (self._fts_expression(child, clause_filters, required)
+                                                  for child in node.must + node.filter) if expression]
+            should = [expression for expression in (self._fts_expression(child, clause_filters, False)
+                                                    for child in node.should) if expression]
+            must_not = []
+            for child in node.must_not:
+                if required and _is_metadata_clause(child):
+                    clause_filters.append((self._field_filter(child), False))
+                else:
+                    expression = self._fts_expression(child, clause_filters, False)
+                    if expression:
+                        must_not.append(expression)
+            # FTS5 has no optional clauses: they only count without required ones
+            if not node.must and should:
+                must.append(' OR '.join(f'({expression})' for expression in should))
+            if not must:
+                if must_not:
+                    # FTS5 cannot match documents by exclusion alone
+                    raise _UnsupportedQuery(node)
+                return None
+            expression = ' AND '.join(f'({expression})' for expression in must)
+            if must_not:
+                expression = f"({expression}) NOT ({' OR '.join(f'({e})' for e in must_not)})"
+            return expression
+
+        if _is_metadata_clause(node):
+            if not required:
+                raise _UnsupportedQuery(node)
+            clause_filters.append((self._field_filter(node), True))
+            return None
+
+        if isinstance(node, WildcardNode):
+            match = _PREFIX_PATTERN.fullmatch(node.pattern)
+            if match is None:
+                raise _UnsupportedQuery(node)
+            expression = self._quote(match.group(1).lower()) + ' *'
+        elif isinstance(node, PhraseNode):
+            words = self.text_processor.normalize_text(node.text).split()
+            if not words:
+                return None
+            expression = self._quote(' '.join(words))
+        else:
+            # Terms and fuzzy terms, which FTS5 matches exactly; stop words are skipped
+            if not self.text_processor.extract_keywords(node.text):
+                return None
+            expression = self._quote(self.text_processor.normalize_text(node.text))
+
+        if node.field is not None:
+            expression = f'{node.field} : {expression}'
+        return expression
+
+    @staticmethod
+    def _field_filter(node: QueryNode) -> Dict[str, Any]:
+        """Build the filter of a metadata clause, matched as in SearchEngine."""
+        if isinstance(node, RangeNode):
+            condition = {}
+            if node.low is not None:
+                condition['$gte'] = SearchEngine._range_value(node.low)
+            if node.high is not None:
+                condition['$lte'] = SearchEngine._range_value(node.high)
+            return {node.field: condition} if condition else {}
+        text = node.pattern if isinstance(node, WildcardNode) else node.text
+        if node.field == 'year':
+            value = SearchEngine._range_value(text)
+            return {'year': {'$gte': value, '$lte': value}}
+        text = max(re.split(r'[*?]', text), key=len)  # Longest literal part of a pattern
+        return {node.field: {'$icontains': text}}
+
+    @classmethod
+    def _leaf_texts(cls, node: Optional[QueryNode]) -> Iterator[str]:
+        """Yield the text of the text clauses of a query that are not excluded."""
+        if isinstance(node, BooleanNode):
+            for child in node.must + node.should + node.filter:
+                yield from cls._leaf_texts(child)
+        elif node is not None and not _is_metadata_clause(node):
+            yield node.pattern if isinstance(node, WildcardNode) else node.text
+
+    @staticmethod
+    def _quote(text: str) -> str:
+        """Quote text as an FTS5 string (a term or phrase)."""
+        return '"' + text.replace('"', '""') + '"'
+
+    @staticmethod
+    def _json_path(key: str) -> str:
+        """Build a JSON path selecting a top-level metadata key."""
+        return '$."' + key.replace('"', '\\"') + '"'
+
+    @staticmethod
+    def _match_filters(metadata: Dict, filters: Dict) -> bool:
+        """Check if document metadata matches filter criteria."""
+        return match_filters(metadata, filters)
+
+    def get_setting(self, key: str, default: Any = None) -> Any:
+        """
+        Read a JSON value stored alongside the index.
+
+        Args:
+            key: Setting name
+            default: Value returned if the setting is absent
+
+        Returns:
+            Stored value
+        """
+        rows = self._query('SELECT value FROM settings WHERE key = ?', (key,))
+        return json.loads(rows[0][0]) if rows else default
+
+    def set_setting(self, key: str, value: Any) -> None:
+        """
+        Store a JSON value alongside the index.
+
+        Args:
+            key: Setting name
+            value: JSON-serializable value
+        """
+        with self._write_lock:
+            connection = self._connection()
+            with connection:
+                connection.execute(
+                    'INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)',
+                    (key, json.dumps(value))
+                )
+
+    def optimize(self) -> None:
+        """Merge the FTS5 index b-trees and checkpoint the WAL."""
+        with self._write_lock:
+            connection = self._connection()
+            with connection:
+                connection.execute("INSERT INTO documents_fts(documents_fts) VALUES ('optimize')")
+            connection.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+
+    def _fetch_document(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        """Load a stored document by ID."""
+        rows = self._query(
+            'SELECT content, processed, metadata, document_type FROM documents WHERE doc_id = ?',
+            (doc_id,)
+        )
+        if not rows:
+            return None
+        content, processed, metadata, doc_type = rows[0]
+        return {
+            'content': ContentHandle(content),
+            'processed': json.loads(processed),
+            'metadata': json.loads(metadata),
+            'document_type': doc_type
+        }
+
+
+class SQLiteDocuments(Mapping):
+    """Read-only doc_id -> document mapping over the SQLite backend."""
+
+    def __init__(self, engine: SQLiteSearchEngine):
+        self._engine = engine
+
+    def __getitem__(self, doc_id: str) -> Dict[str, Any]:
+        doc = self._engine._fetch_document(doc_id)
+        if doc is None:
+            raise KeyError(doc_id)
+        return doc
+
+    def __contains__(self, doc_id: object) -> bool:
+        return bool(self._engine._query('SELECT 1 FROM documents WHERE doc_id = ?', (doc_id,)))
+
+    def __iter__(self) -> Iterator[str]:
+        rows = self._engine._query('SELECT doc_id FROM documents ORDER BY id')
+        return (doc_id for (doc_id,) in rows)
+
+    def __len__(self) -> int:
+        return self._engine._query('SELECT COUNT(*) FROM documents')[0][0]
+
+
+# EOF
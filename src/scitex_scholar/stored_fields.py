@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-17 10:00:00 (ywatanabe)"
+# File: src/scitex_scholar/stored_fields.py
+
+"""
+Compact storage of indexed documents.
+
+SearchEngine keeps each document's raw text once, zlib-compressed, and
+only the small processed fields in memory. The bulky fields derived from
+the text (cleaned text, LaTeX environments and math expressions) are
+dropped at indexing time and recomputed from the raw text by
+rebuild_index; keyword lists and sections are kept, as consumers such as
+VectorSearchEngine read them from the stored fields. Search results
+carry a ContentHandle sharing the compressed bytes, so building results
+copies no text and the content is only decompressed when it is read.
+
+For snippets, a document also keeps the character offset of every word
+of its indexed body text. The body of plain text documents has the same
+words as the raw text, so offsets point into the raw text; LaTeX
+documents additionally keep their compressed cleaned text.
+"""
+
+import zlib
+from array import array
+from collections.abc import Mapping
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+COMPRESSION_LEVEL = 6
+
+# Bulky processed fields derived from the text, recomputed instead of stored
+TRANSIENT_FIELDS = ('cleaned_text', 'latex_environments', 'math_expressions')
+
+
+def compress_text(text: str) -> bytes:
+    """Compress UTF-8 text with zlib."""
+    return zlib.compress(text.encode('utf-8'), COMPRESSION_LEVEL)
+
+
+def decompress_text(data: bytes) -> str:
+    """Decompress text written by compress_text."""
+    return zlib.decompress(data).decode('utf-8')
+
+
+class TextCompressor:
+    """Incremental compress_text for text read in chunks."""
+
+    def __init__(self):
+        """Start an empty compressed stream."""
+        self._compressor = zlib.compressobj(COMPRESSION_LEVEL)
+        self._parts: List[bytes] = []
+
+    def compress_chunks(self, chunks: Iterable[str]) -> Iterator[str]:
+        """Compress chunks as they pass through, yielding them unchanged."""
+        for chunk in chunks:
+            self._parts.append(self._compressor.compress(chunk.encode('utf-8')))
+            yield chunk
+
+    def finish(self) -> bytes:
+        """Return the compressed text, readable by decompress_text."""
+        self._parts.append(self._compressor.flush())
+        return b''.join(self._parts)
+
+
+class ContentHandle:
+    """
+    Lazily decompressed document text.
+
+    Compares equal to the text it holds and supports ``in``; call
+    ``str()`` (or ``text()``) for the text itself.
+    """
+
+    __slots__ = ('data',)
+
+    def __init__(self, data: bytes):
+        """
+        Wrap compressed text.
+
+        Args:
+            data: Output of compress_text
+        """
+        self.data = data
+
+    def text(self) -> str:
+        """Return the decompressed text."""
+        return decompress_text(self.data)
+
+    def __str__(self) -> str:
+        return self.text()
+
+    def __repr__(self) -> str:
+        return f"ContentHandle({len(self.data)} compressed bytes)"
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, ContentHandle):
+            return self.data == other.data
+        if isinstance(other, str):
+            return self.text() == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __contains__(self, item: str) -> bool:
+        return item in self.text()
+
+    def __len__(self) -> int:
+        return len(self.text())
+
+
+class StoredDocument(Mapping):
+    """
+    Stored fields of one document.
+
+    Reads like the document dictionaries of earlier versions, with
+    'content', 'processed', 'metadata' and 'document_type' keys; 'content'
+    is decompressed on each access and 'processed' holds the processed
+    fields other than TRANSIENT_FIELDS.
+    """
+
+    __slots__ = ('compressed', 'processed', 'metadata', 'document_type', 'offsets', 'body')
+
+    _KEYS = ('content', 'processed', 'metadata', 'document_type')
+
+    def __init__(self, compressed: bytes, processed: Dict[str, Any],
+                 metadata: Dict[str, Any], document_type: Optional[str] = None,
+                 offsets: Optional[array] = None, body: Optional[bytes] = None):
+        """
+        Initialize stored fields.
+
+        Args:
+            compressed: Raw text compressed with compress_text
+            processed: Processed fields without TRANSIENT_FIELDS
+            metadata: Document metadata
+            document_type: Detected document type ('text' or 'latex')
+            offsets: Character offsets of the words of the body text, if recorded
+            body: Compressed body text if it differs from the raw text
+        """
+        self.compressed = compressed
+        self.processed = processed
+        self.metadata = metadata
+        self.document_type = document_type
+        self.offsets = offsets
+        self.body = body
+
+    @classmethod
+    def create(cls, content: str, processed: Dict[str, Any], metadata: Dict[str, Any],
+               document_type: Optional[str] = None,
+               offsets: Optional[array] = None) -> 'StoredDocument':
+        """
+        Store a document, dropping the bulky processed fields derived from its text.
+
+        Args:
+            content: Raw document text
+            processed: Output of TextProcessor.process_document/process_latex_document
+            metadata: Document metadata
+            document_type: Detected document type
+            offsets: Character offsets of the words of the body text (see
+                TextProcessor.token_offsets)
+
+        Returns:
+            StoredDocument
+        """
+        kept = {key: value for key, value in processed.items() if key not in TRANSIENT_FIELDS}
+        # Cleaned LaTeX has other words than its source
+        cleaned_text = processed.get('cleaned_text') if document_type == 'latex' else None
+        body = None if cleaned_text is None else compress_text(cleaned_text)
+        return cls(compress_text(content), kept, metadata, document_type, offsets, body)
+
+    @classmethod
+    def from_dict(cls, doc: Mapping) -> 'StoredDocument':
+        """Convert a document dictionary, as stored by earlier versions, to stored fields."""
+        if isinstance(doc, StoredDocument):
+            return doc
+        return cls.create(doc['content'], doc.get('processed') or {}, doc.get('metadata') or {},
+                          doc.get('document_type'))
+
+    @property
+    def content(self) -> ContentHandle:
+        """Handle on the raw text."""
+        return ContentHandle(self.compressed)
+
+    def body_text(self) -> str:
+        """Return the text that body term positions and offsets refer to."""
+        return decompress_text(self.compressed if self.body is None else self.body)
+
+    def fields(self) -> Dict[str, Any]:
+        """Return the JSON-serializable fields other than the content."""
+        return {'processed': self.processed, 'metadata': self.metadata,
+                'document_type': self.document_type}
+
+    def __getitem__(self, key: str) -> Any:
+        if key == 'content':
+            return decompress_text(self.compressed)
+        if key in self._KEYS:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._KEYS)
+
+    def __len__(self) -> int:
+        return len(self._KEYS)
+
+
+# EOF
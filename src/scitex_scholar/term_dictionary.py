@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-17 10:00:00 (ywatanabe)"
+# File: src/scitex_scholar/term_dictionary.py
+
+"""
+Term dictionary for prefix, wildcard and fuzzy term expansion.
+
+Terms are kept in a sorted list, so the terms starting with a prefix form
+a contiguous range found by binary search. A trigram index maps every
+three-character substring of the padded terms to the sorted IDs of the
+terms containing it; fuzzy lookups only verify the terms sharing enough
+trigrams with the query term, and wildcard patterns without a literal
+prefix are narrowed to the terms containing the trigrams of their
+literal parts.
+"""
+
+import fnmatch
+import re
+import threading
+from array import array
+from bisect import bisect_left, insort
+from heapq import merge
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .postings import intersect, union
+
+_WILDCARDS = re.compile(r'[*?]')
+
+
+def trigrams(term: str) -> List[str]:
+    """Return the trigrams of a term padded with '$' at both ends."""
+    padded = f"${term}$"
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+
+def bounded_edit_distance(a: str, b: str, max_edits: int) -> Optional[int]:
+    """
+    Compute the Levenshtein distance of two strings if it is small.
+
+    Only the diagonal band of width 2 * max_edits + 1 of the dynamic
+    programming table is filled, and the computation stops as soon as
+    every cell of a row exceeds max_edits.
+
+    Args:
+        a: First string
+        b: Second string
+        max_edits: Largest distance of interest
+
+    Returns:
+        Edit distance, or None if it exceeds max_edits
+    """
+    if abs(len(a) - len(b)) > max_edits:
+        return None
+    if len(a) > len(b):
+        a, b = b, a
+
+    too_far = max_edits + 1
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        lo, hi = max(1, i - max_edits), min(len(b), i + max_edits)
+        current = [too_far] * (len(b) + 1)
+        current[0] = i if i <= max_edits else too_far
+        for j in range(lo, hi + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost, too_far)
+        if min(current[lo - 1:hi + 1]) > max_edits:
+            return None
+        previous = current
+    return previous[len(b)] if previous[len(b)] <= max_edits else None
+
+
+class TermDictionary:
+    """
+    Sorted term list with a trigram index.
+
+    Terms can be added at any time; they are merged into the sorted list
+    on the next lookup. Terms are never removed, so expansions may name
+    terms without live postings, which scoring ignores.
+    """
+
+    def __init__(self, terms: Iterable[str] = ()):
+        """
+        Initialize the dictionary.
+
+        Args:
+            terms: Initial terms, in any order
+        """
+        self._terms: List[str] = []  # Term ID -> term
+        self._ids: Dict[str, int] = {}
+        self._sorted: List[str] = []
+        self._pending: List[str] = []  # Added since the last lookup
+        self._grams: Dict[str, array] = {}  # Trigram -> sorted term IDs
+        self._lock = threading.Lock()
+        for term in terms:
+            self.add(term)
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+    def __contains__(self, term: object) -> bool:
+        return term in self._ids
+
+    def add(self, term: str) -> None:
+        """
+        Add a term if it is not present.
+
+        Args:
+            term: Term to add
+        """
+        with self._lock:
+            if term in self._ids:
+                return
+            term_id = len(self._terms)
+            self._terms.append(term)
+            self._ids[term] = term_id
+            self._pending.append(term)
+            for gram in set(trigrams(term)):
+                ids = self._grams.get(gram)
+                if ids is None:
+                    ids = self._grams[gram] = array('I')
+                ids.append(term_id)
+
+    def _sorted_terms(self) -> List[str]:
+        """Return the sorted term list, merging terms added since the last call."""
+        with self._lock:
+            if self._pending:
+                if len(self._pending) < 64:
+                    for term in self._pending:
+                        insort(self._sorted, term)
+                else:
+                    self._sorted = list(merge(self._sorted, sorted(self._pending)))
+                self._pending = []
+            return self._sorted
+
+    def prefix(self, prefix: str, limit: Optional[int] = None) -> List[str]:
+        """
+        Find the terms starting with a prefix.
+
+        Args:
+            prefix: Term prefix
+            limit: Maximum number of terms to return
+
+        Returns:
+            Matching terms in sorted order
+        """
+        terms = self._sorted_terms()
+        matched = []
+        for i in range(bisect_left(terms, prefix), len(terms)):
+            if not terms[i].startswith(prefix) or (limit is not None and len(matched) >= limit):
+                break
+            matched.append(terms[i])
+        return matched
+
+    def wildcard(self, pattern: str, limit: Optional[int] = None) -> List[str]:
+        """
+        Find the terms matching a pattern with '*' and '?' wildcards.
+
+        Args:
+            pattern: Pattern such as 'electroenceph*' or 'neuro*gy'
+            limit: Maximum number of terms to return
+
+        Returns:
+            Matching terms in sorted order
+        """
+        literal_prefix = _WILDCARDS.split(pattern, 1)[0]
+        if literal_prefix == pattern:
+            return [pattern] if pattern in self._ids else []
+        regex = re.compile(fnmatch.translate(pattern))
+
+        if literal_prefix:
+            candidates: Iterable[str] = self.prefix(literal_prefix)
+        else:
+            # Terms must contain every trigram of the literal parts
+            grams = {
+                part[i:i + 3]
+                for part in _WILDCARDS.split(pattern) if len(part) >= 3
+                for i in range(len(part) - 2)
+            }
+            if grams:
+                ids = None
+                for gram in sorted(grams, key=lambda gram: len(self._grams.get(gram, ()))):
+                    ids = self._grams.get(gram, array('I')) if ids is None else intersect(ids, self._grams.get(gram, ()))
+                    if not ids:
+                        return []
+                candidates = sorted(self._terms[term_id] for term_id in ids)
+            else:
+                candidates = self._sorted_terms()
+
+        matched = []
+        for term in candidates:
+            if regex.match(term):
+                matched.append(term)
+                if limit is not None and len(matched) >= limit:
+                    break
+        return matched
+
+    def fuzzy(self, term: str, max_edits: int, limit: Optional[int] = None) -> List[Tuple[str, int]]:
+        """
+        Find the terms within an edit distance of a term.
+
+        A term within k edits shares at least ``n - 3k`` of the n distinct
+        trigrams of the query term, so it contains one of any ``3k + 1`` of
+        them. Candidates are gathered from the rarest ``3k + 1`` trigrams
+        and verified with a bounded edit distance.
+
+        Args:
+            term: Query term
+            max_edits: Maximum Levenshtein distance
+            limit: Maximum number of terms to return
+
+        Returns:
+            (term, distance) pairs, closest first
+        """
+        grams = sorted(set(trigrams(term)), key=lambda gram: len(self._grams.get(gram, ())))
+        required = len(grams) - 3 * max_edits
+        if required > 0:
+            ids = union(self._grams.get(gram, ()) for gram in grams[:3 * max_edits + 1])
+            candidates: Iterable[str] = (self._terms[term_id] for term_id in ids)
+        else:
+            candidates = list(self._terms)
+
+        matched = []
+        for candidate in candidates:
+            if abs(len(candidate) - len(term)) > max_edits:
+                continue
+            distance = bounded_edit_distance(term, candidate, max_edits)
+            if distance is not None:
+                matched.append((candidate, distance))
+        matched.sort(key=lambda item: (item[1], item[0]))
+        return matched if limit is None else matched[:limit]
+
+
+# EOF
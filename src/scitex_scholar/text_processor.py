@@ -10,10 +10,82 @@ This module provides functionality for cleaning, normalizing, and processing
 scientific text documents for search and analysis purposes.
 """
 
+import os
 import re
-from typing import List, Dict, Any, Optional
+from array import array
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from itertools import islice
+from typing import Callable, Iterable, Iterator, List, Dict, Any, Optional, Pattern, Sequence, Tuple
 from .latex_parser import LaTeXParser
 
+# Words of ASCII letters, as indexed by default
+WORD_PATTERN = re.compile(r'\b[a-zA-Z]+\b')
+
+# Scientific tokens: Unicode letters and digits with inner hyphens, so that
+# hyphenated terms (event-related), gene and protein names (BRCA1, IL-6,
+# p53) and Greek letters (α, β) are single tokens. A token needs a letter.
+SCIENTIFIC_TOKEN_PATTERN = re.compile(r'(?=[\w-]*[^\W\d_])[^\W_]+(?:-[^\W_]+)*')
+
+_WHITESPACE = re.compile(r'\s+')
+
+# Characters that can continue a token across a chunk boundary
+_TOKEN_CHAR = re.compile(r'[\w-]')
+
+# Mathematical keywords of LaTeX math expressions, one named group each
+_MATH_KEYWORD_PATTERN = re.compile('|'.join(f'(?P<{keyword}>{pattern})' for keyword, pattern in (
+    ('integral', r'\\int'),
+    ('derivative', r'\\frac\{d\w*\}'),
+    ('summation', r'\\sum'),
+    ('limit', r'\\lim'),
+    ('matrix', r'\\begin\{(?:matrix|pmatrix|bmatrix)\}'),
+    ('equation', r'='),
+    ('inequality', r'[<>≤≥]'),
+    ('infinity', r'\\infty'),
+    ('partial_derivative', r'\\partial'),
+    ('square_root', r'\\sqrt'),
+)))
+_NUM_MATH_KEYWORDS = len(_MATH_KEYWORD_PATTERN.groupindex)
+
+# LaTeX markers and scientific vocabulary looked for by detect_document_type.
+# The leading lookahead on possible first characters lets the scan skip
+# other characters quickly. Inline math only consumes its opening '$', so
+# markers inside it are found.
+_DOCUMENT_TYPE_PATTERN = re.compile(
+    r'(?=[\\$rsacRSAC])'
+    r'(?:(?P<documentclass>\\documentclass)'
+    r'|(?P<begin_document>\\begin\{document\})'
+    r'|(?P<section>\\section\{)'
+    r'|(?P<cite>\\cite\{)'
+    r'|(?P<math>\$(?=.*?\$))'
+    r'|(?P<scientific>(?i:research|study|analysis|results|conclusion)))'
+)
+
+# Number of leading characters examined by detect_document_type
+DETECTION_PREFIX = 65536
+
+
+@dataclass
+class TokenizedText:
+    """
+    Result of tokenizing a text in a single pass.
+
+    Attributes:
+        positions: Keyword -> ascending word positions, in order of first occurrence
+        frequencies: Keyword -> number of occurrences
+        offsets: Character offset of every word, including stop words
+        word_count: Number of words, including stop words
+        char_count: Number of characters of the text
+        split_count: Number of whitespace-separated words, as ``len(text.split())``
+    """
+    positions: Dict[str, Sequence[int]]
+    frequencies: Dict[str, int]
+    offsets: array
+    word_count: int
+    char_count: int
+    split_count: int
+
 
 class TextProcessor:
     """
@@ -23,12 +95,21 @@ class TextProcessor:
     from scientific texts including LaTeX content.
     """
     
-    def __init__(self, latex_parser: Optional[LaTeXParser] = None):
+    def __init__(self, latex_parser: Optional[LaTeXParser] = None, scientific_tokens: bool = False,
+                 normalizer: Optional[Callable[[str], str]] = None):
         """
         Initialize TextProcessor with default settings.
         
+        An index and its queries must be tokenized with the same rule and
+        normalizer, which holds when a SearchEngine uses one TextProcessor
+        for both.
+        
         Args:
             latex_parser: Optional LaTeX parser instance for enhanced LaTeX processing
+            scientific_tokens: Tokenize with SCIENTIFIC_TOKEN_PATTERN instead
+                of ASCII words
+            normalizer: Function mapping each lowercase keyword to its index
+                term, such as scitex_scholar.normalizer.Normalizer (stemming)
         """
         self.stop_words = {
             'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 
@@ -36,6 +117,10 @@ class TextProcessor:
             'been', 'being', 'have', 'has', 'had', 'do', 'does', 'did'
         }
         
+        self.scientific_tokens = scientific_tokens
+        self.token_pattern: Pattern = SCIENTIFIC_TOKEN_PATTERN if scientific_tokens else WORD_PATTERN
+        self.normalizer = normalizer
+        
         # Initialize LaTeX parser for enhanced document processing
         self.latex_parser = latex_parser or LaTeXParser()
     
@@ -53,7 +138,7 @@ class TextProcessor:
             return ""
         
         # Remove extra whitespace and normalize
-        cleaned = re.sub(r'\s+', ' ', text.strip())
+        cleaned = _WHITESPACE.sub(' ', text.strip())
         
         return cleaned
     
@@ -72,32 +157,150 @@ class TextProcessor:
         
         return text.lower()
     
-    def extract_keywords(self, text: str, min_length: int = 3) -> List[str]:
+    def tokenize(self, text: str, min_length: int = 3) -> TokenizedText:
         """
-        Extract keywords from text by removing stop words.
+        Tokenize text in one pass, keeping positions and frequencies.
+        
+        Keywords are lowercase words that are not stop words and have at
+        least min_length characters (shorter non-ASCII tokens such as Greek
+        letters are kept), mapped through the normalizer if any.
+        
+        Positions count every word in the text, including stop words and
+        short words, so gaps between keywords are preserved for phrase
+        matching; offsets are taken on the text as given, so the word at
+        position ``p`` starts at ``offsets[p]``.
         
         Args:
             text: Input text
             min_length: Minimum keyword length
             
         Returns:
-            List of extracted keywords
+            TokenizedText
         """
+        positions: Dict[str, List[int]] = {}
+        offsets = array('I')
         if not text:
-            return []
+            return TokenizedText(positions, {}, offsets, 0, 0, 0)
         
-        # Normalize and split into words
-        normalized = self.normalize_text(text)
-        words = re.findall(r'\b[a-zA-Z]+\b', normalized)
+        stop_words = self.stop_words
+        normalize = self.normalizer
+        for position, match in enumerate(self.token_pattern.finditer(text)):
+            offsets.append(match.start())
+            word = match.group().lower()
+            if word in stop_words or (len(word) < min_length and word.isascii()):
+                continue
+            if normalize is not None:
+                word = normalize(word)
+            term_positions = positions.get(word)
+            if term_positions is None:
+                positions[word] = [position]
+            else:
+                term_positions.append(position)
         
-        # Filter out stop words and short words
-        keywords = [
-            word for word in words 
-            if word not in self.stop_words and len(word) >= min_length
-        ]
+        frequencies = {term: len(term_positions) for term, term_positions in positions.items()}
+        return TokenizedText(positions, frequencies, offsets, len(offsets), len(text), len(text.split()))
+    
+    def token_stream(self, chunks: Iterable[str], min_length: int = 3,
+                     record_offsets: bool = False) -> 'TokenStream':
+        """
+        Tokenize a document given as text chunks, without joining them.
         
-        return list(set(keywords))  # Remove duplicates
+        Args:
+            chunks: Text chunks (pages, lines, file blocks) in document order
+            min_length: Minimum keyword length
+            record_offsets: Keep the offset of every word in the stream's ``offsets``
+            
+        Returns:
+            TokenStream yielding (position, offset, keyword) tuples
+        """
+        return TokenStream(self, chunks, min_length, record_offsets)
     
+    def tokenize_stream(self, chunks: Iterable[str], min_length: int = 3) -> TokenizedText:
+        """
+        Tokenize a document given as text chunks, like tokenize on the joined text.
+        
+        Only the current chunk and a partial word are held in memory besides
+        the result, whose positions are stored as ``array('I')``.
+        
+        Args:
+            chunks: Text chunks in document order
+            min_length: Minimum keyword length
+            
+        Returns:
+            TokenizedText
+        """
+        stream = self.token_stream(chunks, min_length, record_offsets=True)
+        positions: Dict[str, array] = {}
+        for position, _, term in stream:
+            term_positions = positions.get(term)
+            if term_positions is None:
+                positions[term] = array('I', (position,))
+            else:
+                term_positions.append(position)
+        return TokenizedText(positions, stream.frequencies, stream.offsets,
+                             stream.word_count, stream.char_count, stream.split_count)
+    
+    def extract_keywords(self, text: str, min_length: int = 3) -> List[str]:
+        """
+        Extract keywords from text by removing stop words.
+        
+        Args:
+            text: Input text
+            min_length: Minimum keyword length
+            
+        Returns:
+            List of distinct keywords in order of first occurrence
+        """
+        return list(self.tokenize(text, min_length).positions)
+
+    def keyword_frequencies(self, text: str, min_length: int = 3) -> Dict[str, int]:
+        """
+        Count keyword occurrences in text.
+
+        Uses the same normalization and filtering as extract_keywords but
+        keeps term frequencies, which are needed for ranking.
+
+        Args:
+            text: Input text
+            min_length: Minimum keyword length
+
+        Returns:
+            Dictionary mapping keywords to occurrence counts
+        """
+        return self.tokenize(text, min_length).frequencies
+
+    def term_positions(self, text: str, min_length: int = 3) -> Dict[str, List[int]]:
+        """
+        Map each keyword to the word positions where it occurs.
+
+        Positions count every word in the text, including stop words and
+        short words that are not returned, so gaps between keywords are
+        preserved for phrase matching.
+
+        Args:
+            text: Input text
+            min_length: Minimum keyword length
+
+        Returns:
+            Dictionary mapping keywords to ascending word positions
+        """
+        return self.tokenize(text, min_length).positions
+
+    def token_offsets(self, text: str) -> array:
+        """
+        Find the character offset of every word counted by term_positions.
+
+        Offsets are taken on the text as given, so the word at position
+        ``p`` of ``term_positions(text)`` starts at ``token_offsets(text)[p]``.
+
+        Args:
+            text: Input text
+
+        Returns:
+            Start offsets of the words, in order
+        """
+        return array('I', (match.start() for match in self.token_pattern.finditer(text or '')))
+
     def extract_sections(self, text: str) -> Dict[str, str]:
         """
         Extract common sections from scientific documents.
@@ -134,17 +337,7 @@ class TextProcessor:
         Returns:
             Dictionary containing processed document information
         """
-        cleaned_text = self.clean_text(document)
-        keywords = self.extract_keywords(cleaned_text)
-        sections = self.extract_sections(document)
-        
-        return {
-            'cleaned_text': cleaned_text,
-            'keywords': keywords,
-            'sections': sections,
-            'word_count': len(cleaned_text.split()),
-            'char_count': len(cleaned_text)
-        }
+        return self._process_text(document)[0]
     
     def process_latex_document(self, latex_text: str) -> Dict[str, Any]:
         """
@@ -156,21 +349,102 @@ class TextProcessor:
         Returns:
             Dictionary containing comprehensive document analysis
         """
-        # Parse LaTeX structure
-        latex_parsed = self.latex_parser.parse_document(latex_text)
+        return self._process_latex(latex_text)[0]
+    
+    def analyze_document(self, content: str) -> Tuple[str, Dict[str, Any], TokenizedText]:
+        """
+        Detect the type of a document, process it and tokenize its body text.
         
-        # Clean LaTeX content for text processing
-        cleaned_text = self.latex_parser.clean_latex_content(latex_text)
+        The body text is the raw content for plain text, whose cleaning only
+        collapses whitespace and keeps every word, and the cleaned text for
+        LaTeX; token offsets refer to it.
+        
+        Args:
+            content: Document content (plain text or LaTeX)
+            
+        Returns:
+            Tuple of (document type, processed document, body tokens)
+        """
+        doc_type = self.detect_document_type(content)
+        if doc_type == 'latex':
+            processed, tokens = self._process_latex(content)
+        else:
+            processed, tokens = self._process_text(content)
+        return doc_type, processed, tokens
+    
+    def process_many(self, documents: Iterable[str], workers: Optional[int] = None,
+                     chunksize: int = 16, ordered: bool = True) -> Iterator[Tuple[int, str, Dict[str, Any]]]:
+        """
+        Detect the type of many documents and process them in worker processes.
+        
+        Processing is CPU-bound regex work, so it is spread over processes
+        rather than threads. Every worker holds a copy of this processor
+        (with its LaTeX parser and normalizer), created once and reused for
+        all of its chunks. Documents are read lazily and at most two chunks
+        per worker are in flight, so results stream while the input is
+        still being consumed.
+        
+        Args:
+            documents: Document texts (plain text or LaTeX)
+            workers: Number of worker processes (defaults to the number of
+                CPUs; 1 processes the documents in this process)
+            chunksize: Number of documents sent to a worker at once
+            ordered: Yield results in input order; otherwise as chunks complete
+            
+        Returns:
+            Iterator of (input index, document type, processed document), as
+            returned by process_document/process_latex_document
+        """
+        workers = workers or os.cpu_count() or 1
+        chunks = _chunked(enumerate(documents), max(1, chunksize))
+        if workers == 1:
+            for chunk in chunks:
+                yield from _process_chunk(chunk, self)
+            return
+        
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(self,)) as executor:
+            pending = deque()
+            try:
+                for chunk in chunks:
+                    pending.append(executor.submit(_process_chunk, chunk))
+                    while len(pending) >= 2 * workers:
+                        yield from _next_results(pending, ordered)
+                while pending:
+                    yield from _next_results(pending, ordered)
+            finally:
+                # Stop queued chunks if the caller stops iterating
+                for future in pending:
+                    future.cancel()
+    
+    def _process_text(self, document: str) -> Tuple[Dict[str, Any], TokenizedText]:
+        """Process a plain text document, returning its tokens as well."""
+        cleaned_text = self.clean_text(document)
+        tokens = self.tokenize(document)
+        sections = self.extract_sections(document)
+        
+        return {
+            'cleaned_text': cleaned_text,
+            'keywords': list(tokens.positions),
+            'sections': sections,
+            'word_count': tokens.split_count,
+            'char_count': len(cleaned_text)
+        }, tokens
+    
+    def _process_latex(self, latex_text: str) -> Tuple[Dict[str, Any], TokenizedText]:
+        """Process a LaTeX document, returning the tokens of its cleaned text as well."""
+        # Parse LaTeX structure and clean content in one pass
+        latex_parsed = self.latex_parser.parse_document(latex_text)
+        cleaned_text = latex_parsed['clean_text']
         
         # Extract keywords from cleaned content
-        keywords = self.extract_keywords(cleaned_text)
+        tokens = self.tokenize(cleaned_text)
         
         # Merge LaTeX-specific and general text processing results
         result = {
             'cleaned_text': cleaned_text,
-            'keywords': keywords,
-            'word_count': len(cleaned_text.split()),
-            'char_count': len(cleaned_text),
+            'keywords': list(tokens.positions),
+            'word_count': tokens.split_count,
+            'char_count': tokens.char_count,
             
             # LaTeX-specific information
             'latex_metadata': latex_parsed.get('metadata', {}),
@@ -192,7 +466,7 @@ class TextProcessor:
             result['math_keywords'] = math_keywords
             result['keywords'].extend(math_keywords)
         
-        return result
+        return result, tokens
     
     def _extract_math_keywords(self, math_expressions: List[Dict[str, str]]) -> List[str]:
         """
@@ -204,56 +478,166 @@ class TextProcessor:
         Returns:
             List of mathematical keywords and concepts
         """
-        math_keywords = []
-        
-        # Common mathematical keywords to extract
-        math_patterns = {
-            'integral': r'\\int',
-            'derivative': r'\\frac\{d\w*\}',
-            'summation': r'\\sum',
-            'limit': r'\\lim',
-            'matrix': r'\\begin\{(matrix|pmatrix|bmatrix)\}',
-            'equation': r'=',
-            'inequality': r'[<>≤≥]',
-            'infinity': r'\\infty',
-            'partial_derivative': r'\\partial',
-            'square_root': r'\\sqrt',
-        }
-        
+        math_keywords = {}
         for expr in math_expressions:
-            content = expr.get('content', '')
-            for keyword, pattern in math_patterns.items():
-                if re.search(pattern, content):
-                    math_keywords.append(keyword)
+            for match in _MATH_KEYWORD_PATTERN.finditer(expr.get('content', '')):
+                math_keywords[match.lastgroup] = None
+            if len(math_keywords) == _NUM_MATH_KEYWORDS:
+                break
         
-        return list(set(math_keywords))  # Remove duplicates
+        return list(math_keywords)  # Distinct, in order of first occurrence
     
-    def detect_document_type(self, text: str) -> str:
+    def detect_document_type(self, text: str, max_chars: int = DETECTION_PREFIX) -> str:
         """
         Detect the type of document based on content patterns.
         
+        A document is LaTeX if it has two kinds of LaTeX markers
+        (\\documentclass, \\begin{document}, \\section{, \\cite{ or inline
+        math), and scientific if it mentions research, study, analysis,
+        results or conclusion. The markers are found in one pass of a
+        combined pattern, which stops as soon as the document is known to
+        be LaTeX, over at most the first max_chars characters.
+        
         Args:
             text: Document text
+            max_chars: Length of the prefix examined (None for the whole text)
             
         Returns:
             Detected document type ('latex', 'plain_text', 'scientific')
         """
-        # Check for LaTeX patterns
-        latex_patterns = [
-            r'\\documentclass',
-            r'\\begin\{document\}',
-            r'\\section\{',
-            r'\\cite\{',
-            r'\$.*?\$',  # Math expressions
-        ]
-        
-        latex_score = sum(1 for pattern in latex_patterns if re.search(pattern, text))
-        
-        if latex_score >= 2:
-            return 'latex'
-        elif any(word in text.lower() for word in ['research', 'study', 'analysis', 'results', 'conclusion']):
-            return 'scientific'
-        else:
-            return 'plain_text'
+        end = len(text) if max_chars is None else min(len(text), max_chars)
+        latex_markers = set()
+        scientific = False
+        for match in _DOCUMENT_TYPE_PATTERN.finditer(text, 0, end):
+            if match.lastgroup == 'scientific':
+                scientific = True
+                continue
+            latex_markers.add(match.lastgroup)
+            if len(latex_markers) >= 2:
+                return 'latex'
+        
+        return 'scientific' if scientific else 'plain_text'
+
+
+class TokenStream:
+    """
+    Incremental tokenizer over the chunks of one document.
+    
+    Iterating yields a (word position, character offset, keyword) tuple for
+    every keyword as soon as the chunk completing it has been read, with the
+    positions, offsets and keywords TextProcessor.tokenize finds in the
+    joined text. Trailing word characters of a chunk are held back until
+    the word ends, so words split across chunks are tokenized whole.
+    
+    ``word_count``, ``char_count``, ``split_count`` and ``frequencies`` are
+    running totals of the text read so far.
+    """
+    
+    def __init__(self, processor: TextProcessor, chunks: Iterable[str],
+                 min_length: int = 3, record_offsets: bool = False):
+        """
+        Initialize the stream.
+        
+        Args:
+            processor: TextProcessor providing the token rule, stop words and normalizer
+            chunks: Text chunks in document order
+            min_length: Minimum keyword length
+            record_offsets: Keep the offset of every word in ``offsets``
+        """
+        self.processor = processor
+        self.min_length = min_length
+        self.word_count = 0
+        self.char_count = 0
+        self.split_count = 0
+        self.frequencies: Dict[str, int] = {}
+        self.offsets: Optional[array] = array('I') if record_offsets else None
+        self._chunks = chunks
+    
+    def __iter__(self) -> Iterator[Tuple[int, int, str]]:
+        carry = ''
+        carry_word = False  # The last chunk ended inside a whitespace-separated word
+        base = 0  # Offset of the start of the buffer in the document
+        for chunk in self._chunks:
+            if not chunk:
+                continue
+            self.char_count += len(chunk)
+            # A whitespace-separated word split across chunks is counted once
+            self.split_count += len(chunk.split())
+            if carry_word and not chunk[0].isspace():
+                self.split_count -= 1
+            carry_word = not chunk[-1].isspace()
+            buffer = carry + chunk
+            # Words ending at the end of the buffer may continue in the next chunk
+            cut = len(buffer)
+            while cut > 0 and _TOKEN_CHAR.match(buffer, cut - 1):
+                cut -= 1
+            yield from self._scan(buffer, cut, base)
+            carry = buffer[cut:]
+            base += cut
+        yield from self._scan(carry, len(carry), base)
+    
+    def _scan(self, buffer: str, end: int, base: int) -> Iterator[Tuple[int, int, str]]:
+        """Tokenize buffer[:end], whose first character is at offset base."""
+        processor = self.processor
+        stop_words = processor.stop_words
+        normalize = processor.normalizer
+        frequencies = self.frequencies
+        offsets = self.offsets
+        for match in processor.token_pattern.finditer(buffer, 0, end):
+            position = self.word_count
+            self.word_count += 1
+            offset = base + match.start()
+            if offsets is not None:
+                offsets.append(offset)
+            word = match.group().lower()
+            if word in stop_words or (len(word) < self.min_length and word.isascii()):
+                continue
+            if normalize is not None:
+                word = normalize(word)
+            frequencies[word] = frequencies.get(word, 0) + 1
+            yield position, offset, word
+
+
+# Processor of a worker process of TextProcessor.process_many
+_worker_processor: Optional[TextProcessor] = None
+
+
+def _init_worker(processor: TextProcessor) -> None:
+    """Keep the processor copied to a worker process for all of its chunks."""
+    global _worker_processor
+    _worker_processor = processor
+
+
+def _chunked(items: Iterable, size: int) -> Iterator[list]:
+    """Split an iterable into lists of at most size items."""
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _process_chunk(chunk: List[Tuple[int, str]],
+                   processor: Optional[TextProcessor] = None) -> List[Tuple[int, str, Dict[str, Any]]]:
+    """Process (index, document) pairs with the given or the worker's processor."""
+    processor = processor or _worker_processor
+    results = []
+    for index, document in chunk:
+        doc_type, processed, _ = processor.analyze_document(document)
+        results.append((index, doc_type, processed))
+    return results
+
+
+def _next_results(pending: deque, ordered: bool) -> List[Tuple[int, str, Dict[str, Any]]]:
+    """Remove finished chunks from pending and return their results."""
+    if ordered:
+        return pending.popleft().result()
+    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+    results = []
+    for future in done:
+        pending.remove(future)
+        results.extend(future.result())
+    return results
 
 # EOF
\ No newline at end of file
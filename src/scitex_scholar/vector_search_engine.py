@@ -24,6 +24,12 @@ from sentence_transformers import SentenceTransformer
 import torch
 from sklearn.metrics.pairwise import cosine_similarity
 import hashlib
+import re
+
+from .filter_index import FilterIndex, bitmap_docnos
+from .postings import DocIdTable
+from .query_cache import QueryCache
+from .snippets import fragments_for_terms
 
 logger = logging.getLogger(__name__)
 
@@ -50,13 +56,16 @@ class VectorSearchEngine:
     - Document chunking for better granularity
     - Persistent vector storage with ChromaDB
     - Query expansion and refinement
+    - Result cache for repeated queries, invalidated when documents are added
     """
     
     def __init__(self, 
                  model_name: str = "allenai/scibert_scivocab_uncased",
                  chunk_size: int = 512,
                  chunk_overlap: int = 128,
-                 db_path: str = "./.vector_db"):
+                 db_path: str = "./.vector_db",
+                 cache_size: int = 256,
+                 cache_ttl: Optional[float] = 300.0):
         """
         Initialize vector search engine.
         
@@ -65,6 +74,9 @@ class VectorSearchEngine:
             chunk_size: Size of text chunks in tokens
             chunk_overlap: Overlap between chunks
             db_path: Path to ChromaDB storage
+            cache_size: Number of query results to cache (0 disables caching)
+            cache_ttl: Seconds after which cached results expire, as other
+                processes may write to the same ChromaDB storage
         """
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
@@ -91,8 +103,31 @@ class VectorSearchEngine:
             metadata={"description": "Document chunk embeddings"}
         )
         
-        # Cache for frequently accessed data
-        self._cache = {}
+        # Metadata filter index over every field, resolving filters to allowed document IDs
+        self.filter_index = FilterIndex(fields=None)
+        self.doc_table = DocIdTable()
+        self._load_filter_index()
+        
+        # Results of repeated queries, keyed by index generation
+        self.generation = 0
+        self.query_cache = QueryCache(cache_size, cache_ttl)
+    
+    def _load_filter_index(self) -> None:
+        """Index the metadata of the documents already stored."""
+        stored = self.doc_collection.get(include=['metadatas'])
+        missing = []
+        for doc_id, metadata in zip(stored['ids'], stored['metadatas']):
+            metadata = metadata or {}
+            # The doc_id field is added for where clauses, as in add_document
+            self.filter_index.add(self.doc_table.add(doc_id),
+                                  {key: value for key, value in metadata.items() if key != 'doc_id'})
+            if 'doc_id' not in metadata:
+                missing.append((doc_id, {**metadata, 'doc_id': doc_id}))
+        
+        # Documents stored by earlier versions lack the doc_id field
+        if missing:
+            ids, metadatas = zip(*missing)
+            self.doc_collection.update(ids=list(ids), metadatas=list(metadatas))
         
     def add_document(self, 
                     doc_id: str, 
@@ -120,7 +155,7 @@ class VectorSearchEngine:
             self.doc_collection.add(
                 ids=[doc_id],
                 embeddings=[doc_embedding.tolist()],
-                metadatas=[metadata],
+                metadatas=[{**metadata, 'doc_id': doc_id}],  # doc_id allows ID filters in where
                 documents=[doc_text]
             )
             
@@ -153,6 +188,9 @@ class VectorSearchEngine:
                     documents=chunk_texts
                 )
             
+            self.filter_index.add(self.doc_table.add(doc_id), metadata)
+            self.generation += 1
+            
             logger.info(f"Added document {doc_id} with {len(chunks)} chunks")
             return True
             
@@ -179,21 +217,76 @@ class VectorSearchEngine:
         Returns:
             List of search results
         """
+        key = QueryCache.make_key(
+            self.generation, ' '.join(query.lower().split()),
+            n_results, search_type, filters, expand_query
+        )
+        cached = self.query_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        results = self._search(query, n_results, search_type, filters, expand_query)
+        self.query_cache.put(key, results)
+        return results
+    
+    def _search(self,
+                query: str,
+                n_results: int,
+                search_type: str,
+                filters: Optional[Dict],
+                expand_query: bool) -> List[SearchResult]:
+        """Run a search without consulting the query cache."""
         # Expand query if requested
         if expand_query:
             expanded_query = self._expand_query(query)
         else:
             expanded_query = query
         
+        # Resolve filters before any vector is compared
+        matched, where = self._resolve_filters(filters)
+        if not matched:
+            return []
+        
         # Get query embedding
         query_embedding = self.encoder.encode(expanded_query, convert_to_numpy=True)
         
         if search_type == "semantic":
-            return self._semantic_search(query_embedding, n_results, filters)
+            return self._semantic_search(query_embedding, n_results, where)
         elif search_type == "chunk":
-            return self._chunk_search(query_embedding, query, n_results, filters)
+            return self._chunk_search(query_embedding, query, n_results, where)
         else:  # hybrid
-            return self._hybrid_search(query_embedding, query, n_results, filters)
+            return self._hybrid_search(query_embedding, query, n_results, where)
+    
+    def _resolve_filters(self, filters: Optional[Dict]) -> Tuple[bool, Optional[Dict]]:
+        """
+        Translate metadata filters into a ChromaDB where clause.
+        
+        Every metadata field is indexed, so filters are resolved with the
+        filter index to the IDs of the matching documents without reading
+        stored metadata; ChromaDB has no $prefix, $contains or $icontains
+        operators. Conditions the index cannot resolve compare a whole value
+        with a list or dictionary, which the scalar metadata values stored in
+        ChromaDB never equal.
+        
+        Args:
+            filters: Metadata filters
+            
+        Returns:
+            Tuple of (False if no document can match, where clause or None)
+        """
+        if not filters:
+            return True, None
+        
+        allowed, residual = self.filter_index.select(filters, len(self.doc_table))
+        if residual or not allowed:
+            return False, None
+        
+        doc_ids = [self.doc_table.doc_id(docno) for docno in bitmap_docnos(allowed)]
+        doc_ids = [doc_id for doc_id in doc_ids if doc_id is not None]
+        if not doc_ids:
+            return False, None
+        
+        return True, {'doc_id': {'$in': doc_ids}}
     
     def _semantic_search(self, 
                         query_embedding: np.ndarray,
@@ -444,19 +537,9 @@ class VectorSearchEngine:
         return expanded
     
     def _extract_highlights(self, text: str, query: str) -> List[str]:
-        """Extract relevant highlights from text."""
-        sentences = text.split('.')
-        query_terms = set(query.lower().split())
-        
-        highlights = []
-        for sentence in sentences:
-            sentence_lower = sentence.lower()
-            if any(term in sentence_lower for term in query_terms):
-                highlights.append(sentence.strip() + '.')
-                if len(highlights) >= 3:
-                    break
-        
-        return highlights
+        """Extract the densest fragments of query terms from text."""
+        fragments = fragments_for_terms(text, re.findall(r'[a-z]+', query.lower()))
+        return [fragment['text'] for fragment in fragments]
     
     def get_statistics(self) -> Dict[str, Any]:
         """Get search engine statistics."""
@@ -465,7 +548,9 @@ class VectorSearchEngine:
             'total_chunks': self.chunk_collection.count(),
             'embedding_model': self.encoder.get_sentence_embedding_dimension(),
             'chunk_size': self.chunk_size,
-            'chunk_overlap': self.chunk_overlap
+            'chunk_overlap': self.chunk_overlap,
+            'generation': self.generation,
+            'query_cache': self.query_cache.get_statistics()
         }
 
 
@@ -12,6 +12,7 @@ capabilities for building searchable document collections.
 
 import unittest
 import asyncio
+import json
 import tempfile
 import shutil
 from pathlib import Path
@@ -250,6 +251,29 @@ class TestDocumentIndexer(unittest.TestCase):
         self.assertEqual(len(new_indexer.indexed_files), len(self.indexer.indexed_files))
         self.assertEqual(new_indexer.index_stats['total_files'], self.indexer.index_stats['total_files'])
     
+    async def test_load_legacy_json_index(self):
+        """Test loading a JSON cache written by earlier versions."""
+        cache_path = Path(self.temp_dir) / "legacy_index.json"
+        cache_path.write_text(json.dumps({
+            'documents': {
+                'doc1': {
+                    'content': 'Sleep spindles support memory consolidation.',
+                    'metadata': {'file_type': 'txt'},
+                    'processed': {'keywords': ['sleep', 'spindles'], 'word_count': 5},
+                    'document_type': 'text'
+                }
+            },
+            'indexed_files': ['doc1'],
+            'stats': {'total_files': 1, 'successful': 1, 'failed': 0, 'skipped': 0}
+        }))
+        
+        new_indexer = DocumentIndexer(SearchEngine())
+        await new_indexer.load_index(cache_path)
+        
+        self.assertEqual(new_indexer.indexed_files, {'doc1'})
+        self.assertEqual(new_indexer.index_stats['total_files'], 1)
+        self.assertEqual([r['doc_id'] for r in new_indexer.search_engine.search("spindles")], ['doc1'])
+    
     def test_concurrent_processing(self):
         """Test concurrent file processing."""
         # This is tested implicitly in index_documents with ThreadPoolExecutor
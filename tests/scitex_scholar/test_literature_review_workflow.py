@@ -159,6 +159,26 @@ class TestLiteratureReviewWorkflow(unittest.TestCase):
         self.assertEqual(stats['vector_indexed'], 2)
         self.assertEqual(len(self.workflow.state['indexed_papers']), 2)
     
+    def test_index_papers_passes_sections_to_vector_summary(self):
+        """Test that stored processed fields keep the abstract for vector summaries."""
+        (self.workflow.papers_dir / "spindles.pdf").touch()
+        self.workflow.indexer.index_documents = AsyncMock(return_value={'successful': 1})
+        self.workflow.search_engine.add_document(
+            "spindles.pdf",
+            "Abstract\nSleep spindles support memory consolidation.\n\nIntroduction\nSpindles.",
+            {'title': 'Sleep Spindles'}
+        )
+        self.workflow.vector_engine.add_document = Mock(return_value=True)
+        
+        stats = asyncio.run(self.workflow.index_papers(force_reindex=True))
+        
+        self.assertEqual(stats['vector_indexed'], 1)
+        call = self.workflow.vector_engine.add_document.call_args.kwargs
+        summary = self.workflow.vector_engine._create_document_summary(
+            call['content'], call['metadata'], call['paper_data']
+        )
+        self.assertIn("Abstract: Sleep spindles support memory consolidation.", summary)
+    
     async def test_search_literature(self):
         """Test literature search."""
         # Mock vector search results
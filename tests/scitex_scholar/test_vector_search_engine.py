@@ -214,6 +214,41 @@ class TestVectorSearchEngine(unittest.TestCase):
         self.assertEqual(len(results), 1)
         self.assertEqual(results[0].metadata['year'], '2023')
     
+    def test_operator_filter_on_any_field(self):
+        """Test operator filters on fields outside the default filter fields."""
+        for i, title in enumerate(['Spindle Density Study', 'Slow Wave Study']):
+            self.engine.add_document(
+                f"doc_title_{i}",
+                f"Sleep research: {title}",
+                {'year': '2024', 'title': title}
+            )
+        
+        # Every field is indexed, so no filter is left to check on stored metadata
+        _, residual = self.engine.filter_index.select({'title': {'$icontains': 'spindle'}},
+                                                      len(self.engine.doc_table))
+        self.assertEqual(residual, {})
+        
+        results = self.engine.search(
+            query="sleep research",
+            filters={'title': {'$icontains': 'spindle density'}},
+            n_results=10
+        )
+        self.assertEqual([r.doc_id for r in results], ['doc_title_0'])
+        
+        results = self.engine.search(
+            query="sleep research",
+            filters={'year': '2024', 'title': {'$prefix': 'Slow'}},
+            n_results=10
+        )
+        self.assertEqual([r.doc_id for r in results], ['doc_title_1'])
+        
+        results = self.engine.search(
+            query="sleep research",
+            filters={'title': {'$contains': 'Gamma'}},
+            n_results=10
+        )
+        self.assertEqual(results, [])
+    
     def test_get_statistics(self):
         """Test statistics retrieval."""
         stats = self.engine.get_statistics()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-17 10:00:00 (ywatanabe)"
+# File: tests/test_filter_index.py
+
+"""
+Test module for metadata filter indexes.
+
+This module tests filter operators, bitmap selection on indexed fields
+and the serialized form of the index.
+"""
+
+import unittest
+import sys
+sys.path.insert(0, './src')
+
+
+class TestFilterIndex(unittest.TestCase):
+    """Test suite for filter index functionality."""
+
+    def _index(self):
+        from scitex_scholar.filter_index import FilterIndex
+
+        index = FilterIndex()
+        index.add(0, {'year': 2019, 'authors': ['Smith', 'Lee'], 'file_path': '/papers/eeg/a.pdf'})
+        index.add(1, {'year': 2021, 'authors': ['Lee'], 'file_path': '/papers/mri/b.pdf'})
+        index.add(2, {'year': '2023', 'file_type': 'tex', 'file_path': '/papers/eeg/c.tex'})
+        return index
+
+    def test_match_filter(self):
+        """Test plain values and operators on metadata values."""
+        from scitex_scholar.filter_index import match_filter, match_filters
+
+        self.assertTrue(match_filter('pdf', 'pdf'))
+        self.assertTrue(match_filter(['Smith', 'Lee'], 'Lee'))
+        self.assertFalse(match_filter(['Smith'], 'Lee'))
+        self.assertTrue(match_filter(2020, {'$gte': 2020, '$lt': 2021}))
+        self.assertTrue(match_filter('2020', {'$gt': 2019}))
+        self.assertFalse(match_filter('n/a', {'$gt': 2019}))
+        self.assertTrue(match_filter('/papers/eeg/a.pdf', {'$prefix': '/papers/eeg'}))
+        self.assertTrue(match_filter('/papers/eeg/a.pdf', {'$contains': 'eeg'}))
+        self.assertTrue(match_filter(['Smith', 'Lee'], {'$in': ['Lee', 'Park']}))
+        self.assertTrue(match_filters({'year': 2020, 'file_type': 'pdf'}, {'file_type': 'pdf'}))
+        self.assertFalse(match_filters({'year': 2020}, {'file_type': 'pdf'}))
+        with self.assertRaises(ValueError):
+            match_filter(2020, {'$near': 2020})
+
+    def test_select(self):
+        """Test indexed filters resolve to bitmaps and others are left over."""
+        from scitex_scholar.filter_index import bitmap_docnos
+
+        index = self._index()
+        bitmap, residual = index.select({'authors': 'Lee', 'year': {'$gte': 2020}}, 3)
+        self.assertEqual(list(bitmap_docnos(bitmap)), [1])
+        self.assertEqual(residual, {})
+
+        bitmap, _ = index.select({'year': {'$gt': 2020}}, 3)
+        self.assertEqual(list(bitmap_docnos(bitmap)), [1, 2])
+
+        bitmap, _ = index.select({'file_path': {'$prefix': '/papers/eeg/'}}, 3)
+        self.assertEqual(list(bitmap_docnos(bitmap)), [0, 2])
+
+        bitmap, _ = index.select({'file_type': 'pdf'}, 3)
+        self.assertEqual(bitmap, 0)
+
+        bitmap, residual = index.select({'journal': 'Nature'}, 3)
+        self.assertIsNone(bitmap)
+        self.assertEqual(residual, {'journal': 'Nature'})
+
+    def test_index_all_fields(self):
+        """Test that an index without a field list indexes every metadata field."""
+        from scitex_scholar.filter_index import FilterIndex, bitmap_docnos
+
+        index = FilterIndex(fields=None)
+        index.add(0, {'journal': 'Nature', 'title': 'Sleep spindles'})
+        index.add(1, {'journal': 'Neuron', 'year': 2021})
+
+        bitmap, residual = index.select({'journal': {'$prefix': 'N'}, 'title': {'$icontains': 'SPINDLE'}}, 2)
+        self.assertEqual(list(bitmap_docnos(bitmap)), [0])
+        self.assertEqual(residual, {})
+        bitmap, residual = index.select({'authors': 'Lee'}, 2)
+        self.assertEqual((bitmap, residual), (0, {}))
+        self.assertEqual(list(bitmap_docnos(index.remap({1: 0}).select({'year': 2021}, 1)[0])), [0])
+
+    def test_to_dict_from_dict(self):
+        """Test exported entries are renumbered and restored."""
+        import json
+        from scitex_scholar.filter_index import FilterIndex, bitmap_docnos
+
+        index = self._index()
+        data = json.loads(json.dumps(index.to_dict({1: 0, 2: 1}, start=1)))
+        restored = FilterIndex.from_dict(data)
+
+        bitmap, _ = restored.select({'authors': 'Lee'}, 2)
+        self.assertEqual(list(bitmap_docnos(bitmap)), [0])
+        bitmap, _ = restored.select({'file_path': {'$prefix': '/papers/eeg/'}}, 2)
+        self.assertEqual(list(bitmap_docnos(bitmap)), [1])
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+# EOF
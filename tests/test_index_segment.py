@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-17 10:00:00 (ywatanabe)"
+# File: tests/test_index_segment.py
+
+"""
+Test module for memory-mapped index segments.
+
+This module tests writing a search index as a binary segment, reopening
+it lazily, and indexing new documents on top of an opened segment.
+"""
+
+import unittest
+import tempfile
+import shutil
+import sys
+from pathlib import Path
+sys.path.insert(0, './src')
+
+
+DOCUMENTS = [
+    ("doc1", "Phase amplitude coupling in the human hippocampus", {"year": 2019, "title": "PAC"}),
+    ("doc2", "Deep learning for seizure detection from EEG", {"year": 2021}),
+    ("doc3", "Seizure prediction with phase amplitude coupling features", {"year": 2022}),
+    ("doc4", "Spike sorting with deep learning on Neuropixels probes", {"year": 2021}),
+]
+
+QUERIES = [
+    ("phase amplitude coupling", False),
+    ("deep learning seizure", False),
+    ("phase amplitude coupling", True),
+    ("deep learning", True),
+]
+
+
+class TestIndexSegment(unittest.TestCase):
+    """Test suite for index segment functionality."""
+
+    def setUp(self):
+        """Create a populated engine and a temporary directory."""
+        from scitex_scholar.search_engine import SearchEngine
+
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.engine = SearchEngine()
+        for doc_id, content, metadata in DOCUMENTS:
+            self.engine.add_document(doc_id, content, metadata)
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        shutil.rmtree(self.temp_dir)
+
+    def _reopen(self, engine, name="segment"):
+        from scitex_scholar.search_engine import SearchEngine
+
+        engine.save_segment(self.temp_dir / name)
+        reopened = SearchEngine()
+        reopened.open_segment(self.temp_dir / name)
+        return reopened
+
+    def test_segment_files(self):
+        """Test that a segment directory holds the expected files."""
+        meta = self.engine.save_segment(self.temp_dir / "segment")
+
+        self.assertEqual(meta['doc_count'], 4)
+        for name in ['terms.dat', 'postings.dat', 'docids.dat', 'docorder.dat',
+                     'lengths.dat', 'stored.dat', 'stored.idx', 'meta.json']:
+            self.assertTrue((self.temp_dir / "segment" / name).exists(), name)
+
+    def test_reopened_segment_matches(self):
+        """Test that searches on a reopened segment match the in-memory engine."""
+        reopened = self._reopen(self.engine)
+
+        self.assertEqual(len(reopened.documents), 4)
+        self.assertEqual(sorted(reopened.documents), ["doc1", "doc2", "doc3", "doc4"])
+        self.assertEqual(reopened.documents["doc2"]["metadata"], {"year": 2021})
+
+        for query, exact in QUERIES:
+            self.assertEqual(reopened.search(query, exact_phrase=exact),
+                             self.engine.search(query, exact_phrase=exact))
+            self.assertEqual(reopened.search(query, exact_phrase=exact, top_k=1),
+                             self.engine.search(query, exact_phrase=exact, top_k=1))
+        self.assertEqual(reopened.search("learning", filters={"year": 2021}),
+                         self.engine.search("learning", filters={"year": 2021}))
+
+    def test_segment_drops_retired_documents(self):
+        """Test that re-added documents are compacted when writing a segment."""
+        self.engine.add_document("doc2", "Transformers for sleep staging", {"year": 2023})
+        reopened = self._reopen(self.engine)
+
+        self.assertEqual(len(reopened.doc_table), 4)
+        self.assertEqual(reopened.search("seizure detection", exact_phrase=True), [])
+        self.assertEqual([r['doc_id'] for r in reopened.search("sleep staging")], ["doc2"])
+
+    def test_updates_on_top_of_segment(self):
+        """Test adding and replacing documents after opening a segment."""
+        from scitex_scholar.search_engine import SearchEngine
+
+        reopened = self._reopen(self.engine)
+        reopened.add_document("doc5", "Sleep spindles and memory consolidation")
+        reopened.add_document("doc1", "Hippocampal sharp wave ripples")
+
+        expected = SearchEngine()
+        for doc_id, content, metadata in DOCUMENTS:
+            expected.add_document(doc_id, content, metadata)
+        expected.add_document("doc5", "Sleep spindles and memory consolidation")
+        expected.add_document("doc1", "Hippocampal sharp wave ripples")
+
+        self.assertEqual(len(reopened.documents), 5)
+        self.assertNotIn("coupling", reopened.documents["doc1"]["content"])
+        for query in ["phase amplitude coupling", "sleep spindles", "sharp wave ripples"]:
+            self.assertEqual(
+                [(r['doc_id'], round(r['score'], 9)) for r in reopened.search(query)],
+                [(r['doc_id'], round(r['score'], 9)) for r in expected.search(query)],
+            )
+
+        # A segment written from a segment-backed engine keeps the merged state
+        merged = self._reopen(reopened, name="merged")
+        self.assertEqual(sorted(merged.documents), ["doc1", "doc2", "doc3", "doc4", "doc5"])
+        self.assertEqual([r['doc_id'] for r in merged.search("ripples")], ["doc1"])
+
+    def test_segment_set_views(self):
+        """Test that several segments are searched through views without copying postings."""
+        from scitex_scholar.search_engine import SearchEngine
+        from scitex_scholar.index_segment import SegmentPostingList
+
+        directories = []
+        for i, documents in enumerate([DOCUMENTS[:2], DOCUMENTS[2:]]):
+            part = SearchEngine()
+            for doc_id, content, metadata in documents:
+                part.add_document(doc_id, content, metadata)
+            directories.append(self.temp_dir / f"segment{i}")
+            part.save_segment(directories[-1])
+
+        opened = SearchEngine()
+        opened.open_segments(directories)
+        for query, exact in QUERIES:
+            self.assertEqual(
+                [(r['doc_id'], round(r['score'], 9)) for r in opened.search(query, exact_phrase=exact)],
+                [(r['doc_id'], round(r['score'], 9)) for r in self.engine.search(query, exact_phrase=exact)],
+            )
+        self.assertEqual([r['doc_id'] for r in opened.search("learning", filters={"year": 2021})],
+                         [r['doc_id'] for r in self.engine.search("learning", filters={"year": 2021})])
+        self.assertEqual(list(opened.doc_lengths), list(self.engine.doc_lengths))
+
+        # Postings of both segments stay zero-copy views, shifted by the segment base
+        postings = opened.index["coupling"]
+        self.assertIsInstance(postings, SegmentPostingList)
+        self.assertEqual([base for base, _ in postings.parts], [0, 2])
+        self.assertTrue(all(isinstance(part.doc_ids, memoryview) for _, part in postings.parts))
+        self.assertEqual(list(postings), list(self.engine.index["coupling"]))
+        self.assertEqual(opened.index.changed_terms(), [])
+
+        # Only terms of new documents are written, not terms that were only read
+        opened.add_document("doc5", "Coupling of sleep spindles")
+        self.assertEqual(sorted(opened.index.changed_terms()), ["coupling", "sleep", "spindles"])
+        self.assertEqual([r['doc_id'] for r in opened.search("sleep coupling")][0], "doc5")
+        self.assertEqual(opened.index["coupling"].get(4), 1)
+        meta = opened.flush_segment(self.temp_dir / "segment2")
+        self.assertEqual((meta['doc_count'], meta['term_count']), (1, 3))
+
+    def test_term_cache_is_bounded(self):
+        """Test that lists read from segments are cached up to a limit."""
+        from scitex_scholar.index_segment import SegmentReader, SegmentSet, SegmentTermIndex
+
+        self.engine.save_segment(self.temp_dir / "segment")
+        index = SegmentTermIndex(SegmentSet([SegmentReader(self.temp_dir / "segment")]), 'postings',
+                                 cache_size=2)
+        for term in ["phase", "seizure", "learning", "missing"]:
+            index.get(term)
+        self.assertEqual(list(index._cache), ["learning", "missing"])
+        self.assertEqual(len(index["phase"]), 2)
+        self.assertEqual(index.changed_terms(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+# EOF
@@ -227,6 +227,7 @@ class TestLaTeXParser(unittest.TestCase):
         self.assertIn('content', parsed)
         self.assertIn('math_expressions', parsed)
         self.assertIn('citations', parsed)
+        self.assertEqual(parsed['commands'], parser.extract_commands(latex_document))
         
         # Check metadata extraction
         metadata = parsed['metadata']
@@ -273,6 +274,109 @@ class TestLaTeXParser(unittest.TestCase):
         self.assertIn('italic', cleaned)
         self.assertIn('text', cleaned)
 
+    def test_nested_environments(self):
+        """Test that nested environments of the same name pair up correctly."""
+        from scitex_scholar.latex_parser import LaTeXParser
+        
+        parser = LaTeXParser()
+        
+        latex_text = r"""\begin{itemize}
+        \item Outer
+        \begin{itemize}\item Inner\end{itemize}
+        \item Last
+        \end{itemize}
+        \begin{figure}\caption{Open figure}"""
+        
+        environments = parser.extract_environments(latex_text)
+        
+        self.assertEqual([env['name'] for env in environments], ['itemize', 'itemize'])
+        outer, inner = environments
+        self.assertEqual(inner['content'], r'\item Inner')
+        self.assertIn('Last', outer['content'])
+        self.assertTrue(outer['start'] < inner['start'] < inner['end'] < outer['end'])
+        self.assertEqual(latex_text[outer['start']:outer['end']].count(r'\end{itemize}'), 2)
+
+    def test_parse_document_lexing(self):
+        """Test comments, escapes, verbatim content, options and nested arguments."""
+        from scitex_scholar.latex_parser import LaTeXParser
+        
+        parser = LaTeXParser()
+        
+        latex_text = r"""\title{Spindles in \emph{Sleep}}
+        % \section{Commented out} \cite{hidden}
+        \section*{Intro}\label{sec:intro}
+        Costs are 5\% as in \citep[p.~3]{a2020, b2021}; see \url{http://x.org/%20a}.
+        Prices of \$5 and $a$$b$ and \(x^2\) and \ref{fig}.
+        \begin{verbatim}\begin{weird} $ { \end{verbatim}
+        \begin{equation*}\sin(x)\end{equation*}"""
+        
+        parsed = parser.parse_document(latex_text)
+        
+        self.assertEqual(parsed['metadata']['title'], r'Spindles in \emph{Sleep}')
+        self.assertEqual([(sec['type'], sec['title']) for sec in parsed['structure']['sections']],
+                         [('section', 'Intro')])
+        self.assertEqual([(cite['type'], cite['key']) for cite in parsed['citations']],
+                         [('citep', 'a2020'), ('citep', 'b2021')])
+        self.assertEqual([(expr['type'], expr['content']) for expr in parsed['math_expressions']],
+                         [('inline', 'a'), ('inline', 'b'), ('inline', 'x^2'), ('equation*', r'\sin(x)')])
+        self.assertEqual([env['name'] for env in parsed['environments']], ['verbatim', 'equation*'])
+        self.assertEqual(parsed['environments'][0]['content'], r'\begin{weird} $ {')
+        
+        clean_text = parsed['clean_text']
+        self.assertIn('Spindles in Sleep', clean_text)
+        self.assertIn('Costs are 5% as in a2020, b2021 ; see [URL]', clean_text)
+        self.assertIn('$5', clean_text)
+        self.assertIn('[REF]', clean_text)
+        self.assertIn('sin (x)', clean_text)
+        self.assertNotIn('Commented', clean_text)
+        self.assertNotIn('sec:intro', clean_text)
+        self.assertEqual(parser.clean_latex_content(latex_text), clean_text)
+        self.assertEqual(parser.extract_citations(latex_text), parsed['citations'])
+
+    def test_parse_cache(self):
+        """Test that parse results are cached by content digest within bounds."""
+        import pickle
+        from scitex_scholar.latex_parser import LaTeXParser, ParseCache
+        
+        parser = LaTeXParser(cache_size=2)
+        documents = [rf"\section{{Part {n}}} \cite{{ref{n}}}" for n in range(3)]
+        
+        parser.parse_document(documents[0])
+        parser.extract_citations(documents[0])
+        parser.extract_environments(documents[1])
+        parser.extract_commands(documents[2])  # Evicts documents[0]
+        info = parser.get_cache_info()
+        self.assertEqual((info['size'], info['hits'], info['misses'], info['evictions']), (2, 1, 3, 1))
+        self.assertAlmostEqual(info['hit_rate'], 0.25)
+        self.assertGreater(info['bytes'], 0)
+        
+        # Callers get copies of the cached lists and items
+        parser.extract_citations(documents[2]).clear()
+        self.assertEqual(len(parser.extract_citations(documents[2])), 1)
+        parser.extract_citations(documents[2])[0]['key'] = 'changed'
+        parser.parse_document(documents[2])['structure']['sections'][0]['title'] = 'changed'
+        self.assertEqual(parser.extract_citations(documents[2])[0]['key'], 'ref2')
+        self.assertEqual(parser.parse_document(documents[2])['structure']['sections'][0]['title'], 'Part 2')
+        
+        # Results over the byte budget are not cached
+        small = LaTeXParser(cache_bytes=100)
+        small.parse_document(documents[0] * 10)
+        self.assertEqual(small.get_cache_info()['size'], 0)
+        
+        cache = ParseCache(max_bytes=10)
+        for n in range(3):
+            cache.put(ParseCache.make_key(documents[n]), n, size=4)
+        stats = cache.get_statistics()
+        self.assertEqual((stats['size'], stats['bytes'], stats['evictions']), (2, 8, 1))
+        self.assertIsNone(cache.get(ParseCache.make_key(documents[0])))
+        self.assertEqual(cache.get(ParseCache.make_key(documents[2])), 2)
+        
+        parser.clear_cache()
+        self.assertEqual(parser.get_cache_info()['bytes'], 0)
+        restored = pickle.loads(pickle.dumps(parser))
+        self.assertEqual(restored.get_cache_info()['max_size'], 2)
+        self.assertEqual(restored.extract_citations(documents[1])[0]['key'], 'ref1')
+
     def test_integration_with_text_processor(self):
         """Test integration with existing TextProcessor."""
         from scitex_scholar.latex_parser import LaTeXParser
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-17 10:00:00 (ywatanabe)"
+# File: tests/test_latex_project.py
+
+"""
+Test module for multi-file LaTeX projects.
+
+This module tests include resolution, merging parse results with source
+files and offsets, BibTeX parsing and the per-file parse cache.
+"""
+
+import unittest
+import tempfile
+import shutil
+import os
+import sys
+from pathlib import Path
+from unittest import mock
+sys.path.insert(0, './src')
+
+
+FILES = {
+    'main.tex': r"""\documentclass{article}
+\title{Sleep Spindles}
+\begin{document}
+\begin{abstract}Spindles and memory.\end{abstract}
+As shown by \cite{smith2020}.
+\input{sections/methods}
+% \input{sections/draft}
+\include{sections/results}
+\bibliography{refs}
+\end{document}
+""",
+    'sections/methods.tex': r"""\section{Methods}
+We fit $y = ax$ as in \citep{jones2019,unknown2021}.
+\input{sections/methods}
+""",
+    'sections/results.tex': r"""\section{Results}
+\begin{equation}r = 0.8\end{equation}
+""",
+    'refs.bib': """@article{smith2020,
+  title = {Spindles in {EEG}},
+  author = "Smith, Ann and Doe, Bob",
+  year = 2020,
+}
+@comment{not an entry}
+@inproceedings(jones2019, title={Slow (and fast) waves})
+""",
+}
+
+
+class TestLaTeXProject(unittest.TestCase):
+    """Test suite for LaTeXProject and parse_bibtex."""
+
+    def setUp(self):
+        """Create a temporary project directory."""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        for name, content in FILES.items():
+            path = self.temp_dir / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(content)
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        shutil.rmtree(self.temp_dir)
+
+    def test_parse_project(self):
+        """Test that includes are followed and results merged in document order."""
+        from scitex_scholar.latex_project import LaTeXProject
+
+        parsed = LaTeXProject(self.temp_dir / 'main.tex').parse()
+
+        self.assertEqual(parsed['files'], ['main.tex', 'sections/methods.tex', 'sections/results.tex', 'refs.bib'])
+        self.assertEqual(parsed['metadata']['title'], 'Sleep Spindles')
+        self.assertEqual(parsed['content']['abstract'], 'Spindles and memory.')
+        self.assertEqual([(sec['title'], sec['file']) for sec in parsed['structure']['sections']],
+                         [('Methods', 'sections/methods.tex'), ('Results', 'sections/results.tex')])
+        self.assertEqual([(cite['key'], cite['file']) for cite in parsed['citations']],
+                         [('smith2020', 'main.tex'), ('jones2019', 'sections/methods.tex'),
+                          ('unknown2021', 'sections/methods.tex')])
+        self.assertEqual([expr['type'] for expr in parsed['math_expressions']], ['inline', 'equation'])
+        self.assertEqual(parsed['undefined_citations'], ['unknown2021'])
+        self.assertEqual(parsed['missing_files'], [])
+        self.assertNotIn('sections/methods', parsed['clean_text'])
+
+        # Offsets point into the source file
+        cite = parsed['citations'][1]
+        methods = FILES['sections/methods.tex']
+        self.assertEqual(methods[cite['start']:cite['end']], r'\citep{jones2019,unknown2021}')
+
+    def test_parse_bibtex(self):
+        """Test BibTeX entries with braced, quoted and bare values."""
+        from scitex_scholar.latex_project import parse_bibtex
+
+        entries = parse_bibtex(FILES['refs.bib'])
+
+        self.assertEqual([(entry['type'], entry['key']) for entry in entries],
+                         [('article', 'smith2020'), ('inproceedings', 'jones2019')])
+        self.assertEqual(entries[0]['fields'], {'title': 'Spindles in {EEG}',
+                                                'author': 'Smith, Ann and Doe, Bob', 'year': '2020'})
+        self.assertEqual(entries[1]['fields'], {'title': 'Slow (and fast) waves'})
+
+    def test_only_changed_files_are_parsed(self):
+        """Test that a second parse reuses unchanged files and re-parses edited ones."""
+        from scitex_scholar.latex_project import LaTeXProject
+
+        project = LaTeXProject(self.temp_dir / 'main.tex')
+        project.parse()
+        self.assertEqual(project.get_cache_info()['parses'], 4)
+
+        project.parse()
+        self.assertEqual(project.get_cache_info()['parses'], 4)
+
+        # Touched but unchanged: read and compared by digest, not parsed
+        main = self.temp_dir / 'main.tex'
+        stat = main.stat()
+        os.utime(main, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        project.parse()
+        self.assertEqual(project.get_cache_info()['parses'], 4)
+
+        results = self.temp_dir / 'sections/results.tex'
+        results.write_text(r"\section{Findings}" + "\n" + r"\input{sections/missing}")
+        parsed = project.parse()
+        self.assertEqual(project.get_cache_info()['parses'], 5)
+        self.assertEqual([sec['title'] for sec in parsed['structure']['sections']], ['Methods', 'Findings'])
+        self.assertEqual(parsed['missing_files'], ['sections/missing.tex'])
+
+    def test_each_file_is_lexed_once(self):
+        """Test that includes and parse results come from a single scan per file."""
+        from scitex_scholar.latex_parser import LaTeXParser
+        from scitex_scholar.latex_project import LaTeXProject
+
+        parser = LaTeXParser(cache_size=0)
+        with mock.patch.object(parser, '_scan', wraps=parser._scan) as scan:
+            parsed = LaTeXProject(self.temp_dir / 'main.tex', latex_parser=parser).parse()
+
+        self.assertEqual(scan.call_count, 3)
+        self.assertEqual(len(parsed['files']), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+# EOF
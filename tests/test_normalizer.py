@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-17 10:00:00 (ywatanabe)"
+# File: tests/test_normalizer.py
+
+"""
+Test module for token normalization.
+
+This module tests the Porter stemmer, the memoized normalizer and
+searches over a stemmed index.
+"""
+
+import unittest
+import sys
+sys.path.insert(0, './src')
+
+
+class TestNormalizer(unittest.TestCase):
+    """Test suite for PorterStemmer and Normalizer."""
+
+    def test_porter_stemmer(self):
+        """Test stems from the examples of Porter's paper."""
+        from scitex_scholar.normalizer import PorterStemmer
+
+        stemmer = PorterStemmer()
+        expected = {
+            'caresses': 'caress', 'ponies': 'poni', 'cats': 'cat', 'agreed': 'agre',
+            'plastered': 'plaster', 'motoring': 'motor', 'hopping': 'hop', 'filing': 'file',
+            'happy': 'happi', 'relational': 'relat', 'conditional': 'condit',
+            'generalization': 'gener', 'electrical': 'electr', 'adjustment': 'adjust',
+            'adoption': 'adopt', 'controlling': 'control', 'networks': 'network',
+            'networked': 'network', 'is': 'is', 'α-synuclein': 'α-synuclein',
+        }
+        self.assertEqual({word: stemmer.stem(word) for word in expected}, expected)
+
+    def test_normalizer_cache_and_lemmas(self):
+        """Test lemma lookup, the bounded memo cache and pickling."""
+        import pickle
+        from scitex_scholar.normalizer import SCIENTIFIC_LEMMAS, Normalizer
+
+        normalizer = Normalizer(lemmas=SCIENTIFIC_LEMMAS, cache_size=2)
+        self.assertEqual(normalizer('hypotheses'), normalizer('hypothesis'))
+        self.assertEqual(normalizer('spectra'), normalizer('spectrum'))
+        normalizer('spectra')
+        info = normalizer.cache_info()
+        self.assertEqual((info.hits, info.currsize, info.maxsize), (1, 2, 2))
+
+        restored = pickle.loads(pickle.dumps(normalizer))
+        self.assertEqual(restored('stimuli'), normalizer('stimulus'))
+        self.assertEqual(restored.cache_info().maxsize, 2)
+
+    def test_stemmed_search(self):
+        """Test that documents and queries are normalized alike."""
+        from scitex_scholar.normalizer import Normalizer
+        from scitex_scholar.search_engine import SearchEngine
+        from scitex_scholar.text_processor import TextProcessor
+
+        engine = SearchEngine(text_processor=TextProcessor(normalizer=Normalizer()))
+        engine.add_document("doc1", "Networked oscillators synchronize")
+        engine.add_document("doc2", "A network of oscillating neurons")
+
+        self.assertEqual({r['doc_id'] for r in engine.search("networks")}, {"doc1", "doc2"})
+        self.assertEqual([r['doc_id'] for r in engine.search("network of oscillations", exact_phrase=True)],
+                         ["doc2"])
+        fragment = engine.snippets("doc1", "network")[0]
+        start, end = fragment['matches'][0]
+        self.assertEqual(fragment['text'][start:end], "Networked")
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+# EOF
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-17 10:00:00 (ywatanabe)"
+# File: tests/test_postings.py
+
+"""
+Test module for compact posting lists.
+
+This module tests document ID interning, array-backed posting lists,
+sorted-array set operations and the delta/varint encoding.
+"""
+
+import unittest
+import sys
+sys.path.insert(0, './src')
+
+
+class TestPostings(unittest.TestCase):
+    """Test suite for posting list functionality."""
+
+    def test_doc_id_table(self):
+        """Test interning assigns increasing integers and retires re-added IDs."""
+        from scitex_scholar.postings import DocIdTable
+
+        table = DocIdTable()
+        self.assertEqual(table.add("/papers/a.pdf"), 0)
+        self.assertEqual(table.add("/papers/b.pdf"), 1)
+        self.assertEqual(table.add("/papers/a.pdf"), 2)
+
+        self.assertEqual(table.get("/papers/a.pdf"), 2)
+        self.assertIsNone(table.doc_id(0))
+        self.assertEqual(table.doc_id(1), "/papers/b.pdf")
+
+        restored = DocIdTable.from_list(table.to_list())
+        self.assertEqual(restored.get("/papers/a.pdf"), 2)
+        self.assertEqual(len(restored), 3)
+
+    def test_posting_list(self):
+        """Test appending, lookup and ordering of postings."""
+        from scitex_scholar.postings import PostingList
+
+        postings = PostingList()
+        postings.append(3, 2)
+        postings.append(10, 5)
+        postings.append(11, 1)
+
+        self.assertEqual(len(postings), 3)
+        self.assertEqual(postings.get(10), 5)
+        self.assertIsNone(postings.get(4))
+        self.assertIn(11, postings)
+        self.assertEqual(postings.max_tf, 5)
+        self.assertEqual(list(postings), [(3, 2), (10, 5), (11, 1)])
+
+        with self.assertRaises(ValueError):
+            postings.append(7, 1)
+
+    def test_extend(self):
+        """Test that extending lists matches appending one posting at a time."""
+        from array import array
+        from scitex_scholar.postings import PostingList, PositionList
+
+        postings = PostingList(memoryview(array('I', [1])), memoryview(array('I', [2])))
+        postings.extend(array('I', [4, 9]), array('I', [7, 1]))
+        self.assertEqual(list(postings), [(1, 2), (4, 7), (9, 1)])
+        self.assertEqual(postings.max_tf, 7)
+        with self.assertRaises(ValueError):
+            postings.extend(array('I', [9]), array('I', [1]))
+
+        appended = PositionList()
+        appended.append(2, [0, 5])
+        appended.append(6, [3])
+        extended = PositionList()
+        extended.extend(array('I', [2, 6]), array('I', [2, 1]), array('I', [0, 5, 3]))
+        self.assertEqual(list(extended.doc_ids), list(appended.doc_ids))
+        self.assertEqual(list(extended.offsets), list(appended.offsets))
+        self.assertEqual(list(extended.get(6)), [3])
+
+    def test_encoding_round_trip(self):
+        """Test delta/varint encoding of posting and position lists."""
+        from scitex_scholar.postings import PostingList, PositionList
+
+        postings = PostingList()
+        for docno, tf in [(0, 1), (200, 3), (70000, 300)]:
+            postings.append(docno, tf)
+        decoded = PostingList.decode(postings.encode())
+        self.assertEqual(list(decoded), list(postings))
+        self.assertEqual(decoded.max_tf, 300)
+        self.assertLess(len(postings.encode()), 3 * 8)
+
+        positions = PositionList()
+        positions.append(2, [0, 5, 1000])
+        positions.append(9, [7])
+        decoded = PositionList.decode(positions.encode())
+        self.assertEqual(list(decoded.doc_ids), [2, 9])
+        self.assertEqual(list(decoded.get(2)), [0, 5, 1000])
+        self.assertEqual(list(decoded.get(9)), [7])
+        self.assertIsNone(decoded.get(3))
+
+    def test_intersect_and_union(self):
+        """Test set operations on sorted integer arrays."""
+        from array import array
+        from scitex_scholar.postings import difference, intersect, union
+
+        a = array('I', [1, 3, 5, 7, 9, 11])
+        b = array('I', [2, 3, 4, 9, 12])
+
+        self.assertEqual(list(intersect(a, b)), [3, 9])
+        self.assertEqual(list(intersect(b, a)), [3, 9])
+        self.assertEqual(list(intersect(a, array('I'))), [])
+        self.assertEqual(list(union([a, b])), [1, 2, 3, 4, 5, 7, 9, 11, 12])
+        self.assertEqual(list(difference(a, b)), [1, 5, 7, 11])
+        self.assertEqual(list(union([a, array('I'), b, a])), [1, 2, 3, 4, 5, 7, 9, 11, 12])
+
+        # Galloping over long gaps agrees with set operations
+        import random
+        rng = random.Random(0)
+        for size in (1, 10, 1000):
+            short = array('I', sorted(rng.sample(range(5000), size)))
+            long = array('I', sorted(rng.sample(range(5000), 2000)))
+            self.assertEqual(list(intersect(short, long)), sorted(set(short) & set(long)))
+            self.assertEqual(list(difference(short, long)), sorted(set(short) - set(long)))
+            self.assertEqual(list(union([short, long])), sorted(set(short) | set(long)))
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+# EOF
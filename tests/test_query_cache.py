@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-17 10:00:00 (ywatanabe)"
+# File: tests/test_query_cache.py
+
+"""
+Test module for the query result cache.
+
+This module tests LRU eviction, expiry, key construction and the
+invalidation of cached search results when the index changes.
+"""
+
+import unittest
+import sys
+sys.path.insert(0, './src')
+
+
+class TestQueryCache(unittest.TestCase):
+    """Test suite for query cache functionality."""
+
+    def test_lru_and_ttl(self):
+        """Test least recently used eviction, expiry and statistics."""
+        from scitex_scholar.query_cache import QueryCache
+
+        now = [0.0]
+        cache = QueryCache(max_size=2, ttl=10, clock=lambda: now[0])
+        cache.put('a', [1])
+        cache.put('b', [2])
+        self.assertEqual(cache.get('a'), [1])
+        cache.put('c', [3])  # Evicts 'b'
+        self.assertIsNone(cache.get('b'))
+
+        now[0] = 11
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.get_statistics()['hits'], 1)
+        self.assertEqual(cache.get_statistics()['misses'], 2)
+
+        # Callers get copies of the cached results
+        cache.put('d', [4])
+        returned = cache.get('d')
+        returned.append(5)
+        self.assertEqual(cache.get('d'), [4])
+
+        # Result dicts are copied too, on put and on get
+        results = [{'doc_id': 'doc1', 'metadata': {'year': 2020}}]
+        cache.put('e', results)
+        results[0]['score'] = 1.0
+        returned = cache.get('e')
+        returned[0]['metadata']['highlight'] = 'x'
+        self.assertEqual(cache.get('e'), [{'doc_id': 'doc1', 'metadata': {'year': 2020}}])
+
+    def test_make_key_ignores_dict_order(self):
+        """Test that equal filters give equal keys."""
+        from scitex_scholar.query_cache import QueryCache
+
+        self.assertEqual(QueryCache.make_key(1, 'eeg', {'year': 2020, 'file_type': 'pdf'}),
+                         QueryCache.make_key(1, 'eeg', {'file_type': 'pdf', 'year': 2020}))
+        self.assertNotEqual(QueryCache.make_key(1, 'eeg', None), QueryCache.make_key(2, 'eeg', None))
+
+    def test_search_engine_cache(self):
+        """Test that cached results are reused and invalidated by index changes."""
+        from scitex_scholar.search_engine import SearchEngine
+
+        engine = SearchEngine()
+        engine.add_document("doc1", "phase amplitude coupling in EEG")
+        first = engine.search("phase  amplitude")
+        self.assertEqual(engine.search("phase amplitude"), first)
+        stats = engine.get_statistics()['query_cache']
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+
+        engine.add_document("doc2", "phase amplitude coupling in MEG")
+        self.assertEqual(len(engine.search("phase amplitude")), 2)
+        engine.remove_document("doc1")
+        self.assertEqual([r['doc_id'] for r in engine.search("phase amplitude")], ["doc2"])
+        self.assertEqual(engine.get_statistics()['query_cache']['hits'], 1)
+
+    def test_cache_key_keeps_operator_case(self):
+        """Test that lowercase words are not served the results of operators."""
+        from scitex_scholar.search_engine import SearchEngine
+        from scitex_scholar.sharded_search_engine import ShardedSearchEngine
+
+        def check(engine):
+            engine.add_document("doc1", "sleep spindles")
+            engine.add_document("doc2", "sleep stages")
+            self.assertEqual([r['doc_id'] for r in engine.search("sleep AND NOT spindles")], ["doc2"])
+            self.assertEqual(sorted(r['doc_id'] for r in engine.search("sleep and not spindles")),
+                             ["doc1", "doc2"])
+
+        check(SearchEngine())
+        with ShardedSearchEngine(num_shards=2) as sharded:
+            check(sharded)
+
+if __name__ == "__main__":
+    unittest.main()
+
+# EOF
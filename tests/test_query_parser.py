@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-17 10:00:00 (ywatanabe)"
+# File: tests/test_query_parser.py
+
+"""
+Test module for the query language.
+
+This module tests parsing of boolean, fielded and range queries, the
+execution plans they compile to, and boolean search results.
+"""
+
+import unittest
+import sys
+sys.path.insert(0, './src')
+
+
+class TestQueryParser(unittest.TestCase):
+    """Test suite for query parsing and execution."""
+
+    def test_parse_operators(self):
+        """Test precedence, modifiers and lenient handling of bad syntax."""
+        from scitex_scholar.query_parser import BooleanNode, PhraseNode, TermNode, parse_query
+
+        self.assertEqual(parse_query("a AND b OR c"), BooleanNode(
+            should=[BooleanNode(must=[TermNode("a"), TermNode("b")]), TermNode("c")]
+        ))
+        self.assertEqual(parse_query('+a -b "c d"'), BooleanNode(
+            must=[TermNode("a")], should=[PhraseNode("c d")], must_not=[TermNode("b")]
+        ))
+        self.assertEqual(parse_query("(a OR b) AND NOT c"), BooleanNode(
+            must=[BooleanNode(should=[TermNode("a"), TermNode("b")])], must_not=[TermNode("c")]
+        ))
+        self.assertEqual(parse_query("a AND (b"), BooleanNode(must=[TermNode("a"), TermNode("b")]))
+        self.assertEqual(parse_query('"unterminated phrase'), PhraseNode("unterminated phrase"))
+        self.assertIsNone(parse_query(") AND ("))
+        self.assertIsNone(parse_query(""))
+
+    def test_parse_fields(self):
+        """Test fielded terms, phrases and ranges."""
+        from scitex_scholar.query_parser import BooleanNode, PhraseNode, RangeNode, TermNode, parse_query
+
+        self.assertEqual(parse_query('coupling title:"deep learning" author:Smith year:2018..2022'), BooleanNode(
+            should=[TermNode("coupling"), PhraseNode("deep learning", "title")],
+            filter=[TermNode("Smith", "authors"), RangeNode("year", "2018", "2022")]
+        ))
+        self.assertEqual(parse_query("year:..2020"), RangeNode("year", None, "2020"))
+        self.assertEqual(parse_query("note:x"), TermNode("note:x"))
+
+    def test_and_plan_probes_rarest_first(self):
+        """Test that conjunctions evaluate the cheapest clause and probe the others."""
+        from scitex_scholar.query_plan import AndPlan, TermPlan
+        from scitex_scholar.postings import PostingList
+
+        class CountingPlan(TermPlan):
+            evaluated = 0
+
+            def evaluate(self):
+                CountingPlan.evaluated += 1
+                return super().evaluate()
+
+        common = CountingPlan(PostingList(range(0, 10000, 2), [1] * 5000))
+        rare = TermPlan(PostingList([4, 7, 5000], [1, 1, 1]))
+        plan = AndPlan([common, rare])
+        self.assertIs(plan.must[0], rare)
+        self.assertEqual(list(plan.evaluate()), [4, 5000])
+        self.assertEqual(CountingPlan.evaluated, 0)
+
+    def test_boolean_search(self):
+        """Test boolean, fielded and range queries through SearchEngine.search."""
+        from scitex_scholar.search_engine import SearchEngine
+
+        engine = SearchEngine()
+        engine.add_document("a", "Phase amplitude coupling in EEG during sleep",
+                            metadata={"title": "Deep learning for PAC", "authors": ["Jane Smith"], "year": 2019})
+        engine.add_document("b", "Phase locking of spikes during sleep",
+                            metadata={"title": "Spike timing", "authors": ["Bob Lee"], "year": 2021})
+        engine.add_document("c", "Amplitude envelope of EEG",
+                            metadata={"title": "Deep nets", "authors": ["Ann Smith"], "year": "2023"})
+
+        def ids(query, **kwargs):
+            return sorted(r['doc_id'] for r in engine.search(query, **kwargs))
+
+        self.assertEqual(ids("phase AND sleep"), ["a", "b"])
+        self.assertEqual(ids("phase -eeg"), ["b"])
+        self.assertEqual(ids("+eeg sleep"), ["a", "c"])
+        self.assertEqual(ids('"phase amplitude" OR envelope'), ["a", "c"])
+        self.assertEqual(ids("(phase OR amplitude) AND NOT locking"), ["a", "c"])
+        self.assertEqual(ids("NOT sleep"), ["c"])
+        self.assertEqual(ids("title:deep"), ["a", "c"])
+        self.assertEqual(ids('title:"deep learning"'), ["a"])
+        self.assertEqual(ids("author:smith"), ["a", "c"])
+        self.assertEqual(ids("sleep year:2020.."), ["b"])
+        self.assertEqual(ids("eeg year:..2020"), ["a"])
+        self.assertEqual(ids("eeg year:2023"), ["c"])
+        self.assertEqual(ids("phase AND sleep", filters={"year": {"$lt": 2020}}), ["a"])
+
+        # Documents matching more query terms rank higher
+        self.assertEqual(engine.search("eeg AND (sleep OR envelope OR coupling)")[0]['doc_id'], "a")
+        engine.remove_document("a")
+        self.assertEqual(ids("phase AND sleep"), ["b"])
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+# EOF
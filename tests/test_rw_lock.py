@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-17 10:00:00 (ywatanabe)"
+# File: tests/test_rw_lock.py
+
+"""
+Test module for the readers-writer lock.
+
+This module tests shared reading, exclusive writing, reentrancy and
+writer preference.
+"""
+
+import unittest
+import sys
+import threading
+import time
+sys.path.insert(0, './src')
+
+
+class TestReadWriteLock(unittest.TestCase):
+    """Test suite for readers-writer lock functionality."""
+
+    def test_reentrancy(self):
+        """Test nested acquisitions and reading while writing."""
+        from scitex_scholar.rw_lock import ReadWriteLock
+
+        lock = ReadWriteLock()
+        with lock.write():
+            with lock.write():
+                with lock.read():
+                    pass
+        with lock.read():
+            with lock.read():
+                with self.assertRaises(RuntimeError):
+                    lock.acquire_write()
+        with lock.write():
+            pass
+
+    def test_readers_share_and_writers_exclude(self):
+        """Test readers run together and a waiting writer blocks new readers."""
+        from scitex_scholar.rw_lock import ReadWriteLock
+
+        lock = ReadWriteLock()
+        events = []
+        first_reader = threading.Event()
+        release_reader = threading.Event()
+
+        def reader(name, hold=None):
+            with lock.read():
+                events.append(('read', name))
+                if hold is not None:
+                    first_reader.set()
+                    hold.wait(5)
+
+        def writer():
+            with lock.write():
+                events.append(('write', 'w'))
+
+        threads = [threading.Thread(target=reader, args=('r1', release_reader))]
+        threads[0].start()
+        first_reader.wait(5)
+
+        # A second reader shares the lock with the first
+        second = threading.Thread(target=reader, args=('r2',))
+        second.start()
+        second.join(5)
+        self.assertIn(('read', 'r2'), events)
+
+        # A waiting writer holds back later readers
+        threads.append(threading.Thread(target=writer))
+        threads[-1].start()
+        time.sleep(0.05)
+        threads.append(threading.Thread(target=reader, args=('r3',)))
+        threads[-1].start()
+        time.sleep(0.05)
+        self.assertNotIn(('write', 'w'), events)
+        self.assertNotIn(('read', 'r3'), events)
+
+        release_reader.set()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(events[-2:], [('write', 'w'), ('read', 'r3')])
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+# EOF
@@ -82,6 +82,27 @@ class TestSearchEngine(unittest.TestCase):
         self.assertEqual(len(results), 1)
         self.assertEqual(results[0]['doc_id'], "doc1")
 
+    def test_phrase_search_positions(self):
+        """Test phrase search aligns positions, including stop-word gaps."""
+        from scitex_scholar.search_engine import SearchEngine
+
+        engine = SearchEngine()
+        engine.add_document("doc1", "State of the art results. The art of state design.")
+        engine.add_document("doc2", "state art of the")
+        engine.add_document("doc3", "phase amplitude coupling and phase amplitude coupling")
+
+        docno = engine.doc_table.get("doc1")
+        self.assertEqual(list(engine.positions['state'].get(docno)), [0, 8])
+
+        results = engine.search("state of the art", exact_phrase=True)
+        self.assertEqual([r['doc_id'] for r in results], ["doc1"])
+
+        results = engine.search("Phase-amplitude coupling", exact_phrase=True)
+        self.assertEqual(results[0]['doc_id'], "doc3")
+        self.assertEqual(results[0]['score'], 20)
+
+        self.assertEqual(engine.search("coupling state", exact_phrase=True), [])
+
     def test_search_scoring(self):
         """Test search result scoring and ranking."""
         from scitex_scholar.search_engine import SearchEngine
@@ -117,6 +138,299 @@ class TestSearchEngine(unittest.TestCase):
         self.assertEqual(len(results), 1)
         self.assertEqual(results[0]['doc_id'], "doc1")
 
+    def test_bm25_term_statistics(self):
+        """Test that term frequencies and document lengths are recorded on add."""
+        from scitex_scholar.search_engine import SearchEngine
+
+        engine = SearchEngine()
+        engine.add_document("doc1", "neural network neural network training")
+
+        docno = engine.doc_table.get("doc1")
+        self.assertEqual(engine.index['neural'].get(docno), 2)
+        self.assertEqual(engine.index['training'].get(docno), 1)
+        self.assertEqual(engine.doc_lengths[docno], 5)
+        self.assertEqual(engine.total_length, 5)
+
+    def test_bm25_ranking(self):
+        """Test that BM25 rewards term frequency and rare terms."""
+        from scitex_scholar.search_engine import SearchEngine
+
+        engine = SearchEngine()
+        engine.add_document("doc1", "oscillation oscillation oscillation in cortex")
+        engine.add_document("doc2", "oscillation in hippocampus and cortex")
+        engine.add_document("doc3", "cortex cortex cortex anatomy")
+
+        results = engine.search("oscillation")
+        self.assertEqual([r['doc_id'] for r in results], ["doc1", "doc2"])
+        self.assertGreater(results[0]['score'], results[1]['score'])
+
+        # "hippocampus" is rarer than "cortex", so it dominates the ranking
+        results = engine.search("hippocampus cortex")
+        self.assertEqual(results[0]['doc_id'], "doc2")
+
+    def test_field_weights(self):
+        """Test that title terms are boosted over body terms."""
+        from scitex_scholar.search_engine import SearchEngine
+
+        engine = SearchEngine()
+        engine.add_document("doc1", "study of spindles during sleep",
+                            metadata={"title": "Sleep spindles"})
+        engine.add_document("doc2", "study of spindles during sleep",
+                            metadata={"title": "Memory consolidation"})
+
+        results = engine.search("spindles")
+        self.assertEqual(results[0]['doc_id'], "doc1")
+        self.assertGreater(results[0]['score'], results[1]['score'])
+
+    def test_top_k_matches_full_ranking(self):
+        """Test that top-k retrieval with pruning returns the best k results."""
+        import random
+        from scitex_scholar.search_engine import SearchEngine
+
+        rng = random.Random(0)
+        vocabulary = ["neural", "network", "cortex", "spike", "sorting",
+                      "seizure", "oscillation", "gamma", "theta", "decoding"]
+        engine = SearchEngine()
+        for i in range(200):
+            words = rng.choices(vocabulary, weights=range(10, 0, -1), k=rng.randint(5, 40))
+            engine.add_document(f"doc{i}", " ".join(words), metadata={"group": i % 3})
+
+        for query in ["neural network", "gamma theta decoding", "spike"]:
+            full = engine.search(query)
+            for k in [1, 5, 20]:
+                top = engine.search(query, top_k=k)
+                self.assertEqual(len(top), k)
+                self.assertEqual([r['score'] for r in top], [r['score'] for r in full[:k]])
+
+            filtered = engine.search(query, filters={"group": 1})
+            top = engine.search(query, filters={"group": 1}, top_k=5)
+            self.assertEqual([r['score'] for r in top], [r['score'] for r in filtered[:5]])
+            self.assertTrue(all(r['metadata']['group'] == 1 for r in top))
+
+        self.assertEqual(engine.search("neural", top_k=0), [])
+
+    def test_readding_document_replaces_postings(self):
+        """Test that re-adding a document does not return stale matches."""
+        from scitex_scholar.search_engine import SearchEngine
+
+        engine = SearchEngine()
+        engine.add_document("doc1", "seizure detection")
+        engine.add_document("doc1", "spike sorting")
+
+        self.assertEqual(engine.search("seizure"), [])
+        self.assertEqual([r['doc_id'] for r in engine.search("spike")], ["doc1"])
+        self.assertEqual(engine.total_length, 2)
+
+    def test_remove_and_update_document(self):
+        """Test that removed and updated documents are tombstoned."""
+        from scitex_scholar.search_engine import SearchEngine
+
+        engine = SearchEngine()
+        engine.add_document("doc1", "seizure detection with deep learning", metadata={"year": 2020})
+        engine.add_document("doc2", "seizure prediction from EEG")
+        engine.add_document("doc3", "spike sorting")
+
+        self.assertTrue(engine.remove_document("doc2"))
+        self.assertFalse(engine.remove_document("doc2"))
+        self.assertNotIn("doc2", engine.documents)
+        self.assertEqual([r['doc_id'] for r in engine.search("seizure")], ["doc1"])
+        self.assertEqual(engine.search("seizure prediction", exact_phrase=True), [])
+
+        self.assertTrue(engine.update_document("doc1", "sleep staging with transformers"))
+        self.assertFalse(engine.update_document("doc9", "unknown"))
+        self.assertEqual(engine.search("seizure"), [])
+        self.assertEqual(engine.documents["doc1"]["metadata"], {"year": 2020})
+
+        # Tombstoned postings do not count toward document frequencies
+        expected = SearchEngine()
+        expected.add_document("doc3", "spike sorting")
+        expected.add_document("doc1", "sleep staging with transformers", metadata={"year": 2020})
+        for query in ["sleep staging", "spike"]:
+            self.assertEqual([(r['doc_id'], r['score']) for r in engine.search(query)],
+                             [(r['doc_id'], r['score']) for r in expected.search(query)])
+
+        self.assertEqual(engine.compact(), 2)
+        self.assertEqual(engine.compact(), 0)
+        self.assertEqual(len(engine.doc_table), 2)
+        self.assertNotIn("seizure", engine.index)
+        for query in ["sleep staging", "spike"]:
+            self.assertEqual([(r['doc_id'], r['score']) for r in engine.search(query)],
+                             [(r['doc_id'], r['score']) for r in expected.search(query)])
+
+        # The new text is processed before the write lock is taken
+        prepare = engine._prepare_document
+
+        def prepare_unlocked(*args):
+            self.assertIsNone(engine.lock._writer)
+            return prepare(*args)
+
+        engine._prepare_document = prepare_unlocked
+        self.assertTrue(engine.update_document("doc3", "spike sorting with kilosort"))
+        self.assertEqual([r['doc_id'] for r in engine.search("kilosort")], ["doc3"])
+
+    def test_filtered_search(self):
+        """Test that metadata filters restrict keyword and phrase results."""
+        import tempfile
+        from pathlib import Path
+        from scitex_scholar.search_engine import SearchEngine
+
+        engine = SearchEngine()
+        engine.add_document("a", "seizure detection from EEG",
+                            metadata={"year": 2019, "authors": ["Smith", "Lee"], "file_path": "/papers/eeg/a.pdf"})
+        engine.add_document("b", "seizure detection from MRI",
+                            metadata={"year": 2021, "authors": ["Lee"], "file_path": "/papers/mri/b.pdf"})
+        engine.add_document("c", "seizure detection review",
+                            metadata={"year": 2023, "journal": "Brain", "file_path": "/papers/eeg/c.pdf"})
+
+        def ids(filters, exact=False):
+            return sorted(r['doc_id'] for r in engine.search("seizure detection", exact_phrase=exact, filters=filters))
+
+        cases = [
+            ({"year": {"$gte": 2020}}, ["b", "c"]),
+            ({"authors": "Lee"}, ["a", "b"]),
+            ({"authors": "Lee", "year": {"$lt": 2020}}, ["a"]),
+            ({"file_path": {"$prefix": "/papers/eeg/"}}, ["a", "c"]),
+            ({"journal": "Brain"}, ["c"]),
+            ({"authors": "Park"}, []),
+        ]
+        for filters, expected in cases:
+            self.assertEqual(ids(filters), expected)
+            self.assertEqual(ids(filters, exact=True), expected)
+
+        engine.update_document("a", "seizure detection from EEG", metadata={"year": 2024})
+        self.assertEqual(ids({"authors": "Lee"}), ["b"])
+        engine.compact()
+        for filters, _ in cases[:4]:
+            expected = ids(filters)
+            with tempfile.TemporaryDirectory() as tmp:
+                engine.save_segment(Path(tmp) / "segment")
+                reopened = SearchEngine()
+                reopened.open_segments([Path(tmp) / "segment"])
+                self.assertEqual(sorted(r['doc_id'] for r in reopened.search("seizure detection", filters=filters)),
+                                 expected)
+
+    def test_concurrent_indexing_and_search(self):
+        """Test that searches during parallel indexing see whole documents."""
+        import threading
+        from concurrent.futures import ThreadPoolExecutor
+        from scitex_scholar.search_engine import SearchEngine
+
+        engine = SearchEngine()
+        errors = []
+        done = threading.Event()
+
+        def add(i):
+            engine.add_document(f"doc{i}", f"neural decoding study {i} alpha beta",
+                                metadata={"year": 2000 + i % 10})
+
+        def search():
+            while not done.is_set():
+                try:
+                    for result in engine.search("alpha beta", exact_phrase=True):
+                        self.assertIn(result['doc_id'], engine.documents)
+                    engine.search("neural decoding", filters={"year": {"$gte": 2005}}, top_k=5)
+                except Exception as e:  # Report failures from the thread
+                    errors.append(e)
+                    return
+
+        searcher = threading.Thread(target=search)
+        searcher.start()
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(add, range(200)))
+        done.set()
+        searcher.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(engine.search("alpha beta", exact_phrase=True)), 200)
+        self.assertEqual(len(engine.doc_table), 200)
+
+    def test_add_documents(self):
+        """Test that a batch indexes like documents added one at a time."""
+        from scitex_scholar.search_engine import SearchEngine
+
+        documents = [
+            ("doc1", "machine learning machine learning algorithms", {"title": "Learning", "year": 2020}),
+            ("doc2", "machine learning in science", {"year": 2021}),
+            ("", "skipped without an id", None),
+            ("doc2", "deep learning in science", {"year": 2022}),
+            ("doc3", "\\section{Methods} Spectral analysis of EEG $\\alpha$ rhythms", None),
+        ]
+
+        single = SearchEngine()
+        single.add_document("doc1", "an earlier version of the first document")
+        expected = [single.add_document(*document) for document in documents]
+
+        for processes in (None, 2):
+            batched = SearchEngine()
+            batched.add_document("doc1", "an earlier version of the first document")
+            self.assertEqual(batched.add_documents(documents, processes=processes), expected)
+            self.assertEqual(batched.export_index(), single.export_index())
+            self.assertEqual(batched.total_length, single.total_length)
+            for query, exact in [("machine learning", False), ("learning science", False),
+                                 ("machine learning", True), ("spectral", False)]:
+                self.assertEqual(batched.search(query, exact_phrase=exact),
+                                 single.search(query, exact_phrase=exact))
+            self.assertEqual(batched.search("learning", filters={"year": 2022}),
+                             single.search("learning", filters={"year": 2022}))
+            self.assertEqual(batched.snippets("doc3", "spectral"), single.snippets("doc3", "spectral"))
+
+    def test_add_document_stream(self):
+        """Test that a document added in chunks is indexed like the whole text."""
+        from scitex_scholar.search_engine import SearchEngine
+
+        text = "Neural oscillations support memory consolidation. " * 50 + "Final remarks on sleep spindles"
+        chunks = [text[i:i + 37] for i in range(0, len(text), 37)]
+        whole = SearchEngine()
+        whole.add_document("doc1", text, {"title": "Thesis"})
+        streamed = SearchEngine()
+        self.assertTrue(streamed.add_document_stream("doc1", iter(chunks), {"title": "Thesis"}))
+
+        self.assertEqual(streamed.export_index(), whole.export_index())
+        self.assertEqual(streamed.search("sleep spindles", exact_phrase=True),
+                         whole.search("sleep spindles", exact_phrase=True))
+        self.assertEqual(streamed.snippets("doc1", "spindles"), whole.snippets("doc1", "spindles"))
+        self.assertEqual(streamed.documents["doc1"]['content'], text)
+        self.assertFalse(streamed.add_document_stream("doc2", iter([])))
+
+        latex = ["\\documentclass{article}\\begin{document}", "\\section{Spindles} $x$\\end{document}"]
+        self.assertTrue(streamed.add_document_stream("doc3", latex))
+        self.assertEqual(streamed.documents["doc3"]['document_type'], 'latex')
+
+    def test_scientific_tokens(self):
+        """Test that documents and queries share the engine's tokenizer."""
+        from scitex_scholar.search_engine import SearchEngine
+        from scitex_scholar.text_processor import TextProcessor
+
+        engine = SearchEngine(text_processor=TextProcessor(scientific_tokens=True))
+        engine.add_document("doc1", "Event-related α desynchronization in BRCA1 carriers")
+        engine.add_document("doc2", "event related potentials")
+
+        self.assertEqual([r['doc_id'] for r in engine.search("event-related")], ["doc1"])
+        self.assertEqual([r['doc_id'] for r in engine.search("brca1 α")], ["doc1"])
+        fragment = engine.snippets("doc1", "α")[0]
+        start, end = fragment['matches'][0]
+        self.assertEqual(fragment['text'][start:end], "α")
+
+    def test_export_import_index(self):
+        """Test that the exported index restores identical search results."""
+        import json
+        from scitex_scholar.search_engine import SearchEngine
+
+        engine = SearchEngine()
+        engine.add_document("doc1", "machine learning machine learning algorithms")
+        engine.add_document("doc2", "machine learning in science")
+        engine.add_document("doc2", "deep learning in science")
+
+        state = json.loads(json.dumps(engine.export_index()))
+        restored = SearchEngine()
+        restored.documents = engine.documents
+        restored.import_index(state)
+
+        for query, exact in [("machine learning", False), ("learning science", False),
+                             ("machine learning", True)]:
+            self.assertEqual(restored.search(query, exact_phrase=exact),
+                             engine.search(query, exact_phrase=exact))
+
     def test_empty_search(self):
         """Test handling of empty search queries."""
         from scitex_scholar.search_engine import SearchEngine
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-17 10:00:00 (ywatanabe)"
+# File: tests/test_segment_store.py
+
+"""
+Test module for log-structured segment storage.
+
+This module tests incremental commits, delete bitmaps, the tiered merge
+policy and merging segments.
+"""
+
+import unittest
+import tempfile
+import shutil
+import sys
+from pathlib import Path
+sys.path.insert(0, './src')
+
+
+BATCHES = [
+    [("doc1", "Phase amplitude coupling in the human hippocampus"),
+     ("doc2", "Deep learning for seizure detection from EEG")],
+    [("doc3", "Seizure prediction with phase amplitude coupling features"),
+     ("doc1", "Hippocampal sharp wave ripples during sleep")],
+    [("doc4", "Spike sorting with deep learning on Neuropixels probes")],
+    [("doc5", "Sleep spindles and memory consolidation"),
+     ("doc2", "Transformers for sleep staging")],
+]
+
+# Live versions of the documents, in the order they were last added
+FINAL = [BATCHES[1][0], BATCHES[1][1], BATCHES[2][0], BATCHES[3][0], BATCHES[3][1]]
+
+QUERIES = [
+    ("phase amplitude coupling", False),
+    ("deep learning seizure", False),
+    ("sleep", False),
+    ("sharp wave ripples", True),
+]
+
+
+class TestSegmentStore(unittest.TestCase):
+    """Test suite for SegmentStore and TieredMergePolicy."""
+
+    def setUp(self):
+        """Create a temporary directory."""
+        self.temp_dir = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        shutil.rmtree(self.temp_dir)
+
+    def _expected(self, batches):
+        from scitex_scholar.search_engine import SearchEngine
+
+        engine = SearchEngine()
+        for batch in batches:
+            for doc_id, content in batch:
+                engine.add_document(doc_id, content)
+        return engine
+
+    def _assert_same_results(self, engine, expected):
+        for query, exact in QUERIES:
+            self.assertEqual(
+                [(r['doc_id'], round(r['score'], 9)) for r in engine.search(query, exact_phrase=exact)],
+                [(r['doc_id'], round(r['score'], 9)) for r in expected.search(query, exact_phrase=exact)],
+            )
+
+    def test_tiered_merge_policy(self):
+        """Test that runs of same-tier segments are selected, newest first."""
+        from scitex_scholar.segment_store import TieredMergePolicy
+
+        policy = TieredMergePolicy(merge_factor=3, floor_segment_docs=10)
+        self.assertEqual(policy.tier(5), 0)
+        self.assertEqual(policy.tier(30), 1)
+        self.assertEqual(policy.tier(95), 2)
+
+        self.assertIsNone(policy.find_merge([100, 5, 5]))
+        self.assertEqual(policy.find_merge([100, 5, 5, 5]), (1, 4))
+        self.assertEqual(policy.find_merge([40, 35, 50, 5]), (0, 3))
+        with self.assertRaises(ValueError):
+            TieredMergePolicy(merge_factor=1)
+
+    def test_incremental_commits(self):
+        """Test that commits write only new documents and record deletions."""
+        from scitex_scholar.search_engine import SearchEngine
+        from scitex_scholar.segment_store import SegmentStore, TieredMergePolicy
+
+        store = SegmentStore(self.temp_dir / "index", TieredMergePolicy(merge_factor=10))
+        engine = SearchEngine()
+        for i, batch in enumerate(BATCHES):
+            for doc_id, content in batch:
+                engine.add_document(doc_id, content)
+            store.commit(engine, {"batch": i})
+            if i == 1:
+                # Only the new documents were written; doc1 is deleted in the first segment
+                self.assertEqual([s['doc_count'] for s in store.segments], [2, 2])
+                self.assertEqual([s['live_count'] for s in store.segments], [1, 2])
+                self.assertIsNotNone(store.segments[0]['deletes'])
+
+        # The first segment was fully superseded and dropped
+        self.assertEqual([s['doc_count'] for s in store.segments], [2, 1, 2])
+        self.assertEqual([s['live_count'] for s in store.segments], [2, 1, 2])
+        self.assertEqual(len(engine.documents), 5)
+        self._assert_same_results(engine, self._expected([FINAL]))
+
+        reopened_store = SegmentStore(self.temp_dir / "index")
+        self.assertEqual(reopened_store.user_data, {"batch": 3})
+        reopened = SearchEngine()
+        reopened_store.open(reopened)
+        self.assertEqual(sorted(reopened.documents), ["doc1", "doc2", "doc3", "doc4", "doc5"])
+        self.assertIn("staging", reopened.documents["doc2"]["content"])
+        self._assert_same_results(reopened, self._expected([FINAL]))
+
+    def test_merge_segments(self):
+        """Test that merging compacts segments without changing results."""
+        from scitex_scholar.search_engine import SearchEngine
+        from scitex_scholar.segment_store import SegmentStore, TieredMergePolicy
+
+        store = SegmentStore(self.temp_dir / "index", TieredMergePolicy(merge_factor=2, floor_segment_docs=100))
+        engine = SearchEngine()
+        for batch in BATCHES:
+            for doc_id, content in batch:
+                engine.add_document(doc_id, content)
+            store.commit(engine)
+            selected = store.find_merge()
+            while selected is not None:
+                merged = store.merge(*selected)
+                self.assertTrue(store.apply_merge(engine, *selected, merged))
+                selected = store.find_merge()
+
+        self.assertEqual(len(store.segments), 1)
+        self.assertEqual(store.segments[0]['doc_count'], 5)
+        self.assertEqual(len(list((self.temp_dir / "index").glob("segment-*"))), 1)
+        # Merging dropped the superseded versions entirely
+        self.assertEqual(engine.segments.deleted, set())
+        self._assert_same_results(engine, self._expected([FINAL]))
+
+    def test_deletes_are_expunged(self):
+        """Test that removed documents are recorded and then compacted away."""
+        from scitex_scholar.search_engine import SearchEngine
+        from scitex_scholar.segment_store import SegmentStore, TieredMergePolicy
+
+        policy = TieredMergePolicy(merge_factor=10, max_deleted_ratio=0.3)
+        self.assertEqual(policy.find_expunge([10, 10], [9, 6]), (1, 2))
+        self.assertIsNone(policy.find_expunge([10, 10], [9, 8]))
+
+        store = SegmentStore(self.temp_dir / "index", policy)
+        engine = SearchEngine()
+        for doc_id, content in FINAL:
+            engine.add_document(doc_id, content)
+        store.commit(engine)
+
+        self.assertTrue(engine.remove_document("doc3"))
+        self.assertTrue(engine.remove_document("doc4"))
+        store.commit(engine)
+        self.assertEqual(store.segments[0]['live_count'], 3)
+        self.assertEqual(engine.segments.deleted, {0, 2})
+        self.assertEqual([r['doc_id'] for r in engine.search("seizure")], [])
+
+        selected = store.find_merge()
+        self.assertEqual(selected, (0, 1))
+        self.assertTrue(store.apply_merge(engine, *selected, store.merge(*selected)))
+        self.assertEqual(store.segments[0]['doc_count'], 3)
+        self.assertEqual(sorted(engine.documents), ["doc1", "doc2", "doc5"])
+        self.assertIsNone(store.find_merge())
+
+    def test_merge_abandoned_after_changes(self):
+        """Test that a merge is not installed if documents changed meanwhile."""
+        from scitex_scholar.search_engine import SearchEngine
+        from scitex_scholar.segment_store import SegmentStore, TieredMergePolicy
+
+        store = SegmentStore(self.temp_dir / "index", TieredMergePolicy(merge_factor=2, floor_segment_docs=100))
+        engine = SearchEngine()
+        for batch in BATCHES[:2]:
+            for doc_id, content in batch:
+                engine.add_document(doc_id, content)
+            store.commit(engine)
+
+        selected = store.find_merge()
+        merged = store.merge(*selected)
+        engine.add_document("doc4", "Spike sorting")
+        self.assertFalse(store.apply_merge(engine, *selected, merged))
+        self.assertFalse((self.temp_dir / "index" / merged['name']).exists())
+        self.assertEqual(len(store.segments), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+# EOF
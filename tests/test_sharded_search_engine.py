@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-17 10:00:00 (ywatanabe)"
+# File: tests/test_sharded_search_engine.py
+
+"""
+Test module for ShardedSearchEngine.
+
+This module tests that searches scattered across shard processes rank
+documents like a single SearchEngine, and the document lifecycle and
+persistence of shards.
+"""
+
+import unittest
+import sys
+import tempfile
+from pathlib import Path
+sys.path.insert(0, './src')
+
+DOCUMENTS = [
+    ("doc1", "phase amplitude coupling in hippocampal theta oscillations", {'year': 2018}),
+    ("doc2", "deep learning for seizure detection from electroencephalography", {'year': 2020}),
+    ("doc3", "theta gamma coupling during memory encoding", {'year': 2021}),
+    ("doc4", "spike sorting with deep neural networks", {'year': 2019}),
+    ("doc5", "coupling of neural oscillations across cortical areas", {'year': 2022}),
+    ("doc6", "a review of seizure prediction methods", {'year': 2017}),
+]
+
+
+class TestShardedSearchEngine(unittest.TestCase):
+    """Test suite for ShardedSearchEngine."""
+
+    def test_matches_single_engine(self):
+        """Test that global IDF makes sharded scores equal to single-engine scores."""
+        from scitex_scholar.search_engine import SearchEngine
+        from scitex_scholar.sharded_search_engine import ShardedSearchEngine
+
+        single = SearchEngine()
+        for doc_id, content, metadata in DOCUMENTS:
+            single.add_document(doc_id, content, metadata)
+
+        with ShardedSearchEngine(num_shards=3) as sharded:
+            self.assertEqual(sharded.add_documents(DOCUMENTS), [True] * len(DOCUMENTS))
+            self.assertEqual(len(sharded.documents), len(DOCUMENTS))
+            self.assertEqual(sorted(sharded.documents), [doc_id for doc_id, _, _ in DOCUMENTS])
+
+            for query, options in [("coupling", {}), ("theta coupling", {'top_k': 2}),
+                                   ("seizure AND NOT prediction", {}),
+                                   ("coupling", {'filters': {'year': {'$gte': 2020}}}),
+                                   ("neural oscillations", {'exact_phrase': True})]:
+                # Documents with equal scores may come from different shards in any order
+                expected = [(-round(r['score'], 9), r['doc_id']) for r in single.search(query, **options)]
+                results = [(-round(r['score'], 9), r['doc_id']) for r in sharded.search(query, **options)]
+                self.assertEqual(sorted(results), sorted(expected))
+                self.assertEqual([score for score, _ in results], [score for score, _ in expected])
+
+    def test_term_missing_from_one_shard(self):
+        """Test that terms are only corrected when missing from every shard."""
+        from scitex_scholar.search_engine import SearchEngine
+        from scitex_scholar.sharded_search_engine import ShardedSearchEngine
+
+        # With two shards, doc1 and doc2 land on one shard and doc4 on the other
+        documents = [
+            ("doc1", "thalamic spindle oscillation during sleep", None),
+            ("doc2", "memory consolidation during sleep", None),
+            ("doc4", "spindle oscillations in sleep", None),
+        ]
+        single = SearchEngine()
+        single.add_documents(documents)
+
+        with ShardedSearchEngine(num_shards=2) as sharded:
+            sharded.add_documents(documents)
+            self.assertNotEqual(sharded.shard_of("doc1"), sharded.shard_of("doc4"))
+
+            for query in ("oscillation", "oscilation", "spindle AND oscillation"):
+                expected = [(r['doc_id'], round(r['score'], 9)) for r in single.search(query)]
+                results = [(r['doc_id'], round(r['score'], 9)) for r in sharded.search(query)]
+                self.assertEqual(results, expected)
+                self.assertEqual([doc_id for doc_id, _ in results], ["doc1"])
+
+    def test_update_remove_and_persistence(self):
+        """Test document changes and saving and loading shards."""
+        from scitex_scholar.sharded_search_engine import ShardedSearchEngine
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with ShardedSearchEngine(num_shards=2) as sharded:
+                sharded.add_documents(DOCUMENTS)
+                self.assertTrue(sharded.remove_document("doc6"))
+                self.assertFalse(sharded.remove_document("doc6"))
+                sharded.update_document("doc4", "seizure onset zones", {'year': 2023})
+                self.assertEqual(sharded.documents["doc4"]['content'], "seizure onset zones")
+                self.assertNotIn("doc6", sharded.documents)
+                sharded.save(Path(temp_dir), {'indexed_files': ['doc1']})
+
+            with ShardedSearchEngine(num_shards=2) as reopened:
+                self.assertEqual(reopened.load(Path(temp_dir)), {'indexed_files': ['doc1']})
+                self.assertEqual(sorted(r['doc_id'] for r in reopened.search("seizure")), ["doc2", "doc4"])
+                self.assertEqual(reopened.get_statistics()['total_documents'], 5)
+
+            with ShardedSearchEngine(num_shards=3) as mismatched:
+                with self.assertRaises(ValueError):
+                    mismatched.load(Path(temp_dir))
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+# EOF
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-17 10:00:00 (ywatanabe)"
+# File: tests/test_snippets.py
+
+"""
+Test module for snippet generation.
+
+This module tests window selection over term hits and the fragments
+SearchEngine builds from recorded word offsets.
+"""
+
+import unittest
+import sys
+import tempfile
+from pathlib import Path
+sys.path.insert(0, './src')
+
+
+class TestSnippets(unittest.TestCase):
+    """Test suite for snippets and highlighted fragments."""
+
+    def test_densest_windows(self):
+        """Test that windows with more distinct terms and hits are selected first."""
+        from scitex_scholar.snippets import densest_windows
+
+        hits = [(0, 0), (50, 0), (52, 1), (53, 0), (100, 1)]
+        self.assertEqual(densest_windows(hits, 10, 2), [[(50, 0), (52, 1), (53, 0)], [(0, 0)]])
+        self.assertEqual(densest_windows([], 10, 2), [])
+
+    def test_engine_snippets(self):
+        """Test fragments and match spans built from indexed offsets."""
+        from scitex_scholar.search_engine import SearchEngine
+        from scitex_scholar.snippets import fragments_for_terms, highlight
+
+        filler = " ".join(["background"] * 40)
+        content = (f"Sleep   spindles are studied here. {filler} "
+                   f"Phase-amplitude Coupling between theta and gamma coupling. {filler}")
+        engine = SearchEngine()
+        engine.add_document("doc1", content)
+
+        fragments = engine.snippets("doc1", "coupling theta", max_fragments=2, fragment_words=8)
+        self.assertEqual(len(fragments), 1)
+        fragment = fragments[0]
+        self.assertEqual(content[fragment['start']:fragment['end']], fragment['text'])
+        self.assertEqual([fragment['text'][s:e] for s, e in fragment['matches']],
+                         ["Coupling", "theta", "coupling"])
+        self.assertIn("**Coupling** between **theta**", highlight(fragment))
+
+        self.assertEqual(engine.snippets("doc1", "absent"), [])
+        self.assertEqual(engine.snippets("missing", "coupling"), [])
+        self.assertEqual(fragments_for_terms(content, ["spindles"], fragment_words=3)[0]['text'],
+                         "Sleep   spindles are")
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            engine.save_segment(Path(temp_dir) / "segment")
+            reopened = SearchEngine()
+            reopened.open_segment(Path(temp_dir) / "segment")
+            self.assertEqual(reopened.snippets("doc1", "coupling theta", 2, 8), fragments)
+
+        # Documents stored without offsets are tokenized on demand
+        legacy = SearchEngine()
+        legacy.documents = {"doc1": {'content': content, 'processed': {}, 'metadata': {}}}
+        legacy.rebuild_index()
+        legacy.documents["doc1"].offsets = None
+        self.assertEqual(legacy.snippets("doc1", "coupling theta", 2, 8), fragments)
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+# EOF
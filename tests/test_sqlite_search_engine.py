@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-17 10:00:00 (ywatanabe)"
+# File: tests/test_sqlite_search_engine.py
+
+"""
+Test module for the SQLite search backend.
+
+This module tests FTS5 keyword and phrase search, metadata filters,
+in-place updates and persistence across connections.
+"""
+
+import unittest
+import sys
+import tempfile
+import threading
+from pathlib import Path
+sys.path.insert(0, './src')
+
+
+class TestSQLiteSearchEngine(unittest.TestCase):
+    """Test suite for SQLiteSearchEngine."""
+
+    def test_keyword_search(self):
+        """Test bm25-ranked keyword search."""
+        from scitex_scholar.sqlite_search_engine import SQLiteSearchEngine
+
+        engine = SQLiteSearchEngine()
+        engine.add_document("doc1", "oscillation oscillation oscillation in cortex")
+        engine.add_document("doc2", "oscillation in hippocampus and cortex")
+        engine.add_document("doc3", "cortex cortex cortex anatomy")
+
+        results = engine.search("oscillation")
+        self.assertEqual([r['doc_id'] for r in results], ["doc1", "doc2"])
+        self.assertGreater(results[0]['score'], results[1]['score'])
+        self.assertEqual(set(results[0]), {'doc_id', 'content', 'score', 'metadata'})
+
+        self.assertEqual(len(engine.search("cortex", top_k=2)), 2)
+        self.assertEqual(engine.search(""), [])
+
+    def test_phrase_search_and_filters(self):
+        """Test exact phrases and metadata filters."""
+        from scitex_scholar.sqlite_search_engine import SQLiteSearchEngine
+
+        engine = SQLiteSearchEngine()
+        engine.add_document("doc1", "machine learning paper", metadata={"type": "paper"})
+        engine.add_document("doc2", "learning machine book", metadata={"type": "book"})
+
+        results = engine.search("machine learning", exact_phrase=True)
+        self.assertEqual([r['doc_id'] for r in results], ["doc1"])
+
+        results = engine.search("machine", filters={"type": "book"})
+        self.assertEqual([r['doc_id'] for r in results], ["doc2"])
+        self.assertEqual(engine.search("machine", filters={"type": ["book"]}), [])
+
+    def test_field_weights(self):
+        """Test that title terms are boosted over body terms."""
+        from scitex_scholar.sqlite_search_engine import SQLiteSearchEngine
+
+        engine = SQLiteSearchEngine()
+        engine.add_document("doc1", "study of spindles during sleep",
+                            metadata={"title": "Sleep spindles"})
+        engine.add_document("doc2", "study of spindles during sleep",
+                            metadata={"title": "Memory consolidation"})
+
+        results = engine.search("spindles")
+        self.assertEqual(results[0]['doc_id'], "doc1")
+
+    def test_readding_document_replaces_it(self):
+        """Test that re-adding, updating and removing documents update the FTS index."""
+        from scitex_scholar.sqlite_search_engine import SQLiteSearchEngine
+
+        engine = SQLiteSearchEngine()
+        engine.add_document("doc1", "seizure detection")
+        engine.add_document("doc1", "spike sorting")
+
+        self.assertEqual(engine.search("seizure"), [])
+        self.assertEqual([r['doc_id'] for r in engine.search("spike")], ["doc1"])
+        self.assertEqual(len(engine.documents), 1)
+
+        self.assertTrue(engine.update_document("doc1", "sleep staging"))
+        self.assertEqual(engine.search("spike"), [])
+        self.assertTrue(engine.remove_document("doc1"))
+        self.assertFalse(engine.remove_document("doc1"))
+        self.assertEqual(engine.search("sleep"), [])
+
+    def test_add_documents(self):
+        """Test adding a batch of documents in one transaction."""
+        from scitex_scholar.sqlite_search_engine import SQLiteSearchEngine
+
+        engine = SQLiteSearchEngine()
+        engine.add_document("doc1", "seizure detection")
+        results = engine.add_documents([
+            ("doc1", "spike sorting", None),
+            ("doc2", "spike detection", {"type": "paper"}),
+            ("doc3", "", None),
+        ])
+
+        self.assertEqual(results, [True, True, False])
+        self.assertEqual(engine.search("seizure"), [])
+        self.assertEqual(sorted(r['doc_id'] for r in engine.search("spike")), ["doc1", "doc2"])
+        self.assertEqual(engine.documents["doc2"]['metadata'], {"type": "paper"})
+        self.assertEqual(len(engine.documents), 2)
+
+    def test_persistence_and_concurrent_reads(self):
+        """Test that committed documents are visible to other connections."""
+        from scitex_scholar.sqlite_search_engine import SQLiteSearchEngine
+
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = Path(tmp) / 'index.db'
+            engine = SQLiteSearchEngine(db_path)
+            engine.add_document("doc1", "gamma oscillation", metadata={"year": 2020})
+            engine.set_setting('indexer', {'indexed_files': ['a.pdf']})
+
+            counts = []
+            reader = threading.Thread(target=lambda: counts.append(len(engine.search("gamma"))))
+            reader.start()
+            reader.join()
+            self.assertEqual(counts, [1])
+
+            engine.close()
+            reopened = SQLiteSearchEngine(db_path)
+            self.assertIn("doc1", reopened.documents)
+            self.assertEqual(reopened.documents["doc1"]['metadata'], {"year": 2020})
+            self.assertEqual(reopened.get_setting('indexer'), {'indexed_files': ['a.pdf']})
+            self.assertEqual(reopened.search("gamma", filters={"year": 2020})[0]['doc_id'], "doc1")
+            reopened.close()
+
+    def test_stored_fields_are_compressed(self):
+        """Test that the raw text is stored compressed and the cleaned text only for LaTeX."""
+        from scitex_scholar.sqlite_search_engine import SQLiteSearchEngine
+
+        engine = SQLiteSearchEngine()
+        engine.add_document("doc1", "Sleep spindles support memory consolidation.")
+        engine.add_document("doc2", r"\section{Spindles} Thalamic \textbf{spindles} \cite{ref}")
+
+        processed = engine.documents["doc1"]['processed']
+        self.assertNotIn('cleaned_text', processed)
+        self.assertIn('keywords', processed)
+        self.assertEqual(str(engine.documents["doc1"]['content']), "Sleep spindles support memory consolidation.")
+        rows = engine._query('SELECT doc_id, typeof(body), typeof(content) FROM documents ORDER BY id')
+        self.assertEqual(rows, [("doc1", 'null', 'blob'), ("doc2", 'blob', 'blob')])
+        self.assertEqual(sorted(r['doc_id'] for r in engine.search("spindles")), ["doc1", "doc2"])
+        self.assertEqual(engine.search("textbf"), [])
+
+        engine.add_document("doc2", "Memory replay")
+        self.assertTrue(engine.remove_document("doc1"))
+        self.assertEqual(engine.search("spindles"), [])
+        self.assertEqual(engine.search("memory")[0]['content'], "Memory replay")
+
+    def test_query_language(self):
+        """Test that query language syntax is translated to FTS5."""
+        from scitex_scholar.sqlite_search_engine import SQLiteSearchEngine
+
+        engine = SQLiteSearchEngine()
+        engine.add_document("doc1", "sleep spindles and memory",
+                            metadata={"title": "Sleep", "authors": ["Smith"], "year": 2020})
+        engine.add_document("doc2", "sleep staging with neural networks",
+                            metadata={"title": "Staging", "authors": ["Doe"], "year": 2018})
+
+        def search(query):
+            return sorted(r['doc_id'] for r in engine.search(query))
+
+        self.assertEqual(search("sleep AND NOT spindles"), ["doc2"])
+        self.assertEqual(search("-spindles sleep"), ["doc2"])
+        self.assertEqual(search("+memory sleep"), ["doc1"])
+        self.assertEqual(search("title:sleep"), ["doc1"])
+        self.assertEqual(search("spind*"), ["doc1"])
+        self.assertEqual(search("spindles~"), ["doc1"])
+        self.assertEqual(search('"sleep spindles"'), ["doc1"])
+        self.assertEqual(search('"spindles sleep"'), [])
+        self.assertEqual(search("memory OR staging"), ["doc1", "doc2"])
+        self.assertEqual(search("sleep and spindles"), ["doc1", "doc2"])
+        self.assertEqual(search("author:smith"), ["doc1"])
+        self.assertEqual(search("sleep -author:smith"), ["doc2"])
+        self.assertEqual(search("sleep year:2015..2019"), ["doc2"])
+        # Queries FTS5 cannot express match any of their keywords
+        self.assertEqual(search("memory OR (staging -author:doe)"), ["doc1", "doc2"])
+        self.assertEqual(search("NOT memory"), [])
+
+    def test_shared_memory_connection_reads_from_threads(self):
+        """Test concurrent reads and writes on a ':memory:' database."""
+        from scitex_scholar.sqlite_search_engine import SQLiteSearchEngine
+
+        engine = SQLiteSearchEngine()
+        errors = []
+
+        def write(start):
+            try:
+                for i in range(start, start + 50):
+                    engine.add_document(f"doc{i}", f"gamma oscillation {i}")
+            except Exception as e:
+                errors.append(e)
+
+        def read():
+            try:
+                for _ in range(50):
+                    engine.search("gamma")
+                    len(engine.documents)
+                    list(engine.documents)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=write, args=(0,)), threading.Thread(target=write, args=(50,)),
+                   threading.Thread(target=read), threading.Thread(target=read)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(engine.documents), 100)
+        self.assertEqual(len(engine.search("gamma")), 100)
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+# EOF
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-17 10:00:00 (ywatanabe)"
+# File: tests/test_stored_fields.py
+
+"""
+Test module for stored document fields.
+
+This module tests compressed document storage, lazy content handles in
+search results, and stored fields in segments and rebuilt indexes.
+"""
+
+import unittest
+import sys
+import tempfile
+from pathlib import Path
+sys.path.insert(0, './src')
+
+
+class TestStoredFields(unittest.TestCase):
+    """Test suite for StoredDocument and ContentHandle."""
+
+    def test_stored_document(self):
+        """Test that bulky text-derived fields are dropped and the text is kept compressed."""
+        from scitex_scholar.stored_fields import ContentHandle, StoredDocument
+
+        content = "Neural oscillations. " * 200
+        processed = {'cleaned_text': content.lower(), 'keywords': ['neural', 'oscillations'],
+                     'sections': {'abstract': 'Neural oscillations.'}, 'word_count': 400,
+                     'math_expressions': [{'type': 'inline', 'content': 'x'}]}
+        doc = StoredDocument.create(content, processed, {'year': 2020}, 'text')
+
+        self.assertEqual(doc.processed, {'keywords': ['neural', 'oscillations'],
+                                         'sections': {'abstract': 'Neural oscillations.'},
+                                         'word_count': 400})
+        self.assertLess(len(doc.compressed), len(content) // 10)
+        self.assertEqual(doc['content'], content)
+        self.assertEqual(dict(doc)['metadata'], {'year': 2020})
+        self.assertIs(StoredDocument.from_dict(doc), doc)
+        self.assertEqual(StoredDocument.from_dict(dict(doc)).compressed, doc.compressed)
+
+        handle = doc.content
+        self.assertIsInstance(handle, ContentHandle)
+        self.assertEqual(handle, content)
+        self.assertEqual(str(handle), content)
+        self.assertIn("oscillations", handle)
+
+    def test_search_results_and_segments(self):
+        """Test lazy result content, segment round trips and index rebuilds."""
+        from scitex_scholar.search_engine import SearchEngine
+        from scitex_scholar.stored_fields import ContentHandle
+
+        engine = SearchEngine()
+        engine.add_document("doc1", "phase amplitude coupling", {'title': 'Coupling'})
+        engine.add_document("doc2", "spike sorting")
+
+        result = engine.search("coupling")[0]
+        self.assertIsInstance(result['content'], ContentHandle)
+        self.assertEqual(str(result['content']), "phase amplitude coupling")
+        self.assertNotIn('cleaned_text', engine.documents["doc1"]['processed'])
+
+        # Sections are kept for consumers of the stored fields such as vector summaries
+        engine.add_document("doc4", "Abstract\nSleep spindles support memory.\n\nIntroduction\nSpindles.")
+        self.assertEqual(engine.documents["doc4"]['processed']['sections']['abstract'],
+                         "Sleep spindles support memory.")
+        self.assertIn('spindles', engine.documents["doc4"]['processed']['keywords'])
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            engine.save_segment(Path(temp_dir) / "segment")
+            reopened = SearchEngine()
+            reopened.open_segment(Path(temp_dir) / "segment")
+            self.assertEqual(reopened.documents["doc1"]['content'], "phase amplitude coupling")
+            self.assertEqual(reopened.search("coupling"), engine.search("coupling"))
+
+        # Documents stored as plain dictionaries by earlier versions are converted
+        rebuilt = SearchEngine()
+        rebuilt.documents = {"doc3": {'content': "sleep spindles", 'processed': {},
+                                      'metadata': {}, 'document_type': 'text'}}
+        rebuilt.rebuild_index()
+        self.assertEqual(str(rebuilt.search("spindles")[0]['content']), "sleep spindles")
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+# EOF
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-17 10:00:00 (ywatanabe)"
+# File: tests/test_term_dictionary.py
+
+"""
+Test module for term expansion.
+
+This module tests prefix, wildcard and fuzzy lookups in the term
+dictionary and the expanded searches of the search engine.
+"""
+
+import unittest
+import sys
+sys.path.insert(0, './src')
+
+
+class TestTermDictionary(unittest.TestCase):
+    """Test suite for TermDictionary and term expansion."""
+
+    def test_prefix_and_wildcard(self):
+        """Test prefix ranges and wildcard patterns, including terms added later."""
+        from scitex_scholar.term_dictionary import TermDictionary
+
+        dictionary = TermDictionary(["neurology", "neuron", "electroencephalography", "phase"])
+        dictionary.add("electroencephalogram")
+        dictionary.add("neuron")
+
+        self.assertEqual(len(dictionary), 5)
+        self.assertEqual(dictionary.prefix("electroenceph"),
+                         ["electroencephalogram", "electroencephalography"])
+        self.assertEqual(dictionary.prefix("neuro", limit=1), ["neurology"])
+        self.assertEqual(dictionary.wildcard("neuro*gy"), ["neurology"])
+        self.assertEqual(dictionary.wildcard("*ology"), ["neurology"])
+        self.assertEqual(dictionary.wildcard("ph?se"), ["phase"])
+        self.assertEqual(dictionary.wildcard("*"), sorted(["neurology", "neuron", "phase",
+                                                            "electroencephalography",
+                                                            "electroencephalogram"]))
+        self.assertEqual(dictionary.wildcard("absent*"), [])
+
+    def test_fuzzy(self):
+        """Test bounded edit distances and fuzzy lookups."""
+        from scitex_scholar.term_dictionary import TermDictionary, bounded_edit_distance
+
+        self.assertEqual(bounded_edit_distance("oscilation", "oscillation", 2), 1)
+        self.assertEqual(bounded_edit_distance("kitten", "sitting", 3), 3)
+        self.assertIsNone(bounded_edit_distance("kitten", "sitting", 2))
+        self.assertIsNone(bounded_edit_distance("a", "abcd", 2))
+
+        dictionary = TermDictionary(["oscillation", "oscillations", "oscillator", "coupling"])
+        self.assertEqual(dictionary.fuzzy("oscilation", 1), [("oscillation", 1)])
+        self.assertEqual(dictionary.fuzzy("oscilation", 2), [("oscillation", 1), ("oscillations", 2)])
+        self.assertEqual(dictionary.fuzzy("oscillation", 1, limit=1), [("oscillation", 0)])
+        self.assertEqual(dictionary.fuzzy("cup", 1), [])
+
+    def test_expanded_search(self):
+        """Test wildcard, fuzzy and misspelled queries in the search engine."""
+        from scitex_scholar.search_engine import SearchEngine
+
+        engine = SearchEngine()
+        engine.add_document("doc1", "electroencephalography of sleep oscillations")
+        engine.add_document("doc2", "electroencephalogram artifacts")
+        engine.add_document("doc3", "neural oscillation and phase coupling")
+
+        def ids(query):
+            return sorted(result['doc_id'] for result in engine.search(query))
+
+        self.assertEqual(ids("electroenceph*"), ["doc1", "doc2"])
+        self.assertEqual(ids("oscilation"), ["doc3"])
+        self.assertEqual(ids("oscilation~2"), ["doc1", "doc3"])
+        self.assertEqual(ids("electroenceph* AND sleep"), ["doc1"])
+        self.assertEqual(ids("+oscilation +coupling"), ["doc3"])
+
+        # Terms added after the dictionary was built are expanded too
+        engine.add_document("doc4", "electroencephalographic monitoring")
+        self.assertEqual(ids("electroenceph*"), ["doc1", "doc2", "doc4"])
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+# EOF
@@ -85,6 +85,111 @@ class TestTextProcessor(unittest.TestCase):
         self.assertTrue(any("machine" in kw.lower() for kw in keywords))
         self.assertTrue(any("learning" in kw.lower() for kw in keywords))
 
+    def test_tokenize(self):
+        """Test that one tokenizer pass returns positions, frequencies and counts."""
+        from scitex_scholar.text_processor import TextProcessor
+        
+        processor = TextProcessor()
+        text = "Neural  decoding of neural spikes in a cortex"
+        tokens = processor.tokenize(text)
+        
+        self.assertEqual(tokens.positions, {'neural': [0, 3], 'decoding': [1], 'spikes': [4], 'cortex': [7]})
+        self.assertEqual(tokens.frequencies, {'neural': 2, 'decoding': 1, 'spikes': 1, 'cortex': 1})
+        self.assertEqual(tokens.word_count, 8)
+        self.assertEqual(tokens.char_count, len(text))
+        self.assertEqual([text[offset:offset + 6] for offset in tokens.offsets[:2]], ['Neural', 'decodi'])
+        self.assertEqual(processor.keyword_frequencies(text), tokens.frequencies)
+        self.assertEqual(processor.extract_keywords(text), ['neural', 'decoding', 'spikes', 'cortex'])
+        
+        processed = processor.process_document(text)
+        self.assertEqual(processed['word_count'], 8)
+        self.assertEqual(processor.process_document("Recorded in 12 sessions")['word_count'], 4)
+        self.assertEqual(processed['char_count'], len(text) - 1)
+
+    def test_tokenize_stream(self):
+        """Test that streaming chunks tokenizes like the joined text."""
+        from scitex_scholar.text_processor import TextProcessor
+        
+        text = "Event-related potentials of the cortex, recorded in 12 sessions\nwith α-band analysis"
+        for processor in (TextProcessor(), TextProcessor(scientific_tokens=True)):
+            expected = processor.tokenize(text)
+            for size in (1, 3, 7, len(text)):
+                chunks = [text[i:i + size] for i in range(0, len(text), size)]
+                tokens = processor.tokenize_stream(iter(chunks))
+                self.assertEqual({term: list(positions) for term, positions in tokens.positions.items()},
+                                 expected.positions)
+                self.assertEqual(tokens.offsets, expected.offsets)
+                self.assertEqual((tokens.word_count, tokens.char_count, tokens.split_count),
+                                 (expected.word_count, expected.char_count, len(text.split())))
+        
+        stream = TextProcessor().token_stream(["cortical oscil", "lations and cortical"])
+        tokens = iter(stream)
+        self.assertEqual(next(tokens), (0, 0, 'cortical'))
+        self.assertEqual(stream.char_count, 14)
+        self.assertEqual(list(tokens), [(1, 9, 'oscillations'), (3, 26, 'cortical')])
+        self.assertEqual(stream.frequencies, {'cortical': 2, 'oscillations': 1})
+
+    def test_scientific_tokens(self):
+        """Test the Unicode scientific token rule."""
+        from scitex_scholar.text_processor import TextProcessor
+        
+        processor = TextProcessor(scientific_tokens=True)
+        tokens = processor.tokenize("Event-related α and β-band power of BRCA1, IL-6 and p53 in 3-5 trials")
+        
+        self.assertEqual(list(tokens.positions),
+                         ['event-related', 'α', 'β-band', 'power', 'brca1', 'il-6', 'p53', 'trials'])
+        self.assertEqual(tokens.word_count, 12)
+        self.assertEqual(TextProcessor().extract_keywords("Event-related"), ['event', 'related'])
+
+    def test_process_many(self):
+        """Test that worker processes return the results of process_document."""
+        from scitex_scholar.text_processor import TextProcessor
+        
+        processor = TextProcessor()
+        documents = [
+            "\\documentclass{article}\\begin{document}\\section{Methods} EEG $\\alpha$ power\\end{document}"
+            if i % 3 == 0 else f"Plain research text number {i}"
+            for i in range(20)
+        ]
+        expected = [
+            (i, processor.detect_document_type(document),
+             processor.process_latex_document(document) if i % 3 == 0 else processor.process_document(document))
+            for i, document in enumerate(documents)
+        ]
+        
+        self.assertEqual(list(processor.process_many(iter(documents), workers=2, chunksize=3)), expected)
+        unordered = list(processor.process_many(documents, workers=2, chunksize=3, ordered=False))
+        self.assertEqual(sorted(unordered, key=lambda result: result[0]), expected)
+        self.assertEqual(list(processor.process_many(documents, workers=1)), expected)
+
+    def test_detect_document_type(self):
+        """Test single-pass type detection over a document prefix."""
+        from scitex_scholar.text_processor import TextProcessor
+        
+        processor = TextProcessor()
+        self.assertEqual(processor.detect_document_type("\\section{Intro} see $x$"), 'latex')
+        self.assertEqual(processor.detect_document_type("$a + \\cite{b}$"), 'latex')
+        self.assertEqual(processor.detect_document_type("One $5 study\nand \\section{x}"), 'scientific')
+        self.assertEqual(processor.detect_document_type("Our RESULTS show"), 'scientific')
+        self.assertEqual(processor.detect_document_type("Shopping list"), 'plain_text')
+        
+        late_markers = "words " * 20000 + "\\documentclass{article} \\begin{document}"
+        self.assertEqual(processor.detect_document_type(late_markers), 'plain_text')
+        self.assertEqual(processor.detect_document_type(late_markers, max_chars=None), 'latex')
+
+    def test_math_keywords(self):
+        """Test math keyword extraction with the combined pattern."""
+        from scitex_scholar.text_processor import TextProcessor
+        
+        processor = TextProcessor()
+        keywords = processor._extract_math_keywords([
+            {'content': '\\int_0^\\infty f(x) dx'},
+            {'content': '\\frac{dy}{dx} = \\sqrt{x} \\leq \\lim_{n} a_n'},
+            {'content': '\\begin{pmatrix} a \\end{pmatrix} < \\sum b'},
+        ])
+        self.assertEqual(keywords, ['integral', 'infinity', 'derivative', 'equation', 'square_root',
+                                    'limit', 'matrix', 'inequality', 'summation'])
+
     def test_process_scientific_document(self):
         """Test processing a complete scientific document."""
         from scitex_scholar.text_processor import TextProcessor